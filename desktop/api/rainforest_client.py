@@ -5,91 +5,91 @@ Handles ASIN lookups with caching to minimize API costs.
 """
 
 import requests
-import json
-import sqlite3
+import threading
 import time
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-class ASINCache:
-    """SQLite cache for ASIN lookups (30-day TTL)."""
-    
-    def __init__(self, db_path: str = 'data/asin_cache.db'):
-        self.db_path = db_path
-        self.conn = None
-        self._init_db()
-    
-    def _init_db(self):
-        """Initialize database and tables."""
-        import os
-        os.makedirs(os.path.dirname(self.db_path) if os.path.dirname(self.db_path) else '.', exist_ok=True)
-        
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS asin_lookups (
-                asin TEXT,
-                marketplace TEXT,
-                data TEXT,
-                lookup_date TIMESTAMP,
-                PRIMARY KEY (asin, marketplace)
-            )
-        ''')
-        self.conn.commit()
-    
-    def get(self, asin: str, marketplace: str = 'AE') -> Optional[Dict]:
-        """Get cached lookup (valid for 30 days)."""
-        cutoff = datetime.now() - timedelta(days=30)
-        
-        cursor = self.conn.execute('''
-            SELECT data FROM asin_lookups
-            WHERE asin = ? AND marketplace = ?
-            AND lookup_date > ?
-        ''', (asin.upper(), marketplace, cutoff))
-        
-        result = cursor.fetchone()
-        if result:
-            return json.loads(result[0])
-        return None
-    
-    def set(self, asin: str, marketplace: str, data: Dict):
-        """Cache lookup result."""
-        self.conn.execute('''
-            INSERT OR REPLACE INTO asin_lookups
-            (asin, marketplace, data, lookup_date)
-            VALUES (?, ?, ?, ?)
-        ''', (asin.upper(), marketplace, json.dumps(data), datetime.now()))
-        self.conn.commit()
-    
-    def close(self):
-        """Close database connection."""
-        if self.conn:
-            self.conn.close()
+from core.asin_cache import ASINCache
 
 class RateLimiter:
-    """Simple rate limiter for API calls."""
+    """
+    Token-bucket rate limiter for API calls, safe to share across worker threads.
+    
+    Tokens refill at requests_per_second up to burst; with the default burst of 1
+    calls are spaced by at least 1 / requests_per_second.
+    """
     
-    def __init__(self, requests_per_second: float = 2.0):
+    def __init__(self, requests_per_second: float = 2.0, burst: int = 1):
+        self.rate = requests_per_second
         self.min_interval = 1.0 / requests_per_second
-        self.last_request = 0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
     
     def wait(self):
-        """Wait if necessary to respect rate limit."""
-        now = time.time()
-        elapsed = now - self.last_request
-        
-        if elapsed < self.min_interval:
-            time.sleep(self.min_interval - elapsed)
-        
-        self.last_request = time.time()
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+class RateLimitedRetry(Retry):
+    """urllib3 Retry whose retries also take a token from the client's rate limiter."""
+    
+    def __init__(self, *args, rate_limiter: Optional[RateLimiter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = rate_limiter
+    
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.rate_limiter = self.rate_limiter
+        return retry
+    
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.rate_limiter:
+            self.rate_limiter.wait()
 
 class RainforestClient:
     """Client for Rainforest Amazon Product API."""
     
-    def __init__(self, api_key: str, cache_db: str = 'data/asin_cache.db'):
+    DEFAULT_BASE_URL = "https://api.rainforestapi.com/request"
+    
+    def __init__(self, api_key: str, cache_db: str = 'data/asin_cache.db', base_url: Optional[str] = None,
+                 requests_per_second: float = 2, max_workers: int = 4):
         self.api_key = api_key
-        self.base_url = "https://api.rainforestapi.com/request"
+        self.base_url = base_url or self.DEFAULT_BASE_URL
         self.cache = ASINCache(cache_db)
-        self.rate_limiter = RateLimiter(requests_per_second=2)
+        self.rate_limiter = RateLimiter(requests_per_second=requests_per_second)
+        self.max_workers = max_workers
+        self.session = self._build_session(max_workers, self.rate_limiter)
+    
+    @staticmethod
+    def _build_session(pool_size: int, rate_limiter: RateLimiter) -> requests.Session:
+        """Pooled HTTP session; retries connection errors, 429 and 5xx with backoff, under the rate limit."""
+        retry = RateLimitedRetry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+            rate_limiter=rate_limiter,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1), max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
     
     def lookup_asin(self, asin: str, marketplace: str = 'AE') -> Dict:
         """
@@ -108,6 +108,13 @@ class RainforestClient:
             print(f"DEBUG CACHE HIT {asin}: Title='{cached.get('title', 'N/A')}', Brand='{cached.get('brand', 'N/A')}'")
             return cached
         
+        result = self._fetch(asin, marketplace)
+        if result.get('status') == 'success':
+            self.cache.set(asin, marketplace, result)
+        return result
+    
+    def _fetch(self, asin: str, marketplace: str) -> Dict:
+        """Rate-limited API lookup of one ASIN (no cache access; safe to run in worker threads)."""
         # Rate limit
         self.rate_limiter.wait()
         
@@ -120,7 +127,7 @@ class RainforestClient:
         }
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=30)
+            response = self.session.get(self.base_url, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -206,8 +213,6 @@ class RainforestClient:
                         'status': 'success'
                     }
                     
-                    # Cache result
-                    self.cache.set(asin, marketplace, result)
                     return result
                 else:
                     # Product not found or error in response
@@ -249,26 +254,54 @@ class RainforestClient:
             }
             return result
     
-    def batch_lookup(self, asin_list: list, marketplace: str = 'AE') -> list:
+    def batch_lookup(self, asin_list: list, marketplace: str = 'AE',
+                     progress_callback: Optional[Callable[[int, int], None]] = None) -> list:
         """
         Batch lookup multiple ASINs.
         
+        Cache hits come from one bulk query; misses are fetched concurrently by
+        max_workers threads sharing the client's rate limiter and HTTP session, and
+        successful lookups are cached in one transaction. Each ASIN is fetched once
+        even if repeated in asin_list.
+        
         Args:
             asin_list: List of ASINs to lookup
             marketplace: Amazon marketplace
+            progress_callback: Optional callable(done, total), called from the calling thread
             
         Returns:
-            List of result dictionaries
+            List of result dictionaries (one per input ASIN, in input order)
         """
-        results = []
+        keys = [str(asin).upper() for asin in asin_list]
+        found = {asin: data for asin, data in self.cache.get_many(keys, marketplace).items() if data}
+
+        misses = [asin for asin in dict.fromkeys(keys) if asin not in found]
+        total = len(dict.fromkeys(keys))
+        done = total - len(misses)
+        if progress_callback and done:
+            progress_callback(done, total)
+        
+        fetched = []
+        if misses:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(misses)))) as executor:
+                futures = {executor.submit(self._fetch, asin, marketplace): asin for asin in misses}
+                for future in as_completed(futures):
+                    asin = futures[future]
+                    found[asin] = future.result()
+                    if found[asin].get('status') == 'success':
+                        fetched.append((asin, found[asin]))
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total)
         
-        for asin in asin_list:
-            result = self.lookup_asin(asin, marketplace)
-            results.append(result)
+        self.cache.set_many(marketplace, fetched)
         
-        return results
+        # Copies so callers can annotate repeated ASINs independently
+        return [dict(found[asin]) for asin in keys]
     
     def __del__(self):
-        """Cleanup cache connection."""
+        """Cleanup cache connection and HTTP pool."""
         if hasattr(self, 'cache'):
             self.cache.close()
+        if hasattr(self, 'session'):
+            self.session.close()
@@ -0,0 +1,69 @@
+"""
+Action Log Schema
+
+Shared, columnar representation of optimizer actions for the actions_log table.
+Actions travel as a DataFrame with ACTION_COLUMNS (list-of-dict actions are still
+accepted everywhere and converted once), so producers project whole result frames
+and the database managers bulk-write them without per-action Python work.
+"""
+
+from typing import Any, Dict, List, Union
+
+import pandas as pd
+
+# Action fields and the value used when a field is missing (None -> SQL NULL)
+ACTION_DEFAULTS: Dict[str, Any] = {
+    'entity_name': '',
+    'action_type': 'UNKNOWN',
+    'old_value': '',
+    'new_value': '',
+    'reason': '',
+    'campaign_name': '',
+    'ad_group_name': '',
+    'target_text': '',
+    'match_type': '',
+    # Harvest tracking fields (impact analysis)
+    'winner_source_campaign': None,
+    'new_campaign_name': None,
+    'before_match_type': None,
+    'after_match_type': None,
+}
+ACTION_COLUMNS: List[str] = list(ACTION_DEFAULTS)
+
+# actions_log insert order
+ACTION_LOG_COLUMNS: List[str] = ['action_date', 'client_id', 'batch_id'] + ACTION_COLUMNS
+
+ActionsLike = Union[pd.DataFrame, List[Dict[str, Any]]]
+
+
+def actions_frame(actions: ActionsLike) -> pd.DataFrame:
+    """Actions (DataFrame or list of dicts) as a DataFrame with exactly ACTION_COLUMNS."""
+    if actions is None:
+        return pd.DataFrame(columns=ACTION_COLUMNS)
+    df = actions if isinstance(actions, pd.DataFrame) else pd.DataFrame(list(actions))
+    out = pd.DataFrame(index=df.index)
+    for col, default in ACTION_DEFAULTS.items():
+        if col not in df.columns:
+            out[col] = default
+        elif default is None:
+            out[col] = df[col].astype(object).where(df[col].notna(), None)
+        else:
+            out[col] = df[col].astype(object).where(df[col].notna(), default)
+    return out.reset_index(drop=True)
+
+
+def action_log_rows(actions: ActionsLike, client_id: str, batch_id: str, date_str: str) -> pd.DataFrame:
+    """Insert-ready actions_log rows (ACTION_LOG_COLUMNS order, old/new values as text)."""
+    rows = actions_frame(actions)
+    rows['old_value'] = rows['old_value'].astype(str)
+    rows['new_value'] = rows['new_value'].astype(str)
+    rows.insert(0, 'action_date', date_str)
+    rows.insert(1, 'client_id', client_id)
+    rows.insert(2, 'batch_id', batch_id)
+    return rows[ACTION_LOG_COLUMNS]
+
+
+def count_action_types(actions: ActionsLike) -> Dict[str, int]:
+    """Actions per action_type, in order of first appearance."""
+    frame = actions_frame(actions)
+    return frame['action_type'].value_counts(sort=False).to_dict()
@@ -0,0 +1,311 @@
+"""
+ASIN Lookup Cache
+
+SQLite cache for Rainforest ASIN lookups shared by the ASIN Mapper (API results)
+and DataHub uploads (own-product placeholders). The database runs in WAL mode with
+one connection per thread, so concurrent uploads and mapper sessions read while a
+writer commits instead of serializing on a single shared connection.
+
+Each entry carries its own expiry (default ASIN_CACHE_TTL_DAYS). A daemon thread
+per database file periodically deletes expired entries and trims the table to
+ASIN_CACHE_MAX_ENTRIES (soonest-expiring first). Hit/miss/eviction counters are
+kept per database file for all ASINCache instances in the process.
+
+Usage:
+    from core.asin_cache import ASINCache
+
+    cache = ASINCache()
+    found = cache.get_many(['B0ABC12345', 'B0XYZ67890'], 'AE')  # {ASIN: data}
+    cache.set_many('AE', [(asin, data), ...], ttl_days=90)
+    cache.stats()  # {'hits': ..., 'misses': ..., 'evictions': ..., 'entries': ...}
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_TTL_DAYS = float(os.getenv("ASIN_CACHE_TTL_DAYS", "30"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("ASIN_CACHE_MAX_ENTRIES", "100000"))
+EVICTION_INTERVAL_SECONDS = float(os.getenv("ASIN_CACHE_EVICT_SECONDS", "600"))
+
+# SQLite's default bound-parameter limit is 999
+_QUERY_CHUNK = 500
+
+
+class _CacheFileState:
+    """Counters and eviction thread shared by every ASINCache on one database file."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired_evictions = 0
+        self.capacity_evictions = 0
+        self.evictor: Optional[threading.Thread] = None
+        self.wake = threading.Event()
+
+
+_file_states: Dict[str, _CacheFileState] = {}
+_file_states_lock = threading.Lock()
+
+
+def _state_for(db_path: str) -> _CacheFileState:
+    key = os.path.abspath(db_path)
+    with _file_states_lock:
+        if key not in _file_states:
+            _file_states[key] = _CacheFileState()
+        return _file_states[key]
+
+
+class ASINCache:
+    """SQLite cache for ASIN lookups with per-entry TTL, size cap and stats."""
+
+    def __init__(self, db_path: str = 'data/asin_cache.db', ttl_days: Optional[float] = None,
+                 max_entries: Optional[int] = None, eviction_interval: Optional[float] = None):
+        self.db_path = db_path
+        self.ttl_seconds = (DEFAULT_TTL_DAYS if ttl_days is None else ttl_days) * 86400
+        self.max_entries = DEFAULT_MAX_ENTRIES if max_entries is None else max_entries
+        self.eviction_interval = EVICTION_INTERVAL_SECONDS if eviction_interval is None else eviction_interval
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._state = _state_for(db_path)
+        self._init_db()
+        self._start_evictor()
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=30000')
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """This thread's connection (opened on first use)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _init_db(self):
+        """Initialize database and tables (adds expires_at to caches created before per-entry TTL)."""
+        os.makedirs(os.path.dirname(self.db_path) if os.path.dirname(self.db_path) else '.', exist_ok=True)
+
+        with self.conn as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS asin_lookups (
+                    asin TEXT,
+                    marketplace TEXT,
+                    data TEXT,
+                    lookup_date TIMESTAMP,
+                    expires_at REAL,
+                    PRIMARY KEY (asin, marketplace)
+                )
+            ''')
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(asin_lookups)')}
+            if 'expires_at' not in columns:
+                conn.execute('ALTER TABLE asin_lookups ADD COLUMN expires_at REAL')
+            legacy = conn.execute(
+                'SELECT rowid, lookup_date FROM asin_lookups WHERE expires_at IS NULL'
+            ).fetchall()
+            if legacy:
+                conn.executemany(
+                    'UPDATE asin_lookups SET expires_at = ? WHERE rowid = ?',
+                    [(self._legacy_expiry(lookup_date), rowid) for rowid, lookup_date in legacy]
+                )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_asin_lookups_expires ON asin_lookups (expires_at)')
+
+    def _legacy_expiry(self, lookup_date) -> float:
+        """Expiry for rows written before expires_at existed: lookup_date + default TTL."""
+        try:
+            return datetime.fromisoformat(str(lookup_date)).timestamp() + self.ttl_seconds
+        except ValueError:
+            return 0.0  # Unparseable date - treat as expired
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, asin: str, marketplace: str = 'AE') -> Optional[Dict]:
+        """Get cached lookup (None if missing or expired)."""
+        return self.get_many([asin], marketplace).get(asin.upper())
+
+    def get_many(self, asins: Iterable[str], marketplace: str = 'AE') -> Dict[str, Dict]:
+        """Get cached lookups for many ASINs with one query per 500 ASINs (keys are upper-cased ASINs)."""
+        keys = list(dict.fromkeys(a.upper() for a in asins))
+        now = time.time()
+        found = {}
+        for start in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[start:start + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            cursor = self.conn.execute(f'''
+                SELECT asin, data FROM asin_lookups
+                WHERE asin IN ({placeholders}) AND marketplace = ?
+                AND expires_at > ?
+            ''', (*chunk, marketplace, now))
+            for asin, data in cursor.fetchall():
+                found[asin] = json.loads(data)
+        with self._state.lock:
+            self._state.hits += len(found)
+            self._state.misses += len(keys) - len(found)
+        return found
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def set(self, asin: str, marketplace: str, data: Dict, ttl_days: Optional[float] = None):
+        """Cache lookup result."""
+        self.set_many(marketplace, [(asin, data)], ttl_days=ttl_days)
+
+    def set_many(self, marketplace: str, entries: Iterable[Tuple[str, Dict]], ttl_days: Optional[float] = None,
+                 only_missing: bool = False) -> int:
+        """
+        Cache many (asin, data) lookups in a single transaction.
+
+        With only_missing=True, ASINs that already have a live entry are left untouched
+        (used for placeholders that must not overwrite real API data). Returns rows written.
+        """
+        now = datetime.now()
+        expires_at = time.time() + (self.ttl_seconds if ttl_days is None else ttl_days * 86400)
+        rows = [(asin.upper(), marketplace, json.dumps(data), now.isoformat(sep=' '), expires_at)
+                for asin, data in entries]
+        if not rows:
+            return 0
+        if only_missing:
+            conflict = '''
+                ON CONFLICT (asin, marketplace) DO UPDATE SET
+                    data = excluded.data, lookup_date = excluded.lookup_date, expires_at = excluded.expires_at
+                WHERE asin_lookups.expires_at <= ?
+            '''
+            rows = [row + (time.time(),) for row in rows]
+            sql = f'''
+                INSERT INTO asin_lookups (asin, marketplace, data, lookup_date, expires_at)
+                VALUES (?, ?, ?, ?, ?) {conflict}
+            '''
+        else:
+            sql = '''
+                INSERT OR REPLACE INTO asin_lookups
+                (asin, marketplace, data, lookup_date, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+            '''
+        with self.conn as conn:
+            before = conn.total_changes
+            conn.executemany(sql, rows)
+            written = conn.total_changes - before
+        if self.max_entries and written:
+            self._state.wake.set()  # Let the evictor enforce the size cap soon
+        return written
+
+    def delete(self, asins: Iterable[str], marketplace: str = 'AE') -> int:
+        """Drop cached lookups for ASINs. Returns rows deleted."""
+        keys = list(dict.fromkeys(a.upper() for a in asins))
+        deleted = 0
+        with self.conn as conn:
+            for start in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[start:start + _QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                deleted += conn.execute(
+                    f'DELETE FROM asin_lookups WHERE asin IN ({placeholders}) AND marketplace = ?',
+                    (*chunk, marketplace)
+                ).rowcount
+        return deleted
+
+    def clear(self) -> int:
+        """Drop every cached lookup (the file stays in place for other open connections). Returns rows deleted."""
+        with self.conn as conn:
+            return conn.execute('DELETE FROM asin_lookups').rowcount
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def evict(self) -> Tuple[int, int]:
+        """Delete expired entries, then trim to max_entries. Returns (expired, over_capacity) removed."""
+        with self.conn as conn:
+            expired = conn.execute('DELETE FROM asin_lookups WHERE expires_at <= ?', (time.time(),)).rowcount
+            over = 0
+            if self.max_entries:
+                excess = conn.execute('SELECT COUNT(*) FROM asin_lookups').fetchone()[0] - self.max_entries
+                if excess > 0:
+                    over = conn.execute('''
+                        DELETE FROM asin_lookups WHERE rowid IN (
+                            SELECT rowid FROM asin_lookups ORDER BY expires_at, lookup_date LIMIT ?
+                        )
+                    ''', (excess,)).rowcount
+        with self._state.lock:
+            self._state.expired_evictions += expired
+            self._state.capacity_evictions += over
+        return expired, over
+
+    def _start_evictor(self):
+        """Start the background eviction thread for this database file (once per process)."""
+        if self.eviction_interval <= 0:
+            return
+        with self._state.lock:
+            if self._state.evictor is not None and self._state.evictor.is_alive():
+                return
+            evictor = ASINCache(self.db_path, ttl_days=self.ttl_seconds / 86400, max_entries=self.max_entries,
+                                eviction_interval=0)
+            thread = threading.Thread(target=self._evict_loop, args=(evictor, self._state, self.eviction_interval),
+                                      name=f"asin-cache-evictor:{os.path.basename(self.db_path)}", daemon=True)
+            self._state.evictor = thread
+        self.evict()
+        thread.start()
+
+    @staticmethod
+    def _evict_loop(cache: 'ASINCache', state: _CacheFileState, interval: float):
+        while True:
+            state.wake.wait(interval)
+            state.wake.clear()
+            try:
+                cache.evict()
+            except sqlite3.Error as e:
+                print(f"ASIN cache eviction failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Stats / lifecycle
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for this database file plus current entry counts."""
+        now = time.time()
+        total, live = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(expires_at > ?), 0) FROM asin_lookups', (now,)
+        ).fetchone()
+        with self._state.lock:
+            lookups = self._state.hits + self._state.misses
+            return {
+                'hits': self._state.hits,
+                'misses': self._state.misses,
+                'hit_rate': (self._state.hits / lookups) if lookups else 0.0,
+                'expired_evictions': self._state.expired_evictions,
+                'capacity_evictions': self._state.capacity_evictions,
+                'evictions': self._state.expired_evictions + self._state.capacity_evictions,
+                'entries': total,
+                'live_entries': live,
+                'max_entries': self.max_entries,
+            }
+
+    def close(self):
+        """Close every connection this cache opened."""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
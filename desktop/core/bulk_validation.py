@@ -8,6 +8,7 @@ Validates bulk export files against Amazon's requirements including:
 - Auto Campaign Restrictions
 """
 
+import numpy as np
 import pandas as pd
 from dataclasses import dataclass, field
 from enum import Enum
@@ -397,6 +398,166 @@ def validate_auto_campaign(row: dict, idx: int, campaign_type: str = "Manual") -
     return issues
 
 
+# ==========================================
+# COLUMNAR RULE ENGINE
+# ==========================================
+# Each rule below is a boolean mask over the whole frame with the same semantics
+# as the per-row validators above; ValidationIssue objects are only built for
+# the offending rows.
+
+# Rule order within a row (matches the per-row validator call order)
+_RULE_ORDER = {"ISO001": 0, "ISO002": 1, "ISO003": 2, "ISO004": 3, "BLD001": 4, "BLD002": 5, "BID002": 6, "AUTO001": 7}
+
+
+def _column(df: pd.DataFrame, name: str, default=None) -> pd.Series:
+    """Column as object Series; a missing column behaves like row.get(name, default)."""
+    if name in df.columns:
+        return df[name].astype(object)
+    return pd.Series([default] * len(df), index=df.index, dtype=object)
+
+
+def _text(values: pd.Series) -> pd.Series:
+    """str() of every value, like str(row.get(...)) in the per-row validators."""
+    return values.astype(str)
+
+
+def _blank_mask(values: pd.Series) -> np.ndarray:
+    """Vectorized is_blank()."""
+    return (values.isna() | _text(values).str.strip().eq("")).to_numpy()
+
+
+def _truthy_mask(values: pd.Series) -> np.ndarray:
+    """Python truthiness per element (NaN is truthy; None, 0 and '' are not)."""
+    return np.frompyfunc(bool, 1, 1)(values.to_numpy(dtype=object)).astype(bool)
+
+
+def _first_truthy(*columns: pd.Series) -> pd.Series:
+    """Vectorized `a or b or c`: first truthy value per row, else the last one."""
+    result = columns[-1]
+    for values in reversed(columns[:-1]):
+        result = values.where(_truthy_mask(values), result)
+    return result
+
+
+def _parse_bids(values: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+    """
+    float(str(v).replace('$','').replace(',','').strip()) per row.
+    
+    Each distinct string is parsed once. Returns (parsed floats, unparseable mask).
+    """
+    parsed, invalid = {}, set()
+    for raw in pd.unique(values):
+        try:
+            parsed[raw] = float(raw.replace("$", "").replace(",", "").strip())
+        except (ValueError, TypeError):
+            invalid.add(raw)
+    return values.map(parsed), values.isin(invalid).to_numpy()
+
+
+def _negative_rule_issues(df: pd.DataFrame, emit) -> None:
+    """Isolation / Bleeder negative rules (export_type='negatives')."""
+    match_type = _text(_column(df, "Match Type", "")).str.lower()
+    match_type_values = match_type.to_numpy()
+    normalized = match_type.str.strip()
+    is_isolation = normalized.str.contains("campaign negative", regex=False).to_numpy()
+    is_bleeder = ~is_isolation & normalized.str.contains("negative", regex=False).to_numpy()
+    if not (is_isolation.any() or is_bleeder.any()):
+        return
+    
+    ad_group_name = _column(df, "Ad Group Name")
+    ad_group_blank = _blank_mask(ad_group_name)
+    ad_group_id_blank = _blank_mask(_column(df, "Ad Group Id"))
+    ad_group_text_values = _text(_column(df, "Ad Group Name", "")).to_numpy()
+    
+    # ISO001: Ad Group must be blank
+    emit(is_isolation & ~(ad_group_blank & ad_group_id_blank), lambda i: ValidationIssue(
+        row=i, code="ISO001", message=ERROR_MESSAGES["ISO001"], field="Ad Group Name", value=ad_group_text_values[i]
+    ))
+    
+    # ISO002: Match Type validation
+    valid_iso_types = match_type.isin(["campaign negative exact", "campaign negative phrase"]).to_numpy()
+    emit(is_isolation & ~valid_iso_types, lambda i: ValidationIssue(
+        row=i, code="ISO002", message=ERROR_MESSAGES["ISO002"], field="Match Type", value=match_type_values[i]
+    ))
+    
+    # ISO003: Status validation
+    status = _text(_column(df, "State") if "State" in df.columns else _column(df, "Status", "")).str.lower()
+    status_values = status.to_numpy()
+    bad_status = (status.ne("") & ~status.isin(["enabled", "deleted"])).to_numpy()
+    emit(is_isolation & bad_status, lambda i: ValidationIssue(
+        row=i, code="ISO003", message=ERROR_MESSAGES["ISO003"], field="State", value=status_values[i]
+    ))
+    
+    # ISO004: Max Bid must be blank
+    has_bid = ~(_blank_mask(_column(df, "Bid")) & _blank_mask(_column(df, "Max Bid")))
+    bid_text_values = _text(_column(df, "Bid") if "Bid" in df.columns else _column(df, "Max Bid", "")).to_numpy()
+    emit(is_isolation & has_bid, lambda i: ValidationIssue(
+        row=i, code="ISO004", message=ERROR_MESSAGES["ISO004"], field="Bid", value=bid_text_values[i]
+    ))
+    
+    # BLD001: Ad Group is required
+    emit(is_bleeder & ad_group_blank & ad_group_id_blank, lambda i: ValidationIssue(
+        row=i, code="BLD001", message=ERROR_MESSAGES["BLD001"], field="Ad Group Name"
+    ))
+    
+    # BLD002: Match Type validation (should NOT have "campaign" prefix)
+    has_campaign = match_type.str.contains("campaign", regex=False).to_numpy()
+    emit(is_bleeder & has_campaign, lambda i: ValidationIssue(
+        row=i, code="BLD002", message=ERROR_MESSAGES["BLD002"], field="Match Type", value=match_type_values[i]
+    ))
+
+
+def _bid_rule_issues(df: pd.DataFrame, export_type: str, currency: str, emit) -> None:
+    """BID002: bid parseable and within currency limits."""
+    bid = _column(df, "Bid")
+    new_bid = _column(df, "New Bid")
+    if export_type == "bids":
+        checked = np.ones(len(df), dtype=bool)
+    else:
+        checked = _truthy_mask(bid) | _truthy_mask(new_bid)
+    
+    bid_val = _first_truthy(bid, _column(df, "Max Bid"), new_bid)
+    checked &= ~_blank_mask(bid_val)
+    if not checked.any():
+        return
+    
+    limits = get_currency_limits(currency)
+    bid_text = _text(bid_val)
+    parsed, invalid = _parse_bids(bid_text)
+    invalid &= checked
+    numeric = parsed.to_numpy(dtype=float)
+    bid_text_values, parsed_values = bid_text.to_numpy(), parsed.to_numpy()
+    
+    emit(invalid, lambda i: ValidationIssue(
+        row=i, code="BID002", message=f"Invalid bid value: {bid_text_values[i]}", field="Bid", value=bid_text_values[i]
+    ))
+    with np.errstate(invalid="ignore"):
+        below = checked & ~invalid & (numeric < limits["min_bid"])
+        above = checked & ~invalid & ~below & (numeric > limits["max_bid"])
+    emit(below, lambda i: ValidationIssue(
+        row=i, code="BID002", message=f"Bid {parsed_values[i]} below minimum {limits['min_bid']} {currency}",
+        field="Bid", value=str(parsed_values[i])
+    ))
+    emit(above, lambda i: ValidationIssue(
+        row=i, code="BID002", message=f"Bid {parsed_values[i]} exceeds maximum {limits['max_bid']} {currency}",
+        field="Bid", value=str(parsed_values[i])
+    ))
+
+
+def _auto_campaign_rule_issues(df: pd.DataFrame, campaign_cache: Dict[str, str], emit) -> None:
+    """AUTO001: no positive keywords in Auto campaigns."""
+    if not campaign_cache:
+        return  # Every campaign defaults to Manual
+    campaign_type = _column(df, "Campaign Name", "").map(campaign_cache).fillna("Manual")
+    is_auto = _text(campaign_type).str.lower().eq("auto").to_numpy()
+    match_type = _text(_column(df, "Match Type", "")).str.lower()
+    match_type_values = match_type.to_numpy()
+    positive = (match_type.isin(["broad", "phrase", "exact"]) & ~match_type.str.contains("negative", regex=False)).to_numpy()
+    emit(is_auto & positive, lambda i: ValidationIssue(
+        row=i, code="AUTO001", message=ERROR_MESSAGES["AUTO001"], field="Match Type", value=match_type_values[i]
+    ))
+
+
 # ==========================================
 # MAIN VALIDATION ORCHESTRATOR
 # ==========================================
@@ -410,6 +571,9 @@ def validate_bulk_export(
     """
     Comprehensive validation for bulk export files.
     
+    Rules run as vectorized masks over the frame; issues are reported in the
+    same order as the per-row validators (by row, then rule).
+    
     Args:
         df: DataFrame to validate
         export_type: Type of export ("negatives", "bids", "harvest")
@@ -423,37 +587,30 @@ def validate_bulk_export(
         return df, ValidationResult()
     
     df = df.copy()
-    all_issues = []
     campaign_cache = campaign_cache or {}
+    row_nums = [idx + 2 for idx in df.index]  # Excel row number (header is row 1)
+    found: List[Tuple[int, int, ValidationIssue]] = []
     
-    for idx, row in df.iterrows():
-        row_dict = row.to_dict()
-        row_num = idx + 2  # Excel row number (header is row 1)
-        
-        # 1. Negative Keyword Validation
-        if export_type == "negatives":
-            match_type = str(row_dict.get("Match Type", "")).lower()
-            neg_type = detect_negative_type(match_type)
-            
-            if neg_type == NegativeType.ISOLATION:
-                issues = validate_isolation_negative(row_dict, row_num)
-            elif neg_type == NegativeType.BLEEDER:
-                issues = validate_bleeder_negative(row_dict, row_num)
-            else:
-                issues = []
-            
-            all_issues.extend(issues)
-        
-        # 2. Bid Validation
-        if export_type == "bids" or row_dict.get("Bid") or row_dict.get("New Bid"):
-            issues = validate_bid_update(row_dict, row_num, currency)
-            all_issues.extend(issues)
-        
-        # 3. Auto Campaign Restrictions
-        campaign_name = row_dict.get("Campaign Name", "")
-        campaign_type = campaign_cache.get(campaign_name, "Manual")
-        issues = validate_auto_campaign(row_dict, row_num, campaign_type)
-        all_issues.extend(issues)
+    def emit(mask: np.ndarray, make_issue) -> None:
+        for pos in np.flatnonzero(mask):
+            issue = make_issue(pos)
+            found.append((pos, _RULE_ORDER[issue.code], issue))
+    
+    # 1. Negative Keyword Validation
+    if export_type == "negatives":
+        _negative_rule_issues(df, emit)
+    
+    # 2. Bid Validation
+    _bid_rule_issues(df, export_type, currency, emit)
+    
+    # 3. Auto Campaign Restrictions
+    _auto_campaign_rule_issues(df, campaign_cache, emit)
+    
+    found.sort(key=lambda item: (item[0], item[1]))
+    all_issues = []
+    for pos, _, issue in found:
+        issue.row = row_nums[pos]
+        all_issues.append(issue)
     
     result = ValidationResult(issues=all_issues)
     
@@ -0,0 +1,243 @@
+"""
+Compact DataFrame Storage
+
+Memory-compact, read-only representation of the DataFrames DataHub keeps in
+st.session_state.unified_data. Repeated strings (campaign, ad group, match type,
+targeting, and any low-cardinality text column) are held as categoricals, and numerics
+are downcast where the values survive the round trip unchanged. A frame derived from
+another (enriched_data from search_term_report) stores only the columns it added or
+changed as a sidecar joined back by row index.
+
+to_frame() rebuilds an ordinary DataFrame with the original dtypes, so callers never
+see categorical or downcast columns. The decoded frame is kept in a small process-wide
+LRU bounded by COMPACT_DECODED_CACHE_MB, so repeated reads of the same upload (every
+page render) copy it instead of decoding every column again.
+
+Usage:
+    from core.compact_frame import CompactFrame
+
+    stored = CompactFrame(df)
+    enriched_stored = CompactFrame(enriched, base=stored, base_frame=df)
+    df = stored.to_frame()
+    stored.memory()  # {'rows': ..., 'original_bytes': ..., 'stored_bytes': ..., ...}
+"""
+
+import itertools
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# Always stored as categoricals when present (repeated on every row)
+CATEGORY_COLUMNS = (
+    'Campaign Name', 'Ad Group Name', 'Match Type', 'Targeting', 'TargetingExpression',
+    'campaign_name', 'ad_group_name', 'match_type', 'target_text',
+)
+# Other text columns become categoricals when distinct values <= this share of rows
+AUTO_CATEGORY_RATIO = float(os.getenv("COMPACT_CATEGORY_RATIO", "0.5"))
+# Budget for decoded frames kept across to_frame() calls (all sessions)
+DECODED_CACHE_MB = int(os.getenv("COMPACT_DECODED_CACHE_MB", "256"))
+
+# Each CompactFrame gets a fresh token (id() can be reused once a replaced upload is collected)
+_tokens = itertools.count()
+
+
+def _object_bytes(series: pd.Series) -> int:
+    return int(series.memory_usage(index=False, deep=True))
+
+
+def _compact_column(series: pd.Series, force_category: bool):
+    """
+    Compact one column.
+
+    Returns:
+        (compact series, original dtype or None when left as is, original bytes)
+        Original bytes match memory_usage(deep=True) without scanning the objects again.
+    """
+    dtype = series.dtype
+    if dtype == object:
+        try:
+            compact = series.astype('category')
+        except (TypeError, ValueError):  # unhashable values
+            return series, None, _object_bytes(series)
+        if force_category or len(compact.cat.categories) <= AUTO_CATEGORY_RATIO * len(series):
+            codes = compact.cat.codes.to_numpy()
+            sizes = np.array([sys.getsizeof(v) for v in compact.cat.categories], dtype=np.int64)
+            counts = np.bincount(codes[codes >= 0], minlength=len(sizes))
+            missing = series[codes < 0]
+            original = 8 * len(series) + int(counts @ sizes) + sum(sys.getsizeof(v) for v in missing)
+            return compact, dtype, original
+        return series, None, _object_bytes(series)
+    original = int(series.memory_usage(index=False, deep=True))
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+        compact = pd.to_numeric(series, downcast='integer' if dtype.kind == 'i' else 'unsigned')
+        return (compact, dtype, original) if compact.dtype != dtype else (series, None, original)
+    if isinstance(dtype, np.dtype) and dtype == np.float64:
+        compact = series.astype(np.float32)
+        if np.array_equal(compact.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+            return compact, dtype, original
+    return series, None, original
+
+
+class _DecodedCache:
+    """Thread-safe LRU of decoded frames keyed by CompactFrame token, bounded by bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+    def get(self, token: int) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            self._entries.move_to_end(token)
+            return entry[0]
+
+    def put(self, token: int, frame: pd.DataFrame):
+        size = int(frame.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            if size > self.max_bytes or token in self._entries:
+                return
+            self._entries[token] = (frame, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def discard(self, token: int):
+        with self._lock:
+            entry = self._entries.pop(token, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+
+_decoded_cache = _DecodedCache(DECODED_CACHE_MB * 1024 * 1024)
+
+
+class CompactFrame:
+    """
+    Read-only compact copy of a DataFrame.
+
+    Supports the read-only subset of the DataFrame API the hub's consumers use on stored
+    frames (len, columns, index, empty, frame[col] / frame[[cols]]); anything else should
+    go through to_frame().
+    """
+
+    def __init__(self, df: pd.DataFrame, base: Optional['CompactFrame'] = None,
+                 base_frame: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            df: Frame to store
+            base: Stored frame df was derived from (e.g. the STR for enriched_data)
+            base_frame: base.to_frame() as passed to the derivation, used to find
+                        the columns df shares with base unchanged
+        """
+        self.columns = df.columns
+        self.index = df.index
+        self.base = None
+        self._token = next(_tokens)
+        own = list(df.columns)
+
+        if (base is not None and base_frame is not None and df.columns.is_unique
+                and len(df) == len(base_frame) and df.index.equals(base_frame.index)):
+            shared = {c for c in df.columns
+                      if c in base.columns and c in base_frame.columns and df[c].equals(base_frame[c])}
+            if shared:
+                self.base = base
+                own = [c for c in df.columns if c not in shared]
+
+        self._dtypes: Dict[str, np.dtype] = {}
+        self._none_missing = set()  # object columns whose missing values were None, not NaN
+        index_bytes = int(df.index.memory_usage(deep=True))
+        if df.columns.is_unique:
+            data = {}
+            self.original_bytes = index_bytes
+            for col in df.columns:
+                series = df[col]
+                if col not in own:
+                    self.original_bytes += _object_bytes(series) if series.dtype == object else int(series.nbytes)
+                    continue
+                data[col], original, nbytes = _compact_column(series, col in CATEGORY_COLUMNS)
+                self.original_bytes += nbytes
+                if original is not None:
+                    self._dtypes[col] = original
+                    if original == object:
+                        missing = series[data[col].cat.codes.to_numpy() < 0]
+                        if len(missing) and all(v is None for v in missing):
+                            self._none_missing.add(col)
+            self._frame = pd.DataFrame(data, index=df.index, columns=own)
+        else:
+            self._frame = df.copy()
+            self.original_bytes = int(df.memory_usage(index=True, deep=True).sum())
+        self.stored_bytes = int(self._frame.memory_usage(index=True, deep=True).sum())
+
+    # ---------- DataFrame-like read access ----------
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.index) == 0 or len(self.columns) == 0
+
+    @property
+    def shape(self):
+        return len(self.index), len(self.columns)
+
+    def __getitem__(self, key: Union[str, Sequence[str]]) -> Union[pd.Series, pd.DataFrame]:
+        if isinstance(key, (list, tuple, pd.Index)):
+            return pd.DataFrame({col: self._column(col) for col in key}, index=self.index, columns=list(key),
+                                copy=False)
+        return self._column(key)
+
+    def _column(self, col: str) -> pd.Series:
+        if col in self._frame.columns:
+            series = self._frame[col]
+            original = self._dtypes.get(col)
+            if original is None:
+                return series.copy()
+            restored = series.astype(original)
+            if col in self._none_missing:
+                # Assign rather than write through to_numpy(): under Copy-on-Write it is read-only
+                restored = restored.where(series.cat.codes >= 0, None)
+            return restored
+        if self.base is not None and col in self.columns:
+            return self.base._column(col)
+        raise KeyError(col)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Rebuild the stored DataFrame (a fresh copy with the original dtypes)."""
+        if not self.columns.is_unique:
+            return self._frame.copy()
+        decoded = _decoded_cache.get(self._token)
+        if decoded is None:
+            decoded = pd.DataFrame({col: self._column(col) for col in self.columns}, index=self.index,
+                                   columns=self.columns, copy=False)
+            _decoded_cache.put(self._token, decoded)
+        # Callers may modify what they get; the cached frame must stay as decoded
+        return decoded.copy()
+
+    def release(self):
+        """Drop this frame's decoded copy (called when the hub replaces the dataset)."""
+        _decoded_cache.discard(self._token)
+
+    # ---------- Reporting ----------
+
+    def memory(self) -> Dict[str, Union[int, str, List[str]]]:
+        """Rows, original vs stored bytes, and which columns are compacted or shared."""
+        return {
+            'rows': len(self),
+            'columns': len(self.columns),
+            'storage': 'sidecar' if self.base is not None else 'compact',
+            'sidecar_columns': list(self._frame.columns) if self.base is not None else [],
+            'categorical_columns': [c for c in self._frame.columns if isinstance(self._frame[c].dtype, pd.CategoricalDtype)],
+            'original_bytes': self.original_bytes,
+            'stored_bytes': self.stored_bytes,
+        }
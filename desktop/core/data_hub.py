@@ -11,10 +11,18 @@ import numpy as np
 import json
 from datetime import datetime
 from typing import Dict, Optional, Tuple
-from core.data_loader import load_uploaded_file, SmartMapper, safe_numeric
+from core.data_loader import (
+    load_uploaded_file, SmartMapper, safe_numeric, iter_uploaded_file, read_header,
+    uploaded_file_size, STR_STREAM_MIN_BYTES
+)
 from core.db_manager import get_db_manager
 from core.mapping_engine import MappingEngine
-from api.rainforest_client import ASINCache
+from core.id_index import BulkIdIndex
+from core.compact_frame import CompactFrame
+from core.dataset_registry import dataset_registry
+from core.state_versions import bump_state_version
+from features.constants import classify_match_types
+from core.asin_cache import ASINCache
 
 class DataHub:
     """Central data management system."""
@@ -43,12 +51,86 @@ class DataHub:
             }
     
     def get_data(self, data_type: str) -> Optional[pd.DataFrame]:
-        """Get specific dataset."""
-        return st.session_state.unified_data.get(data_type)
+        """Get specific dataset (a fresh DataFrame from the compact session store's decoded cache)."""
+        stored = st.session_state.unified_data.get(data_type)
+        return stored.to_frame() if isinstance(stored, CompactFrame) else stored
     
     def get_enriched_data(self) -> Optional[pd.DataFrame]:
         """Get the fully merged/enriched dataset."""
-        return st.session_state.unified_data.get('enriched_data')
+        return self.get_data('enriched_data')
+    
+    def _store(self, data_type: str, df: Optional[pd.DataFrame], base: Optional[str] = None,
+               base_frame: Optional[pd.DataFrame] = None):
+        """
+        Keep a dataset in the session store in compact form (see core.compact_frame).
+        
+        Args:
+            data_type: unified_data key
+            df: Dataset to store
+            base: Key of the stored dataset df was derived from; columns df shares with it
+                  unchanged are not stored twice
+            base_frame: The DataFrame df was derived from (get_data(base))
+        """
+        previous = st.session_state.unified_data.get(data_type)
+        if isinstance(previous, CompactFrame):
+            previous.release()
+        if isinstance(df, pd.DataFrame):
+            base_stored = st.session_state.unified_data.get(base) if base else None
+            df = CompactFrame(df, base=base_stored if isinstance(base_stored, CompactFrame) else None,
+                              base_frame=base_frame)
+        st.session_state.unified_data[data_type] = df
+        bump_state_version(data_type)
+    
+    def get_memory_report(self) -> pd.DataFrame:
+        """
+        Per-session memory report: original vs stored size of every dataset in the hub.
+        
+        Sidecar datasets (enriched_data) only count the columns they add to their base.
+        """
+        rows = []
+        for data_type in ['search_term_report', 'enriched_data', 'advertised_product_report',
+                          'bulk_id_mapping', 'category_mapping']:
+            stored = st.session_state.unified_data.get(data_type)
+            if stored is None:
+                continue
+            if isinstance(stored, CompactFrame):
+                info = stored.memory()
+            else:
+                size = int(stored.memory_usage(index=True, deep=True).sum())
+                info = {'rows': len(stored), 'columns': len(stored.columns), 'storage': 'frame',
+                        'original_bytes': size, 'stored_bytes': size}
+            rows.append({
+                'Dataset': data_type,
+                'Rows': info['rows'],
+                'Columns': info['columns'],
+                'Storage': info['storage'],
+                'Original MB': info['original_bytes'] / 1024 ** 2,
+                'Stored MB': info['stored_bytes'] / 1024 ** 2,
+            })
+        report = pd.DataFrame(rows, columns=['Dataset', 'Rows', 'Columns', 'Storage', 'Original MB', 'Stored MB'])
+        if not report.empty:
+            total = {'Dataset': 'TOTAL', 'Rows': report['Rows'].sum(), 'Columns': report['Columns'].sum(),
+                     'Storage': '', 'Original MB': report['Original MB'].sum(), 'Stored MB': report['Stored MB'].sum()}
+            report = pd.concat([report, pd.DataFrame([total])], ignore_index=True)
+            report['Saved %'] = (1 - report['Stored MB'] / report['Original MB'].where(report['Original MB'] > 0)).fillna(0) * 100
+        return report
+    
+    def get_bulk_id_index(self) -> Optional[BulkIdIndex]:
+        """
+        Get the ID lookup index for the current bulk file.
+        
+        Built once per bulk upload and shared by MappingEngine.map_ids_from_bulk and the
+        optimizer's enrich_with_ids; rebuilt automatically when the bulk file changes.
+        """
+        # The index reads the stored (compact) bulk frame column by column
+        bulk = st.session_state.unified_data.get('bulk_id_mapping')
+        if bulk is None:
+            return None
+        index = st.session_state.unified_data.get('bulk_id_index')
+        if index is None or index.bulk is not bulk:
+            index = BulkIdIndex(bulk)
+            st.session_state.unified_data['bulk_id_index'] = index
+        return index
     
     def is_loaded(self, data_type: str) -> bool:
         """Check if a specific dataset is loaded."""
@@ -58,8 +140,35 @@ class DataHub:
         """Get upload status for all datasets."""
         return st.session_state.unified_data['upload_status']
     
+    @staticmethod
+    def _refine_match_types(df_renamed: pd.DataFrame) -> pd.Series:
+        """
+        REFINED MATCH TYPE LOGIC (Fix for "OTHER" buckets)
+        
+        Infer match type from expression or targeting (vectorized)
+        1. TargetingExpression first (most accurate for PT), 2. fallback to Targeting
+        Trust explicit strong types (EXACT/BROAD/PHRASE); unknown -> '-'
+        """
+        blank = pd.Series('', index=df_renamed.index)
+        expr = df_renamed.get('TargetingExpression', blank).astype(str).str.lower()
+        targeting = df_renamed.get('Targeting', blank).astype(str).str.lower()
+        expr = expr.where(~expr.isin(['', 'nan']), targeting)
+        return classify_match_types(
+            df_renamed.get('Match Type', blank),
+            expr,
+            strong_types=('EXACT', 'BROAD', 'PHRASE'),
+            unknown_values=('', 'NAN'),
+            unknown_label='-',
+        )
+    
     def upload_search_term_report(self, uploaded_file) -> Tuple[bool, str]:
         """Upload and validate search term report."""
+        # Large reports stream straight to the database instead of being loaded whole
+        if uploaded_file is not None and uploaded_file_size(uploaded_file) >= STR_STREAM_MIN_BYTES:
+            db = get_db_manager(st.session_state.get('test_mode', False))
+            if hasattr(db, 'save_raw_search_term_chunks'):
+                return self._stream_search_term_report(uploaded_file, db)
+        
         df = load_uploaded_file(uploaded_file)
         if df is None:
             return False, "Failed to load file"
@@ -71,35 +180,7 @@ class DataHub:
         rename_map = {v: k for k, v in col_map.items()}
         df_renamed = df.rename(columns=rename_map)
 
-        # -----------------------------------------------------------
-        # REFINED MATCH TYPE LOGIC (Fix for "OTHER" buckets)
-        # -----------------------------------------------------------
-        # Add helper to infer match type from expression or targeting
-        def infer_mt(row):
-            curr = str(row.get('Match Type', '')).upper()
-            
-            # 1. Try TargetingExpression first (most accurate for PT)
-            expr = str(row.get('TargetingExpression', '')).lower()
-            if not expr or expr == 'nan':
-                # 2. Fallback to Targeting column
-                expr = str(row.get('Targeting', '')).lower()
-            
-            # Trust explicit strong types
-            if curr in ['EXACT', 'BROAD', 'PHRASE']:
-                return curr
-            
-            # Infer from Expression/Targeting
-            if 'asin=' in expr or (len(expr) == 10 and expr.startswith('b0')):
-                return 'PT'
-            if 'category=' in expr:
-                return 'CATEGORY'
-            if any(x in expr for x in ['close-match', 'loose-match', 'substitutes', 'complements', '*']):
-                return 'AUTO'
-            
-            return curr if curr and curr != 'NAN' else '-'
-
-        df_renamed['Match Type'] = df_renamed.apply(infer_mt, axis=1)
-        # -----------------------------------------------------------
+        df_renamed['Match Type'] = self._refine_match_types(df_renamed)
         
         # Validate critical columns
         missing_critical = []
@@ -118,7 +199,7 @@ class DataHub:
                 df_renamed[col] = safe_numeric(df_renamed[col])
         
         # Store
-        st.session_state.unified_data['search_term_report'] = df_renamed
+        self._store('search_term_report', df_renamed)
         st.session_state.unified_data['upload_status']['search_term_report'] = True
         
         # Timestamp tracking (defensive check for existing sessions)
@@ -146,19 +227,17 @@ class DataHub:
                 st.error("❌ No Active Account Selected! Please select an account in the sidebar.")
                 return 0
             
-            # Determine date column for affected weeks calculation
+            # Determine date column for the upload's date range
             date_col = None
             for col in ['Date', 'Start Date', 'date']:
                 if col in df_renamed.columns:
                     date_col = col
                     break
             
-            # Step 1: Save raw daily data (with deduplication)
-            raw_count = db.save_raw_search_term_data(df_renamed, client_id)
+            # Step 1: Save raw daily data (with deduplication); returns the weeks it touched
+            raw_count, affected_weeks = db.save_raw_search_term_data(df_renamed, client_id)
             
-            # Step 2: Determine affected weeks from the uploaded data
-            # Let the DB tell us what weeks are present rather than calculating in Python
-            affected_weeks = []
+            # Step 2: Track the upload's date range
             start_date = None  # Track earliest date for session state
             if date_col and not df_renamed.empty:
                 dates = pd.to_datetime(df_renamed[date_col], errors='coerce')
@@ -166,12 +245,8 @@ class DataHub:
                 if not valid_dates.empty:
                     start_date = valid_dates.min().date()  # Earliest date in upload
                     print(f"DEBUG: Uploaded dates range: {valid_dates.min()} to {valid_dates.max()}")
-                    # Pass None to let reaggregate discover weeks from DB directly
-                    # This avoids any Python/Postgres week calculation mismatch
-                    affected_weeks = None  # Let DB determine weeks
             
-            # Step 3: Reaggregate those weeks from raw → target_stats
-            agg_count = 0
+            # Step 3: Reaggregate only the weeks this upload touched from raw → target_stats
             agg_count = db.reaggregate_target_stats(client_id, affected_weeks)
             print(f"DEBUG: Reaggregation completed. Rows aggregated: {agg_count}")
             
@@ -192,6 +267,7 @@ class DataHub:
                 
                 # Update global timestamp to invalidate impact cache
                 st.session_state['data_upload_timestamp'] = datetime.now().timestamp()
+                dataset_registry.invalidate(client_id)
                 
                 # Show success prominently
                 st.success(f"✅ Successfully saved {saved_count:,} rows to database!")
@@ -217,6 +293,84 @@ class DataHub:
             return True, f"Loaded {len(df_renamed):,} rows (⚠️ NOT SAVED TO DB - {save_error})"
     
 
+    def _stream_search_term_report(self, uploaded_file, db) -> Tuple[bool, str]:
+        """
+        Streaming upload for large search term reports.
+        
+        Columns are mapped from the header only; the file is then read in compact chunks
+        (see iter_uploaded_file), each chunk is normalized and COPYed to raw_search_term_data
+        as it is read, and the session is loaded from the reaggregated weekly data afterwards.
+        Peak memory is one chunk regardless of file size.
+        """
+        client_id = st.session_state.get('active_account_id')
+        if not client_id:
+            st.error("❌ No Active Account Selected! Please select an account in the sidebar.")
+            return False, "No active account selected"
+        
+        try:
+            header = read_header(uploaded_file)
+        except Exception as e:
+            st.error(f"Error reading file: {str(e)}")
+            return False, "Failed to load file"
+        col_map = SmartMapper.map_columns(pd.DataFrame(columns=[c.strip() for c in header]))
+        
+        missing_critical = [crit for crit in ["Spend", "Clicks", "Sales", "Orders"] if crit not in col_map]
+        if missing_critical:
+            st.info(f"Could not find columns for: {', '.join(missing_critical)}. Please checks report headers.")
+        
+        progress = {'rows': 0, 'chunks': 0, 'start': None, 'end': None}
+        
+        def normalized_chunks():
+            for chunk in iter_uploaded_file(uploaded_file, col_map):
+                chunk['Match Type'] = self._refine_match_types(chunk)
+                if 'Date' in chunk.columns:
+                    # Parsed here (same rules as the raw save) to track the upload's date range
+                    chunk['Date'] = pd.to_datetime(chunk['Date'], errors='coerce', format='mixed')
+                    lo, hi = chunk['Date'].min(), chunk['Date'].max()
+                    if pd.notna(lo):
+                        progress['start'] = lo if progress['start'] is None else min(progress['start'], lo)
+                        progress['end'] = hi if progress['end'] is None else max(progress['end'], hi)
+                progress['rows'] += len(chunk)
+                progress['chunks'] += 1
+                yield chunk
+        
+        try:
+            saved_count, affected_weeks = db.save_raw_search_term_chunks(normalized_chunks(), client_id)
+            if saved_count <= 0:
+                raise Exception("save_raw_search_term_chunks returned 0 rows")
+            print(f"DEBUG: Streamed {progress['rows']:,} rows in {progress['chunks']} chunks; "
+                  f"dates {progress['start']} to {progress['end']}")
+            agg_count = db.reaggregate_target_stats(client_id, affected_weeks)
+            print(f"DEBUG: Reaggregation completed. Rows aggregated: {agg_count}")
+        except Exception as e:
+            if 'last_stats_save' not in st.session_state:
+                st.session_state.last_stats_save = {}
+            st.session_state.last_stats_save['success'] = False
+            st.session_state.last_stats_save['error'] = str(e)
+            st.session_state.last_stats_save['timestamp'] = datetime.now()
+            st.error(f"⚠️ DATABASE SAVE FAILED! Large reports are not kept in memory, so nothing was loaded. Error: {e}")
+            st.warning("Please try uploading again or check database connection.")
+            return False, f"Streaming upload failed after {progress['rows']:,} rows ({e})"
+        
+        # Update global timestamp to invalidate impact cache
+        st.session_state['data_upload_timestamp'] = datetime.now().timestamp()
+        dataset_registry.invalidate(client_id)
+        
+        # Session works from the account's recent weekly data, like a fresh login
+        self.load_from_database(client_id)
+        
+        if 'last_stats_save' not in st.session_state:
+            st.session_state.last_stats_save = {}
+        st.session_state.last_stats_save['client_id'] = client_id
+        st.session_state.last_stats_save['start_date'] = progress['start'].date() if progress['start'] is not None else None
+        st.session_state.last_stats_save['saved_count'] = saved_count
+        st.session_state.last_stats_save['timestamp'] = datetime.now()
+        st.session_state.last_stats_save['success'] = True
+        
+        st.success(f"✅ Successfully saved {saved_count:,} rows to database!")
+        return True, (f"Streamed & Saved {saved_count:,} rows to Account '{client_id}' "
+                      f"({len(col_map)} cols mapped, {progress['chunks']} chunks)")
+
     def _populate_asin_cache(self, df: pd.DataFrame):
         """Populate ASIN cache with user's own products to prevent API lookups."""
         if df is None:
@@ -238,24 +392,23 @@ class DataHub:
             if not target_col:
                 return
 
-            count = 0
-            for _, row in df.iterrows():
-                val = str(row[target_col]).strip().upper()
-                
-                # Basic ASIN validation (starts with B, 10 chars)
-                if len(val) == 10 and val.startswith('B'):
-                    asin = val
-                else:
-                    continue
-                    
-                # Create a "dummy" but valid cache entry
-                # This makes the ASIN Mapper think we already fetched it
-                # We flag it as 'YOUR_PRODUCT' via brand/seller if needed, 
-                # but simply having it in cache prevents API call.
-                
+            # Basic ASIN validation (starts with B, 10 chars)
+            values = df[target_col].astype(str).str.strip().str.upper()
+            is_asin_like = (values.str.len() == 10) & values.str.startswith('B')
+            rows = df[is_asin_like.to_numpy()]
+            asins = values[is_asin_like].tolist()
+            
+            # Create "dummy" but valid cache entries
+            # This makes the ASIN Mapper think we already fetched them
+            # We flag them as 'YOUR_PRODUCT' via brand/seller if needed, 
+            # but simply having them in cache prevents API calls.
+            titles = rows[title_col].tolist() if title_col else [None] * len(rows)
+            skus = rows[sku_col].tolist() if sku_col else ['Unknown SKU'] * len(rows)
+            entries = []
+            for asin, title, sku in zip(asins, titles, skus):
                 cache_data = {
                     'asin': asin,
-                    'title': str(row[title_col]) if title_col and pd.notna(row[title_col]) else f"Your Product ({row.get(sku_col, 'Unknown SKU')})",
+                    'title': str(title) if title_col and pd.notna(title) else f"Your Product ({sku})",
                     'brand': 'Your Brand', 
                     'seller': 'Your Seller ID',
                     'price': None,
@@ -268,12 +421,11 @@ class DataHub:
                     'status': 'success',
                     'is_own_product': True # Custom flag we can check
                 }
-                
-                # Check if exists first to avoid overwriting rich API data with dummy data
-                # Only set if NOT exists
-                if not cache.get(asin):
-                    cache.set(asin, 'AE', cache_data)
-                    count += 1
+                entries.append((asin, cache_data))
+            
+            # One transaction; ASINs with live entries are skipped so rich API data is never
+            # overwritten by dummy data
+            count = cache.set_many('AE', entries, only_missing=True)
             
             cache.close()
             if count > 0:
@@ -299,7 +451,7 @@ class DataHub:
         df_renamed = df.rename(columns={v: k for k, v in col_map.items()})
         
         # Store
-        st.session_state.unified_data['advertised_product_report'] = df_renamed
+        self._store('advertised_product_report', df_renamed)
         st.session_state.unified_data['upload_status']['advertised_product_report'] = True
         
         if 'upload_timestamps' not in st.session_state.unified_data:
@@ -315,6 +467,7 @@ class DataHub:
              if client_id:
                  db = get_db_manager(st.session_state.get('test_mode', False))
                  db.save_advertised_product_map(df_renamed, client_id)
+                 dataset_registry.invalidate(client_id)
         except Exception as e:
              st.warning(f"Could not persist to DB: {e}")
 
@@ -364,12 +517,13 @@ class DataHub:
             return False, f"Could not find 'Campaign ID' column. Found: {list(df_renamed.columns)}"
 
         # Store
-        st.session_state.unified_data['bulk_id_mapping'] = df_renamed
+        self._store('bulk_id_mapping', df_renamed)
         st.session_state.unified_data['upload_status']['bulk_id_mapping'] = True
         
         if 'upload_timestamps' not in st.session_state.unified_data:
             st.session_state.unified_data['upload_timestamps'] = {}
         st.session_state.unified_data['upload_timestamps']['bulk_id_mapping'] = datetime.now()
+        self.get_bulk_id_index()
         
         # PERSIST TO DB
         try:
@@ -377,6 +531,7 @@ class DataHub:
              if client_id:
                  db = get_db_manager(st.session_state.get('test_mode', False))
                  db.save_bulk_mapping(df_renamed, client_id)
+                 dataset_registry.invalidate(client_id)
         except Exception as e:
              st.warning(f"Could not persist to DB: {e}")
         
@@ -398,7 +553,7 @@ class DataHub:
         # Flexible - just store whatever they upload
         # Expected: SKU, Category, Subcategory columns
         
-        st.session_state.unified_data['category_mapping'] = df
+        self._store('category_mapping', df)
         st.session_state.unified_data['upload_status']['category_mapping'] = True
         
         if 'upload_timestamps' not in st.session_state.unified_data:
@@ -414,6 +569,7 @@ class DataHub:
              if client_id:
                  db = get_db_manager(st.session_state.get('test_mode', False))
                  db.save_category_mapping(df, client_id)
+                 dataset_registry.invalidate(client_id)
         except Exception as e:
              st.warning(f"Could not persist to DB: {e}")
         
@@ -446,9 +602,9 @@ class DataHub:
         # =============================================
         # 2. IDs from Bulk File
         # =============================================
-        bulk = self.get_data('bulk_id_mapping')
-        if bulk is not None:
-            enriched, id_stats = MappingEngine.map_ids_from_bulk(enriched, bulk)
+        bulk_index = self.get_bulk_id_index()
+        if bulk_index is not None:
+            enriched, id_stats = MappingEngine.map_ids_from_bulk(enriched, bulk_index)
             # Show stats in UI
             pass # st.toast(f"🔗 ID Mapping: Campaign={id_stats['campaign_id_matched']}, KW={id_stats['keyword_id_matched']}, PT={id_stats['targeting_id_matched']}", icon="🆔")
         
@@ -463,7 +619,7 @@ class DataHub:
                 pass # st.toast(f"📊 Category Mapping: {cat_stats['matched']}/{cat_stats['total']} matched", icon="📁")
         
         # Store enriched data
-        st.session_state.unified_data['enriched_data'] = enriched
+        self._store('enriched_data', enriched, base='search_term_report', base_frame=st_report)
     
     def clear_all(self):
         """Clear all uploaded data."""
@@ -490,85 +646,94 @@ class DataHub:
     def load_from_database(self, account_id: str) -> bool:
         """Load account's RECENT data (last 4 weeks) from database into session state."""
         try:
-            db = get_db_manager(st.session_state.get('test_mode', False))
-            
-            # --- 1. Load TARGET STATS (Existing Logic) ---
-            # Get last 4 weeks of data for accurate monthly baseline
-            with db._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(f'''
-                    SELECT DISTINCT start_date FROM target_stats 
-                    WHERE client_id = {db.placeholder} 
-                    ORDER BY start_date DESC 
-                    LIMIT 4
-                ''', (account_id,))
-                recent_dates = [row['start_date'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()]
-            
-            if not recent_dates:
-                self.clear_all()
-                return False
-            
-            df = db.get_target_stats_by_account(account_id, limit=100000)
-            df = df[df['start_date'].isin(recent_dates)].copy()
-            
-            if df.empty:
-                self.clear_all()
-                return False
-            
-            # CRITICAL: Map database columns correctly
-            # target_text → Targeting (for bid optimization)
-            # customer_search_term → Customer Search Term (for harvest)
-            column_mapping = {
-                'campaign_name': 'Campaign Name',
-                'ad_group_name': 'Ad Group Name',
-                'target_text': 'Targeting',
-                'customer_search_term': 'Customer Search Term',
-                'match_type': 'Match Type',
-                'spend': 'Spend',
-                'sales': 'Sales',
-                'orders': 'Orders',
-                'clicks': 'Clicks',
-                'impressions': 'Impressions',
-                'start_date': 'Date'
-            }
+            test_mode = st.session_state.get('test_mode', False)
+            db = get_db_manager(test_mode)
+            
+            # Account datasets are read once per upload and shared by every session
+            # on the account (core.dataset_registry); _store keeps this session's copy
+            def _load_recent_stats():
+                # --- 1. Load TARGET STATS (Existing Logic) ---
+                # Get last 4 weeks of data for accurate monthly baseline
+                with db._get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(f'''
+                        SELECT DISTINCT start_date FROM target_stats 
+                        WHERE client_id = {db.placeholder} 
+                        ORDER BY start_date DESC 
+                        LIMIT 4
+                    ''', (account_id,))
+                    recent_dates = [row['start_date'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()]
+            
+                if not recent_dates:
+                    return None
+            
+                df = db.get_target_stats_by_account(account_id, limit=100000)
+                df = df[df['start_date'].isin(recent_dates)].copy()
+            
+                if df.empty:
+                    return None
+            
+                # CRITICAL: Map database columns correctly
+                # target_text → Targeting (for bid optimization)
+                # customer_search_term → Customer Search Term (for harvest)
+                column_mapping = {
+                    'campaign_name': 'Campaign Name',
+                    'ad_group_name': 'Ad Group Name',
+                    'target_text': 'Targeting',
+                    'customer_search_term': 'Customer Search Term',
+                    'match_type': 'Match Type',
+                    'spend': 'Spend',
+                    'sales': 'Sales',
+                    'orders': 'Orders',
+                    'clicks': 'Clicks',
+                    'impressions': 'Impressions',
+                    'start_date': 'Date'
+                }
             
-            df_renamed = df.rename(columns=column_mapping)
-            
-            # ========================================================
-            # CRITICAL FIX: Create 'Customer Search Term' from Targeting
-            # For raw file uploads, CST contains clean ASINs like "B0DF472VMZ"
-            # For DB data, Targeting contains "asin=\"B0DF472VMZ\""
-            # Strip the prefix to match raw file behavior for consistent ASIN detection
-            # ========================================================
-            if 'Customer Search Term' not in df_renamed.columns or df_renamed['Customer Search Term'].isna().all():
-                if 'Targeting' in df_renamed.columns:
-                    import re
+                df_renamed = df.rename(columns=column_mapping)
+            
+                # ========================================================
+                # CRITICAL FIX: Create 'Customer Search Term' from Targeting
+                # For raw file uploads, CST contains clean ASINs like "B0DF472VMZ"
+                # For DB data, Targeting contains "asin=\"B0DF472VMZ\""
+                # Strip the prefix to match raw file behavior for consistent ASIN detection
+                # ========================================================
+                if 'Customer Search Term' not in df_renamed.columns or df_renamed['Customer Search Term'].isna().all():
+                    if 'Targeting' in df_renamed.columns:
+                        import re
                     
-                    def extract_clean_cst(targeting):
-                        """Extract clean Customer Search Term from targeting expression.
-                        Strips asin=, asin-expanded=, category= prefixes and quotes.
-                        """
-                        if pd.isna(targeting):
-                            return targeting
-                        t = str(targeting).strip()
+                        def extract_clean_cst(targeting):
+                            """Extract clean Customer Search Term from targeting expression.
+                            Strips asin=, asin-expanded=, category= prefixes and quotes.
+                            """
+                            if pd.isna(targeting):
+                                return targeting
+                            t = str(targeting).strip()
                         
-                        # Handle asin="..." or asin-expanded="..."
-                        asin_match = re.match(r'^asin(?:-expanded)?=["\']?([A-Z0-9]{10})["\']?$', t, re.IGNORECASE)
-                        if asin_match:
-                            return asin_match.group(1).upper()
+                            # Handle asin="..." or asin-expanded="..."
+                            asin_match = re.match(r'^asin(?:-expanded)?=["\']?([A-Z0-9]{10})["\']?$', t, re.IGNORECASE)
+                            if asin_match:
+                                return asin_match.group(1).upper()
                         
-                        # Handle category="..." - extract category name
-                        cat_match = re.match(r'^category=["\']?(.+?)["\']?$', t, re.IGNORECASE)
-                        if cat_match:
-                            return cat_match.group(1)
+                            # Handle category="..." - extract category name
+                            cat_match = re.match(r'^category=["\']?(.+?)["\']?$', t, re.IGNORECASE)
+                            if cat_match:
+                                return cat_match.group(1)
                         
-                        # Return as-is for keywords and other targeting
-                        return t
+                            # Return as-is for keywords and other targeting
+                            return t
                     
-                    df_renamed['Customer Search Term'] = df_renamed['Targeting'].apply(extract_clean_cst)
+                        df_renamed['Customer Search Term'] = df_renamed['Targeting'].apply(extract_clean_cst)
             
-
-            st.session_state.unified_data['search_term_report'] = df_renamed
+                return df_renamed, recent_dates
+            
+            loaded = dataset_registry.get_or_load(account_id, 'recent_target_stats', (test_mode,), _load_recent_stats)
+            if loaded is None:
+                self.clear_all()
+                return False
+            df_renamed, recent_dates = loaded
+            
+            self._store('search_term_report', df_renamed)
             st.session_state.unified_data['upload_status']['search_term_report'] = True
             st.session_state.unified_data['upload_timestamps']['search_term_report'] = datetime.now()
             
@@ -577,25 +742,29 @@ class DataHub:
             st.session_state["should_log_actions"] = False
             
             # --- 2. Load BULK ID MAPPING (FIRST - before other mappings) ---
-            bulk_map = db.get_bulk_mapping(account_id)
+            bulk_map = dataset_registry.get_or_load(account_id, 'bulk_mapping', (test_mode,),
+                                                 lambda: db.get_bulk_mapping(account_id))
             if not bulk_map.empty:
-                 st.session_state.unified_data['bulk_id_mapping'] = bulk_map
+                 self._store('bulk_id_mapping', bulk_map)
                  st.session_state.unified_data['upload_status']['bulk_id_mapping'] = True
                  st.session_state.unified_data['upload_timestamps']['bulk_id_mapping'] = datetime.now()
+                 self.get_bulk_id_index()
                  pass # st.toast(f"🔗 Loaded {len(bulk_map)} bulk ID mappings from DB", icon="🆔")
             
             # --- 3. Load ADVERTISED PRODUCT MAP ---
-            adv_map = db.get_advertised_product_map(account_id)
+            adv_map = dataset_registry.get_or_load(account_id, 'advertised_product_map', (test_mode,),
+                                                 lambda: db.get_advertised_product_map(account_id))
             if not adv_map.empty:
-                 st.session_state.unified_data['advertised_product_report'] = adv_map
+                 self._store('advertised_product_report', adv_map)
                  st.session_state.unified_data['upload_status']['advertised_product_report'] = True
                  st.session_state.unified_data['upload_timestamps']['advertised_product_report'] = datetime.now()
                  pass # st.toast(f"📦 Loaded {len(adv_map)} advertised products from DB", icon="📦")
             
             # --- 4. Load CATEGORY MAPPING ---
-            cat_map = db.get_category_mappings(account_id)
+            cat_map = dataset_registry.get_or_load(account_id, 'category_mapping', (test_mode,),
+                                                 lambda: db.get_category_mappings(account_id))
             if not cat_map.empty:
-                 st.session_state.unified_data['category_mapping'] = cat_map
+                 self._store('category_mapping', cat_map)
                  st.session_state.unified_data['upload_status']['category_mapping'] = True
                  st.session_state.unified_data['upload_timestamps']['category_mapping'] = datetime.now()
                  pass # st.toast(f"📁 Loaded {len(cat_map)} category mappings from DB", icon="📁")
@@ -630,9 +799,11 @@ class DataHub:
     def get_summary(self) -> Dict[str, any]:
         """Get summary statistics of loaded data."""
         summary = {}
+        # Read the stored frames directly (column access only, no full rebuild)
+        stored = st.session_state.unified_data
         
         # Search term report
-        str_report = self.get_data('search_term_report')
+        str_report = stored.get('search_term_report')
         if str_report is not None:
             summary['search_terms'] = len(str_report)
             summary['total_clicks'] = str_report['Clicks'].sum() if 'Clicks' in str_report.columns else 0
@@ -640,19 +811,19 @@ class DataHub:
             summary['campaigns'] = str_report['Campaign Name'].nunique() if 'Campaign Name' in str_report.columns else 0
         
         # Advertised products
-        adv_report = self.get_data('advertised_product_report')
+        adv_report = stored.get('advertised_product_report')
         if adv_report is not None:
             summary['advertised_products'] = len(adv_report)
             summary['unique_asins'] = adv_report['ASIN'].nunique() if 'ASIN' in adv_report.columns else 0
         
         # Bulk IDs
-        bulk_ids = self.get_data('bulk_id_mapping')
+        bulk_ids = stored.get('bulk_id_mapping')
         if bulk_ids is not None:
             summary['mapped_campaigns'] = bulk_ids['Campaign Name'].nunique() if 'Campaign Name' in bulk_ids.columns else 0
             summary['mapped_adgroups'] = bulk_ids['Ad Group Name'].nunique() if 'Ad Group Name' in bulk_ids.columns else 0
         
         # Category mapping
-        cat_map = self.get_data('category_mapping')
+        cat_map = stored.get('category_mapping')
         if cat_map is not None:
             summary['categorized_skus'] = len(cat_map)
         
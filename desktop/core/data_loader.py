@@ -5,11 +5,28 @@ Centralized CSV/Excel reading and column mapping.
 All data ingestion goes through here.
 """
 
+import os
 import pandas as pd
 import re
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional
 import streamlit as st
 
+# Optional: openpyxl read-only mode streams .xlsx rows without loading the whole sheet
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+# Streaming ingest: rows per chunk, and the file size above which STR uploads stream
+STR_CHUNK_ROWS = int(os.getenv("STR_CHUNK_ROWS", "100000"))
+STR_STREAM_MIN_BYTES = int(os.getenv("STR_STREAM_MIN_MB", "25")) * 1024 * 1024
+
+# Standard columns read as categoricals (few distinct values, repeated on every row)
+STR_CATEGORY_COLUMNS = ("Campaign Name", "Ad Group Name", "Match Type")
+# Standard metric columns held as float32 in streamed chunks
+STR_METRIC_COLUMNS = ("Impressions", "Clicks", "Spend", "Sales", "Orders", "CPC")
+
 class SmartMapper:
     """Smart column mapper with alias support for Amazon PPC reports."""
     
@@ -124,6 +141,106 @@ def load_uploaded_file(uploaded_file) -> Optional[pd.DataFrame]:
         st.error(f"Error reading file: {str(e)}")
         return None
 
+def uploaded_file_size(uploaded_file) -> int:
+    """Size of an uploaded file in bytes (0 if unknown)."""
+    size = getattr(uploaded_file, 'size', None)
+    if size is None and hasattr(uploaded_file, 'seek'):
+        pos = uploaded_file.tell()
+        size = uploaded_file.seek(0, os.SEEK_END)
+        uploaded_file.seek(pos)
+    return int(size or 0)
+
+def read_header(uploaded_file) -> List[str]:
+    """
+    Read only the header row of an uploaded CSV or Excel file.
+    
+    Returns raw column names (not stripped); the file is rewound for the next read.
+    """
+    if uploaded_file.name.endswith('.csv'):
+        header = pd.read_csv(uploaded_file, encoding='utf-8-sig', nrows=0)
+    else:
+        header = pd.read_excel(uploaded_file, nrows=0)
+    uploaded_file.seek(0)
+    return [str(c) for c in header.columns]
+
+def _to_float32(series: pd.Series) -> pd.Series:
+    """Metric column to float32 (currency symbols stripped when the chunk parsed as text)."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.fillna(0).astype('float32')
+    return safe_numeric(series).astype('float32')
+
+def _iter_excel_chunks(uploaded_file, usecols: List[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of `chunksize` sheet rows, streaming .xlsx rows via openpyxl when available."""
+    if not (OPENPYXL_AVAILABLE and uploaded_file.name.endswith('.xlsx')):
+        # .xls / no openpyxl: the sheet has to be read whole, but is still normalized chunk by chunk
+        df = pd.read_excel(uploaded_file, usecols=usecols, dtype=object)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize].reset_index(drop=True)
+        return
+    
+    wb = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [str(c) if c is not None else '' for c in next(rows, ())]
+        keep = [i for i, c in enumerate(header) if c in usecols]
+        names = [header[i] for i in keep]
+        batch = []
+        for row in rows:
+            batch.append([row[i] if i < len(row) else None for i in keep])
+            if len(batch) == chunksize:
+                yield pd.DataFrame(batch, columns=names, dtype=object)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=names, dtype=object)
+    finally:
+        wb.close()
+
+def iter_uploaded_file(uploaded_file, col_map: Optional[Dict[str, str]] = None,
+                       chunksize: int = STR_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Stream an uploaded report as mapped, compactly typed chunks.
+    
+    Columns are mapped once from the header (SmartMapper) and only mapped columns are read.
+    Each chunk comes back renamed to standard names with categorical campaign / ad group /
+    match type columns, float32 metrics and text everywhere else, so peak memory is bounded
+    by the chunk size rather than the file size.
+    
+    Args:
+        uploaded_file: Streamlit UploadedFile object (or any named binary file object)
+        col_map: Standard -> file column map; built from the header when omitted
+        chunksize: Rows per chunk
+        
+    Yields:
+        DataFrame chunks with standard column names
+    """
+    raw_cols = read_header(uploaded_file)
+    if col_map is None:
+        col_map = SmartMapper.map_columns(pd.DataFrame(columns=[c.strip() for c in raw_cols]))
+    
+    # Invert map for renaming (Found -> Standard), same as the in-memory upload path
+    rename_map = {v: k for k, v in col_map.items()}
+    usecols = [c for c in raw_cols if c.strip() in rename_map]
+    categorical = {c for c in usecols if rename_map[c.strip()] in STR_CATEGORY_COLUMNS}
+    metrics = {c for c in usecols if rename_map[c.strip()] in STR_METRIC_COLUMNS}
+    
+    if uploaded_file.name.endswith('.csv'):
+        # Metrics are left to the parser: exports may carry currency symbols that a float dtype rejects
+        dtypes = {c: ('category' if c in categorical else str) for c in usecols if c not in metrics}
+        reader = pd.read_csv(uploaded_file, encoding='utf-8-sig', usecols=usecols, dtype=dtypes,
+                             chunksize=chunksize)
+    else:
+        reader = _iter_excel_chunks(uploaded_file, usecols, chunksize)
+    
+    for chunk in reader:
+        chunk.columns = chunk.columns.str.strip()
+        chunk = chunk.rename(columns=rename_map)
+        for col in chunk.columns:
+            if col in STR_METRIC_COLUMNS:
+                chunk[col] = _to_float32(chunk[col])
+            elif col in STR_CATEGORY_COLUMNS and not isinstance(chunk[col].dtype, pd.CategoricalDtype):
+                chunk[col] = chunk[col].astype('category')
+        yield chunk
+
 def safe_numeric(series: pd.Series) -> pd.Series:
     """Convert series to numeric, handling currency symbols and errors."""
     return pd.to_numeric(
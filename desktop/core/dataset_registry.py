@@ -0,0 +1,280 @@
+"""
+Process-wide Account Dataset Registry
+
+One read-only copy of each account's large read-mostly datasets (target stats, impact
+actions, the DataHub's database load) shared by every session in this process, instead
+of one pickled copy per st.cache_data entry plus one unpickled copy per reader.
+
+- Datasets are held as Arrow tables. view() hands each reader a DataFrame whose numeric
+  columns are zero-copy, read-only views of the shared buffers; text columns are built
+  per view with repeated strings deduplicated.
+- Views are copy-on-write: assigning a column (df['x'] = ...) replaces it in the reader's
+  frame only, filtering/.copy() give private writable frames, and an in-place write into
+  a shared column (df.loc[mask, 'Spend'] = 0) raises instead of corrupting other sessions.
+- Entries are reference counted (live views) and keyed by a per-account generation.
+  invalidate(client_id) is called by the same upload events that bump
+  data_upload_timestamp, so a new upload is a guaranteed miss in every session.
+- Concurrent misses for the same dataset load it once; other sessions wait for it.
+
+pyarrow is optional: if it is not installed, ARROW_AVAILABLE is False and datasets are
+shared as a single DataFrame handed out as copies (like core.query_cache).
+
+Usage:
+    from core.dataset_registry import dataset_registry
+
+    df = dataset_registry.get_or_load(client_id, 'target_stats', (), loader)
+    impact_df, summary = dataset_registry.get_or_load(client_id, 'impact', (14, 14), loader)
+    dataset_registry.invalidate(client_id)
+    dataset_registry.stats()  # {'hits': ..., 'live_views': ..., 'bytes': ..., ...}
+"""
+
+import copy
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+
+@dataclass
+class _Entry:
+    table: Any                      # pa.Table, or a DataFrame when Arrow can't hold the frame
+    extras: Tuple                   # plain Python values returned next to the frame (deep-copied per reader)
+    nbytes: int
+    loaded_at: float
+    # Object columns whose missing values were NaN: None if all were, else the NaN positions
+    nan_missing: Dict[str, Optional[np.ndarray]] = field(default_factory=dict)
+    refs: int = 0                   # live views
+    views: int = 0                  # views handed out over the entry's lifetime
+
+
+def _to_arrow(df: pd.DataFrame):
+    """
+    Arrow table holding df, or None when the frame doesn't survive the round trip
+    (mixed-type object columns, duplicate column names, dtype changes).
+    """
+    if not ARROW_AVAILABLE or not df.columns.is_unique:
+        return None, {}
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError, ValueError):
+        return None, {}
+    probe = table.slice(0, 0).to_pandas()
+    if not probe.dtypes.equals(df.dtypes) or not probe.columns.equals(df.columns):
+        return None, {}
+    # Arrow stores NaN in object columns as null, which comes back as None
+    nan_missing = {}
+    for col in df.columns:
+        if df[col].dtype == object:
+            positions = np.flatnonzero(df[col].isna().to_numpy())
+            is_none = np.array([v is None for v in df[col].to_numpy()[positions]], dtype=bool)
+            if len(positions) and not is_none.all():
+                nan_missing[col] = None if not is_none.any() else positions[~is_none]
+    return table, nan_missing
+
+
+class DatasetRegistry:
+    """
+    Thread-safe registry of shared, read-only account datasets.
+
+    Bounded by total bytes (least recently used idle entries are evicted first) and by
+    age, so data changed outside this process is picked up like the former cache TTL.
+    """
+
+    def __init__(self, max_bytes: int = 1024 * 1024 * 1024, ttl_seconds: float = 3600):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0  # bumped by invalidate() for every account
+        self._loading: Dict[Tuple, threading.Lock] = {}
+        # Re-entrant: a view finalized by garbage collection inside a locked section releases here
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.fallbacks = 0  # frames shared as DataFrame copies because Arrow couldn't hold them
+
+    # ---------- Lookup ----------
+
+    def _key(self, client_id: str, name: str, args: Tuple) -> Tuple:
+        return (client_id, (self._epoch, self._generations.get(client_id, 0)), name, args)
+
+    def _lookup(self, key: Tuple) -> Optional[_Entry]:
+        """Live entry for key (caller holds the lock)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.loaded_at > self.ttl_seconds:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_or_load(self, client_id: str, name: str, args: Tuple, loader: Callable[[], Any]) -> Any:
+        """
+        Shared view of a dataset, loading it once per account generation.
+
+        Args:
+            client_id: Account ID (the invalidation unit)
+            name: Dataset name, e.g. 'target_stats'
+            args: Hashable query arguments distinguishing variants of the dataset
+            loader: Returns a DataFrame, or a tuple whose first item is a DataFrame and
+                    whose other items are plain Python values (e.g. a summary dict).
+                    None is returned as is and not registered.
+
+        Returns:
+            Same shape as the loader's result, with the DataFrame as a read-only view.
+        """
+        with self._lock:
+            key = self._key(client_id, name, args)
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+            else:
+                load_lock = self._loading.setdefault(key, threading.Lock())
+        if entry is not None:
+            return self._hand_out(entry)
+
+        with load_lock:
+            with self._lock:
+                entry = self._lookup(key)  # loaded by another session while we waited
+                if entry is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if entry is None:
+                try:
+                    value = loader()
+                    if value is None:
+                        return None
+                    entry = self._register(key, value)
+                finally:
+                    with self._lock:
+                        self._loading.pop(key, None)
+                if entry is None:
+                    return value
+        return self._hand_out(entry)
+
+    # ---------- Storage ----------
+
+    def _register(self, key: Tuple, value: Any) -> Optional[_Entry]:
+        """Convert and store a loader result; None if it can't be shared."""
+        frame, extras = (value[0], tuple(value[1:])) if isinstance(value, tuple) else (value, ())
+        if not isinstance(frame, pd.DataFrame):
+            return None
+        table, nan_missing = _to_arrow(frame)
+        if table is None:
+            table, nbytes = frame, int(frame.memory_usage(index=True, deep=True).sum())
+        else:
+            nbytes = int(table.nbytes)
+        entry = _Entry(table=table, extras=extras, nbytes=nbytes, loaded_at=time.monotonic(),
+                       nan_missing=nan_missing)
+
+        with self._lock:
+            if table is frame:
+                self.fallbacks += 1
+            if nbytes > self.max_bytes:
+                return entry  # Larger than the whole budget - serve this reader, don't keep it
+            if self._key(key[0], key[2], key[3]) != key:
+                return entry  # Invalidated while loading - don't register stale data
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                idle = next((k for k, e in self._entries.items() if e.refs == 0 and k != key), None)
+                self._drop(idle if idle is not None else next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def _drop(self, key: Tuple):
+        """Forget an entry (caller holds the lock); live views keep their buffers alive."""
+        self._bytes -= self._entries.pop(key).nbytes
+
+    # ---------- Views ----------
+
+    def _hand_out(self, entry: _Entry) -> Any:
+        """Reader's view of an entry, in the loader's result shape."""
+        if isinstance(entry.table, pd.DataFrame):
+            frame = entry.table.copy()
+        else:
+            frame = self.view(entry)
+        with self._lock:
+            entry.views += 1
+        if not entry.extras:
+            return frame
+        return (frame,) + copy.deepcopy(entry.extras)
+
+    def view(self, entry: _Entry) -> pd.DataFrame:
+        """Zero-copy DataFrame over an entry's Arrow table, counted until garbage collected."""
+        frame = entry.table.to_pandas(split_blocks=True)
+        for col, positions in entry.nan_missing.items():
+            if positions is None:
+                frame[col] = frame[col].where(frame[col].notna(), np.nan)
+            else:
+                # Assign: writing through to_numpy() is read-only or a lost copy under Copy-on-Write
+                mask = np.zeros(len(frame), dtype=bool)
+                mask[positions] = True
+                frame[col] = frame[col].mask(mask, np.nan)
+        with self._lock:
+            entry.refs += 1
+        weakref.finalize(frame, self._release, entry)
+        return frame
+
+    def _release(self, entry: _Entry):
+        with self._lock:
+            entry.refs -= 1
+
+    # ---------- Invalidation / reporting ----------
+
+    def invalidate(self, client_id: Optional[str] = None):
+        """Drop every dataset for client_id (or everything if None) and start a new generation."""
+        with self._lock:
+            if client_id is None:
+                self._entries.clear()
+                self._bytes = 0
+                self._epoch += 1
+            else:
+                self._generations[client_id] = self._generations.get(client_id, 0) + 1
+                for key in [k for k in self._entries if k[0] == client_id]:
+                    self._drop(key)
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, live views and shared memory footprint."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'fallbacks': self.fallbacks,
+                'entries': len(self._entries),
+                'live_views': sum(e.refs for e in self._entries.values()),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'arrow': ARROW_AVAILABLE,
+            }
+
+
+# Global registry (shared by all sessions in this process)
+dataset_registry = DatasetRegistry(
+    max_bytes=int(os.getenv("DATASET_REGISTRY_MB", "1024")) * 1024 * 1024,
+    ttl_seconds=float(os.getenv("DATASET_REGISTRY_TTL", "3600")),
+)
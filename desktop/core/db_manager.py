@@ -14,6 +14,9 @@ import pandas as pd
 import uuid
 import os
 
+from core.action_log import ActionsLike, ACTION_LOG_COLUMNS, action_log_rows
+from core.dataset_registry import dataset_registry
+
 # Load environment variables from .env file
 try:
     from dotenv import load_dotenv
@@ -161,6 +164,13 @@ class DatabaseManager:
                 ON actions_log(client_id, action_date)
             """)
             
+            # MIGRATION: Harvest tracking columns
+            for col_name in ['winner_source_campaign', 'new_campaign_name', 'before_match_type', 'after_match_type']:
+                try:
+                    cursor.execute(f"SELECT {col_name} FROM actions_log LIMIT 1")
+                except sqlite3.OperationalError:
+                    cursor.execute(f"ALTER TABLE actions_log ADD COLUMN {col_name} TEXT")
+            
             # ==========================================
             # MAPPING TABLES (Persistence)
             # ==========================================
@@ -482,14 +492,24 @@ class DatabaseManager:
             df = pd.read_sql_query(query, conn, params=(account_id, limit))
             return df
             
-    def get_target_stats_df(self, client_id: str = 'default_client') -> pd.DataFrame:
+    def get_target_stats_df(self, client_id: str = 'default_client', columns: Optional[List[str]] = None,
+                            start_date: Union[date, str, None] = None, end_date: Union[date, str, None] = None) -> pd.DataFrame:
         """
         Retrieve ALL target stats for a client as DataFrame (not just latest week).
         Used by Account Overview to display full historical data.
+        Optional column subset and inclusive start_date/end_date bounds (same as PostgresManager).
         """
         conn = sqlite3.connect(str(self.db_path))
         try:
-            query = """
+            where = "client_id = ?"
+            params = [client_id]
+            if start_date is not None:
+                where += " AND start_date >= ?"
+                params.append(str(start_date)[:10])
+            if end_date is not None:
+                where += " AND start_date <= ?"
+                params.append(str(end_date)[:10])
+            query = f"""
                 SELECT 
                     start_date as Date,
                     campaign_name as 'Campaign Name',
@@ -502,10 +522,12 @@ class DatabaseManager:
                     clicks as Clicks,
                     impressions as Impressions
                 FROM target_stats 
-                WHERE client_id = ? 
+                WHERE {where} 
                 ORDER BY start_date DESC
             """
-            df = pd.read_sql(query, conn, params=(client_id,))
+            df = pd.read_sql(query, conn, params=tuple(params))
+            if columns:
+                df = df[[c for c in columns if c in df.columns]]
             
             # Post-processing types
             if not df.empty and 'Date' in df.columns:
@@ -1093,12 +1115,13 @@ class DatabaseManager:
     # ACTIONS LOG OPERATIONS
     # ==========================================
     
-    def log_action_batch(self, actions: List[Dict[str, Any]], client_id: str, batch_id: Optional[str] = None, action_date: Optional[str] = None) -> int:
+    def log_action_batch(self, actions: ActionsLike, client_id: str, batch_id: Optional[str] = None, action_date: Optional[str] = None) -> int:
         """
         Bulk insert actions into the actions log.
         
         Args:
-            actions: List of action dictionaries with keys:
+            actions: Action DataFrame (core.action_log.ACTION_COLUMNS) or list of
+                action dictionaries with keys:
                 entity_name, action_type, old_value, new_value, reason,
                 campaign_name, ad_group_name, target_text, match_type
             client_id: Client identifier
@@ -1108,7 +1131,7 @@ class DatabaseManager:
         Returns:
             Number of actions logged
         """
-        if not actions:
+        if actions is None or len(actions) == 0:
             return 0
         
         if batch_id is None:
@@ -1121,36 +1144,28 @@ class DatabaseManager:
         else:
             date_str = datetime.now().isoformat()
         
+        rows = action_log_rows(actions, client_id, batch_id, date_str)
+        data = list(zip(*(rows[col].tolist() for col in ACTION_LOG_COLUMNS)))
+        
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            cursor.executemany(f"""
+                INSERT OR REPLACE INTO actions_log 
+                ({", ".join(ACTION_LOG_COLUMNS)})
+                VALUES ({", ".join("?" * len(ACTION_LOG_COLUMNS))})
+            """, data)
             
-            for action in actions:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO actions_log 
-                    (action_date, client_id, batch_id, entity_name, action_type, old_value, new_value, 
-                     reason, campaign_name, ad_group_name, target_text, match_type,
-                     winner_source_campaign, new_campaign_name, before_match_type, after_match_type)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    date_str,
-                    client_id,
-                    batch_id,
-                    action.get('entity_name', ''),
-                    action.get('action_type', 'UNKNOWN'),
-                    str(action.get('old_value', '')),
-                    str(action.get('new_value', '')),
-                    action.get('reason', ''),
-                    action.get('campaign_name', ''),
-                    action.get('ad_group_name', ''),
-                    action.get('target_text', ''),
-                    action.get('match_type', ''),
-                    action.get('winner_source_campaign'),  # New field
-                    action.get('new_campaign_name'),  # New field
-                    action.get('before_match_type'),  # New field
-                    action.get('after_match_type')  # New field
-                ))
-            
-            return len(actions)
+            return len(data)
+    
+    def delete_action_batch(self, client_id: str, batch_id: str) -> int:
+        """Delete a specific action batch (for undo functionality)."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM actions_log WHERE client_id = ? AND batch_id = ?",
+                (client_id, batch_id)
+            )
+            return cursor.rowcount
     
     def get_actions_by_batch(self, batch_id: str) -> List[Dict[str, Any]]:
         """Get all actions for a specific batch."""
@@ -1599,8 +1614,10 @@ class DatabaseManager:
             cursor.execute("DELETE FROM target_stats WHERE client_id = ?", (account_id,))
             cursor.execute("DELETE FROM actions_log WHERE client_id = ?", (account_id,))
             cursor.execute("DELETE FROM accounts WHERE account_id = ?", (account_id,))
-            
-            return cursor.rowcount
+            deleted = cursor.rowcount
+        
+        dataset_registry.invalidate(account_id)
+        return deleted
     
     def reassign_data(self, from_account: str, to_account: str, date_range: tuple) -> int:
         """Move data between accounts for a date range."""
@@ -1636,8 +1653,10 @@ class DatabaseManager:
                 WHERE client_id = ? AND DATE(action_date) BETWEEN ? AND ?
             """, (to_account, from_account, start_date, end_date))
             total_updated += cursor.rowcount
-            
-            return total_updated
+        
+        dataset_registry.invalidate(from_account)
+        dataset_registry.invalidate(to_account)
+        return total_updated
 
 
 # ==========================================
@@ -0,0 +1,303 @@
+"""
+Bulk ID Index
+
+Persistent, pre-normalized lookup index over one Bulk ID Mapping file, shared by
+MappingEngine.map_ids_from_bulk (STR enrichment) and the optimizer's enrich_with_ids.
+
+Every key component (campaign, ad group, keyword / PT expression, match type) is
+normalized once and integer-coded. Each lookup table (strict keyword, relaxed
+keyword, PT, campaign/ad group fallback, bids) is grouped once on those codes and
+cached on the index, so enrichment calls only normalize the *distinct* values of
+the incoming frame and resolve them with a hashed get_indexer.
+
+Build one index per bulk upload (DataHub.get_bulk_id_index) and pass it wherever a
+bulk DataFrame was passed before.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# ==========================================
+# NORMALIZERS
+# ==========================================
+
+def normalize_name(series: pd.Series) -> pd.Series:
+    """Lowercase, alphanumeric only (MappingEngine.normalize)."""
+    return series.astype(str).str.lower().str.replace(r'[^a-z0-9]', '', regex=True).str.strip()
+
+
+def normalize_targeting(series: pd.Series) -> pd.Series:
+    """Remove 'asin=', 'category=' and quotes (MappingEngine.normalize_targeting)."""
+    s = series.astype(str).str.lower().str.strip()
+    s = s.str.replace(r'asin\s*=\s*', '', regex=True)
+    s = s.str.replace(r'category\s*=\s*', '', regex=True)
+    s = s.str.replace(r'["\']', '', regex=True)
+    return s.str.strip()
+
+
+def normalize_for_mapping(series: pd.Series) -> pd.Series:
+    """
+    Normalize and strip prefixes for robust matching (optimizer enrich_with_ids).
+    e.g., 'asin="B0123"' -> 'b0123', 'category="123"' -> '123'
+    """
+    s = series.astype(str).str.strip().str.lower()
+    # Remove common prefixes and quotes
+    s = s.str.replace(r'^(asin|category|asin-expanded|keyword-group)=', '', regex=True)
+    s = s.str.replace(r'^"', '', regex=True).str.replace(r'"$', '', regex=True)
+    # Final alphanumeric cleanup
+    return s.str.replace(r'[^a-z0-9]', '', regex=True)
+
+
+def normalize_match_type(series: pd.Series) -> pd.Series:
+    return series.astype(str).str.lower().str.strip()
+
+
+NORMALIZERS: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    'name': normalize_name,
+    'targeting': normalize_targeting,
+    'mapping': normalize_for_mapping,
+    'match': normalize_match_type,
+}
+
+# Auto targeting types (after normalize_targeting)
+AUTO_PT_PATTERN = 'closematch|loosematch|substitutes|complements'
+
+
+# ==========================================
+# LOOKUP TABLE
+# ==========================================
+
+class _Lookup:
+    """One grouped table: integer-coded composite key -> value columns."""
+
+    def __init__(self, keys: Sequence[np.ndarray], values: pd.DataFrame, agg: str = 'first'):
+        grouped = values.groupby(list(keys), sort=False)
+        grouped = grouped.first() if agg == 'first' else grouped.agg(agg)
+        self.keys = grouped.index
+        self.values = grouped.reset_index(drop=True)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def find(self, keys: Sequence[np.ndarray], index: pd.Index) -> pd.DataFrame:
+        """Rows for each query key (all-NaN where there is no match), aligned to index."""
+        if len(keys) == 1:
+            positions = self.keys.get_indexer(keys[0])
+        else:
+            positions = self.keys.get_indexer(pd.MultiIndex.from_arrays(list(keys)))
+        matched = self.values.reindex(positions)
+        matched.index = index
+        return matched
+
+
+# ==========================================
+# INDEX
+# ==========================================
+
+class BulkIdIndex:
+    """Pre-normalized, integer-coded ID lookup tables over a bulk file."""
+
+    # Column candidates (same precedence as the original merge-based code)
+    MAPPING_KW_COLS = ['Keyword Text', 'Customer Search Term', 'keyword_text', 'Keyword']
+    MAPPING_PT_COLS = ['Product Targeting Expression', 'TargetingExpression', 'targeting_expression']
+    MAPPING_KWID_COLS = ['Keyword ID', 'KeywordId', 'keyword_id', 'Keyword Id']
+    MAPPING_PTID_COLS = ['Product Targeting ID', 'TargetingId', 'targeting_id', 'Product Targeting Id']
+    OPTIMIZER_KW_COLS = ['Customer Search Term', 'Keyword Text', 'keyword_text']
+    OPTIMIZER_PT_COLS = ['TargetingExpression', 'Product Targeting Expression', 'targeting_expression']
+
+    def __init__(self, bulk: pd.DataFrame):
+        # A DataFrame or the hub's CompactFrame: only len/columns/index and column reads are used
+        self.bulk = bulk
+        self.empty = bulk is None or bulk.empty
+        self._vocab: Dict[str, Dict[str, int]] = {name: {} for name in NORMALIZERS}
+        self._bulk_codes: Dict[Tuple[str, str], np.ndarray] = {}
+        self._tables: Dict[str, Optional[_Lookup]] = {}
+        self._masks: Dict[str, np.ndarray] = {}
+        if not self.empty:
+            self._encode_bulk()
+
+    # ---------- Encoding ----------
+
+    def _encode(self, values: pd.Series, normalizer: str, grow: bool) -> np.ndarray:
+        """Normalize distinct values once and map them to integer codes (-1 = unknown)."""
+        raw_codes, uniques = pd.factorize(values.astype(str), use_na_sentinel=False)
+        normalized = NORMALIZERS[normalizer](pd.Series(uniques, dtype=object))
+        vocab = self._vocab[normalizer]
+        if grow:
+            unique_codes = np.array([vocab.setdefault(v, len(vocab)) for v in normalized], dtype=np.int64)
+        else:
+            unique_codes = np.array([vocab.get(v, -1) for v in normalized], dtype=np.int64)
+        return unique_codes[raw_codes] if len(unique_codes) else np.full(len(values), -1, dtype=np.int64)
+
+    def _encode_bulk(self) -> None:
+        """Normalize every bulk key column up front so the vocabularies are complete before any query."""
+        for col in ['Campaign Name', 'Ad Group Name']:
+            self._bulk_column(col, 'name')
+            self._bulk_column(col, 'mapping')
+        self._bulk_column('Match Type', 'match')
+        for col in [self._first_col(self.OPTIMIZER_KW_COLS), self._first_col(self.OPTIMIZER_PT_COLS)]:
+            if col:
+                self._bulk_column(col, 'mapping')
+        for col in [self._first_col(self.MAPPING_KW_COLS), self._first_col(self.MAPPING_PT_COLS)]:
+            if col:
+                self._bulk_column(col, 'targeting')
+
+    def encode(self, values: pd.Series, normalizer: str) -> np.ndarray:
+        """Integer codes of a query column (values never seen in the bulk file get -1)."""
+        return self._encode(values, normalizer, grow=False)
+
+    def encode_constant(self, value: str, length: int, normalizer: str) -> np.ndarray:
+        return self.encode(pd.Series([value]), normalizer).repeat(length)
+
+    def _bulk_column(self, column: Optional[str], normalizer: str) -> np.ndarray:
+        """Codes of a bulk column (missing column behaves like all '')."""
+        key = (column or '', normalizer)
+        if key not in self._bulk_codes:
+            if column and column in self.bulk.columns:
+                values = self.bulk[column]
+            else:
+                values = pd.Series([''] * len(self.bulk), index=self.bulk.index)
+            self._bulk_codes[key] = self._encode(values, normalizer, grow=True)
+        return self._bulk_codes[key]
+
+    def _first_col(self, candidates: List[str]) -> Optional[str]:
+        return next((c for c in candidates if c in self.bulk.columns), None)
+
+    def _table(self, name: str, build: Callable[[], Optional[_Lookup]]) -> Optional[_Lookup]:
+        if name not in self._tables:
+            self._tables[name] = None if self.empty else build()
+        return self._tables[name]
+
+    def _build(self, mask: np.ndarray, components: List[Tuple[Optional[str], str]],
+               value_cols: Dict[str, str], agg: str = 'first') -> Optional[_Lookup]:
+        """Group masked bulk rows by coded key components; value_cols maps bulk col -> output name."""
+        if not mask.any():
+            return None
+        keys = [self._bulk_column(col, norm)[mask] for col, norm in components]
+        values = self.bulk[list(value_cols)].loc[mask].rename(columns=value_cols).reset_index(drop=True)
+        return _Lookup(keys, values, agg)
+
+    def _valid_ids(self, column: str) -> np.ndarray:
+        ids = self.bulk[column]
+        return (ids.notna() & (ids != "") & (ids != "nan")).to_numpy()
+
+    def _non_blank(self, column: str) -> np.ndarray:
+        if column not in self._masks:
+            values = self.bulk[column]
+            self._masks[column] = (values.notna() & (values.astype(str).str.strip() != '')).to_numpy()
+        return self._masks[column]
+
+    def _bulk_contains(self, column: str, normalizer: str, pattern: str) -> np.ndarray:
+        """Regex test on the normalized bulk column, evaluated once per distinct value."""
+        codes = self._bulk_column(column, normalizer)
+        vocab = pd.Series(list(self._vocab[normalizer]), dtype=object)
+        return vocab.str.contains(pattern, regex=True).to_numpy(dtype=bool)[codes]
+
+    # ---------- Optimizer tables (enrich_with_ids) ----------
+
+    def optimizer_keyword_column(self) -> Optional[str]:
+        return None if self.empty else self._first_col(self.OPTIMIZER_KW_COLS)
+
+    def optimizer_keyword_table(self, strict: bool) -> Optional[_Lookup]:
+        """(campaign, ad group, keyword[, match type]) -> KeywordId, CampaignId, AdGroupId."""
+        def build():
+            kw_col = self.optimizer_keyword_column()
+            if not kw_col or not {'KeywordId', 'CampaignId', 'AdGroupId'} <= set(self.bulk.columns):
+                return None
+            components = [('Campaign Name', 'mapping'), ('Ad Group Name', 'mapping'), (kw_col, 'mapping')]
+            if strict:
+                components.append(('Match Type', 'match'))
+            cols = {'KeywordId': 'KeywordId', 'CampaignId': 'CampaignId', 'AdGroupId': 'AdGroupId'}
+            return self._build(self._valid_ids('KeywordId'), components, cols)
+        return self._table(f"optimizer_kw_{'strict' if strict else 'relaxed'}", build)
+
+    def optimizer_pt_table(self) -> Optional[_Lookup]:
+        """(campaign, ad group, PT expression) -> TargetingId, CampaignId, AdGroupId."""
+        def build():
+            pt_col = self._first_col(self.OPTIMIZER_PT_COLS)
+            if not pt_col or not {'TargetingId', 'CampaignId', 'AdGroupId'} <= set(self.bulk.columns):
+                return None
+            components = [('Campaign Name', 'mapping'), ('Ad Group Name', 'mapping'), (pt_col, 'mapping')]
+            cols = {'TargetingId': 'TargetingId', 'CampaignId': 'CampaignId', 'AdGroupId': 'AdGroupId'}
+            return self._build(self._valid_ids('TargetingId'), components, cols)
+        return self._table("optimizer_pt", build)
+
+    def optimizer_fallback_table(self) -> Optional[_Lookup]:
+        """(campaign, ad group) -> CampaignId, AdGroupId."""
+        def build():
+            cols = {c: c for c in ['CampaignId', 'AdGroupId'] if c in self.bulk.columns}
+            if not cols:
+                return None
+            components = [('Campaign Name', 'mapping'), ('Ad Group Name', 'mapping')]
+            return self._build(np.ones(len(self.bulk), dtype=bool), components, cols)
+        return self._table("optimizer_fallback", build)
+
+    # ---------- MappingEngine tables (map_ids_from_bulk) ----------
+
+    def has_ad_group_ids(self) -> bool:
+        return not self.empty and 'Ad Group Name' in self.bulk.columns and 'AdGroupId' in self.bulk.columns
+
+    def mapping_campaign_table(self, with_ad_group: bool) -> Optional[_Lookup]:
+        """(campaign[, ad group]) -> CampaignId[, AdGroupId]."""
+        def build():
+            if 'CampaignId' not in self.bulk.columns:
+                return None
+            components = [('Campaign Name', 'name')]
+            cols = {'CampaignId': 'CampaignId'}
+            if with_ad_group:
+                components.append(('Ad Group Name', 'name'))
+                cols['AdGroupId'] = 'AdGroupId'
+            return self._build(np.ones(len(self.bulk), dtype=bool), components, cols)
+        return self._table(f"mapping_campaign_{with_ad_group}", build)
+
+    def mapping_keyword_table(self, strict: bool) -> Optional[_Lookup]:
+        """(campaign, ad group, keyword[, match type]) -> KeywordId."""
+        def build():
+            kw_col = self._first_col(self.MAPPING_KW_COLS)
+            kwid_col = self._first_col(self.MAPPING_KWID_COLS)
+            if not kw_col or not kwid_col:
+                return None
+            components = [('Campaign Name', 'name'), ('Ad Group Name', 'name'), (kw_col, 'targeting')]
+            if strict:
+                components.append(('Match Type', 'match'))
+            return self._build(self._non_blank(kw_col), components, {kwid_col: 'KeywordId'})
+        return self._table(f"mapping_kw_{'strict' if strict else 'relaxed'}", build)
+
+    def mapping_pt_tables(self) -> Tuple[Optional[_Lookup], Optional[_Lookup]]:
+        """
+        PT lookups split into (specific, auto):
+        ASIN/Category PT keyed by (campaign, ad group, expression); Auto PT by (campaign, ad group).
+        """
+        pt_col = None if self.empty else self._first_col(self.MAPPING_PT_COLS)
+        ptid_col = None if self.empty else self._first_col(self.MAPPING_PTID_COLS)
+
+        def build(auto: bool):
+            def _build():
+                if not pt_col or not ptid_col:
+                    return None
+                rows = self._non_blank(pt_col)
+                is_auto = self._bulk_contains(pt_col, 'targeting', AUTO_PT_PATTERN)
+                components = [('Campaign Name', 'name'), ('Ad Group Name', 'name')]
+                if not auto:
+                    components.append((pt_col, 'targeting'))
+                return self._build(rows & (is_auto if auto else ~is_auto), components, {ptid_col: 'TargetingId'})
+            return _build
+
+        return self._table("mapping_pt_specific", build(False)), self._table("mapping_pt_auto", build(True))
+
+    def mapping_bid_table(self) -> Optional[_Lookup]:
+        """(campaign, ad group) -> mean Ad Group Default Bid / Bid."""
+        def build():
+            cols = {c: c for c in ['Ad Group Default Bid', 'Bid'] if c in self.bulk.columns}
+            if not cols:
+                return None
+            components = [('Campaign Name', 'name'), ('Ad Group Name', 'name')]
+            return self._build(np.ones(len(self.bulk), dtype=bool), components, cols, agg='mean')
+        return self._table("mapping_bids", build)
+
+    def stats(self) -> Dict[str, int]:
+        """Row counts of the tables built so far (for debugging)."""
+        return {name: len(table) for name, table in self._tables.items() if table is not None}
@@ -14,6 +14,8 @@ import numpy as np
 import re
 from typing import Optional, Tuple
 
+from core.id_index import BulkIdIndex, normalize_name, normalize_targeting
+
 
 class MappingEngine:
     """Centralized mapping engine for data enrichment."""
@@ -24,16 +26,12 @@ class MappingEngine:
     @staticmethod
     def normalize(series: pd.Series) -> pd.Series:
         """Normalize a Series for robust matching (lowercase, alphanumeric only)."""
-        return series.astype(str).str.lower().str.replace(r'[^a-z0-9]', '', regex=True).str.strip()
+        return normalize_name(series)
     
     @staticmethod
     def normalize_targeting(series: pd.Series) -> pd.Series:
         """Normalize targeting expressions (remove 'asin=', 'category=', quotes)."""
-        s = series.astype(str).str.lower().str.strip()
-        s = s.str.replace(r'asin\s*=\s*', '', regex=True)
-        s = s.str.replace(r'category\s*=\s*', '', regex=True)
-        s = s.str.replace(r'["\']', '', regex=True)
-        return s.str.strip()
+        return normalize_targeting(series)
     
     # =========================================================================
     # METHOD 1: Map SKU from Advertised Product Report
@@ -106,214 +104,111 @@ class MappingEngine:
     # METHOD 2: Map IDs from Bulk Upload File
     # =========================================================================
     @staticmethod
-    def map_ids_from_bulk(df: pd.DataFrame, bulk: pd.DataFrame) -> Tuple[pd.DataFrame, dict]:
+    def _fill_from(enriched: pd.DataFrame, found: pd.DataFrame) -> None:
+        """Add looked-up columns, or fill gaps in columns the report already has."""
+        for col in found.columns:
+            if col not in enriched.columns:
+                enriched[col] = found[col]
+            else:
+                enriched[col] = enriched[col].fillna(found[col])
+
+    @staticmethod
+    def map_ids_from_bulk(df: pd.DataFrame, bulk) -> Tuple[pd.DataFrame, dict]:
         """
         Maps CampaignId, AdGroupId, KeywordId, TargetingId from Bulk file.
         
+        Lookups are served by a BulkIdIndex, so the bulk side is normalized and
+        grouped once per upload; pass the index (DataHub.get_bulk_id_index) to reuse it.
+        
         Args:
             df: Search Term Report DataFrame
-            bulk: Bulk Upload File DataFrame
+            bulk: Bulk Upload File DataFrame or a prebuilt BulkIdIndex
             
         Returns:
             Tuple of (enriched DataFrame, stats dict)
         """
         stats = {'method': 'bulk', 'campaign_id_matched': 0, 'keyword_id_matched': 0, 
-                 'targeting_id_matched': 0, 'total': len(df)}
+                 'targeting_id_matched': 0, 'total': len(df) if df is not None else 0}
         
         if bulk is None or df is None:
             return df, stats
-            
-        enriched = df.copy()
+        
+        index = bulk if isinstance(bulk, BulkIdIndex) else BulkIdIndex(bulk)
+        if index.empty:
+            return df.copy(), stats
+        bulk = index.bulk
+        
+        # Every phase is a left join, so the result carries a fresh RangeIndex
+        enriched = df.reset_index(drop=True)
+        
+        # Normalized key codes, computed once per column and shared by all phases
+        codes = {}
+        
+        def code(col: str, normalizer: str) -> np.ndarray:
+            if (col, normalizer) not in codes:
+                codes[(col, normalizer)] = index.encode(enriched[col], normalizer)
+            return codes[(col, normalizer)]
         
         # ========== PHASE 1: Campaign & AdGroup IDs ===========
         if 'Campaign Name' in enriched.columns and 'Campaign Name' in bulk.columns:
-            if 'CampaignId' in bulk.columns:
-                # Normalize keys
-                enriched['_camp_norm'] = MappingEngine.normalize(enriched['Campaign Name'])
-                
-                bulk_norm = bulk.copy()
-                bulk_norm['_camp_norm'] = MappingEngine.normalize(bulk_norm['Campaign Name'])
-                
-                # Prepare merge columns
-                merge_cols = ['_camp_norm', 'CampaignId']
-                on_keys = ['_camp_norm']
-                
-                if 'Ad Group Name' in enriched.columns and 'Ad Group Name' in bulk.columns and 'AdGroupId' in bulk.columns:
-                    enriched['_ag_norm'] = MappingEngine.normalize(enriched['Ad Group Name'])
-                    bulk_norm['_ag_norm'] = MappingEngine.normalize(bulk_norm['Ad Group Name'])
-                    merge_cols.extend(['_ag_norm', 'AdGroupId'])
-                    on_keys.append('_ag_norm')
-                
-                # Dedupe and merge - CRITICAL: Use groupby().first() to enforce 1-to-1 mapping
-                # drop_duplicates() alone keeps duplicates if IDs differ for same name
-                # Fix: Exclude keys from value selection to avoid 'already exists' error on reset_index
-                val_cols = [c for c in merge_cols if c not in on_keys]
-                id_lookup = bulk_norm.groupby(on_keys)[val_cols].first().reset_index()
-                enriched = enriched.merge(id_lookup, on=on_keys, how='left')
+            with_ag = 'Ad Group Name' in enriched.columns and index.has_ad_group_ids()
+            id_lookup = index.mapping_campaign_table(with_ad_group=with_ag)
+            
+            if id_lookup is not None:
+                keys = [code('Campaign Name', 'name')]
+                if with_ag:
+                    keys.append(code('Ad Group Name', 'name'))
+                MappingEngine._fill_from(enriched, id_lookup.find(keys, enriched.index))
                 
                 # Stats
-                if 'CampaignId' in enriched.columns:
-                    stats['campaign_id_matched'] = enriched['CampaignId'].notna().sum()
-                
-                # Cleanup
-                enriched.drop(columns=['_camp_norm', '_ag_norm'], inplace=True, errors='ignore')
+                stats['campaign_id_matched'] = enriched['CampaignId'].notna().sum()
         
         # ========== PHASE 2: Keyword & Targeting IDs ===========
         if 'Targeting' in enriched.columns:
-            # Detect keyword column in bulk (try multiple names)
-            kw_col = next((c for c in ['Keyword Text', 'Customer Search Term', 'keyword_text', 'Keyword'] if c in bulk.columns), None)
-            pt_col = next((c for c in ['Product Targeting Expression', 'TargetingExpression', 'targeting_expression'] if c in bulk.columns), None)
-            
-            # Detect ID columns - TRY BOTH FORMATS (with and without spaces)
-            kwid_col = next((c for c in ['Keyword ID', 'KeywordId', 'keyword_id', 'Keyword Id'] if c in bulk.columns), None)
-            ptid_col = next((c for c in ['Product Targeting ID', 'TargetingId', 'targeting_id', 'Product Targeting Id'] if c in bulk.columns), None)
-            
-            # Prepare enriched normalized keys
-            enriched['_camp_norm'] = MappingEngine.normalize(enriched['Campaign Name'])
-            enriched['_ag_norm'] = MappingEngine.normalize(enriched['Ad Group Name'])
-            enriched['_target_norm'] = MappingEngine.normalize_targeting(enriched['Targeting'])
+            camp = code('Campaign Name', 'name')
+            ag = code('Ad Group Name', 'name')
+            target = code('Targeting', 'targeting')
             
             # ----- Keyword ID -----
-            if kw_col and kwid_col:
-                # Filter bulk to only keyword rows (non-empty keyword text)
-                kw_lookup = bulk[bulk[kw_col].notna() & (bulk[kw_col].astype(str).str.strip() != '')].copy()
+            strict_lookup = index.mapping_keyword_table(strict=True)
+            if strict_lookup is not None:
+                if 'Match Type' in enriched.columns:
+                    match = code('Match Type', 'match')
+                else:
+                    match = index.encode_constant('', len(enriched), 'match')
                 
-                if not kw_lookup.empty:
-                    kw_lookup = kw_lookup[['Campaign Name', 'Ad Group Name', kw_col, kwid_col, 'Match Type']].copy()
-                    
-                    kw_lookup['_camp_norm'] = MappingEngine.normalize(kw_lookup['Campaign Name'])
-                    kw_lookup['_ag_norm'] = MappingEngine.normalize(kw_lookup['Ad Group Name'])
-                    kw_lookup['_target_norm'] = MappingEngine.normalize_targeting(kw_lookup[kw_col])
-                    kw_lookup['_match_norm'] = kw_lookup['Match Type'].astype(str).str.lower().str.strip()
-                    
-                    # ENRICHED (STR) Normalization
-                    enriched['_match_norm'] = enriched['Match Type'].astype(str).str.lower().str.strip() if 'Match Type' in enriched.columns else ''
-                    
-                    # CRITICAL: Standardize to 'KeywordId' (no space) for internal use
-                    kw_lookup = kw_lookup.rename(columns={kwid_col: 'KeywordId'})
-                    
-                    # STRATEGY 1: Strict Match (Campaign + AG + Keyword + Match Type)
-                    # This handles the "phrase" vs "exact" collision correctly
-                    strict_lookup = kw_lookup.groupby(['_camp_norm', '_ag_norm', '_target_norm', '_match_norm'])['KeywordId'].first().reset_index()
-                    enriched = enriched.merge(strict_lookup, on=['_camp_norm', '_ag_norm', '_target_norm', '_match_norm'], how='left', suffixes=('', '_strict'))
-                    
-                    if 'KeywordId_strict' in enriched.columns:
-                        if 'KeywordId' not in enriched.columns:
-                            enriched['KeywordId'] = enriched['KeywordId_strict']
-                        else:
-                            enriched['KeywordId'] = enriched['KeywordId'].fillna(enriched['KeywordId_strict'])
-                        enriched.drop(columns=['KeywordId_strict'], inplace=True, errors='ignore')
-                        
-                    # STRATEGY 2: Relaxed Match (Campaign + AG + Keyword) - Fallback
-                    # Only for rows that didn't match strictly (e.g. if Match Type is missing or formatted differently)
-                    relaxed_lookup = kw_lookup.groupby(['_camp_norm', '_ag_norm', '_target_norm'])['KeywordId'].first().reset_index()
-                    enriched = enriched.merge(relaxed_lookup, on=['_camp_norm', '_ag_norm', '_target_norm'], how='left', suffixes=('', '_relaxed'))
-                    
-                    if 'KeywordId_relaxed' in enriched.columns:
-                        if 'KeywordId' not in enriched.columns:
-                            enriched['KeywordId'] = enriched['KeywordId_relaxed']
-                        else:
-                            enriched['KeywordId'] = enriched['KeywordId'].fillna(enriched['KeywordId_relaxed'])
-                        enriched.drop(columns=['KeywordId_relaxed'], inplace=True, errors='ignore')
-                    
-                    # Cleanup specific normalization col
-                    enriched.drop(columns=['_match_norm'], inplace=True, errors='ignore')
-                    
-                    stats['keyword_id_matched'] = enriched['KeywordId'].notna().sum()
-            
-            # ----- Targeting ID -----
-            if pt_col and ptid_col:
-                pt_lookup = bulk[bulk[pt_col].notna() & (bulk[pt_col].astype(str).str.strip() != '')].copy()
+                # STRATEGY 1: Strict Match (Campaign + AG + Keyword + Match Type)
+                # This handles the "phrase" vs "exact" collision correctly
+                MappingEngine._fill_from(enriched, strict_lookup.find([camp, ag, target, match], enriched.index))
+                
+                # STRATEGY 2: Relaxed Match (Campaign + AG + Keyword) - Fallback
+                relaxed_lookup = index.mapping_keyword_table(strict=False)
+                MappingEngine._fill_from(enriched, relaxed_lookup.find([camp, ag, target], enriched.index))
                 
-                if not pt_lookup.empty:
-                    pt_lookup = pt_lookup[['Campaign Name', 'Ad Group Name', pt_col, ptid_col]].copy()
-                    pt_lookup['_camp_norm'] = MappingEngine.normalize(pt_lookup['Campaign Name'])
-                    pt_lookup['_ag_norm'] = MappingEngine.normalize(pt_lookup['Ad Group Name'])
-                    pt_lookup['_target_norm'] = MappingEngine.normalize_targeting(pt_lookup[pt_col])
-                    
-                    # CRITICAL: Standardize to 'TargetingId' (no space) for internal use
-                    pt_lookup = pt_lookup.rename(columns={ptid_col: 'TargetingId'})
-                    
-                    # Check if it's auto targeting (close-match, loose-match, etc.)
-                    pt_lookup['_is_auto'] = pt_lookup['_target_norm'].str.contains('closematch|loosematch|substitutes|complements', regex=True)
-                    
-                    # Split: Auto PT vs ASIN/Category PT
-                    auto_pt = pt_lookup[pt_lookup['_is_auto']].copy()
-                    specific_pt = pt_lookup[~pt_lookup['_is_auto']].copy()
-                    
-                    # For ASIN/Category PT: Strict match on targeting expression
-                    if not specific_pt.empty:
-                        # CRITICAL: Enforce uniqueness on join keys
-                        specific_pt = specific_pt.groupby(['_camp_norm', '_ag_norm', '_target_norm'])['TargetingId'].first().reset_index()
-                        enriched = enriched.merge(specific_pt, on=['_camp_norm', '_ag_norm', '_target_norm'], how='left', suffixes=('', '_spec'))
-                        
-                        if 'TargetingId_spec' in enriched.columns:
-                            if 'TargetingId' not in enriched.columns:
-                                enriched['TargetingId'] = enriched['TargetingId_spec']
-                            else:
-                                enriched['TargetingId'] = enriched['TargetingId'].fillna(enriched['TargetingId_spec'])
-                            enriched.drop(columns=['TargetingId_spec'], inplace=True, errors='ignore')
-                    
-                    # For Auto PT: Match on campaign + ad group only
-                    if not auto_pt.empty:
-                        auto_agg = auto_pt.groupby(['_camp_norm', '_ag_norm'])['TargetingId'].first().reset_index()
-                        enriched = enriched.merge(auto_agg, on=['_camp_norm', '_ag_norm'], how='left', suffixes=('', '_auto'))
-                        
-                        if 'TargetingId_auto' in enriched.columns:
-                            if 'TargetingId' not in enriched.columns:
-                                enriched['TargetingId'] = enriched['TargetingId_auto']
-                            else:
-                                enriched['TargetingId'] = enriched['TargetingId'].fillna(enriched['TargetingId_auto'])
-                            enriched.drop(columns=['TargetingId_auto'], inplace=True, errors='ignore')
-                        
-                    stats['targeting_id_matched'] = enriched['TargetingId'].notna().sum()
+                stats['keyword_id_matched'] = enriched['KeywordId'].notna().sum()
             
-            # Cleanup
-            enriched.drop(columns=['_camp_norm', '_ag_norm', '_target_norm'], inplace=True, errors='ignore')
+            # ----- Targeting ID -----
+            # ASIN/Category PT: strict match on targeting expression; Auto PT: campaign + ad group only
+            specific_pt, auto_pt = index.mapping_pt_tables()
+            if specific_pt is not None:
+                MappingEngine._fill_from(enriched, specific_pt.find([camp, ag, target], enriched.index))
+            if auto_pt is not None:
+                MappingEngine._fill_from(enriched, auto_pt.find([camp, ag], enriched.index))
+            if specific_pt is not None or auto_pt is not None:
+                stats['targeting_id_matched'] = enriched['TargetingId'].notna().sum()
         
         # ========== PHASE 3: Bid Columns ===========
-        # Map Ad Group Default Bid and Keyword Bid from bulk file
-        if 'Ad Group Default Bid' in bulk.columns or 'Bid' in bulk.columns:
-            # Normalize keys for matching
-            enriched['_camp_norm'] = MappingEngine.normalize(enriched['Campaign Name'])
-            enriched['_ag_norm'] = MappingEngine.normalize(enriched['Ad Group Name'])
-            
-            bulk_norm = bulk.copy()
-            bulk_norm['_camp_norm'] = MappingEngine.normalize(bulk_norm['Campaign Name'])
-            bulk_norm['_ag_norm'] = MappingEngine.normalize(bulk_norm['Ad Group Name'])
-            
-            # Build bid lookup: Campaign + Ad Group -> Bid values
-            bid_cols = ['_camp_norm', '_ag_norm']
-            if 'Ad Group Default Bid' in bulk.columns:
-                bid_cols.append('Ad Group Default Bid')
-            if 'Bid' in bulk.columns:
-                bid_cols.append('Bid')
-            
-            # Aggregate: take mean of available bids per Campaign + Ad Group
-            agg_dict = {col: 'mean' for col in bid_cols if col not in ['_camp_norm', '_ag_norm']}
-            bid_lookup = bulk_norm[bid_cols].groupby(['_camp_norm', '_ag_norm']).agg(agg_dict).reset_index()
-            
-            # Merge bid data
-            enriched = enriched.merge(bid_lookup, on=['_camp_norm', '_ag_norm'], how='left', suffixes=('', '_bulk'))
-            
-            # Handle suffix conflicts
-            for col in ['Ad Group Default Bid', 'Bid']:
-                bulk_col = f'{col}_bulk'
-                if bulk_col in enriched.columns:
-                    if col not in enriched.columns:
-                        enriched[col] = enriched[bulk_col]
-                    else:
-                        enriched[col] = enriched[col].fillna(enriched[bulk_col])
-                    enriched.drop(columns=[bulk_col], inplace=True, errors='ignore')
+        # Map Ad Group Default Bid and Keyword Bid from bulk file (mean per Campaign + Ad Group)
+        bid_lookup = index.mapping_bid_table()
+        if bid_lookup is not None:
+            found = bid_lookup.find([code('Campaign Name', 'name'), code('Ad Group Name', 'name')], enriched.index)
+            MappingEngine._fill_from(enriched, found)
             
             # Stats
             if 'Ad Group Default Bid' in enriched.columns:
                 stats['default_bid_matched'] = enriched['Ad Group Default Bid'].notna().sum()
             if 'Bid' in enriched.columns:
                 stats['bid_matched'] = enriched['Bid'].notna().sum()
-            
-            # Cleanup
-            enriched.drop(columns=['_camp_norm', '_ag_norm'], inplace=True, errors='ignore')
         
         return enriched, stats
     
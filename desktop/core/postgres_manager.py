@@ -55,10 +55,12 @@ except ImportError:
         
     except ImportError:
         raise ImportError("No Postgres driver found.")
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, Iterable, Tuple
 from datetime import date, datetime, timedelta
 from contextlib import contextmanager
+import numpy as np
 import pandas as pd
+import io
 import uuid
 import time
 import functools
@@ -93,30 +95,25 @@ HARVEST_VALIDATION_CONFIG = {
 }
 
 # ==========================================
-# PERFORMANCE: Simple TTL Cache
+# PERFORMANCE: Shared result cache
 # ==========================================
-class TTLCache:
-    """Simple time-based cache for query results."""
-    def __init__(self, ttl_seconds: int = 60):
-        self._cache = {}
-        self._ttl = ttl_seconds
-    
-    def get(self, key: str) -> Optional[Any]:
-        if key in self._cache:
-            value, timestamp = self._cache[key]
-            if time.time() - timestamp < self._ttl:
-                return value
-            del self._cache[key]
-        return None
-    
-    def set(self, key: str, value: Any):
-        self._cache[key] = (value, time.time())
-    
-    def clear(self):
-        self._cache.clear()
+# Process-wide LRU cache for target_stats reads, keyed by (client_id, data watermark).
+# Writers below call target_stats_cache.invalidate(client_id); the watermark also
+# catches writes made by other processes. Replaces the old TTLCache, which served stale data.
+from core.query_cache import target_stats_cache
+# Shared per-account datasets (DataHub loads, impact fetchers); dropped when an account's data moves
+from core.dataset_registry import dataset_registry
 
-# Global cache instance
-# _query_cache = TTLCache(ttl_seconds=60)  # REMOVED: Rely on Streamlit cache
+# Local columnar snapshots of target_stats (opt-in via ENABLE_TARGET_STATS_SNAPSHOTS=1, needs pyarrow)
+from core.snapshot_store import TargetStatsSnapshotStore, TARGET_STATS_COLUMNS, SNAPSHOTS_AVAILABLE
+
+# Columnar actions_log rows shared with the SQLite manager
+from core.action_log import ActionsLike, ACTION_LOG_COLUMNS, action_log_rows
+_snapshot_store = (
+    TargetStatsSnapshotStore()
+    if SNAPSHOTS_AVAILABLE and os.getenv("ENABLE_TARGET_STATS_SNAPSHOTS", "0") == "1"
+    else None
+)
 
 def retry_on_connection_error(max_retries: int = 3, base_delay: float = 1.0):
     """Decorator for retrying database operations with exponential backoff."""
@@ -140,6 +137,15 @@ def retry_on_connection_error(max_retries: int = 3, base_delay: float = 1.0):
         return wrapper
     return decorator
 
+def _action_key_sql(alias: str = "") -> str:
+    """SQL expression identifying one aggregated action (target/campaign/ad group/match/type/week) in actions_log."""
+    p = f"{alias}." if alias else ""
+    week_start = f"DATE({p}action_date - (MOD((EXTRACT(DOW FROM {p}action_date)::int - 2 + 7), 7)) * INTERVAL '1 day')"
+    return (
+        f"md5(concat_ws(chr(31), COALESCE({p}target_text, ''), COALESCE({p}campaign_name, ''), "
+        f"COALESCE({p}ad_group_name, ''), COALESCE({p}match_type, ''), {p}action_type, {week_start}::text))"
+    )
+
 class PostgresManager:
     """
     PostgreSQL persistence for Supabase / Cloud Postgres.
@@ -328,6 +334,10 @@ class PostgresManager:
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_actions_log_batch ON actions_log(batch_id, action_date)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_actions_log_client ON actions_log(client_id, action_date)")
                 
+                # MIGRATION: Harvest tracking columns (written by log_action_batch)
+                for col_name in ['winner_source_campaign', 'new_campaign_name', 'before_match_type', 'after_match_type']:
+                    cursor.execute(f"ALTER TABLE actions_log ADD COLUMN IF NOT EXISTS {col_name} TEXT")
+                
                 # Category Mappings
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS category_mappings (
@@ -493,6 +503,62 @@ class PostgresManager:
                 """)
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_shared_reports_client ON shared_reports(client_id)")
 
+                # Action Impact Windows (materialized per-action before/after stats per horizon)
+                # Refreshed incrementally by refresh_action_impact_windows()
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS action_impact_windows (
+                        client_id TEXT NOT NULL,
+                        before_days INTEGER NOT NULL,
+                        after_days INTEGER NOT NULL,
+                        action_key TEXT NOT NULL,
+                        action_date TIMESTAMP,
+                        action_type TEXT,
+                        target_text TEXT,
+                        campaign_name TEXT,
+                        ad_group_name TEXT,
+                        match_type TEXT,
+                        old_value TEXT,
+                        new_value TEXT,
+                        reason TEXT,
+                        before_date TIMESTAMP,
+                        before_end_date TIMESTAMP,
+                        after_date TIMESTAMP,
+                        after_end TIMESTAMP,
+                        actual_before_days INTEGER,
+                        before_spend DOUBLE PRECISION,
+                        before_sales DOUBLE PRECISION,
+                        before_clicks BIGINT,
+                        before_impressions BIGINT,
+                        before_orders BIGINT,
+                        observed_after_spend DOUBLE PRECISION,
+                        observed_after_sales DOUBLE PRECISION,
+                        after_clicks BIGINT,
+                        after_impressions BIGINT,
+                        after_orders BIGINT,
+                        match_level TEXT,
+                        rolling_30d_spc DOUBLE PRECISION,
+                        computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (client_id, before_days, after_days, action_key)
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_aiw_read ON action_impact_windows(client_id, before_days, after_days, action_date DESC)")
+                
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS action_impact_watermarks (
+                        client_id TEXT NOT NULL,
+                        before_days INTEGER NOT NULL,
+                        after_days INTEGER NOT NULL,
+                        stats_updated_at TIMESTAMP,
+                        latest_date DATE,
+                        refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (client_id, before_days, after_days)
+                    )
+                """)
+                
+                # MIGRATION: staleness is flagged by the writers (see _mark_action_impact_stale)
+                cursor.execute("ALTER TABLE action_impact_watermarks ADD COLUMN IF NOT EXISTS actions_changed BOOLEAN DEFAULT FALSE")
+                cursor.execute("ALTER TABLE action_impact_watermarks ADD COLUMN IF NOT EXISTS changed_from DATE")
+
     def save_weekly_stats(self, client_id: str, start_date: date, end_date: date, spend: float, sales: float, roas: Optional[float] = None) -> int:
         if roas is None:
             roas = sales / spend if spend > 0 else 0.0
@@ -669,33 +735,150 @@ class PostgresManager:
                                 impressions = EXCLUDED.impressions,
                                 updated_at = CURRENT_TIMESTAMP
                         """, records)
+                        self._mark_action_impact_stale(cursor, client_id, changed_from=week_start_str)
                 
                 total_saved += len(records)
         
+        if total_saved:
+            target_stats_cache.invalidate(client_id)
         return total_saved
 
     # ==========================================
     # RAW SEARCH TERM DATA STORAGE
     # ==========================================
     
-    def save_raw_search_term_data(self, df: pd.DataFrame, client_id: str, batch_size: int = 5000) -> int:
+    # Staging table shared by the one-shot and streaming raw saves; seq keeps upload order
+    # so the merge can keep the first occurrence of each key across chunks
+    _RAW_STAGING_DDL = """
+        CREATE TEMP TABLE raw_st_staging (
+            seq BIGSERIAL,
+            client_id TEXT,
+            report_date DATE,
+            campaign_name TEXT,
+            ad_group_name TEXT,
+            targeting TEXT,
+            customer_search_term TEXT,
+            match_type TEXT,
+            impressions INTEGER,
+            clicks INTEGER,
+            spend DOUBLE PRECISION,
+            sales DOUBLE PRECISION,
+            orders INTEGER
+        ) ON COMMIT DROP
+    """
+    _RAW_COLUMNS = ['client_id', 'report_date', 'campaign_name', 'ad_group_name', 'targeting',
+                    'customer_search_term', 'match_type', 'impressions', 'clicks', 'spend', 'sales', 'orders']
+    _RAW_KEY_COLUMNS = ['client_id', 'report_date', 'campaign_name', 'ad_group_name', 'targeting',
+                        'customer_search_term']
+    
+    def save_raw_search_term_data(self, df: pd.DataFrame, client_id: str,
+                                  batch_size: int = 100000) -> Tuple[int, List[str]]:
         """
         Save raw daily search term data BEFORE weekly aggregation.
         Preserves original granularity for re-aggregation and auditing.
         
         Flow: Upload → raw_search_term_data (daily) → reaggregate → target_stats (weekly)
         
+        Columnar ingest: rows are normalized and deduplicated with vectorized pandas ops,
+        streamed into a temp staging table with COPY FROM STDIN, then merged into
+        raw_search_term_data with a single INSERT ... SELECT ... ON CONFLICT.
+        
         Args:
             df: DataFrame with Date, Campaign Name, Ad Group Name, Targeting, 
                 Customer Search Term, Match Type, Impressions, Clicks, Spend, Sales, Orders
             client_id: Account identifier
-            batch_size: Rows per batch insert (default 5000 for large uploads)
+            batch_size: Rows per COPY chunk (bounds the in-memory CSV buffer)
         
         Returns:
-            Number of rows saved
+            (rows saved, Monday week starts touched) - pass the weeks to reaggregate_target_stats
         """
         if df is None or df.empty:
-            return 0
+            return 0, []
+        return self.save_raw_search_term_chunks([df], client_id, batch_size=batch_size)
+    
+    def save_raw_search_term_chunks(self, chunks: Iterable[pd.DataFrame], client_id: str,
+                                    batch_size: int = 100000) -> Tuple[int, List[str]]:
+        """
+        Streaming variant of save_raw_search_term_data for uploads read in chunks.
+        
+        Each chunk is normalized and COPYed into the staging table as soon as it arrives,
+        so only one chunk is held in memory; one merge at the end upserts the whole upload
+        (first occurrence of a key wins across chunks, like the one-shot save).
+        
+        Args:
+            chunks: Iterable of DataFrames with the save_raw_search_term_data columns
+            client_id: Account identifier
+            batch_size: Rows per COPY call within a chunk
+        
+        Returns:
+            (rows saved, Monday week starts touched) - pass the weeks to reaggregate_target_stats
+        """
+        t0 = time.perf_counter()
+        col_list = ", ".join(self._RAW_COLUMNS)
+        key_list = ", ".join(self._RAW_KEY_COLUMNS)
+        weeks = set()
+        staged = 0
+        
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(self._RAW_STAGING_DDL)
+                
+                for chunk in chunks:
+                    records, chunk_weeks = self._raw_search_term_records(chunk, client_id)
+                    if records is None:
+                        continue
+                    weeks.update(chunk_weeks)
+                    staged += len(records)
+                    for i in range(0, len(records), batch_size):
+                        buf = io.StringIO()
+                        records.iloc[i:i + batch_size].to_csv(buf, index=False, header=False, na_rep='\\N')
+                        buf.seek(0)
+                        cursor.copy_expert(
+                            f"COPY raw_st_staging ({col_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                            buf
+                        )
+                
+                if not staged:
+                    return 0, []
+                
+                # Merge with ON CONFLICT for deduplication
+                # If same row is uploaded again, update metrics instead of duplicating
+                cursor.execute(f"""
+                    INSERT INTO raw_search_term_data ({col_list})
+                    SELECT {col_list} FROM (
+                        SELECT DISTINCT ON ({key_list}) {col_list}
+                        FROM raw_st_staging
+                        ORDER BY {key_list}, seq
+                    ) first_rows
+                    ON CONFLICT (client_id, report_date, campaign_name, ad_group_name, targeting, customer_search_term)
+                    DO UPDATE SET
+                        match_type = EXCLUDED.match_type,
+                        impressions = EXCLUDED.impressions,
+                        clicks = EXCLUDED.clicks,
+                        spend = EXCLUDED.spend,
+                        sales = EXCLUDED.sales,
+                        orders = EXCLUDED.orders,
+                        uploaded_at = CURRENT_TIMESTAMP
+                """)
+                total_saved = cursor.rowcount
+        
+        target_stats_cache.invalidate(client_id)
+        elapsed = time.perf_counter() - t0
+        rate = total_saved / elapsed if elapsed > 0 else float(total_saved)
+        print(f"RAW_SAVE: Upserted {total_saved} daily rows to raw_search_term_data for {client_id} "
+              f"in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+        return total_saved, sorted(weeks)
+    
+    def _raw_search_term_records(self, df: pd.DataFrame, client_id: str):
+        """
+        Normalize an upload (or upload chunk) into raw_search_term_data rows.
+        
+        Returns:
+            (records DataFrame in _RAW_COLUMNS order, Monday week starts touched),
+            or (None, []) when the frame has no savable rows
+        """
+        if df is None or df.empty:
+            return None, []
         
         # Determine date column
         date_col = None
@@ -706,7 +889,7 @@ class PostgresManager:
         
         if date_col is None:
             print("WARNING: No date column found in raw data upload")
-            return 0
+            return None, []
         
         # Required columns
         camp_col = next((c for c in ['Campaign Name', 'campaign_name'] if c in df.columns), None)
@@ -714,83 +897,68 @@ class PostgresManager:
         
         if not camp_col or not ag_col:
             print("WARNING: Missing Campaign Name or Ad Group Name columns")
-            return 0
+            return None, []
         
         # Optional columns
         targeting_col = next((c for c in ['Targeting', 'targeting'] if c in df.columns), None)
         cst_col = next((c for c in ['Customer Search Term', 'customer_search_term'] if c in df.columns), None)
         mt_col = next((c for c in ['Match Type', 'match_type'] if c in df.columns), None)
         
-        # Prepare records
-        records = []
-        for _, row in df.iterrows():
-            # Parse date
-            report_date = pd.to_datetime(row[date_col], errors='coerce')
-            if pd.isna(report_date):
-                continue
-            
-            records.append((
-                client_id,
-                report_date.date().isoformat(),
-                str(row[camp_col]).lower().strip() if pd.notna(row[camp_col]) else '',
-                str(row[ag_col]).lower().strip() if pd.notna(row[ag_col]) else '',
-                str(row[targeting_col]).lower().strip() if targeting_col and pd.notna(row.get(targeting_col)) else None,
-                str(row[cst_col]).lower().strip() if cst_col and pd.notna(row.get(cst_col)) else None,
-                str(row[mt_col]).lower().strip() if mt_col and pd.notna(row.get(mt_col)) else None,
-                int(row.get('Impressions', 0) or 0),
-                int(row.get('Clicks', 0) or 0),
-                float(row.get('Spend', 0) or 0),
-                float(row.get('Sales', 0) or 0),
-                int(row.get('Orders', 0) or 0)
-            ))
-        
-        if not records:
-            return 0
-        
-        # Deduplicate records to avoid "ON CONFLICT DO UPDATE command cannot affect row a second time"
-        # The unique constraint is (client_id, report_date, campaign_name, ad_group_name, targeting, customer_search_term)
-        # These correspond to indices 0, 1, 2, 3, 4, 5 in the tuple
-        seen_keys = set()
-        unique_records = []
-        for r in records:
-            # Create a key tuple for the unique constraint
-            # Treat None as a distinct value, but ensure consistent hashing
-            key = (r[0], r[1], r[2], r[3], r[4], r[5])
-            if key not in seen_keys:
-                seen_keys.add(key)
-                unique_records.append(r)
-        
-        records = unique_records
-        
-        if not records:
-            return 0
-        
-        # Batch insert with ON CONFLICT for deduplication
-        # If same row is uploaded again, update metrics instead of duplicating
-        total_saved = 0
-        with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                for i in range(0, len(records), batch_size):
-                    batch = records[i:i + batch_size]
-                    execute_values(cursor, """
-                        INSERT INTO raw_search_term_data 
-                        (client_id, report_date, campaign_name, ad_group_name, targeting, 
-                         customer_search_term, match_type, impressions, clicks, spend, sales, orders)
-                        VALUES %s
-                        ON CONFLICT (client_id, report_date, campaign_name, ad_group_name, targeting, customer_search_term)
-                        DO UPDATE SET
-                            match_type = EXCLUDED.match_type,
-                            impressions = EXCLUDED.impressions,
-                            clicks = EXCLUDED.clicks,
-                            spend = EXCLUDED.spend,
-                            sales = EXCLUDED.sales,
-                            orders = EXCLUDED.orders,
-                            uploaded_at = CURRENT_TIMESTAMP
-                    """, batch)
-                    total_saved += len(batch)
-        
-        print(f"RAW_SAVE: Upserted {total_saved} daily rows to raw_search_term_data for {client_id}")
-        return total_saved
+        # Parse dates once for the whole column ('mixed' keeps per-value format inference)
+        dates = df[date_col]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, errors='coerce', format='mixed')
+        valid = dates.notna()
+        if not valid.any():
+            return None, []
+        
+        def _norm_text(col: Optional[str], missing: Optional[str]) -> pd.Series:
+            if col is None:
+                return pd.Series(missing, index=df.index, dtype=object)
+            raw = df[col]
+            if isinstance(raw.dtype, pd.CategoricalDtype):
+                # Normalize the categories once, then broadcast through the codes; missing sits
+                # at the end so code -1 maps to it (and an all-NaN chunk with no categories works)
+                cats = raw.cat.categories.astype(str).str.lower().str.strip().to_numpy(dtype=object)
+                lookup = np.append(cats, np.array([missing], dtype=object))
+                return pd.Series(lookup[raw.cat.codes.to_numpy()], index=df.index, dtype=object)
+            out = raw.astype(str).str.lower().str.strip().astype(object)
+            return out.where(raw.notna(), missing)
+        
+        def _num(col: str, dtype) -> pd.Series:
+            if col not in df.columns:
+                return pd.Series(0, index=df.index, dtype=dtype)
+            if df[col].dtype == 'float32' and dtype == 'float64':
+                # Keep float32 so COPY writes the shortest repr (12.34, not 12.340000152587891)
+                return df[col].fillna(0)
+            return pd.to_numeric(df[col], errors='coerce').fillna(0).astype(dtype)
+        
+        records = pd.DataFrame({
+            'client_id': client_id,
+            'report_date': dates.dt.strftime('%Y-%m-%d'),
+            'campaign_name': _norm_text(camp_col, ''),
+            'ad_group_name': _norm_text(ag_col, ''),
+            'targeting': _norm_text(targeting_col, None),
+            'customer_search_term': _norm_text(cst_col, None),
+            'match_type': _norm_text(mt_col, None),
+            'impressions': _num('Impressions', 'int64'),
+            'clicks': _num('Clicks', 'int64'),
+            'spend': _num('Spend', 'float64'),
+            'sales': _num('Sales', 'float64'),
+            'orders': _num('Orders', 'int64'),
+        })[valid]
+        
+        # Deduplicate on the unique constraint to avoid
+        # "ON CONFLICT DO UPDATE command cannot affect row a second time" (first occurrence wins)
+        records = records.drop_duplicates(subset=self._RAW_KEY_COLUMNS, keep='first')
+        
+        if records.empty:
+            return None, []
+        
+        # Touched weeks (Monday starts, same as date_trunc('week'))
+        touched = dates[valid]
+        week_starts = (touched - pd.to_timedelta(touched.dt.weekday, unit='D')).dt.strftime('%Y-%m-%d')
+        return records, week_starts.unique().tolist()
     
     def reaggregate_target_stats(self, client_id: str, week_starts: List[str] = None) -> int:
         """
@@ -801,18 +969,22 @@ class PostgresManager:
         - Upload Thu-Sun (Batch 2) → raw table has 6 rows
         - Reaggregate → target_stats has 1 row with SUM of all 6 days
         
+        Set-based: all affected weeks are deleted and rebuilt with one statement each
+        (week = ANY(...)) inside a single transaction, so readers never see empty weeks.
+        
         Args:
             client_id: Account identifier
-            week_starts: Optional list of week start dates (Monday) to reaggregate.
+            week_starts: Optional list of week start dates (Monday) to reaggregate, e.g. the
+                        weeks returned by save_raw_search_term_data for an upload.
                         If None, determines weeks from raw_search_term_data.
         
         Returns:
             Number of rows upserted in target_stats
         """
-        # Step 1: Determine affected weeks if not provided
-        if week_starts is None:
-            with self._get_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                # Step 1: Determine affected weeks if not provided
+                if week_starts is None:
                     cursor.execute("""
                         SELECT DISTINCT date_trunc('week', report_date)::date as week_start
                         FROM raw_search_term_data
@@ -820,66 +992,63 @@ class PostgresManager:
                         ORDER BY week_start DESC
                     """, (client_id,))
                     week_starts = [row['week_start'].isoformat() for row in cursor.fetchall()]
+                
+                if not week_starts:
+                    return 0
+                
+                weeks = [str(w)[:10] for w in week_starts]
+                
+                # Step 2: Delete existing target_stats for these weeks
+                cursor.execute("""
+                    DELETE FROM target_stats 
+                    WHERE client_id = %s AND start_date = ANY(%s::date[])
+                """, (client_id, weeks))
+                
+                # Step 3: Aggregate from raw and insert into target_stats (same transaction)
+                cursor.execute("""
+                    INSERT INTO target_stats 
+                    (client_id, start_date, end_date, campaign_name, ad_group_name, target_text, 
+                     customer_search_term, match_type, spend, sales, orders, clicks, impressions)
+                    SELECT 
+                        client_id,
+                        date_trunc('week', report_date)::date as start_date,
+                        MAX(report_date)::date as end_date,
+                        campaign_name,
+                        ad_group_name,
+                        COALESCE(targeting, customer_search_term, '-') as target_text,
+                        customer_search_term,
+                        match_type,
+                        SUM(spend) as spend,
+                        SUM(sales) as sales,
+                        SUM(orders) as orders,
+                        SUM(clicks) as clicks,
+                        SUM(impressions) as impressions
+                    FROM raw_search_term_data
+                    WHERE client_id = %s 
+                      AND date_trunc('week', report_date)::date = ANY(%s::date[])
+                    GROUP BY 
+                        client_id, 
+                        date_trunc('week', report_date)::date,
+                        campaign_name, 
+                        ad_group_name, 
+                        targeting,
+                        customer_search_term,
+                        match_type
+                    ON CONFLICT (client_id, start_date, campaign_name, ad_group_name, target_text, customer_search_term, match_type)
+                    DO UPDATE SET
+                        end_date = EXCLUDED.end_date,
+                        spend = EXCLUDED.spend,
+                        sales = EXCLUDED.sales,
+                        orders = EXCLUDED.orders,
+                        clicks = EXCLUDED.clicks,
+                        impressions = EXCLUDED.impressions,
+                        updated_at = CURRENT_TIMESTAMP
+                """, (client_id, weeks))
+                total_upserted = cursor.rowcount
+                self._mark_action_impact_stale(cursor, client_id, changed_from=min(weeks))
         
-        if not week_starts:
-            return 0
-        
-        # Step 2: Delete existing target_stats for these weeks
-        with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                for week_start in week_starts:
-                    cursor.execute("""
-                        DELETE FROM target_stats 
-                        WHERE client_id = %s AND start_date = %s
-                    """, (client_id, week_start))
-        
-        # Step 3: Aggregate from raw and insert into target_stats
-        total_upserted = 0
-        with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                for week_start in week_starts:
-                    cursor.execute("""
-                        INSERT INTO target_stats 
-                        (client_id, start_date, end_date, campaign_name, ad_group_name, target_text, 
-                         customer_search_term, match_type, spend, sales, orders, clicks, impressions)
-                        SELECT 
-                            client_id,
-                            date_trunc('week', report_date)::date as start_date,
-                            MAX(report_date)::date as end_date,
-                            campaign_name,
-                            ad_group_name,
-                            COALESCE(targeting, customer_search_term, '-') as target_text,
-                            customer_search_term,
-                            match_type,
-                            SUM(spend) as spend,
-                            SUM(sales) as sales,
-                            SUM(orders) as orders,
-                            SUM(clicks) as clicks,
-                            SUM(impressions) as impressions
-                        FROM raw_search_term_data
-                        WHERE client_id = %s 
-                          AND date_trunc('week', report_date)::date = %s
-                        GROUP BY 
-                            client_id, 
-                            date_trunc('week', report_date)::date,
-                            campaign_name, 
-                            ad_group_name, 
-                            targeting,
-                            customer_search_term,
-                            match_type
-                        ON CONFLICT (client_id, start_date, campaign_name, ad_group_name, target_text, customer_search_term, match_type)
-                        DO UPDATE SET
-                            end_date = EXCLUDED.end_date,
-                            spend = EXCLUDED.spend,
-                            sales = EXCLUDED.sales,
-                            orders = EXCLUDED.orders,
-                            clicks = EXCLUDED.clicks,
-                            impressions = EXCLUDED.impressions,
-                            updated_at = CURRENT_TIMESTAMP
-                    """, (client_id, week_start))
-                    total_upserted += cursor.rowcount
-        
-        print(f"REAGG: Aggregated {total_upserted} weekly rows from raw_search_term_data to target_stats for {client_id}")
+        target_stats_cache.invalidate(client_id)
+        print(f"REAGG: Aggregated {total_upserted} weekly rows across {len(weeks)} weeks from raw_search_term_data to target_stats for {client_id}")
         return total_upserted
 
 
@@ -916,51 +1085,105 @@ class PostgresManager:
                     return row['latest_date']
         return None
 
-    def get_target_stats_by_account(self, account_id: str, limit: int = 50000) -> pd.DataFrame:
+    def _target_stats_watermark(self, client_id: str) -> tuple:
+        """Cheap fingerprint of a client's target_stats (changes on any insert/update/delete)."""
         with self._get_connection() as conn:
-            query = "SELECT * FROM target_stats WHERE client_id = %s ORDER BY start_date DESC LIMIT %s"
-            return pd.read_sql_query(query, conn, params=(account_id, limit))
-
-    # @st.cache_data(ttl=300)  <-- Can't use decorator on method easily without refactoring self. 
-    # Instead, we will implement a direct fetch with optional streamlit caching at the call site or 
-    # simpler: just remove the custom cache for now to force fresh data until we move this to a helper.
-    # Actually, for this specific large query, let's just disable the broken custom cache.
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute("""
+                    SELECT MAX(updated_at) as updated_at, COUNT(*) as row_count
+                    FROM target_stats WHERE client_id = %s
+                """, (client_id,))
+                row = cursor.fetchone()
+                return (row['updated_at'], row['row_count'])
     
+    def get_target_stats_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for the shared target_stats cache."""
+        return target_stats_cache.stats()
+
     @retry_on_connection_error()
-    def get_target_stats_df(self, client_id: str = 'default_client') -> pd.DataFrame:
-        """Get large historical dataset. Custom caching removed to fix stale data issues."""
+    def get_target_stats_by_account(self, account_id: str, limit: int = 50000) -> pd.DataFrame:
+        def _load():
+            with self._get_connection() as conn:
+                query = "SELECT * FROM target_stats WHERE client_id = %s ORDER BY start_date DESC LIMIT %s"
+                return pd.read_sql_query(query, conn, params=(account_id, limit))
+        
+        watermark = self._target_stats_watermark(account_id)
+        return target_stats_cache.get_or_load(account_id, watermark, ('target_stats_by_account', limit), _load)
+    
+    def _query_target_stats_df(self, client_id: str, columns: List[str], start_date=None, end_date=None,
+                               weeks: Optional[List[str]] = None) -> pd.DataFrame:
+        """SQL read of target_stats in get_target_stats_df layout, with projection and date predicates."""
+        select = ",\n                    ".join(f'{TARGET_STATS_COLUMNS[c]} as "{c}"' for c in columns)
+        where = ["client_id = %s"]
+        params: List[Any] = [client_id]
+        if start_date is not None:
+            where.append("start_date >= %s")
+            params.append(start_date)
+        if end_date is not None:
+            where.append("start_date <= %s")
+            params.append(end_date)
+        if weeks is not None:
+            where.append("start_date = ANY(%s::date[])")
+            params.append(list(weeks))
         
-        # cache_key = f'target_stats_df_{client_id}'
-        # cached = _query_cache.get(cache_key)
-        # if cached is not None:
-        #     return cached
-
         with self._get_connection() as conn:
-            query = """
+            query = f"""
                 SELECT 
-                    start_date as "Date",
-                    campaign_name as "Campaign Name",
-                    ad_group_name as "Ad Group Name",
-                    target_text as "Targeting",
-                    customer_search_term as "Customer Search Term",
-                    match_type as "Match Type",
-                    spend as "Spend",
-                    sales as "Sales",
-                    orders as "Orders",
-                    clicks as "Clicks",
-                    impressions as "Impressions"
+                    {select}
                 FROM target_stats 
-                WHERE client_id = %s 
+                WHERE {' AND '.join(where)} 
                 ORDER BY start_date DESC
             """
-            df = pd.read_sql(query, conn, params=(client_id,))
+            df = pd.read_sql(query, conn, params=tuple(params))
             if not df.empty and 'Date' in df.columns:
                 df['Date'] = pd.to_datetime(df['Date'])
                 print(f"DEBUG: DB fetch for {client_id}: {len(df)} rows. Range: {df['Date'].min()} to {df['Date'].max()}")
-        
-        # _query_cache.set(cache_key, df)
         return df
     
+    def _sync_target_stats_snapshot(self, client_id: str) -> int:
+        """Re-download only the weeks whose (MAX(updated_at), COUNT(*)) changed since the last sync."""
+        with self._get_connection() as conn:
+            fingerprints = pd.read_sql("""
+                SELECT start_date as week_start, MAX(updated_at) as updated_at, COUNT(*) as row_count
+                FROM target_stats
+                WHERE client_id = %s
+                GROUP BY start_date
+            """, conn, params=(client_id,))
+        return _snapshot_store.sync(
+            client_id,
+            fingerprints,
+            lambda weeks: self._query_target_stats_df(client_id, list(TARGET_STATS_COLUMNS), weeks=weeks),
+        )
+    
+    @retry_on_connection_error()
+    def get_target_stats_df(self, client_id: str = 'default_client', columns: Optional[List[str]] = None,
+                            start_date: Union[date, str, None] = None, end_date: Union[date, str, None] = None) -> pd.DataFrame:
+        """
+        Get large historical dataset.
+        
+        Served from the shared cache while the data watermark is unchanged; on a miss, read from
+        the local Parquet snapshot (synced incrementally) or, if unavailable, straight from SQL.
+        
+        Args:
+            client_id: Account identifier
+            columns: Optional subset of columns (default: all get_target_stats_df columns)
+            start_date / end_date: Optional inclusive bounds on the week start ("Date")
+        """
+        cols = list(columns) if columns else list(TARGET_STATS_COLUMNS)
+        
+        def _load():
+            if _snapshot_store is not None:
+                try:
+                    self._sync_target_stats_snapshot(client_id)
+                    return _snapshot_store.read(client_id, cols, start_date, end_date)
+                except Exception as e:
+                    print(f"SNAPSHOT: Falling back to SQL for {client_id}: {e}")
+            return self._query_target_stats_df(client_id, cols, start_date, end_date)
+        
+        watermark = self._target_stats_watermark(client_id)
+        args = ('target_stats_df', tuple(cols), str(start_date), str(end_date))
+        return target_stats_cache.get_or_load(client_id, watermark, args, _load)
+    
             
     def get_stats_by_date_range(self, start_date: date, end_date: date, client_id: Optional[str] = None) -> List[Dict[str, Any]]:
         with self._get_connection() as conn:
@@ -995,6 +1218,8 @@ class PostgresManager:
                 rows += cursor.rowcount
                 cursor.execute("DELETE FROM actions_log WHERE client_id = %s", (client_id,))
                 rows += cursor.rowcount
+                self._invalidate_action_impact_windows(cursor, client_id)
+                target_stats_cache.invalidate(client_id)
                 return rows
 
     def clear_all_stats(self) -> int:
@@ -1219,63 +1444,63 @@ class PostgresManager:
                 WHERE client_id = %s
             """, conn, params=(client_id,))
 
-    def log_action_batch(self, actions: List[Dict[str, Any]], client_id: str, batch_id: Optional[str] = None, action_date: Optional[str] = None) -> int:
-        if not actions: return 0
+    def log_action_batch(self, actions: ActionsLike, client_id: str, batch_id: Optional[str] = None, action_date: Optional[str] = None) -> int:
+        """
+        Bulk upsert actions into actions_log.
+        
+        Accepts the columnar action frame from the optimizer (or a list of action dicts),
+        stages it with COPY and merges with a single INSERT ... ON CONFLICT.
+        """
+        if actions is None or len(actions) == 0: return 0
         if batch_id is None: batch_id = str(uuid.uuid4())[:8]
         if action_date:
             date_str = str(action_date)[:10] if action_date else datetime.now().isoformat()
         else:
             date_str = datetime.now().isoformat()
-            
-        data = []
-        # Track unique constraint keys to prevent duplicates in same batch
-        seen_keys = set()
         
-        for action in actions:
-            # Unique key matches ON CONFLICT constraint
-            unique_key = (
-                client_id,
-                date_str[:10],  # action_date
-                action.get('target_text', ''),
-                action.get('action_type', 'UNKNOWN'),
-                action.get('campaign_name', '')
-            )
-            
-            # Skip if we've already seen this combination
-            if unique_key in seen_keys:
-                continue
-            seen_keys.add(unique_key)
-            
-            data.append((
-                date_str,
-                client_id,
-                batch_id,
-                action.get('entity_name', ''),
-                action.get('action_type', 'UNKNOWN'),
-                str(action.get('old_value', '')),
-                str(action.get('new_value', '')),
-                action.get('reason', ''),
-                action.get('campaign_name', ''),
-                action.get('ad_group_name', ''),
-                action.get('target_text', ''),
-                action.get('match_type', ''),
-                action.get('winner_source_campaign'),
-                action.get('new_campaign_name'),
-                action.get('before_match_type'),
-                action.get('after_match_type')
-            ))
+        rows = action_log_rows(actions, client_id, batch_id, date_str)
         
-        if not data:
+        # Deduplicate on the unique constraint (first occurrence wins) to avoid
+        # "ON CONFLICT DO UPDATE command cannot affect row a second time"
+        rows = rows.drop_duplicates(subset=['target_text', 'action_type', 'campaign_name'], keep='first')
+        
+        if rows.empty:
             return 0
+        
+        col_list = ", ".join(ACTION_LOG_COLUMNS)
+        buf = io.StringIO()
+        rows.to_csv(buf, index=False, header=False, na_rep='\\N')
+        buf.seek(0)
             
         with self._get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                execute_values(cursor, """
-                    INSERT INTO actions_log 
-                    (action_date, client_id, batch_id, entity_name, action_type, old_value, new_value, 
-                     reason, campaign_name, ad_group_name, target_text, match_type,
-                     winner_source_campaign, new_campaign_name, before_match_type, after_match_type)
-                    VALUES %s
+                cursor.execute("""
+                    CREATE TEMP TABLE actions_log_staging (
+                        action_date TIMESTAMP,
+                        client_id TEXT,
+                        batch_id TEXT,
+                        entity_name TEXT,
+                        action_type TEXT,
+                        old_value TEXT,
+                        new_value TEXT,
+                        reason TEXT,
+                        campaign_name TEXT,
+                        ad_group_name TEXT,
+                        target_text TEXT,
+                        match_type TEXT,
+                        winner_source_campaign TEXT,
+                        new_campaign_name TEXT,
+                        before_match_type TEXT,
+                        after_match_type TEXT
+                    ) ON COMMIT DROP
+                """)
+                cursor.copy_expert(
+                    f"COPY actions_log_staging ({col_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                    buf
+                )
+                cursor.execute(f"""
+                    INSERT INTO actions_log ({col_list})
+                    SELECT {col_list} FROM actions_log_staging
                     ON CONFLICT (client_id, action_date, target_text, action_type, campaign_name) 
                     DO UPDATE SET
                         batch_id = EXCLUDED.batch_id,
@@ -1289,18 +1514,41 @@ class PostgresManager:
                         new_campaign_name = EXCLUDED.new_campaign_name,
                         before_match_type = EXCLUDED.before_match_type,
                         after_match_type = EXCLUDED.after_match_type
-                """, data)
-        return len(data)
+                """)
+                
+                # Upserts can change already-materialized action groups; drop their windows so they are recomputed
+                self._mark_action_impact_stale(cursor, client_id, actions_changed=True)
+                self._drop_action_windows(cursor, "l.batch_id = %s", (client_id, batch_id))
+        target_stats_cache.invalidate(client_id)
+        return len(rows)
+
+    def _drop_action_windows(self, cursor, where: str, params: tuple):
+        """
+        Drop the materialized impact windows of the action groups that have rows in actions_log
+        matching where (on alias l, params after client_id), so they are recomputed on the next read.
+        """
+        cursor.execute(f"""
+            DELETE FROM action_impact_windows w
+            USING actions_log l
+            WHERE l.client_id = %s AND {where}
+              AND w.client_id = l.client_id
+              AND w.action_key = {_action_key_sql('l')}
+        """, params)
 
     def delete_action_batch(self, client_id: str, batch_id: str) -> int:
         """Delete a specific action batch (for undo functionality)."""
         with self._get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                # Windows of the affected action groups (incl. groups spanning other batches) go first
+                self._mark_action_impact_stale(cursor, client_id, actions_changed=True)
+                self._drop_action_windows(cursor, "l.batch_id = %s", (client_id, batch_id))
                 cursor.execute(
                     "DELETE FROM actions_log WHERE client_id = %s AND batch_id = %s",
                     (client_id, batch_id)
                 )
-                return cursor.rowcount
+                deleted = cursor.rowcount
+        target_stats_cache.invalidate(client_id)
+        return deleted
 
     def clear_todays_actions(self, client_id: str) -> int:
         """Delete all actions logged today for a client."""
@@ -1308,11 +1556,15 @@ class PostgresManager:
         today = date.today().isoformat()
         with self._get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                self._mark_action_impact_stale(cursor, client_id, actions_changed=True)
+                self._drop_action_windows(cursor, "DATE(l.action_date) = %s", (client_id, today))
                 cursor.execute(
                     "DELETE FROM actions_log WHERE client_id = %s AND DATE(action_date) = %s",
                     (client_id, today)
                 )
-                return cursor.rowcount
+                deleted = cursor.rowcount
+        target_stats_cache.invalidate(client_id)
+        return deleted
 
 
     def create_account(self, account_id: str, account_name: str, account_type: str = 'brand', metadata: dict = None, organization_id: str = None) -> bool:
@@ -1443,6 +1695,289 @@ class PostgresManager:
         # _query_cache.set(cache_key, result)
         return result
     
+    def _invalidate_action_impact_windows(self, cursor, client_id: str):
+        """Drop materialized impact windows so the next read rebuilds them (used when data is moved/deleted)."""
+        cursor.execute("DELETE FROM action_impact_windows WHERE client_id = %s", (client_id,))
+        cursor.execute("DELETE FROM action_impact_watermarks WHERE client_id = %s", (client_id,))
+    
+    def _mark_action_impact_stale(self, cursor, client_id: str, changed_from: Optional[str] = None,
+                                  actions_changed: bool = False):
+        """
+        Flag every materialized horizon of a client as stale, inside the writer's transaction.
+        
+        changed_from is the earliest target_stats week the write touched; actions_changed means
+        actions_log gained or changed rows. Writers and refresh_action_impact_windows() hold the same
+        per-client advisory lock until commit, so a refresh never clears a flag for a write it did
+        not see. Call this before touching action_impact_windows rows (lock order).
+        """
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"action_impact:{client_id}",))
+        cursor.execute("""
+            UPDATE action_impact_watermarks
+            SET changed_from = LEAST(changed_from, %s::date),
+                actions_changed = actions_changed OR %s
+            WHERE client_id = %s
+        """, (changed_from, actions_changed, client_id))
+    
+    def _action_impact_windows_stale(self, client_id: str, before_days: int, after_days: int) -> bool:
+        """Cheap primary-key check: does this horizon need refresh_action_impact_windows()?"""
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute("""
+                    SELECT actions_changed, changed_from FROM action_impact_watermarks
+                    WHERE client_id = %s AND before_days = %s AND after_days = %s
+                """, (client_id, before_days, after_days))
+                row = cursor.fetchone()
+        return row is None or bool(row['actions_changed']) or row['changed_from'] is not None
+    
+    @retry_on_connection_error()
+    def refresh_action_impact_windows(self, client_id: str, before_days: int = 14, after_days: int = 14) -> int:
+        """
+        Incrementally refresh action_impact_windows for one client and horizon.
+        
+        Recomputes (in one transaction) only:
+        - action groups not yet materialized (new actions, or groups touched by log_action_batch)
+        - windows overlapping target_stats weeks flagged by the writers since the last refresh
+        Undone action groups are dropped by the delete paths themselves (_drop_action_windows).
+        A horizon with no watermark row is rebuilt in full.
+        
+        Returns:
+            Number of action windows (re)computed
+        """
+        params = {
+            'client_id': client_id,
+            'before_days': before_days,
+            'after_days': after_days,
+            'after_minus_1': after_days - 1,
+        }
+        
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                # Serialize with the writers (see _mark_action_impact_stale): every write this refresh
+                # doesn't see commits after it and flags the watermark again
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"action_impact:{client_id}",))
+                cursor.execute("""
+                    SELECT actions_changed, changed_from FROM action_impact_watermarks
+                    WHERE client_id = %(client_id)s AND before_days = %(before_days)s AND after_days = %(after_days)s
+                """, params)
+                watermark = cursor.fetchone()
+                
+                if watermark is None:
+                    # No watermark: full rebuild for this horizon
+                    cursor.execute("""
+                        DELETE FROM action_impact_windows
+                        WHERE client_id = %(client_id)s AND before_days = %(before_days)s AND after_days = %(after_days)s
+                    """, params)
+                elif not watermark['actions_changed'] and watermark['changed_from'] is None:
+                    return 0  # Another reader refreshed it first
+                
+                stats_changed = watermark is not None and watermark['changed_from'] is not None
+                if stats_changed:
+                    # Drop windows overlapping the weeks the writers touched
+                    cursor.execute("""
+                        DELETE FROM action_impact_windows
+                        WHERE client_id = %(client_id)s AND before_days = %(before_days)s AND after_days = %(after_days)s
+                          AND after_end >= %(changed_from)s::date
+                    """, {**params, 'changed_from': watermark['changed_from']})
+                
+                # Materialize every action group that has no window yet
+                cursor.execute(f"""
+                    WITH aggregated_actions AS (
+                        -- Group daily actions into weekly buckets
+                        SELECT 
+                            LOWER(target_text) as target_lower,
+                            CASE 
+                                WHEN LOWER(target_text) LIKE 'asin=%%' THEN 
+                                    LOWER(REPLACE(REPLACE(target_text, 'asin="', ''), '"', ''))
+                                ELSE LOWER(target_text)
+                            END as normalized_target_lower,
+                            LOWER(campaign_name) as campaign_lower,
+                            LOWER(ad_group_name) as ad_group_lower,
+                            target_text, campaign_name, ad_group_name, match_type, action_type,
+                            DATE(action_date - (MOD((EXTRACT(DOW FROM action_date)::int - 2 + 7), 7)) * INTERVAL '1 day') as week_start,
+                            {_action_key_sql()} as action_key,
+                            MAX(action_date) as action_date,
+                            (ARRAY_AGG(old_value ORDER BY action_date ASC))[1] as old_value,
+                            (ARRAY_AGG(new_value ORDER BY action_date DESC))[1] as new_value,
+                            STRING_AGG(DISTINCT reason, '; ') as reason,
+                            MAX(action_date) - INTERVAL '%(before_days)s days' as before_start,
+                            MAX(action_date) - INTERVAL '1 day' as before_end,
+                            MAX(action_date) as after_start,
+                            MAX(action_date) + INTERVAL '%(after_minus_1)s days' as after_end
+                        FROM actions_log
+                        WHERE client_id = %(client_id)s
+                          AND LOWER(action_type) NOT IN ('hold', 'monitor', 'flagged')
+                        GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11
+                    ),
+                    pending AS (
+                        SELECT a.* FROM aggregated_actions a
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM action_impact_windows w
+                            WHERE w.client_id = %(client_id)s
+                              AND w.before_days = %(before_days)s
+                              AND w.after_days = %(after_days)s
+                              AND w.action_key = a.action_key
+                        )
+                    ),
+                    latest_data AS (
+                        SELECT MAX(start_date) as latest_date FROM target_stats WHERE client_id = %(client_id)s
+                    )
+                    INSERT INTO action_impact_windows (
+                        client_id, before_days, after_days, action_key,
+                        action_date, action_type, target_text, campaign_name, ad_group_name, match_type,
+                        old_value, new_value, reason,
+                        before_date, before_end_date, after_date, after_end, actual_before_days,
+                        before_spend, before_sales, before_clicks, before_impressions, before_orders,
+                        observed_after_spend, observed_after_sales, after_clicks, after_impressions, after_orders,
+                        match_level, rolling_30d_spc
+                    )
+                    SELECT 
+                        %(client_id)s, %(before_days)s, %(after_days)s, a.action_key,
+                        a.action_date, 
+                        a.action_type, 
+                        a.target_text, 
+                        a.campaign_name,
+                        a.ad_group_name,
+                        a.match_type,
+                        a.old_value, 
+                        a.new_value, 
+                        a.reason,
+                        a.before_start,
+                        a.before_end,
+                        a.after_start,
+                        a.after_end,
+                        -- Count actual CALENDAR DAYS in windows (not report count)
+                        -- before_days = days spanned by data in before window + 7 (one week's data coverage)
+                        COALESCE((SELECT (MAX(start_date)::date - MIN(start_date)::date) + 7
+                                  FROM target_stats 
+                                  WHERE client_id = %(client_id)s 
+                                    AND start_date >= a.before_start AND start_date <= a.before_end), 0),
+                        -- BEFORE stats via LATERAL (per-action window)
+                        COALESCE(bs.spend, bcs.spend, bc.spend, 0),
+                        COALESCE(bs.sales, bcs.sales, bc.sales, 0),
+                        COALESCE(bs.clicks, bcs.clicks, bc.clicks, 0),
+                        COALESCE(bs.impressions, bcs.impressions, bc.impressions, 0),
+                        COALESCE(bs.orders, bcs.orders, bc.orders, 0),
+                        -- AFTER stats via LATERAL (per-action window)
+                        COALESCE(afs.spend, afcs.spend, ac.spend, 0),
+                        COALESCE(afs.sales, afcs.sales, ac.sales, 0),
+                        COALESCE(afs.clicks, afcs.clicks, ac.clicks, 0),
+                        COALESCE(afs.impressions, afcs.impressions, ac.impressions, 0),
+                        COALESCE(afs.orders, afcs.orders, ac.orders, 0),
+                        CASE 
+                            WHEN bs.spend IS NOT NULL THEN 'target'
+                            WHEN bcs.spend IS NOT NULL THEN 'cst'
+                            ELSE 'campaign' 
+                        END,
+                        r30.rolling_spc
+                    FROM pending a
+                    CROSS JOIN latest_data ld
+                    -- BEFORE: target_text match (for BID_CHANGE)
+                    LEFT JOIN LATERAL (
+                        SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions, SUM(orders) as orders
+                        FROM target_stats t
+                        WHERE t.client_id = %(client_id)s
+                          AND LOWER(t.target_text) = a.target_lower
+                          AND LOWER(t.campaign_name) = a.campaign_lower
+                          AND t.start_date >= a.before_start AND t.start_date <= a.before_end
+                    ) bs ON TRUE
+                    -- BEFORE: CST match (for NEGATIVE/HARVEST)
+                    LEFT JOIN LATERAL (
+                        SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions, SUM(orders) as orders
+                        FROM target_stats t
+                        WHERE t.client_id = %(client_id)s
+                          AND LOWER(t.customer_search_term) = a.normalized_target_lower
+                          AND t.start_date >= a.before_start AND t.start_date <= a.before_end
+                    ) bcs ON a.action_type IN ('NEGATIVE', 'NEGATIVE_ADD', 'HARVEST')
+                    -- BEFORE: Campaign fallback
+                    LEFT JOIN LATERAL (
+                        SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions, SUM(orders) as orders
+                        FROM target_stats t
+                        WHERE t.client_id = %(client_id)s
+                          AND LOWER(t.campaign_name) = a.campaign_lower
+                          AND t.start_date >= a.before_start AND t.start_date <= a.before_end
+                    ) bc ON bs.spend IS NULL AND bcs.spend IS NULL
+                    -- AFTER: target_text match (for BID_CHANGE)
+                    LEFT JOIN LATERAL (
+                        SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions, SUM(orders) as orders
+                        FROM target_stats t
+                        WHERE t.client_id = %(client_id)s
+                          AND LOWER(t.target_text) = a.target_lower
+                          AND LOWER(t.campaign_name) = a.campaign_lower
+                          AND t.start_date >= a.after_start AND t.start_date <= LEAST(a.after_end, ld.latest_date)
+                    ) afs ON TRUE
+                    -- AFTER: CST match (for NEGATIVE/HARVEST)
+                    LEFT JOIN LATERAL (
+                        SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions, SUM(orders) as orders
+                        FROM target_stats t
+                        WHERE t.client_id = %(client_id)s
+                          AND LOWER(t.customer_search_term) = a.normalized_target_lower
+                          AND t.start_date >= a.after_start AND t.start_date <= LEAST(a.after_end, ld.latest_date)
+                    ) afcs ON a.action_type IN ('NEGATIVE', 'NEGATIVE_ADD', 'HARVEST')
+                    -- AFTER: Campaign fallback
+                    LEFT JOIN LATERAL (
+                        SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions, SUM(orders) as orders
+                        FROM target_stats t
+                        WHERE t.client_id = %(client_id)s
+                          AND LOWER(t.campaign_name) = a.campaign_lower
+                          AND t.start_date >= a.after_start AND t.start_date <= LEAST(a.after_end, ld.latest_date)
+                    ) ac ON afs.spend IS NULL AND afcs.spend IS NULL
+                    -- Rolling 30d stats for baseline
+                    LEFT JOIN LATERAL (
+                        SELECT CASE WHEN SUM(clicks) > 0 THEN SUM(sales) / SUM(clicks) ELSE NULL END as rolling_spc
+                        FROM target_stats t
+                        WHERE t.client_id = %(client_id)s
+                          AND LOWER(t.target_text) = a.target_lower
+                          AND LOWER(t.campaign_name) = a.campaign_lower
+                          AND t.start_date >= ld.latest_date - INTERVAL '30 days'
+                    ) r30 ON TRUE
+                    ON CONFLICT (client_id, before_days, after_days, action_key) DO NOTHING
+                """, params)
+                refreshed = cursor.rowcount
+                
+                # Rolling 30d baseline is anchored on latest_date, so it shifts for every action when stats change
+                if stats_changed:
+                    cursor.execute("""
+                        WITH rolling AS (
+                            SELECT LOWER(target_text) as target_lower, LOWER(campaign_name) as campaign_lower,
+                                   CASE WHEN SUM(clicks) > 0 THEN SUM(sales) / SUM(clicks) ELSE NULL END as rolling_spc
+                            FROM target_stats
+                            WHERE client_id = %(client_id)s
+                              AND start_date >= (SELECT MAX(start_date) FROM target_stats WHERE client_id = %(client_id)s) - INTERVAL '30 days'
+                            GROUP BY 1, 2
+                        )
+                        UPDATE action_impact_windows w
+                        SET rolling_30d_spc = r.rolling_spc
+                        FROM action_impact_windows w2
+                        LEFT JOIN rolling r
+                          ON r.target_lower = LOWER(w2.target_text) AND r.campaign_lower = LOWER(w2.campaign_name)
+                        WHERE w.client_id = %(client_id)s
+                          AND w.before_days = %(before_days)s
+                          AND w.after_days = %(after_days)s
+                          AND w2.client_id = w.client_id
+                          AND w2.before_days = w.before_days
+                          AND w2.after_days = w.after_days
+                          AND w2.action_key = w.action_key
+                    """, params)
+                
+                # Record what the windows were built from (read from the data, not transaction time)
+                cursor.execute("""
+                    INSERT INTO action_impact_watermarks (client_id, before_days, after_days, stats_updated_at, latest_date,
+                                                          actions_changed, changed_from, refreshed_at)
+                    SELECT %(client_id)s, %(before_days)s, %(after_days)s, MAX(updated_at), MAX(start_date),
+                           FALSE, NULL, CURRENT_TIMESTAMP
+                    FROM target_stats WHERE client_id = %(client_id)s
+                    ON CONFLICT (client_id, before_days, after_days) DO UPDATE SET
+                        stats_updated_at = EXCLUDED.stats_updated_at,
+                        latest_date = EXCLUDED.latest_date,
+                        actions_changed = FALSE,
+                        changed_from = NULL,
+                        refreshed_at = CURRENT_TIMESTAMP
+                """, params)
+        
+        if refreshed:
+            print(f"IMPACT_WINDOWS: Refreshed {refreshed} action windows for {client_id} ({before_days}d/{after_days}d)")
+        return refreshed
+    
     @retry_on_connection_error()
     def get_action_impact(self, client_id: str, before_days: int = 14, after_days: int = 14) -> pd.DataFrame:
         """
@@ -1458,148 +1993,57 @@ class PostgresManager:
         # if cached is not None:
         #    return cached
 
-        # Calculate intervals based on before_days and after_days
-        after_minus_1 = after_days - 1
+        # Before/after windows are materialized in action_impact_windows; the writers flag the
+        # horizon stale, so a read only refreshes when actions_log or target_stats actually changed
+        if self._action_impact_windows_stale(client_id, before_days, after_days):
+            self.refresh_action_impact_windows(client_id, before_days, after_days)
         
-        # Original LATERAL join query - accurate but slower
-        # Indexes added for performance: idx_ts_client_campaign, idx_ts_client_target, idx_ts_client_cst
         query = """
-            WITH aggregated_actions AS (
-                -- Group daily actions into weekly buckets
-                SELECT 
-                    LOWER(target_text) as target_lower,
-                    CASE 
-                        WHEN LOWER(target_text) LIKE 'asin=%%' THEN 
-                            LOWER(REPLACE(REPLACE(target_text, 'asin="', ''), '"', ''))
-                        ELSE LOWER(target_text)
-                    END as normalized_target_lower,
-                    LOWER(campaign_name) as campaign_lower,
-                    LOWER(ad_group_name) as ad_group_lower,
-                    target_text, campaign_name, ad_group_name, match_type, action_type,
-                    DATE(action_date - (MOD((EXTRACT(DOW FROM action_date)::int - 2 + 7), 7)) * INTERVAL '1 day') as week_start,
-                    MAX(action_date) as action_date,
-                    (ARRAY_AGG(old_value ORDER BY action_date ASC))[1] as old_value,
-                    (ARRAY_AGG(new_value ORDER BY action_date DESC))[1] as new_value,
-                    STRING_AGG(DISTINCT reason, '; ') as reason,
-                    MAX(action_date) - INTERVAL '%(before_days)s days' as before_start,
-                    MAX(action_date) - INTERVAL '1 day' as before_end,
-                    MAX(action_date) as after_start,
-                    MAX(action_date) + INTERVAL '%(after_minus_1)s days' as after_end
-                FROM actions_log
-                WHERE client_id = %(client_id)s
-                  AND LOWER(action_type) NOT IN ('hold', 'monitor', 'flagged')
-                GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9, 10
-            ),
-            latest_data AS (
+            WITH latest_data AS (
                 SELECT MAX(start_date) as latest_date FROM target_stats WHERE client_id = %(client_id)s
             )
             SELECT 
-                a.action_date, 
-                a.action_type, 
-                a.target_text, 
-                a.campaign_name,
-                a.ad_group_name,
-                a.match_type,
-                a.old_value, 
-                a.new_value, 
-                a.reason,
-                a.before_start as before_date,
-                a.before_end as before_end_date,
-                a.after_start as after_date,
-                LEAST(a.after_end, ld.latest_date) as after_end_date,
-                -- Count actual CALENDAR DAYS in windows (not report count)
-                -- before_days = days spanned by data in before window + 7 (one week's data coverage)
-                COALESCE((SELECT (MAX(start_date)::date - MIN(start_date)::date) + 7
-                          FROM target_stats 
-                          WHERE client_id = %(client_id)s 
-                            AND start_date >= a.before_start AND start_date <= a.before_end), 0) as actual_before_days,
+                w.action_date, 
+                w.action_type, 
+                w.target_text, 
+                w.campaign_name,
+                w.ad_group_name,
+                w.match_type,
+                w.old_value, 
+                w.new_value, 
+                w.reason,
+                w.before_date,
+                w.before_end_date,
+                w.after_date,
+                LEAST(w.after_end, ld.latest_date) as after_end_date,
+                w.actual_before_days,
                 -- after_days = calendar days from action_date to latest available data
-                (ld.latest_date::date - a.after_start::date + 1) as actual_after_days,
-                -- BEFORE stats via LATERAL (per-action window)
-                COALESCE(bs.spend, bcs.spend, bc.spend, 0) as before_spend,
-                COALESCE(bs.sales, bcs.sales, bc.sales, 0) as before_sales,
-                COALESCE(bs.clicks, bcs.clicks, bc.clicks, 0) as before_clicks,
-                COALESCE(bs.impressions, bcs.impressions, bc.impressions, 0) as before_impressions,
-                -- AFTER stats via LATERAL (per-action window)
-                COALESCE(afs.spend, afcs.spend, ac.spend, 0) as observed_after_spend,
-                COALESCE(afs.sales, afcs.sales, ac.sales, 0) as observed_after_sales,
-                COALESCE(afs.clicks, afcs.clicks, ac.clicks, 0) as after_clicks,
-                COALESCE(afs.impressions, afcs.impressions, ac.impressions, 0) as after_impressions,
-                CASE 
-                    WHEN bs.spend IS NOT NULL THEN 'target'
-                    WHEN bcs.spend IS NOT NULL THEN 'cst'
-                    ELSE 'campaign' 
-                END as match_level,
-                r30.rolling_spc as rolling_30d_spc
-            FROM aggregated_actions a
+                (ld.latest_date::date - w.after_date::date + 1) as actual_after_days,
+                w.before_spend,
+                w.before_sales,
+                w.before_clicks,
+                w.before_impressions,
+                w.before_orders,
+                w.observed_after_spend,
+                w.observed_after_sales,
+                w.after_clicks,
+                w.after_impressions,
+                w.after_orders,
+                w.match_level,
+                w.rolling_30d_spc
+            FROM action_impact_windows w
             CROSS JOIN latest_data ld
-            -- BEFORE: target_text match (for BID_CHANGE)
-            LEFT JOIN LATERAL (
-                SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions
-                FROM target_stats t
-                WHERE t.client_id = %(client_id)s
-                  AND LOWER(t.target_text) = a.target_lower
-                  AND LOWER(t.campaign_name) = a.campaign_lower
-                  AND t.start_date >= a.before_start AND t.start_date <= a.before_end
-            ) bs ON TRUE
-            -- BEFORE: CST match (for NEGATIVE/HARVEST)
-            LEFT JOIN LATERAL (
-                SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions
-                FROM target_stats t
-                WHERE t.client_id = %(client_id)s
-                  AND LOWER(t.customer_search_term) = a.normalized_target_lower
-                  AND t.start_date >= a.before_start AND t.start_date <= a.before_end
-            ) bcs ON a.action_type IN ('NEGATIVE', 'NEGATIVE_ADD', 'HARVEST')
-            -- BEFORE: Campaign fallback
-            LEFT JOIN LATERAL (
-                SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions
-                FROM target_stats t
-                WHERE t.client_id = %(client_id)s
-                  AND LOWER(t.campaign_name) = a.campaign_lower
-                  AND t.start_date >= a.before_start AND t.start_date <= a.before_end
-            ) bc ON bs.spend IS NULL AND bcs.spend IS NULL
-            -- AFTER: target_text match (for BID_CHANGE)
-            LEFT JOIN LATERAL (
-                SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions
-                FROM target_stats t
-                WHERE t.client_id = %(client_id)s
-                  AND LOWER(t.target_text) = a.target_lower
-                  AND LOWER(t.campaign_name) = a.campaign_lower
-                  AND t.start_date >= a.after_start AND t.start_date <= LEAST(a.after_end, ld.latest_date)
-            ) afs ON TRUE
-            -- AFTER: CST match (for NEGATIVE/HARVEST)
-            LEFT JOIN LATERAL (
-                SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions
-                FROM target_stats t
-                WHERE t.client_id = %(client_id)s
-                  AND LOWER(t.customer_search_term) = a.normalized_target_lower
-                  AND t.start_date >= a.after_start AND t.start_date <= LEAST(a.after_end, ld.latest_date)
-            ) afcs ON a.action_type IN ('NEGATIVE', 'NEGATIVE_ADD', 'HARVEST')
-            -- AFTER: Campaign fallback
-            LEFT JOIN LATERAL (
-                SELECT SUM(spend) as spend, SUM(sales) as sales, SUM(clicks) as clicks, SUM(impressions) as impressions
-                FROM target_stats t
-                WHERE t.client_id = %(client_id)s
-                  AND LOWER(t.campaign_name) = a.campaign_lower
-                  AND t.start_date >= a.after_start AND t.start_date <= LEAST(a.after_end, ld.latest_date)
-            ) ac ON afs.spend IS NULL AND afcs.spend IS NULL
-            -- Rolling 30d stats for baseline
-            LEFT JOIN LATERAL (
-                SELECT CASE WHEN SUM(clicks) > 0 THEN SUM(sales) / SUM(clicks) ELSE NULL END as rolling_spc
-                FROM target_stats t
-                WHERE t.client_id = %(client_id)s
-                  AND LOWER(t.target_text) = a.target_lower
-                  AND LOWER(t.campaign_name) = a.campaign_lower
-                  AND t.start_date >= ld.latest_date - INTERVAL '30 days'
-            ) r30 ON TRUE
-            ORDER BY a.action_date DESC
+            WHERE w.client_id = %(client_id)s
+              AND w.before_days = %(before_days)s
+              AND w.after_days = %(after_days)s
+            ORDER BY w.action_date DESC
         """
         
         with self._get_connection() as conn:
             df = pd.read_sql(query, conn, params={
                 'client_id': client_id,
-                'after_minus_1': after_minus_1,
-                'before_days': before_days
+                'before_days': before_days,
+                'after_days': after_days
             })
         
         if df.empty:
@@ -2706,7 +3150,15 @@ class PostgresManager:
                 """, (to_account, from_account, start_date, end_date))
                 total_updated += cursor.rowcount
                 
-                return total_updated
+                # Moved rows keep their updated_at, so watermarks can't see this change
+                self._invalidate_action_impact_windows(cursor, from_account)
+                self._invalidate_action_impact_windows(cursor, to_account)
+        
+        # After the commit, so no reader re-caches the pre-move frames
+        for account in (from_account, to_account):
+            target_stats_cache.invalidate(account)
+            dataset_registry.invalidate(account)
+        return total_updated
     
     def delete_account(self, account_id: str) -> bool:
         """Delete an account and all its data."""
@@ -2721,9 +3173,12 @@ class PostgresManager:
                     cursor.execute("DELETE FROM advertised_product_cache WHERE client_id = %s", (account_id,))
                     cursor.execute("DELETE FROM bulk_mappings WHERE client_id = %s", (account_id,))
                     cursor.execute("DELETE FROM account_health_metrics WHERE client_id = %s", (account_id,))
+                    self._invalidate_action_impact_windows(cursor, account_id)
                     # Delete account
                     cursor.execute("DELETE FROM accounts WHERE account_id = %s", (account_id,))
-                    return True
+            target_stats_cache.invalidate(account_id)
+            dataset_registry.invalidate(account_id)
+            return True
         except Exception as e:
             print(f"Failed to delete account: {e}")
             return False
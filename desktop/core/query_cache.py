@@ -0,0 +1,128 @@
+"""
+Process-wide Query Result Cache
+
+Shared, memory-bounded LRU cache for large per-account DataFrame reads
+(e.g. target_stats history). Entries are keyed by (client_id, data watermark, query args)
+so a changed watermark is a guaranteed miss, and writers call invalidate(client_id)
+to drop every entry for an account immediately.
+
+Usage:
+    from core.query_cache import target_stats_cache
+
+    df = target_stats_cache.get_or_load(client_id, watermark, ('target_stats_df',), loader)
+    target_stats_cache.invalidate(client_id)
+    target_stats_cache.stats()  # {'hits': ..., 'misses': ..., ...}
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+
+def _sizeof(value: Any) -> int:
+    """Approximate in-memory size of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    return 1024
+
+
+class QueryResultCache:
+    """
+    Thread-safe LRU cache bounded by total bytes.
+
+    DataFrames are stored once and handed out as copies so callers can
+    mutate their result without corrupting the shared entry.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return value.copy()
+        return value
+
+    def get(self, client_id: str, watermark: Hashable, args: Tuple = ()) -> Optional[Any]:
+        key = (client_id, watermark, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[0]
+        return self._copy(value)
+
+    def set(self, client_id: str, watermark: Hashable, args: Tuple, value: Any):
+        key = (client_id, watermark, args)
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return  # Larger than the whole budget - don't cache
+        with self._lock:
+            # A new watermark supersedes older entries for the same query
+            for stale in [k for k in self._entries if k[0] == client_id and k[2] == args and k != key]:
+                self._bytes -= self._entries.pop(stale)[1]
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_load(self, client_id: str, watermark: Hashable, args: Tuple, loader: Callable[[], Any]) -> Any:
+        """Return cached value or call loader() and cache its result."""
+        cached = self.get(client_id, watermark, args)
+        if cached is not None:
+            return cached
+        value = loader()
+        if value is not None:
+            self.set(client_id, watermark, args, value)
+        return self._copy(value)
+
+    def invalidate(self, client_id: Optional[str] = None):
+        """Drop all entries for client_id (or everything if None)."""
+        with self._lock:
+            if client_id is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                for key in [k for k in self._entries if k[0] == client_id]:
+                    self._bytes -= self._entries.pop(key)[1]
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current memory footprint."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+# Global cache instance for target_stats reads (shared by all sessions in this process)
+target_stats_cache = QueryResultCache(
+    max_bytes=int(os.getenv("TARGET_STATS_CACHE_MB", "512")) * 1024 * 1024
+)
@@ -0,0 +1,269 @@
+"""
+Columnar Snapshot Store for target_stats
+
+Keeps a local Parquet copy of each account's target_stats next to the database,
+partitioned by week (hive layout: <root>/<account>-<hash>/week=YYYY-MM-DD/part-0.parquet).
+
+- sync() compares a per-week fingerprint (MAX(updated_at), COUNT(*)) from the DB
+  against the local manifest and only re-downloads weeks that changed.
+- read() uses pyarrow datasets for column projection and date predicate pushdown,
+  so readers don't re-pull and re-infer the full history on every dashboard open.
+
+pyarrow is optional: if it is not installed, SNAPSHOTS_AVAILABLE is False and
+callers fall back to plain SQL reads. Snapshots hold client data on local disk and a
+full reaggregation rewrites every week, so PostgresManager only uses them when
+ENABLE_TARGET_STATS_SNAPSHOTS=1.
+
+Files are written to a temp name and os.replace()d into place while holding a per-account
+lock file, so several processes (Streamlit workers) can share one snapshot directory.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    SNAPSHOTS_AVAILABLE = True
+except ImportError:
+    SNAPSHOTS_AVAILABLE = False
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Column layout of get_target_stats_df (DataFrame name -> target_stats column)
+TARGET_STATS_COLUMNS: Dict[str, str] = {
+    'Date': 'start_date',
+    'Campaign Name': 'campaign_name',
+    'Ad Group Name': 'ad_group_name',
+    'Targeting': 'target_text',
+    'Customer Search Term': 'customer_search_term',
+    'Match Type': 'match_type',
+    'Spend': 'spend',
+    'Sales': 'sales',
+    'Orders': 'orders',
+    'Clicks': 'clicks',
+    'Impressions': 'impressions',
+}
+
+_INT_COLUMNS = ('Orders', 'Clicks', 'Impressions')
+_FLOAT_COLUMNS = ('Spend', 'Sales')
+
+
+def _arrow_schema() -> "pa.Schema":
+    """Fixed schema so all-null partitions don't break dataset schema unification."""
+    fields = []
+    for col in TARGET_STATS_COLUMNS:
+        if col == 'Date':
+            fields.append(pa.field(col, pa.timestamp('ns')))
+        elif col in _INT_COLUMNS:
+            fields.append(pa.field(col, pa.int64()))
+        elif col in _FLOAT_COLUMNS:
+            fields.append(pa.field(col, pa.float64()))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+# desktop/data/snapshots regardless of the working directory (ignored by git)
+DEFAULT_SNAPSHOT_DIR = Path(os.getenv(
+    "TARGET_STATS_SNAPSHOT_DIR", Path(__file__).resolve().parent.parent / "data" / "snapshots"
+))
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Exclusive cross-process lock on path (created if missing), held for the block."""
+    with open(path, 'a+b') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _replace_atomically(path: Path, write: Callable[[str], None]):
+    """Write to a unique temp file next to path, then os.replace() it into place."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _week_key(value: Union[date, datetime, str]) -> str:
+    return str(value)[:10]
+
+
+class TargetStatsSnapshotStore:
+    """Per-account, week-partitioned Parquet snapshots of target_stats."""
+
+    MANIFEST = "manifest.json"
+    LOCK = ".lock"
+
+    def __init__(self, root: Path = DEFAULT_SNAPSHOT_DIR):
+        self.root = Path(root)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _thread_lock(self, client_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(client_id, threading.Lock())
+
+    @contextmanager
+    def _lock(self, client_id: str):
+        """Per-account lock across threads (in-process) and processes (lock file)."""
+        account_dir = self._account_dir(client_id)
+        account_dir.mkdir(parents=True, exist_ok=True)
+        with self._thread_lock(client_id), _file_lock(account_dir / self.LOCK):
+            yield account_dir
+
+    def _account_dir(self, client_id: str) -> Path:
+        # Sanitizing alone can fold distinct ids together ("a b" / "a_b"); the hash of the
+        # raw id keeps each account's manifest and weeks separate.
+        digest = hashlib.sha1(client_id.encode('utf-8')).hexdigest()[:10]
+        return self.root / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', client_id)}-{digest}"
+
+    def _load_manifest(self, client_id: str) -> Dict[str, Dict[str, str]]:
+        path = self._account_dir(client_id) / self.MANIFEST
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text()).get('weeks', {})
+        except (ValueError, OSError):
+            return {}  # Corrupt manifest -> full resync
+
+    def _save_manifest(self, client_id: str, weeks: Dict[str, Dict[str, str]]):
+        path = self._account_dir(client_id) / self.MANIFEST
+        payload = json.dumps({'synced_at': datetime.now().isoformat(), 'weeks': weeks})
+        _replace_atomically(path, lambda tmp: Path(tmp).write_text(payload))
+
+    def sync(
+        self,
+        client_id: str,
+        fingerprints: pd.DataFrame,
+        fetch_weeks: Callable[[List[str]], pd.DataFrame],
+    ) -> int:
+        """
+        Bring the local snapshot up to date.
+
+        Args:
+            client_id: Account identifier
+            fingerprints: One row per week with columns week_start, updated_at, row_count
+            fetch_weeks: Loads full rows (TARGET_STATS_COLUMNS layout) for the given week starts
+
+        Returns:
+            Number of weeks rewritten or removed
+        """
+        with self._lock(client_id) as account_dir:
+            manifest = self._load_manifest(client_id)
+
+            current = {
+                _week_key(r.week_start): {'updated_at': str(r.updated_at), 'row_count': int(r.row_count)}
+                for r in fingerprints.itertuples(index=False)
+            }
+            changed = [w for w, fp in current.items() if manifest.get(w) != fp]
+            on_disk = [p.parent.name[len("week="):] for p in account_dir.glob("week=*/part-0.parquet")]
+            removed = [w for w in on_disk if w not in current]
+
+            for week in removed:
+                part = account_dir / f"week={week}" / "part-0.parquet"
+                if part.exists():
+                    part.unlink()
+
+            if changed:
+                rows = fetch_weeks(changed)[list(TARGET_STATS_COLUMNS)].copy()
+                rows['Date'] = pd.to_datetime(rows['Date'])
+                for col in _INT_COLUMNS:
+                    rows[col] = pd.to_numeric(rows[col], errors='coerce').fillna(0).astype('int64')
+                schema = _arrow_schema()
+                week_of = rows['Date'].dt.strftime('%Y-%m-%d')
+                for week in changed:
+                    week_dir = account_dir / f"week={week}"
+                    week_dir.mkdir(parents=True, exist_ok=True)
+                    table = pa.Table.from_pandas(rows[week_of == week], schema=schema, preserve_index=False)
+                    _replace_atomically(week_dir / "part-0.parquet", lambda tmp: pq.write_table(table, tmp))
+
+            if changed or removed or not (account_dir / self.MANIFEST).exists():
+                self._save_manifest(client_id, current)
+
+            if changed or removed:
+                print(f"SNAPSHOT: Synced {len(changed)} changed / {len(removed)} removed weeks for {client_id}")
+            return len(changed) + len(removed)
+
+    def read(
+        self,
+        client_id: str,
+        columns: Optional[List[str]] = None,
+        start_date: Optional[Union[date, datetime, str]] = None,
+        end_date: Optional[Union[date, datetime, str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Read an account's snapshot with column projection and date pushdown.
+
+        Dates filter on the week start ("Date"), same as the SQL path.
+        Result is ordered by Date descending.
+        """
+        columns = list(columns) if columns else list(TARGET_STATS_COLUMNS)
+        read_cols = columns if 'Date' in columns else columns + ['Date']
+        # Under the lock so a concurrent sync can't remove a week between listing and reading
+        with self._lock(client_id) as account_dir:
+            files = sorted(str(p) for p in account_dir.glob("week=*/part-0.parquet"))
+            if not files:
+                return pd.DataFrame(columns=columns)
+
+            dataset = ds.dataset(
+                files,
+                format='parquet',
+                schema=_arrow_schema().append(pa.field('week', pa.string())),
+                partitioning=ds.partitioning(pa.schema([('week', pa.string())]), flavor='hive'),
+                partition_base_dir=str(account_dir),
+            )
+            predicate = None
+            if start_date is not None:
+                start = _week_key(start_date)
+                predicate = ds.field('week') >= start
+            if end_date is not None:
+                end = _week_key(end_date)
+                clause = ds.field('week') <= end
+                predicate = clause if predicate is None else (predicate & clause)
+
+            df = dataset.to_table(columns=read_cols, filter=predicate).to_pandas()
+        if 'Date' in df.columns:
+            df['Date'] = pd.to_datetime(df['Date'])
+            df = df.sort_values('Date', ascending=False, kind='stable').reset_index(drop=True)
+        return df[columns]
+
+    def clear(self, client_id: str):
+        """Drop an account's snapshot (next sync rebuilds it)."""
+        with self._lock(client_id):
+            manifest = self._account_dir(client_id) / self.MANIFEST
+            if manifest.exists():
+                manifest.unlink()
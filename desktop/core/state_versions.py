@@ -0,0 +1,39 @@
+"""
+Session State Versions
+
+Monotonic version numbers for session-state entries, bumped by the code that stores them.
+Readers that cache work derived from an entry (the AI assistant's knowledge graph) compare
+versions instead of id() of the stored object, which CPython reuses once a replaced object
+has been garbage collected. Storing the same object again (e.g. a results dict updated in
+place) also gets a new version.
+
+Usage:
+    from core.state_versions import bump_state_version, state_version
+
+    st.session_state['latest_ai_insights'] = results
+    bump_state_version('latest_ai_insights')
+    state_version('latest_ai_insights')  # -> int, or None if never stored
+"""
+
+import itertools
+from typing import Optional
+
+import streamlit as st
+
+# Process-wide counter: versions never repeat, even after a session's state is cleared
+_counter = itertools.count(1)
+
+
+def bump_state_version(key: str) -> int:
+    """Record that session-state entry key was (re)stored and return its new version."""
+    versions = st.session_state.get('_state_versions')
+    if versions is None:
+        versions = st.session_state['_state_versions'] = {}
+    versions[key] = next(_counter)
+    return versions[key]
+
+
+def state_version(key: str) -> Optional[int]:
+    """Version of session-state entry key (None if it was never stored through bump_state_version)."""
+    versions = st.session_state.get('_state_versions') or {}
+    return versions.get(key)
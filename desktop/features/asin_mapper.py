@@ -14,6 +14,7 @@ from core.data_loader import SmartMapper, load_uploaded_file, safe_numeric
 from api.rainforest_client import RainforestClient
 from utils.validators import validate_search_term_report
 from ui.components import metric_card
+from core.state_versions import bump_state_version
 
 class ASINMapperModule(BaseFeature):
     """ASIN Intent Mapping and Competitor Detection."""
@@ -160,6 +161,7 @@ class ASINMapperModule(BaseFeature):
             with st.spinner("Classifying ASINs..."):
                 results = self.analyze(self.data)
                 st.session_state['latest_asin_analysis'] = results
+                bump_state_version('latest_asin_analysis')
         
         # Display results if available
         if results:
@@ -309,9 +311,15 @@ class ASINMapperModule(BaseFeature):
             
             if st.button("🗑️ Force Refresh / Clear Cache", key="clear_cache_btn", type="secondary", use_container_width=True):
                 try:
-                    import os, time
-                    if os.path.exists("data/asin_cache.db"):
-                        os.remove("data/asin_cache.db")
+                    import time
+                    from core.asin_cache import ASINCache
+                    # Delete rows rather than the file: WAL mode keeps -wal/-shm files and live connections
+                    cache = ASINCache()
+                    try:
+                        cleared = cache.clear()
+                    finally:
+                        cache.close()
+                    if cleared:
                         st.toast("Cache cleared! fetching fresh data...", icon="🧹")
                         time.sleep(1)
                     else:
@@ -340,11 +348,14 @@ class ASINMapperModule(BaseFeature):
                     client = RainforestClient(api_key)
                     asin_details = []
                     progress = st.progress(0)
-                    total = len(high_priority)
                     
-                    for i, (idx, row) in enumerate(high_priority.iterrows()):
-                        details = client.lookup_asin(row['asin'])
-                        
+                    # Cached ASINs in one query, the rest fetched concurrently under the shared rate limit
+                    lookups = client.batch_lookup(
+                        high_priority['asin'].tolist(),
+                        progress_callback=lambda done, total: progress.progress(done / total)
+                    )
+                    
+                    for (idx, row), details in zip(high_priority.iterrows(), lookups):
                         # DEBUG: Show what API returned
                         print(f"API Response for {row['asin']}: status={details.get('status', 'unknown')}, brand={details.get('brand', 'MISSING')}, title={details.get('title', 'MISSING')[:50] if details.get('title') else 'MISSING'}")
                         
@@ -362,7 +373,6 @@ class ASINMapperModule(BaseFeature):
                             details['AdGroupId'] = row['AdGroupId']
                         
                         asin_details.append(details)
-                        progress.progress((i + 1) / total)
                     
                     details_df = pd.DataFrame(asin_details)
                     
@@ -393,6 +403,7 @@ class ASINMapperModule(BaseFeature):
                     
                     # Persist Update
                     st.session_state['latest_asin_analysis'] = results
+                    bump_state_version('latest_asin_analysis')
                     st.rerun()  # Rerun to show Enriched View
 
     def _display_enriched_results(self, results):
@@ -1,10 +1,183 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import copy
+import hashlib
 import json
+import os
+import threading
+import time
 import requests
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from typing import Callable, Iterator, List, Dict, Any, Optional, Tuple
 from core.db_manager import get_db_manager
+from core.state_versions import state_version
+from features.assistant_context import ContextCompiler, context_metrics, estimate_tokens
+from api.rainforest_client import RateLimiter, RateLimitedRetry
+
+# LLM endpoints (point these at a local mock server for testing)
+CLAUDE_API_URL = os.getenv("CLAUDE_API_URL", "https://api.anthropic.com/v1/messages")
+OPENAI_API_URL = os.getenv("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")
+
+# Client report narratives: concurrent panel requests, shared request rate, narrative reuse
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "4"))
+LLM_REQUESTS_PER_SECOND = float(os.getenv("LLM_REQUESTS_PER_SECOND", "2"))
+NARRATIVE_CACHE_TTL = float(os.getenv("NARRATIVE_CACHE_TTL", "86400"))
+NARRATIVE_CACHE_MAX_ENTRIES = 512
+
+# Assistant knowledge graph sections (in context order) and the inputs each one reads.
+# A section is recomputed only when one of its inputs changed since it was built.
+KNOWLEDGE_SECTIONS = {
+    "dataset_overview": ("data",),
+    "account_health": ("data", "optimizer", "settings"),
+    "campaign_portfolio": ("data",),
+    "term_analysis": ("data", "optimizer"),
+    "strategic_insights": ("data", "optimizer", "settings"),
+    "patterns_detected": ("data",),
+    "cross_references": ("data",),
+    "optimization_impact": ("data", "optimizer", "impact"),
+    "module_context": ("optimizer", "modules", "impact"),
+    "data_status": ("stores",),
+}
+# Decision impact is read from the database: re-read at most this often (seconds)
+ASSISTANT_IMPACT_TTL = float(os.getenv("ASSISTANT_IMPACT_TTL", "300"))
+
+NO_API_KEY_MESSAGE = "⚠️ No AI API Key configured. Please add CLAUDE_API_KEY or OPENAI_API_KEY to .streamlit/secrets.toml"
+
+FALLBACK_PANEL_NARRATIVE = "Detailed analysis available in full dashboard."
+FALLBACK_EXECUTIVE_SUMMARY = {
+    "achievements": [
+        "Account performance analyzed across all campaigns",
+        "Optimization opportunities identified and quantified",
+        "Decision impact tracking active and validated"
+    ],
+    "areas_to_watch": [
+        "Review detailed dashboard for specific campaign insights",
+        "Monitor pending optimization implementations"
+    ],
+    "next_steps": [
+        "Execute recommended optimization actions",
+        "Track impact over next 14-60 days",
+        "Schedule performance review meeting"
+    ]
+}
+
+
+class LLMError(Exception):
+    """LLM request failed (after retries), or no API key is configured. str() is user-facing."""
+
+
+class NarrativeGenerationError(Exception):
+    """
+    Some report panels failed. narratives holds every requested panel: generated text
+    for the panels that succeeded, fallback content for the rest.
+    """
+
+    def __init__(self, message: str, narratives: Dict[str, Any], errors: List[str]):
+        super().__init__(message)
+        self.narratives = narratives
+        self.errors = errors
+
+
+# One rate limit and one pooled, retrying HTTP session for all LLM calls in this process,
+# so concurrent panels (and concurrent users) don't multiply into 429s
+_llm_rate_limiter = RateLimiter(requests_per_second=LLM_REQUESTS_PER_SECOND, burst=max(1, LLM_MAX_WORKERS))
+_llm_session: Optional[requests.Session] = None
+_llm_session_lock = threading.Lock()
+
+
+def _get_llm_session() -> requests.Session:
+    """Pooled HTTP session; retries 429/5xx/529 with backoff (honouring Retry-After) under the shared rate limit."""
+    global _llm_session
+    with _llm_session_lock:
+        if _llm_session is None:
+            retry = RateLimitedRetry(
+                total=4,
+                backoff_factor=1.0,
+                status_forcelist=(429, 500, 502, 503, 504, 529),
+                allowed_methods=frozenset(['POST']),
+                raise_on_status=False,
+                rate_limiter=_llm_rate_limiter,
+            )
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, LLM_MAX_WORKERS), max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _llm_session = session
+        return _llm_session
+
+
+def _iter_sse(response: requests.Response) -> Iterator[Tuple[str, str]]:
+    """(event, data) pairs of a text/event-stream response, as they arrive."""
+    event, data = "message", []
+    # chunk_size=None: hand over each chunk as received instead of waiting for 512 bytes
+    for raw in response.iter_lines(chunk_size=None):
+        line = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+            continue
+        if line.startswith(':'):
+            continue  # Comment / keep-alive
+        name, _, value = line.partition(':')
+        value = value[1:] if value.startswith(' ') else value
+        if name == 'event':
+            event = value
+        elif name == 'data':
+            data.append(value)
+    if data:
+        yield event, "\n".join(data)
+
+
+class NarrativeCache:
+    """
+    Thread-safe cache of generated narratives keyed by a hash of the prompt messages
+    (system prompt + panel context), so a panel is only regenerated when its data changes.
+    Only successful, validated results are stored.
+    """
+
+    def __init__(self, ttl_seconds: float = NARRATIVE_CACHE_TTL, max_entries: int = NARRATIVE_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(messages: List[Dict[str, str]]) -> str:
+        return hashlib.sha256(json.dumps(messages, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))  # oldest first
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+# Global narrative cache (shared by all sessions in this process)
+narrative_cache = NarrativeCache()
 
 
 class AssistantModule:
@@ -26,11 +199,17 @@ class AssistantModule:
     
     def __init__(self):
         self.system_prompt = self._build_system_prompt()
+        # Chat: the methodology travels in the compiled context, only when the question needs it
+        self.chat_system_prompt = self._build_system_prompt(include_methodology=False)
         
-    def _build_system_prompt(self) -> str:
+    def _build_system_prompt(self, include_methodology: bool = True) -> str:
         """
         Build the comprehensive system prompt that transforms the AI into
         a deep strategist rather than a surface-level data reporter.
+
+        Args:
+            include_methodology: Embed the platform methodology; if False the prompt points
+                                 to `platform_knowledge` in the knowledge graph instead
         """
         from utils.formatters import get_account_currency
         currency_symbol = get_account_currency()
@@ -240,7 +419,9 @@ If Auto outperforms Manual: Discovery is working - harvest more aggressively
 """
         
         # Inject the methodology text and currency
-        return prompt_template.format(methodology=self._get_platform_methodology(), currency=currency_symbol)
+        methodology = (self._get_platform_methodology() if include_methodology else
+                       "Provided as `platform_knowledge` in the knowledge graph when relevant to the question.")
+        return prompt_template.format(methodology=methodology, currency=currency_symbol)
 
     # =========================================================================
     # KNOWLEDGE GRAPH CONSTRUCTION
@@ -257,7 +438,8 @@ If Auto outperforms Manual: Discovery is working - harvest more aggressively
         print(f"[ASSISTANT] Checking session state: unified_data={st.session_state.get('unified_data') is not None}, data={st.session_state.get('data') is not None}")
 
         if 'unified_data' in st.session_state and st.session_state.unified_data.get('search_term_report') is not None:
-            str_df = st.session_state.unified_data['search_term_report']
+            from core.data_hub import DataHub
+            str_df = DataHub().get_data('search_term_report')
             print(f"[ASSISTANT] Loaded from unified_data: {len(str_df)} rows")
         elif 'data' in st.session_state and 'search_term_report' in st.session_state['data']:
             str_df = st.session_state['data']['search_term_report']
@@ -363,20 +545,24 @@ If Auto outperforms Manual: Discovery is working - harvest more aggressively
             # C. Merge Bid Recommendations
             bids_df = opt_res.get('direct_bids', pd.DataFrame())
             if not bids_df.empty:
-                bids_map = {}
                 id_col = 'KeywordId' if 'KeywordId' in bids_df.columns else 'TargetingId'
                 if id_col in master.columns and id_col in bids_df.columns:
-                    for _, row in bids_df.iterrows():
-                        key = str(row[id_col])
-                        if key and key != 'nan':
-                            bids_map[key] = {
-                                'New Bid': row.get('New Bid'), 
-                                'Original Bid': row.get('Cost Per Click (CPC)', row.get('CPC')),
-                                'Reason': row.get('Reason', '')
-                            }
-                            
-                    master['Optimized_Bid'] = master[id_col].astype(str).map(lambda x: bids_map.get(x, {}).get('New Bid'))
-                    master['Bid_Reason'] = master[id_col].astype(str).map(lambda x: bids_map.get(x, {}).get('Reason', ''))
+                    # Bid per target ID (last recommendation wins), looked up by index
+                    bid_keys = bids_df[id_col].astype(str)
+                    valid = (bid_keys != '') & (bid_keys != 'nan')
+                    bids = bids_df[valid].set_axis(bid_keys[valid].to_numpy())
+                    bids = bids[~bids.index.duplicated(keep='last')]
+                    master_ids = master[id_col].astype(str)
+                    matched = master_ids.isin(bids.index)
+
+                    if 'New Bid' in bids.columns:
+                        master['Optimized_Bid'] = master_ids.map(bids['New Bid']).astype(object).where(matched, None)
+                    else:
+                        master['Optimized_Bid'] = None
+                    if 'Reason' in bids.columns:
+                        master['Bid_Reason'] = master_ids.map(bids['Reason']).where(matched, '')
+                    else:
+                        master['Bid_Reason'] = ''
         else:
             master['Is_Harvest_Candidate'] = False
             master['Is_Negative_Candidate'] = False
@@ -393,20 +579,132 @@ If Auto outperforms Manual: Discovery is working - harvest more aggressively
         if df.empty:
             return {"error": "No data loaded"}
         
-        knowledge = {
-            "dataset_overview": self._compute_dataset_overview(df),
-            "account_health": self._compute_account_health(df),
-            "campaign_portfolio": self._analyze_campaign_portfolio(df),
-            "term_analysis": self._analyze_terms(df),
-            "strategic_insights": self._compute_strategic_insights(df),
-            "patterns_detected": self._detect_patterns(df),
-            "cross_references": self._build_cross_references(df),
-            "optimization_impact": self._compute_optimization_impact(df),  # NEW: Financial impact summary
-            "module_context": self._gather_module_context(),
-            "data_status": self._summarize_data_status()
+        return {name: self._knowledge_section(name, df) for name in KNOWLEDGE_SECTIONS}
+
+    def _knowledge_section(self, name: str, df: Optional[pd.DataFrame]) -> Any:
+        """Compute one knowledge graph section (df may be None for sections that don't read data)."""
+        if name == "dataset_overview":
+            return self._compute_dataset_overview(df)
+        if name == "account_health":
+            return self._compute_account_health(df)
+        if name == "campaign_portfolio":
+            return self._analyze_campaign_portfolio(df)
+        if name == "term_analysis":
+            return self._analyze_terms(df)
+        if name == "strategic_insights":
+            return self._compute_strategic_insights(df)
+        if name == "patterns_detected":
+            return self._detect_patterns(df)
+        if name == "cross_references":
+            return self._build_cross_references(df)
+        if name == "optimization_impact":
+            return self._compute_optimization_impact(df)  # Financial impact summary
+        if name == "module_context":
+            return self._gather_module_context()
+        if name == "data_status":
+            return self._summarize_data_status()
+        raise KeyError(name)
+
+    def _knowledge_inputs(self, impact_epoch: int = 0) -> Dict[str, Any]:
+        """
+        Cheap version tokens for each input of the knowledge graph (see KNOWLEDGE_SECTIONS).
+
+        data: account + data watermark (upload timestamps and the stored frames' versions)
+        optimizer: version of the stored optimizer run
+        modules: versions of the stored ASIN and cluster analyses
+        Versions come from core.state_versions (bumped where each object is stored), not id(),
+        which CPython reuses for a new object once the replaced one is collected.
+        impact: account + impact_epoch, which _get_knowledge advances once ASSISTANT_IMPACT_TTL
+                seconds have passed since decision impact was last read from the DB
+        """
+        state = st.session_state
+        unified = state.get('unified_data') or {}
+        legacy = state.get('data')
+        legacy_str = legacy.get('search_term_report') if isinstance(legacy, dict) else None
+        account = state.get('active_account_id')
+        watermark = state.get('data_upload_timestamp')
+        opt_key = 'optimizer_results' if state.get('optimizer_results') else 'latest_optimizer_run'
+        opt_res = state.get(opt_key)
+
+        def stored(container, key):
+            return (container.get(key) is not None, state_version(key))
+
+        return {
+            # Nothing in this tree writes the legacy state['data'] store; only its presence is tracked
+            "data": (account, watermark, repr(unified.get('upload_timestamps')),
+                     stored(unified, 'search_term_report'), stored(unified, 'enriched_data'), legacy_str is not None),
+            "optimizer": (opt_key, state_version(opt_key), opt_res.get('run_id')) if opt_res else None,
+            "settings": state.get('opt_target_roas', 3.0),
+            "modules": (stored(state, 'latest_asin_analysis'), stored(state, 'latest_ai_insights')),
+            "impact": (account, unified.get('client_id'), state.get('client_id'), state.get('test_mode', False),
+                       watermark, impact_epoch),
+            "stores": ('unified_data' in state,) + tuple(
+                unified.get(name) is not None
+                for name in ('search_term_report', 'advertised_product_report', 'bulk_id_mapping')),
         }
-        
-        return knowledge
+
+    def _get_knowledge(self) -> Tuple[Dict[str, Any], bool]:
+        """
+        Knowledge graph for the current session, built incrementally.
+
+        Sections are kept in session state with the versions of the inputs they were built
+        from; only sections whose inputs changed are recomputed, and the granular dataset is
+        only rebuilt when one of those reads it. The result is shared with the cache - treat
+        it as read-only.
+
+        Returns:
+            (knowledge, has_data) - without a Search Term Report, knowledge is the reduced
+            context (error, data_status, module_context) and has_data is False
+        """
+        cache = st.session_state.get('_assistant_knowledge')
+        if cache is None:
+            cache = {'sections': {}, 'versions': {}, 'has_data': None, 'generation': 0, 'json': None,
+                     'impact_epoch': 0, 'impact_read_at': None}
+            st.session_state['_assistant_knowledge'] = cache
+
+        # Decision impact goes stale ASSISTANT_IMPACT_TTL seconds after it was last read
+        if cache['impact_read_at'] is not None and time.time() - cache['impact_read_at'] >= ASSISTANT_IMPACT_TTL:
+            cache['impact_epoch'] += 1
+            cache['impact_read_at'] = None
+        inputs = self._knowledge_inputs(cache['impact_epoch'])
+
+        def version(name):
+            return tuple(inputs[i] for i in KNOWLEDGE_SECTIONS[name])
+
+        def stale(names):
+            return [n for n in names if cache['versions'].get(n) != version(n)]
+
+        df = None
+        known = cache['has_data'] is not None and cache['has_data'][0] == inputs['data']
+        data_stale = any('data' in KNOWLEDGE_SECTIONS[n] for n in stale(KNOWLEDGE_SECTIONS))
+        if not known or (cache['has_data'][1] and data_stale):
+            df = self._construct_granular_dataset()
+            inputs = self._knowledge_inputs(cache['impact_epoch'])  # The build may have loaded the account from the DB
+            has_data = not df.empty
+            if cache['has_data'] is None or cache['has_data'][1] != has_data:
+                cache['generation'] += 1
+            cache['has_data'] = (inputs['data'], has_data)
+        has_data = cache['has_data'][1]
+
+        names = list(KNOWLEDGE_SECTIONS) if has_data else ["data_status", "module_context"]
+        rebuild = stale(names)
+        if rebuild:
+            print(f"[ASSISTANT] Knowledge graph: recomputing {', '.join(rebuild)}")
+            for name in rebuild:
+                cache['sections'][name] = self._knowledge_section(name, df)
+                cache['versions'][name] = version(name)
+            if any('impact' in KNOWLEDGE_SECTIONS[name] for name in rebuild):
+                cache['impact_read_at'] = time.time()
+            cache['generation'] += 1
+
+        if not has_data:
+            # Even without STR data, we can still provide decision_impact from DB
+            return {
+                "error": "No Search Term Report loaded yet. Upload in Data Hub for full analysis.",
+                "data_status": cache['sections']["data_status"],
+                "module_context": cache['sections']["module_context"],  # This includes decision_impact
+            }, False
+        return {name: cache['sections'][name] for name in names}, True
 
     def _compute_dataset_overview(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Compute high-level dataset statistics."""
@@ -1544,66 +1842,172 @@ PLATFORM METHODOLOGY & ENGINE LOGIC (UPDATED JAN 2, 2026)
         Build the comprehensive context for the AI.
         Returns a JSON-formatted knowledge graph.
         """
-        df = self._construct_granular_dataset()
-        
-        if df.empty:
-            # Even without STR data, we can still provide decision_impact from DB
-            knowledge = {
-                "error": "No Search Term Report loaded yet. Upload in Data Hub for full analysis.",
-                "data_status": self._summarize_data_status(),
-                "module_context": self._gather_module_context()  # This includes decision_impact
-            }
-            return json.dumps(knowledge, indent=2, default=str)
-        
-        knowledge = self._build_knowledge_graph(df)
-        
-        # Format as JSON for better LLM parsing
-        return json.dumps(knowledge, indent=2, default=str)
+        knowledge, _ = self._get_knowledge()
+        cache = st.session_state['_assistant_knowledge']
+
+        # Format as JSON for better LLM parsing (re-serialized only when a section changed)
+        if cache['json'] is None or cache['json'][0] != cache['generation']:
+            cache['json'] = (cache['generation'], json.dumps(knowledge, indent=2, default=str))
+        return cache['json'][1]
+
+    def _build_chat_messages(self, history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Prompt for the latest chat question: the chat system prompt plus the knowledge graph
+        (and platform methodology) compiled for that question within ASSISTANT_CONTEXT_TOKENS.
+        Context size and build time are recorded per request in context_metrics.
+        """
+        t0 = time.perf_counter()
+        question = next((m["content"] for m in reversed(history) if m["role"] == "user"), "")
+
+        knowledge, _ = self._get_knowledge()
+        sections = dict(knowledge, platform_knowledge=self._get_platform_methodology())
+        compiled = ContextCompiler().compile(sections, question)
+
+        messages = [
+            {"role": "system", "content": self.chat_system_prompt},
+            {"role": "system", "content": f"KNOWLEDGE GRAPH (Your dataset analysis, most relevant sections first):\n{compiled.text}"}
+        ] + history
+
+        system_tokens = estimate_tokens(self.chat_system_prompt)
+        history_tokens = sum(estimate_tokens(m["content"]) for m in history)
+        metrics = {
+            "question_chars": len(question),
+            "context_tokens": compiled.tokens,
+            "budget_tokens": compiled.budget_tokens,
+            "system_tokens": system_tokens,
+            "history_tokens": history_tokens,
+            "prompt_tokens": system_tokens + compiled.tokens + history_tokens,
+            "sections": compiled.included,
+            "omitted": compiled.omitted,
+            "trimmed": compiled.trimmed,
+            "build_ms": round((time.perf_counter() - t0) * 1000, 1),
+        }
+        context_metrics.record(metrics)
+        st.session_state['assistant_context_metrics'] = metrics
+        print(f"[ASSISTANT] Prompt: ~{metrics['prompt_tokens']:,} tokens (context {compiled.tokens:,}/"
+              f"{compiled.budget_tokens:,}, {len(compiled.included)} sections, {len(compiled.omitted)} omitted) "
+              f"built in {metrics['build_ms']:.0f} ms")
+        return messages
 
     # =========================================================================
     # LLM INTERFACE
     # =========================================================================
 
-    def _call_llm(self, messages):
+    def _call_llm(self, messages, stream: bool = False, cancel: Optional[threading.Event] = None):
         """
         Calls AI API using the requests library.
         Tries Claude first (if available), falls back to OpenAI.
-        """
-        import os
+        Errors are returned as a message for the chat rather than raised.
 
-        # Check for Claude API key first
-        claude_key = None
+        With stream=True, returns a generator of reply text chunks as they arrive (for
+        st.write_stream); errors are yielded as text too. Closing the generator, or setting
+        cancel, closes the connection so the provider stops generating.
+        """
+        if stream:
+            return self._stream_reply(messages, cancel)
         try:
-            claude_key = st.secrets.get("CLAUDE_API_KEY")
-        except Exception:
-            pass
-        if not claude_key:
-            claude_key = os.environ.get("CLAUDE_API_KEY")
+            return self._request_llm(messages)
+        except LLMError as e:
+            return str(e)
+
+    def _stream_reply(self, messages, cancel: Optional[threading.Event] = None) -> Iterator[str]:
+        """Chat reply chunks from _stream_llm, with a failure appended as text."""
+        t0 = time.perf_counter()
+        first_token = None
+        try:
+            for chunk in self._stream_llm(messages, cancel=cancel):
+                if first_token is None:
+                    first_token = time.perf_counter() - t0
+                yield chunk
+        except LLMError as e:
+            yield str(e) if first_token is None else f"\n\n{e}"
+        if first_token is not None:
+            print(f"[ASSISTANT] Streamed reply: first token after {first_token * 1000:.0f} ms, "
+                  f"complete after {time.perf_counter() - t0:.1f}s")
+
+    def _api_keys(self) -> Tuple[Optional[str], Optional[str]]:
+        """(Claude key, OpenAI key) from st.secrets or the environment."""
+        keys = []
+        for name in ("CLAUDE_API_KEY", "OPENAI_API_KEY"):
+            key = None
+            try:
+                key = st.secrets.get(name)
+            except Exception:
+                pass
+            keys.append(key or os.environ.get(name))
+        return keys[0], keys[1]
+
+    def _request_llm(self, messages, keys: Optional[Tuple[Optional[str], Optional[str]]] = None) -> str:
+        """
+        Send messages to Claude (falling back to OpenAI) and return the reply text.
+
+        Args:
+            messages: OpenAI-format messages
+            keys: (Claude key, OpenAI key); resolved from secrets when None. Worker
+                  threads get keys from the calling thread.
+
+        Raises:
+            LLMError: No API key configured, or the request failed after retries
+        """
+        claude_key, openai_key = keys if keys is not None else self._api_keys()
 
         # Try Claude first if available
         if claude_key:
             try:
                 return self._call_claude(messages, claude_key)
             except Exception as e:
+                if not openai_key:
+                    raise LLMError(f"❌ Error communicating with AI: {str(e)}") from e
                 print(f"[ASSISTANT] Claude API failed: {str(e)}, falling back to OpenAI")
                 # Fall through to OpenAI
 
-        # Fallback to OpenAI
-        openai_key = None
-        try:
-            openai_key = st.secrets.get("OPENAI_API_KEY")
-        except Exception:
-            pass
         if not openai_key:
-            openai_key = os.environ.get("OPENAI_API_KEY")
+            raise LLMError(NO_API_KEY_MESSAGE)
 
-        if not openai_key:
-            return "⚠️ No AI API Key configured. Please add CLAUDE_API_KEY or OPENAI_API_KEY to .streamlit/secrets.toml"
+        try:
+            return self._call_openai(messages, openai_key)
+        except Exception as e:
+            raise LLMError(f"❌ Error communicating with AI: {str(e)}") from e
 
-        return self._call_openai(messages, openai_key)
+    def _stream_llm(self, messages, keys: Optional[Tuple[Optional[str], Optional[str]]] = None,
+                    cancel: Optional[threading.Event] = None) -> Iterator[str]:
+        """
+        Stream the reply to messages from Claude (falling back to OpenAI), yielding text
+        chunks as they arrive. Falls back only if Claude fails before its first chunk.
 
-    def _call_claude(self, messages, api_key):
-        """Call Claude API (Anthropic)."""
+        Args:
+            messages: OpenAI-format messages
+            keys: (Claude key, OpenAI key); resolved from secrets when None
+            cancel: Stop reading (and close the connection) once set
+
+        Raises:
+            LLMError: No API key configured, or the request failed after retries
+        """
+        claude_key, openai_key = keys if keys is not None else self._api_keys()
+        providers = [(name, stream, key) for name, stream, key in (
+            ("Claude", self._stream_claude, claude_key),
+            ("OpenAI", self._stream_openai, openai_key),
+        ) if key]
+        if not providers:
+            raise LLMError(NO_API_KEY_MESSAGE)
+
+        for i, (name, stream, key) in enumerate(providers):
+            started = False
+            chunks = stream(messages, key, cancel)
+            try:
+                for chunk in chunks:
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or i == len(providers) - 1:
+                    raise LLMError(f"❌ Error communicating with AI: {str(e)}") from e
+                print(f"[ASSISTANT] {name} API failed: {str(e)}, falling back to OpenAI")
+            finally:
+                chunks.close()  # Closes the connection if we stopped early
+
+    def _claude_request(self, messages, api_key) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Headers and payload for the Claude messages API."""
         headers = {
             "x-api-key": api_key,
             "anthropic-version": "2023-06-01",
@@ -1636,10 +2040,16 @@ PLATFORM METHODOLOGY & ENGINE LOGIC (UPDATED JAN 2, 2026)
 
         if system_msg:
             payload["system"] = system_msg
+        return headers, payload
+
+    def _call_claude(self, messages, api_key):
+        """Call Claude API (Anthropic)."""
+        headers, payload = self._claude_request(messages, api_key)
 
         try:
-            response = requests.post(
-                "https://api.anthropic.com/v1/messages",
+            _llm_rate_limiter.wait()
+            response = _get_llm_session().post(
+                CLAUDE_API_URL,
                 headers=headers,
                 json=payload,
                 timeout=60
@@ -1650,8 +2060,35 @@ PLATFORM METHODOLOGY & ENGINE LOGIC (UPDATED JAN 2, 2026)
         except Exception as e:
             raise Exception(f"Claude API error: {str(e)}")
 
-    def _call_openai(self, messages, api_key):
-        """Call OpenAI API."""
+    def _stream_claude(self, messages, api_key, cancel: Optional[threading.Event] = None) -> Iterator[str]:
+        """Stream a Claude reply (server-sent events), yielding text deltas."""
+        headers, payload = self._claude_request(messages, api_key)
+        payload["stream"] = True
+
+        try:
+            _llm_rate_limiter.wait()
+            response = _get_llm_session().post(CLAUDE_API_URL, headers=headers, json=payload, timeout=60, stream=True)
+            response.raise_for_status()
+        except Exception as e:
+            raise Exception(f"Claude API error: {str(e)}")
+
+        try:
+            for event, data in _iter_sse(response):
+                if cancel is not None and cancel.is_set():
+                    return
+                if event == "content_block_delta":
+                    delta = json.loads(data).get("delta", {})
+                    if delta.get("type") == "text_delta" and delta.get("text"):
+                        yield delta["text"]
+                elif event == "error":
+                    raise Exception(f"Claude API error: {data}")
+                elif event == "message_stop":
+                    return
+        finally:
+            response.close()
+
+    def _openai_request(self, messages, api_key) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Headers and payload for the OpenAI chat completions API."""
         headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
@@ -1663,10 +2100,16 @@ PLATFORM METHODOLOGY & ENGINE LOGIC (UPDATED JAN 2, 2026)
             "temperature": 0.4,
             "max_tokens": 2000
         }
+        return headers, payload
+
+    def _call_openai(self, messages, api_key):
+        """Call OpenAI API."""
+        headers, payload = self._openai_request(messages, api_key)
 
         try:
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
+            _llm_rate_limiter.wait()
+            response = _get_llm_session().post(
+                OPENAI_API_URL,
                 headers=headers,
                 json=payload,
                 timeout=60
@@ -1674,7 +2117,59 @@ PLATFORM METHODOLOGY & ENGINE LOGIC (UPDATED JAN 2, 2026)
             response.raise_for_status()
             return response.json()['choices'][0]['message']['content']
         except Exception as e:
-            return f"❌ Error communicating with AI: {str(e)}"
+            raise Exception(f"OpenAI API error: {str(e)}")
+
+    def _stream_openai(self, messages, api_key, cancel: Optional[threading.Event] = None) -> Iterator[str]:
+        """Stream an OpenAI reply (server-sent events), yielding content deltas."""
+        headers, payload = self._openai_request(messages, api_key)
+        payload["stream"] = True
+
+        try:
+            _llm_rate_limiter.wait()
+            response = _get_llm_session().post(OPENAI_API_URL, headers=headers, json=payload, timeout=60, stream=True)
+            response.raise_for_status()
+        except Exception as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
+
+        try:
+            for _, data in _iter_sse(response):
+                if cancel is not None and cancel.is_set():
+                    return
+                if data == "[DONE]":
+                    return
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    raise Exception(f"OpenAI API error: {chunk['error']}")
+                choices = chunk.get("choices") or []
+                text = (choices[0].get("delta") or {}).get("content") if choices else None
+                if text:
+                    yield text
+        finally:
+            response.close()
+
+    def _cached_llm_call(self, messages, keys=None, parse: Optional[Callable[[str], Any]] = None,
+                         refresh: bool = False) -> Any:
+        """
+        LLM reply for messages, reused from narrative_cache while the prompt is unchanged.
+
+        Args:
+            messages: OpenAI-format messages (the cache key is a hash of these)
+            keys: (Claude key, OpenAI key) passed to _request_llm
+            parse: Optional reply parser/validator; the parsed value is what gets cached,
+                   and nothing is cached if it raises
+            refresh: Skip the cache lookup (the new reply replaces the cached one)
+
+        Raises:
+            LLMError: Request failed (nothing cached)
+        """
+        key = NarrativeCache.key(messages)
+        cached = None if refresh else narrative_cache.get(key)
+        if cached is not None:
+            return cached
+        response = self._request_llm(messages, keys)
+        result = parse(response) if parse else response.strip()
+        narrative_cache.set(key, result)
+        return result
 
     # =========================================================================
     # UI RENDERING
@@ -1764,9 +2259,6 @@ PLATFORM METHODOLOGY & ENGINE LOGIC (UPDATED JAN 2, 2026)
         """
         import base64
         
-        # Build context
-        data_context = self._get_context()
-        
         # Initialize chat history
         if "messages" not in st.session_state:
             st.session_state.messages = []
@@ -1796,13 +2288,15 @@ PLATFORM METHODOLOGY & ENGINE LOGIC (UPDATED JAN 2, 2026)
 
                 with st.chat_message("assistant"):
                     with st.spinner("Analyzing your data..."):
-                        full_messages = [
-                            {"role": "system", "content": self.system_prompt},
-                            {"role": "system", "content": f"KNOWLEDGE GRAPH (Your complete dataset analysis):\n{data_context}"}
-                        ] + st.session_state.messages
-                        
-                        response = self._call_llm(full_messages)
-                        st.markdown(response)
+                        full_messages = self._build_chat_messages(st.session_state.messages)
+
+                    # Render tokens as they arrive. Navigating away stops this script run
+                    # inside write_stream; closing the stream then stops the generation.
+                    stream = self._call_llm(full_messages, stream=True)
+                    try:
+                        response = st.write_stream(stream)
+                    finally:
+                        stream.close()
                         
             st.session_state.messages.append({"role": "assistant", "content": response})
             st.rerun()
@@ -1811,26 +2305,35 @@ PLATFORM METHODOLOGY & ENGINE LOGIC (UPDATED JAN 2, 2026)
     # CLIENT REPORT GENERATION (NEW - Jan 2026)
     # =========================================================================
 
-    def generate_report_narratives(self, panels: List[str]) -> Dict[str, Any]:
+    def generate_report_narratives(self, panels: List[str], refresh: bool = False,
+                                   on_panel: Optional[Callable[[str, int, int], None]] = None) -> Dict[str, Any]:
         """
         Generate AI narratives for client report panels.
 
         Args:
             panels: List of panel names e.g., ["performance", "health", "portfolio"]
+            refresh: Ask the LLM again even for panels with a cached narrative
+            on_panel: Called as each panel finishes with (panel, panels done, total), in
+                      the calling thread (safe for Streamlit progress updates). If it raises
+                      (e.g. the user navigated away), panels not yet started are cancelled.
 
         Returns:
             Dict mapping panel name to narrative text or structured data
 
+        Raises:
+            NarrativeGenerationError: Some panels failed; .narratives has the panels that
+                succeeded plus fallback content for the rest
+
         Example:
             narratives = assistant.generate_report_narratives([
                 "performance", "health", "portfolio", "impact",
                 "actions", "match_type", "executive_summary"
             ])
         """
-        # Build knowledge graph using EXISTING method
-        df = self._construct_granular_dataset()
+        # Knowledge graph for this session (only stale sections are recomputed)
+        knowledge, has_data = self._get_knowledge()
 
-        if df.empty:
+        if not has_data:
             # Return safe empty structures to prevent UI crashes
             safe_responses = {}
             for panel in panels:
@@ -1844,34 +2347,54 @@ PLATFORM METHODOLOGY & ENGINE LOGIC (UPDATED JAN 2, 2026)
                     safe_responses[panel] = "Data analysis pending - upload Search Term Report to generate insights."
             return safe_responses
 
-        knowledge = self._build_knowledge_graph(df)
+        # Panels are independent: fan them out on a bounded pool. Requests share one
+        # rate limiter and retry 429/5xx with backoff; each narrative is cached by a hash
+        # of its prompt, so unchanged panels cost nothing on the next report open.
+        keys = self._api_keys()  # st.secrets is read here, not in the workers
 
-        narratives = {}
+        def _generate(panel: str):
+            if panel == "executive_summary":
+                # Executive summary returns structured dict, not string
+                return self._generate_executive_summary(knowledge, keys, refresh)
+            # Regular panels return narrative string
+            panel_data = self._extract_panel_context(panel, knowledge)
+            return self._generate_panel_narrative(panel, panel_data, keys, refresh)
 
-        # Generate narrative for each panel
+        narratives = {}
         api_errors = []
-        for panel in panels:
-            try:
-                if panel == "executive_summary":
-                    # Executive summary returns structured dict, not string
-                    narratives[panel] = self._generate_executive_summary(knowledge)
-                else:
-                    # Regular panels return narrative string
-                    panel_data = self._extract_panel_context(panel, knowledge)
-                    narratives[panel] = self._generate_panel_narrative(panel, panel_data)
-            except Exception as e:
-                error_msg = str(e)
-                # Check if it's a rate limit error
-                if "429" in error_msg or "Too Many Requests" in error_msg:
-                    api_errors.append(f"{panel}: Rate limit exceeded")
-                    print(f"[ASSISTANT] Rate limit error for panel '{panel}': {error_msg}")
-                else:
-                    api_errors.append(f"{panel}: {error_msg}")
-                    print(f"[ASSISTANT] API error for panel '{panel}': {error_msg}")
-
-        # If any API errors occurred, raise exception to prevent caching
+        workers = max(1, min(LLM_MAX_WORKERS, len(panels)))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {executor.submit(_generate, panel): panel for panel in dict.fromkeys(panels)}
+            for future in as_completed(futures):
+                panel = futures[future]
+                try:
+                    narratives[panel] = future.result()
+                except Exception as e:
+                    error_msg = str(e)
+                    # Check if it's a rate limit error
+                    if "429" in error_msg or "Too Many Requests" in error_msg:
+                        api_errors.append(f"{panel}: Rate limit exceeded")
+                        print(f"[ASSISTANT] Rate limit error for panel '{panel}': {error_msg}")
+                    else:
+                        api_errors.append(f"{panel}: {error_msg}")
+                        print(f"[ASSISTANT] API error for panel '{panel}': {error_msg}")
+                    narratives[panel] = (copy.deepcopy(FALLBACK_EXECUTIVE_SUMMARY) if panel == "executive_summary"
+                                         else FALLBACK_PANEL_NARRATIVE)
+                if on_panel is not None:
+                    on_panel(panel, len(narratives), len(futures))
+        finally:
+            # Normally all done; after an interruption, don't start the remaining panels
+            # (running ones finish in the background and are cached)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        narratives = {panel: narratives[panel] for panel in panels}
+
+        # If any API errors occurred, raise so the caller doesn't keep the fallbacks;
+        # the panels that succeeded are on the exception (and already cached)
         if api_errors:
-            raise Exception(f"AI generation failed due to API errors: {', '.join(api_errors)}")
+            raise NarrativeGenerationError(
+                f"AI generation failed due to API errors: {', '.join(api_errors)}", narratives, api_errors)
 
         return narratives
 
@@ -1929,16 +2452,21 @@ PLATFORM METHODOLOGY & ENGINE LOGIC (UPDATED JAN 2, 2026)
 
         return panel_contexts.get(panel_name, {})
 
-    def _generate_panel_narrative(self, panel_name: str, context: Dict) -> str:
+    def _generate_panel_narrative(self, panel_name: str, context: Dict, keys=None, refresh: bool = False) -> str:
         """
         Generate 2-3 sentence narrative for a panel.
 
         Args:
             panel_name: Panel identifier
             context: Panel-specific data from _extract_panel_context()
+            keys: (Claude key, OpenAI key); resolved from secrets when None
+            refresh: Bypass the cached narrative for this prompt
 
         Returns:
             2-3 sentence narrative string
+
+        Raises:
+            LLMError: API request failed
         """
         # Panel-specific prompts for client-facing reports
         prompts = {
@@ -2032,20 +2560,17 @@ Explain match types simply (e.g., "exact keyword targeting" vs "broad discovery"
             {"role": "user", "content": prompt}
         ]
 
-        # Call Claude API using EXISTING _call_llm method
-        try:
-            response = self._call_llm(messages)
-            return response.strip()
-        except Exception as e:
-            # Fallback if API fails
-            return f"Detailed analysis available in full dashboard. (Error: {str(e)})"
+        # Cached per prompt; API failures propagate so the report can retry this panel
+        return self._cached_llm_call(messages, keys, refresh=refresh)
 
-    def _generate_executive_summary(self, knowledge: Dict) -> Dict[str, List[str]]:
+    def _generate_executive_summary(self, knowledge: Dict, keys=None, refresh: bool = False) -> Dict[str, List[str]]:
         """
         Generate executive summary with achievements/concerns/next steps.
 
         Args:
             knowledge: Full knowledge graph
+            keys: (Claude key, OpenAI key); resolved from secrets when None
+            refresh: Bypass the cached summary for this prompt
 
         Returns:
             Dict with structure:
@@ -2086,43 +2611,32 @@ Requirements:
             {"role": "user", "content": summary_prompt}
         ]
 
-        try:
-            response = self._call_llm(messages)
-
+        def _parse(response: str) -> Dict[str, List[str]]:
             # Clean response (remove markdown code fences if present)
             clean = response.replace("```json", "").replace("```", "").strip()
 
             # Parse JSON
-            summary = json.loads(clean)
+            try:
+                summary = json.loads(clean)
+            except ValueError:
+                print(f"❌ [Raw Response] {response}")
+                raise
 
             # Validate structure
-            if not all(k in summary for k in ["achievements", "areas_to_watch", "next_steps"]):
+            if not isinstance(summary, dict) or not all(k in summary for k in ["achievements", "areas_to_watch", "next_steps"]):
+                print(f"❌ [Raw Response] {response}")
                 raise ValueError("Invalid summary structure")
 
             return summary
 
+        try:
+            return self._cached_llm_call(messages, keys, parse=_parse, refresh=refresh)
+        except LLMError:
+            raise  # API failure - let the report retry this panel
         except Exception as e:
-            # Fallback to generic summary
+            # Unusable reply - fallback to generic summary (not cached)
             print(f"❌ [Exec Summary Error] {str(e)}")
-            if 'response' in locals():
-                print(f"❌ [Raw Response] {response}")
-            
-            return {
-                "achievements": [
-                    "Account performance analyzed across all campaigns",
-                    "Optimization opportunities identified and quantified",
-                    "Decision impact tracking active and validated"
-                ],
-                "areas_to_watch": [
-                    "Review detailed dashboard for specific campaign insights",
-                    "Monitor pending optimization implementations"
-                ],
-                "next_steps": [
-                    "Execute recommended optimization actions",
-                    "Track impact over next 14-60 days",
-                    "Schedule performance review meeting"
-                ]
-            }
+            return copy.deepcopy(FALLBACK_EXECUTIVE_SUMMARY)
 
 
 def get_dynamic_key_insights() -> list:
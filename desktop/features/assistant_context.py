@@ -0,0 +1,227 @@
+"""
+Assistant Context Compiler
+
+Fits the assistant's knowledge graph (and the platform methodology) into a token budget
+for each chat question, instead of sending the whole graph as indented JSON:
+
+- Sections are ranked by relevance to the question: keyword matches per section, plus
+  words of the question (campaign names, search terms, ASINs) found in the section.
+- Long lists are cut to their top-N entries (the graph's lists are already sorted by
+  importance) with a note of how many were left out.
+- Sections are emitted as compact JSON, most relevant first, while they fit the budget.
+  A section that doesn't fit is retried with fewer list entries, then left out and
+  named in "_omitted" so the model knows it exists.
+- Tokens are counted with a local estimator (no tokenizer dependency).
+
+Usage:
+    from features.assistant_context import ContextCompiler, context_metrics
+
+    compiled = ContextCompiler(budget_tokens=4000).compile(sections, question)
+    compiled.text, compiled.tokens, compiled.omitted
+    context_metrics.record({...})
+    context_metrics.stats()  # {'requests': ..., 'avg_prompt_tokens': ..., ...}
+"""
+
+import json
+import os
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+# Token budget for the compiled knowledge graph (system prompt and chat history excluded)
+ASSISTANT_CONTEXT_TOKENS = int(os.getenv("ASSISTANT_CONTEXT_TOKENS", "4000"))
+# Entries kept per list; smaller counts are tried when a section doesn't fit
+ASSISTANT_CONTEXT_TOP_N = int(os.getenv("ASSISTANT_CONTEXT_TOP_N", "10"))
+FALLBACK_TOP_N = (5, 3, 1)
+
+# Always included, first and in full
+PINNED_SECTIONS = ("error",)
+
+# Words in a question that point at a section (prefixes, matched at word starts)
+SECTION_KEYWORDS = {
+    "dataset_overview": ("overview", "total", "spend", "sales", "roas", "acos", "cvr", "order", "click",
+                         "performance", "summary", "account", "overall"),
+    "account_health": ("health", "score", "efficien", "status", "overall", "doing"),
+    "campaign_portfolio": ("campaign", "portfolio", "winner", "loser", "concentrat", "budget", "scale",
+                           "best", "worst"),
+    "term_analysis": ("term", "keyword", "search", "query", "queries", "top", "convert"),
+    "strategic_insights": ("opportunit", "waste", "bleed", "losing", "lose", "match type", "exact", "broad",
+                           "phrase", "auto", "paradox", "scale", "zero", "untapped"),
+    "patterns_detected": ("pattern", "theme", "trend", "day", "week", "season"),
+    "cross_references": ("conflict", "multiple", "cannibal", "overlap", "paradox", "cross", "duplicate"),
+    "optimization_impact": ("optimi", "recommend", "harvest", "negat", "bid", "save", "saving", "project",
+                            "forecast", "action", "monthly"),
+    "module_context": ("impact", "decision", "win rate", "simulat", "forecast", "asin", "competitor",
+                       "cluster", "realized", "realised", "validat", "attribut"),
+    "data_status": ("upload", "missing", "data", "loaded", "file", "report", "bulk"),
+    "platform_knowledge": ("how", "why", "calculat", "methodolog", "formula", "defin", "mean", "validat",
+                           "counterfactual", "market drag", "visibility boost", "threshold", "increment",
+                           "capital protected", "work"),
+}
+_SECTION_PATTERNS = {
+    name: re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")")
+    for name, keywords in SECTION_KEYWORDS.items()
+}
+
+# Order used when the question doesn't point anywhere (most generally useful first)
+SECTION_PRIORITY = (
+    "dataset_overview", "account_health", "strategic_insights", "module_context", "optimization_impact",
+    "campaign_portfolio", "term_analysis", "cross_references", "patterns_detected", "data_status",
+    "platform_knowledge",
+)
+
+# Question words too common to identify an entity in a section
+_STOPWORDS = frozenset((
+    "what", "where", "which", "when", "should", "would", "could", "about", "with", "this", "that", "these",
+    "those", "have", "does", "from", "into", "them", "they", "there", "their", "make", "more", "most",
+    "much", "many", "your", "mine", "show", "tell", "give", "some", "than", "then", "also", "just", "only",
+    "over", "under", "last", "next", "week", "month", "campaign", "campaigns", "term", "terms", "keyword",
+    "keywords", "spend", "sales", "roas", "acos",
+))
+
+_TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]|\n\s*")
+_WORD_PATTERN = re.compile(r"[\w\-]{4,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local token estimate: one token per punctuation mark, per 4 characters of a word and
+    per line break (with its indentation). Errs on the high side of BPE tokenizers for
+    JSON and English, so a budget holds.
+    """
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+def summarize(value: Any, top_n: int) -> Any:
+    """Copy of value with every list cut to its first top_n entries plus a '... N more' note."""
+    if isinstance(value, dict):
+        return {k: summarize(v, top_n) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [summarize(v, top_n) for v in value[:top_n]]
+        if len(value) > top_n:
+            items.append(f"... {len(value) - top_n} more")
+        return items
+    return value
+
+
+@dataclass
+class CompiledContext:
+    """Knowledge graph compiled for one question."""
+    text: str
+    tokens: int
+    budget_tokens: int
+    included: List[str] = field(default_factory=list)   # in emitted (relevance) order
+    omitted: List[str] = field(default_factory=list)
+    trimmed: Dict[str, int] = field(default_factory=dict)  # section -> list entries kept, when below top_n
+
+
+class ContextCompiler:
+    """Ranks, summarizes and packs knowledge graph sections into a token budget."""
+
+    def __init__(self, budget_tokens: int = ASSISTANT_CONTEXT_TOKENS, top_n: int = ASSISTANT_CONTEXT_TOP_N):
+        self.budget_tokens = budget_tokens
+        self.top_n = top_n
+
+    def rank(self, sections: Dict[str, str], question: str) -> List[str]:
+        """
+        Section names, most relevant to the question first.
+
+        Args:
+            sections: Section name -> its compact JSON (searched for the question's words)
+            question: The user's question
+        """
+        text = question.lower()
+        words = {w for w in _WORD_PATTERN.findall(text) if w not in _STOPWORDS}
+        priority = {name: i for i, name in enumerate(SECTION_PRIORITY)}
+
+        def score(name):
+            pattern = _SECTION_PATTERNS.get(name)
+            keyword_hits = len(pattern.findall(text)) if pattern is not None else 0
+            body = sections[name].lower()
+            entity_hits = sum(1 for w in words if w in body)
+            return (-(10 * keyword_hits + 5 * entity_hits), priority.get(name, len(priority)))
+
+        return sorted(sections, key=score)
+
+    def compile(self, knowledge: Dict[str, Any], question: str) -> CompiledContext:
+        """Compact JSON of the most relevant sections that fit the budget."""
+        pinned = [name for name in PINNED_SECTIONS if name in knowledge]
+        bodies = {name: _dumps(summarize(value, self.top_n)) for name, value in knowledge.items()}
+        ranked = pinned + self.rank({n: b for n, b in bodies.items() if n not in pinned}, question)
+
+        compiled = CompiledContext(text="", tokens=0, budget_tokens=self.budget_tokens)
+        parts = []
+        used = 2 + estimate_tokens(f'"_omitted":{_dumps(list(knowledge))}')  # braces + room for the note
+        for name in ranked:
+            body = bodies[name]
+            entry_tokens = estimate_tokens(body) + estimate_tokens(_dumps(name)) + 2
+            if name not in pinned and used + entry_tokens > self.budget_tokens:
+                body = None
+                for top_n in (n for n in FALLBACK_TOP_N if n < self.top_n):
+                    candidate = _dumps(summarize(knowledge[name], top_n))
+                    if candidate == bodies[name]:
+                        break  # No lists to cut
+                    entry_tokens = estimate_tokens(candidate) + estimate_tokens(_dumps(name)) + 2
+                    if used + entry_tokens <= self.budget_tokens:
+                        body = candidate
+                        compiled.trimmed[name] = top_n
+                        break
+                if body is None:
+                    compiled.omitted.append(name)
+                    continue
+            parts.append(f"{_dumps(name)}:{body}")
+            compiled.included.append(name)
+            used += entry_tokens
+
+        if compiled.omitted:
+            parts.append(f'"_omitted":{_dumps(compiled.omitted)}')
+        compiled.text = "{" + ",".join(parts) + "}"
+        compiled.tokens = estimate_tokens(compiled.text)
+        return compiled
+
+
+class ContextMetrics:
+    """Thread-safe per-request prompt metrics (size, build time) for the last max_requests chat requests."""
+
+    def __init__(self, max_requests: int = 500):
+        self._requests: Deque[Dict[str, Any]] = deque(maxlen=max_requests)
+        self._lock = threading.Lock()
+        self.total_requests = 0
+
+    def record(self, metrics: Dict[str, Any]):
+        with self._lock:
+            self._requests.append(dict(metrics))
+            self.total_requests += 1
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return dict(self._requests[-1]) if self._requests else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Averages over the recorded requests, and the latest request's metrics."""
+        with self._lock:
+            requests = list(self._requests)
+            total = self.total_requests
+        if not requests:
+            return {'requests': total}
+        build_ms = sorted(r.get('build_ms', 0.0) for r in requests)
+        return {
+            'requests': total,
+            'avg_prompt_tokens': round(sum(r.get('prompt_tokens', 0) for r in requests) / len(requests)),
+            'max_prompt_tokens': max(r.get('prompt_tokens', 0) for r in requests),
+            'avg_context_tokens': round(sum(r.get('context_tokens', 0) for r in requests) / len(requests)),
+            'avg_build_ms': round(sum(build_ms) / len(build_ms), 1),
+            'p95_build_ms': round(build_ms[min(len(build_ms) - 1, int(0.95 * len(build_ms)))], 1),
+            'sections_omitted': sum(len(r.get('omitted', [])) for r in requests),
+            'last': requests[-1],
+        }
+
+
+# Global prompt metrics (shared by all sessions in this process)
+context_metrics = ContextMetrics()
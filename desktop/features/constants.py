@@ -5,6 +5,9 @@ This module contains constants used across multiple feature modules
 to ensure consistency and reduce duplication.
 """
 
+import numpy as np
+import pandas as pd
+
 # ==========================================
 # AUTO TARGETING TYPES
 # ==========================================
@@ -109,3 +112,54 @@ def classify_match_type(row) -> str:
 
     # 4. Fallback
     return 'OTHER' if mt in ['-', 'NAN', 'NONE', ''] else mt
+
+
+# Match types trusted as-is by classify_match_type / classify_match_types
+STRONG_MATCH_TYPES = ('EXACT', 'BROAD', 'PHRASE', 'PT', 'CATEGORY', 'AUTO')
+
+# Substrings marking auto targeting expressions (literal, not regex)
+AUTO_TARGETING_MARKERS = ('close-match', 'loose-match', 'substitutes', 'complements', '*')
+
+
+def classify_match_types(
+    match_type: pd.Series,
+    targeting: pd.Series,
+    strong_types=STRONG_MATCH_TYPES,
+    unknown_values=('-', 'NAN', 'NONE', ''),
+    unknown_label: str = 'OTHER',
+) -> pd.Series:
+    """
+    Vectorized match type classification (same heuristics as classify_match_type).
+
+    Order: trusted strong types -> asin=/B0 ASIN -> category= -> auto markers -> fallback.
+
+    Args:
+        match_type: Raw/refined match type values
+        targeting: Targeting (or TargetingExpression) text
+        strong_types: Upper-case match types returned unchanged
+        unknown_values: Upper-case match types replaced by unknown_label on fallback
+        unknown_label: Label for rows with no usable match type
+
+    Returns:
+        Series of classified match types aligned with match_type
+    """
+    # Classify unique values only, then broadcast back via factorized codes
+    mt_codes, mt_uniques = pd.factorize(match_type.astype(str).str.upper())
+    expr_codes, expr_uniques = pd.factorize(targeting.astype(str).str.lower())
+    mt = pd.Series(mt_uniques, dtype=object)
+    expr = pd.Series(expr_uniques, dtype=object)
+
+    is_pt = expr.str.contains('asin=', regex=False) | ((expr.str.len() == 10) & expr.str.startswith('b0'))
+    is_category = expr.str.contains('category=', regex=False)
+    is_auto = pd.Series(False, index=expr.index)
+    for marker in AUTO_TARGETING_MARKERS:
+        is_auto |= expr.str.contains(marker, regex=False)
+
+    is_strong = mt.isin(strong_types).to_numpy()[mt_codes]
+    fallback = mt.where(~mt.isin(unknown_values), unknown_label).to_numpy(dtype=object)[mt_codes]
+    result = np.select(
+        [is_strong, is_pt.to_numpy()[expr_codes], is_category.to_numpy()[expr_codes], is_auto.to_numpy()[expr_codes]],
+        [mt.to_numpy(dtype=object)[mt_codes], 'PT', 'CATEGORY', 'AUTO'],
+        default=fallback,
+    )
+    return pd.Series(result, index=match_type.index, dtype=object)
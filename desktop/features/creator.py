@@ -391,11 +391,9 @@ class CreatorModule(BaseFeature):
             # Check if SKUs are missing (ANY row missing SKU triggers mapping)
             if "Advertised SKU" not in df_harvest.columns or df_harvest["Advertised SKU"].eq("SKU_NEEDED").any():
                 
-                purchased_report = None
-                
                 # 1. Try Data Hub (Session State)
-                if 'unified_data' in st.session_state:
-                     purchased_report = st.session_state.unified_data.get('advertised_product_report')
+                hub = DataHub()
+                purchased_report = hub.get_data('advertised_product_report')
 
                 # 2. Fallback: Try DB
                 if purchased_report is None or (hasattr(purchased_report, 'empty') and purchased_report.empty):
@@ -406,9 +404,7 @@ class CreatorModule(BaseFeature):
                             purchased_report = db_mgr.get_advertised_product_map(client_id)
                             
                             if purchased_report is not None and not purchased_report.empty:
-                                if 'unified_data' not in st.session_state:
-                                     DataHub() # Initialize structure
-                                st.session_state.unified_data['advertised_product_report'] = purchased_report
+                                hub._store('advertised_product_report', purchased_report)
                         except Exception as e:
                             st.warning(f"Could not load SKU map from DB: {e}")
 
@@ -296,3 +296,18 @@ def render_debug_metrics():
                 st.write("**Fix:** Check campaign naming consistency in data uploads")
             else:
                 st.warning("⚠️ **Some checks failed** - see details above")
+
+    # Shared target_stats cache counters (Postgres backend only)
+    if hasattr(db, 'get_target_stats_cache_stats'):
+        with st.expander("🗄️ Target Stats Cache"):
+            st.json(db.get_target_stats_cache_stats())
+
+    # Account datasets shared across sessions (impact, actuals, DataHub loads)
+    from core.dataset_registry import dataset_registry
+    with st.expander("🧩 Shared Dataset Registry"):
+        st.json(dataset_registry.stats())
+
+    # Assistant prompt size / build time per chat request (this process)
+    from features.assistant_context import context_metrics
+    with st.expander("🧠 Assistant Context Metrics"):
+        st.json(context_metrics.stats())
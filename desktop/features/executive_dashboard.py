@@ -14,22 +14,24 @@ from typing import Dict, Any, Optional
 from utils.formatters import get_account_currency
 from features.impact_metrics import ImpactMetrics
 from features.report_card import get_account_health_score
-from features.constants import classify_match_type
+from features.constants import classify_match_types
 from ui.theme import ThemeManager
 
 from features.impact_dashboard import get_maturity_status, _fetch_impact_data
 from core.db_manager import get_db_manager
+from core.dataset_registry import dataset_registry
 
-@st.cache_data(ttl=3600, show_spinner=False)
 def _fetch_and_process_stats(client_id: str, cache_version: str) -> Optional[pd.DataFrame]:
     """
-    Cached fetcher for target stats.
+    Cached fetcher for target stats, shared by every session on the account
+    (core.dataset_registry, invalidated on upload). cache_version is a no-op since the
+    move off st.cache_data; it is ignored and only kept for callers.
     Includes expensive pre-processing:
     - Date conversion
     - Match type classification
     - Base metric calculation
     """
-    try:
+    def _load():
         db = get_db_manager()
         df = db.get_target_stats_df(client_id)
         
@@ -42,12 +44,15 @@ def _fetch_and_process_stats(client_id: str, cache_version: str) -> Optional[pd.
         df['CVR'] = (df['Orders'] / df['Clicks'] * 100).replace([np.inf, -np.inf], 0).fillna(0)
         df['CPC'] = (df['Spend'] / df['Clicks']).replace([np.inf, -np.inf], 0).fillna(0)
         
-        # Unified Match Type Logic (expensive loop)
+        # Unified Match Type Logic (vectorized)
         df['Refined Match Type'] = df['Match Type'].fillna('-').astype(str)
         if 'Targeting' in df.columns:
-            df['Refined Match Type'] = df.apply(classify_match_type, axis=1)
+            df['Refined Match Type'] = classify_match_types(df['Refined Match Type'], df['Targeting'])
             
         return df
+
+    try:
+        return dataset_registry.get_or_load(client_id, 'processed_target_stats', (), _load)
     except Exception as e:
         print(f"Stats fetch error: {e}")
         return None
@@ -1,15 +1,19 @@
 """
 Data Fetchers - Cached data fetching for impact analysis.
+
+Results are shared by every session on the account through core.dataset_registry
+(one read-only copy per account, invalidated on upload) instead of one st.cache_data
+copy per session cache_version. The cache_version arguments below are therefore no-ops,
+accepted only so existing callers keep working.
 """
 
-import streamlit as st
 import pandas as pd
 from typing import Dict, Any, Tuple
 
 from core.db_manager import get_db_manager
+from core.dataset_registry import dataset_registry
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
 def fetch_impact_data(
     client_id: str,
     test_mode: bool,
@@ -26,16 +30,20 @@ def fetch_impact_data(
         test_mode: Whether using test database
         before_days: Number of days for before comparison window (fixed at 14)
         after_days: Number of days for after comparison window (14, 30, or 60)
-        cache_version: Version string that changes when data is uploaded (invalidates cache)
+        cache_version: No-op (ignored); uploads invalidate the shared registry directly
 
     Returns:
-        Tuple of (impact_df, full_summary)
+        Tuple of (impact_df, full_summary). impact_df is a read-only shared view:
+        assign columns or .copy() before modifying it in place.
     """
-    try:
+    def _load():
         db = get_db_manager(test_mode)
         impact_df = db.get_action_impact(client_id, before_days=before_days, after_days=after_days)
         full_summary = db.get_impact_summary(client_id, before_days=before_days, after_days=after_days)
         return impact_df, full_summary
+
+    try:
+        return dataset_registry.get_or_load(client_id, 'impact_data', (test_mode, before_days, after_days), _load)
     except Exception as e:
         # Return empty structures on failure to prevent UI crash
         print(f"Cache miss error: {e}")
@@ -50,25 +58,26 @@ def fetch_impact_data(
         }
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
 def fetch_account_actuals(client_id: str, cache_version: str) -> pd.DataFrame:
     """
     Cached fetcher for account-level daily stats (Actuals).
 
     Args:
         client_id: Account ID
-        cache_version: Version string for cache invalidation
+        cache_version: No-op (ignored); uploads invalidate the shared registry directly
 
     Returns:
-        DataFrame with account actuals
+        DataFrame with account actuals (read-only shared view)
     """
-    try:
-        db = get_db_manager()
-        df = db.get_target_stats_df(client_id)
+    def _load():
+        df = get_db_manager().get_target_stats_df(client_id)
         if df.empty:
             return pd.DataFrame()
         df['Date'] = pd.to_datetime(df['Date'])
         return df
+
+    try:
+        return dataset_registry.get_or_load(client_id, 'account_actuals', (), _load)
     except Exception as e:
         print(f"Actuals fetch error: {e}")
         return pd.DataFrame()
@@ -5,15 +5,222 @@ Uses semantic clustering + Claude API to analyze search terms
 and provide actionable strategic recommendations.
 """
 
+import hashlib
 import streamlit as st
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import pairwise_distances, silhouette_score
 from features._base import BaseFeature
 from core.data_loader import SmartMapper, load_uploaded_file, safe_numeric
 from api.anthropic_client import AnthropicClient
+from core.state_versions import bump_state_version
+
+# From this many unique terms K selection uses MiniBatchKMeans with warm-started centers
+# and a sampled silhouette; smaller accounts keep the exact KMeans path
+MINIBATCH_MIN_TERMS = 5000
+SILHOUETTE_SAMPLE = 3000
+MINIBATCH_SIZE = 4096
+
+
+def search_terms_watermark(search_terms) -> str:
+    """Content digest of the unique search terms (cache watermark for uploads without a Data Hub timestamp)."""
+    hashed = pd.util.hash_pandas_object(pd.Series(search_terms, dtype=object), index=False)
+    return hashlib.blake2b(hashed.to_numpy().tobytes(), digest_size=16).hexdigest()
+
+
+def _farthest_point(X, model) -> np.ndarray:
+    """Row of X farthest from its assigned center (seed for the next K's extra center)."""
+    distances = model.transform(X).min(axis=1)
+    row = X[int(np.argmax(distances))]
+    return row.toarray() if hasattr(row, 'toarray') else np.asarray(row)
+
+
+def cluster_search_terms(search_terms, n_clusters: Optional[int] = None) -> Tuple[np.ndarray, int, List[int]]:
+    """
+    Cluster unique search terms on TF-IDF features.
+    
+    With n_clusters=None, K is picked from up to 10 values by silhouette score.
+    Returns (labels aligned with search_terms, K, tested K values).
+    """
+    vectorizer = TfidfVectorizer(
+        max_features=150,
+        ngram_range=(1, 2),
+        min_df=1,
+        max_df=0.9
+    )
+    tfidf_matrix = vectorizer.fit_transform(search_terms)
+    
+    if len(search_terms) < MINIBATCH_MIN_TERMS:
+        return _cluster_exact(tfidf_matrix, len(search_terms), n_clusters)
+    return _cluster_minibatch(tfidf_matrix, len(search_terms), n_clusters)
+
+
+def _k_range(n_terms: int) -> Optional[range]:
+    """K values to test (at least 10 terms per cluster), or None when only the minimum fits."""
+    min_clusters = 3
+    max_clusters = min(35, n_terms // 10)
+    if max_clusters <= min_clusters:
+        return None
+    return range(min_clusters, min(max_clusters + 1, min_clusters + 10))  # Test up to 10 values
+
+
+def _cluster_exact(tfidf_matrix, n_terms: int, n_clusters: Optional[int]):
+    """Full KMeans (n_init=10) per K with exact silhouette."""
+    tested = []
+    if n_clusters is None:
+        K_range = _k_range(n_terms)
+        if K_range is None:
+            n_clusters = 3
+        else:
+            silhouette_scores = []
+            for k in K_range:
+                kmeans_test = KMeans(n_clusters=k, random_state=42, n_init=10)
+                labels = kmeans_test.fit_predict(tfidf_matrix)
+                silhouette_scores.append(silhouette_score(tfidf_matrix, labels))
+            # Pick K with highest silhouette score
+            tested = list(K_range)
+            n_clusters = tested[silhouette_scores.index(max(silhouette_scores))]
+    
+    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+    return kmeans.fit_predict(tfidf_matrix), n_clusters, tested
+
+
+def _cluster_minibatch(tfidf_matrix, n_terms: int, n_clusters: Optional[int]):
+    """
+    MiniBatchKMeans K search: each K starts from the previous K's centers plus the
+    worst-fit term and is scored on one fixed silhouette sample (distances computed
+    once). The chosen K is refined with a full KMeans pass from its centers.
+    """
+    if n_clusters is not None:
+        model = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init=3, batch_size=MINIBATCH_SIZE)
+        model.fit(tfidf_matrix)
+        best_k, best_centers, tested = n_clusters, model.cluster_centers_, []
+    else:
+        K_range = _k_range(n_terms) or range(3, 4)
+        sample = np.random.default_rng(42).choice(n_terms, min(SILHOUETTE_SAMPLE, n_terms), replace=False)
+        sample_distances = pairwise_distances(tfidf_matrix[sample])
+        best = None
+        model = None
+        for k in K_range:
+            if model is None:
+                model = MiniBatchKMeans(n_clusters=k, random_state=42, n_init=3, batch_size=MINIBATCH_SIZE)
+            else:
+                init = np.vstack([model.cluster_centers_, _farthest_point(tfidf_matrix, model)])
+                model = MiniBatchKMeans(n_clusters=k, init=init, random_state=42, n_init=1, batch_size=MINIBATCH_SIZE)
+            labels = model.fit_predict(tfidf_matrix)
+            try:
+                score = silhouette_score(sample_distances, labels[sample], metric='precomputed')
+            except ValueError:  # Sample landed in a single cluster
+                score = -1.0
+            if best is None or score > best[0]:
+                best = (score, k, model.cluster_centers_)
+        _, best_k, best_centers = best
+        tested = list(K_range) if len(K_range) > 1 else []
+    
+    kmeans = KMeans(n_clusters=best_k, init=best_centers, n_init=1, random_state=42)
+    return kmeans.fit_predict(tfidf_matrix), best_k, tested
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_cluster_search_terms(client_id: str, cache_version: str, n_clusters: Optional[int], _search_terms):
+    """
+    Cached cluster_search_terms.
+    
+    Args:
+        client_id: Account ID
+        cache_version: Watermark of the search term data (invalidates cache)
+        n_clusters: Fixed K, or None to select K by silhouette
+        _search_terms: Unique search terms (not hashed; covered by cache_version)
+    """
+    return cluster_search_terms(_search_terms, n_clusters)
+
+
+def summarize_clusters(data: pd.DataFrame, n_clusters: int, term_col: str, imp_col: str, clicks_col: str,
+                       spend_col: str, orders_col: str, sales_col: Optional[str] = None,
+                       sku_col: Optional[str] = None, asin_col: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Per-cluster performance summary from a single groupby over the labelled rows (clusters with < 3 rows skipped)."""
+    rows = data[data['cluster'].notna()]
+    frame = pd.DataFrame({
+        'cluster': rows['cluster'].to_numpy(),
+        'term': rows[term_col].to_numpy(),
+        'impressions': rows[imp_col].to_numpy(),
+        'clicks': rows[clicks_col].to_numpy(),
+        'orders': rows[orders_col].to_numpy(),
+        'spend': safe_numeric(rows[spend_col]).to_numpy(),
+        'sales': safe_numeric(rows[sales_col]).to_numpy() if sales_col else 0.0,
+    })
+    by_cluster = frame.groupby('cluster')
+    sizes = by_cluster.size()
+    totals = by_cluster[['impressions', 'clicks', 'spend', 'sales', 'orders']].sum()
+    
+    # Term-level performance: converting = at least 1 order, waste = clicks but zero orders
+    terms = frame.groupby(['cluster', 'term'])[['impressions', 'clicks', 'orders', 'spend']].sum()
+    converting = (terms['orders'] > 0).groupby(level='cluster').sum()
+    wasters = (terms['clicks'] > 0) & (terms['orders'] == 0)
+    non_converting = wasters.groupby(level='cluster').sum()
+    wasted_spend = terms['spend'].where(wasters, 0.0).groupby(level='cluster').sum()
+    top_terms = (terms['impressions'].sort_values(ascending=False, kind='stable')
+                 .groupby(level='cluster').head(5))
+    top_terms_by_cluster = {c: grp.index.get_level_values('term').tolist()
+                            for c, grp in top_terms.groupby(level='cluster', sort=False)}
+    
+    # Advertised SKUs/ASINs in order of first appearance per cluster
+    products = {}
+    for col in (sku_col, asin_col):
+        if not col:
+            continue
+        values = pd.DataFrame({'cluster': rows['cluster'].to_numpy(), 'value': rows[col].to_numpy()}).dropna()
+        values = values.drop_duplicates()
+        products[col] = values.groupby('cluster', sort=False)['value'].agg(list).to_dict()
+    
+    cluster_summary = []
+    for cluster_id in range(n_clusters):
+        if cluster_id not in sizes.index or sizes[cluster_id] < 3:
+            continue
+        
+        total_impressions, total_clicks, total_spend, total_sales, total_orders = totals.loc[cluster_id]
+        if not sales_col:
+            total_sales = 0
+        
+        # Top 5 SKUs, then ASINs that differ from them
+        advertised_skus = []
+        if sku_col:
+            skus = [str(s).strip() for s in products[sku_col].get(cluster_id, [])]
+            skus = [s for s in skus if s and s.lower() != 'nan']
+            advertised_skus.extend(skus[:5])
+        if asin_col:
+            asins = [str(a).strip() for a in products[asin_col].get(cluster_id, [])]
+            asins = [a for a in asins if a and a.lower() != 'nan']
+            for asin in asins[:5]:
+                if asin not in advertised_skus:
+                    advertised_skus.append(asin)
+        
+        wasted = wasted_spend.get(cluster_id, 0.0)
+        # Waste percentage of THIS cluster's spend (not total)
+        waste_pct = (wasted / total_spend * 100) if total_spend > 0 else 0
+        
+        cluster_summary.append({
+            'cluster_id': cluster_id + 1,
+            'size': int(sizes[cluster_id]),
+            'top_terms': top_terms_by_cluster.get(cluster_id, []),
+            'advertised_products': advertised_skus if advertised_skus else ['No SKU data'],
+            'impressions': int(total_impressions),
+            'clicks': int(total_clicks),
+            'spend': float(total_spend),
+            'sales': float(total_sales),
+            'orders': int(total_orders),
+            'converting_terms': int(converting.get(cluster_id, 0)),
+            'non_converting_terms': int(non_converting.get(cluster_id, 0)),
+            'wasted_spend': float(wasted),
+            'waste_pct': float(waste_pct),
+            'ctr': (total_clicks / total_impressions * 100) if total_impressions > 0 else 0,
+            'cvr': (total_orders / total_clicks * 100) if total_clicks > 0 else 0
+        })
+    return cluster_summary
+
 
 class AIInsightsModule(BaseFeature):
     """AI-Powered Campaign Insights using semantic clustering."""
@@ -89,6 +296,7 @@ class AIInsightsModule(BaseFeature):
                     
                     # Persist for AI Assistant
                     st.session_state['latest_ai_insights'] = results
+                    bump_state_version('latest_ai_insights')
                     
                     # Generate Download
                     output_file = self.generate_output(results)
@@ -152,45 +360,13 @@ class AIInsightsModule(BaseFeature):
         search_terms = data[term_col].dropna().unique()
         
         with st.spinner("Clustering search terms..."):
-            # TF-IDF vectorization
-            vectorizer = TfidfVectorizer(
-                max_features=150,
-                ngram_range=(1, 2),
-                min_df=1,
-                max_df=0.9
-            )
-            
-            tfidf_matrix = vectorizer.fit_transform(search_terms)
+            # Cached per (account, data watermark, K): reopening the page skips the fit
+            client_id = st.session_state.get('active_account_id') or 'local'
+            watermark = "v1_" + search_terms_watermark(search_terms)
+            cluster_labels, n_clusters, tested = _cached_cluster_search_terms(client_id, watermark, None, search_terms)
             
-            # Determine optimal number of clusters (natural clustering)
-            # Use elbow method with silhouette score
-            from sklearn.metrics import silhouette_score
-            
-            min_clusters = 3
-            max_clusters = min(35, len(search_terms) // 10)  # At least 10 terms per cluster
-            
-            if max_clusters <= min_clusters:
-                n_clusters = min_clusters
-            else:
-                # Try different K values and find optimal
-                silhouette_scores = []
-                K_range = range(min_clusters, min(max_clusters + 1, min_clusters + 10))  # Test up to 10 values
-                
-                for k in K_range:
-                    kmeans_test = KMeans(n_clusters=k, random_state=42, n_init=10)
-                    labels = kmeans_test.fit_predict(tfidf_matrix)
-                    score = silhouette_score(tfidf_matrix, labels)
-                    silhouette_scores.append(score)
-                
-                # Pick K with highest silhouette score
-                best_idx = silhouette_scores.index(max(silhouette_scores))
-                n_clusters = list(K_range)[best_idx]
-                
-                st.info(f"🎯 Optimal clusters detected: {n_clusters} (tested {min_clusters}-{max(K_range)})")
-            
-            # Final clustering with optimal K
-            kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-            cluster_labels = kmeans.fit_predict(tfidf_matrix)
+            if tested:
+                st.info(f"🎯 Optimal clusters detected: {n_clusters} (tested {tested[0]}-{tested[-1]})")
         
         # Map clusters back to data
         term_to_cluster = dict(zip(search_terms, cluster_labels))
@@ -203,9 +379,6 @@ class AIInsightsModule(BaseFeature):
             data['Orders'] = 0
             orders_col = 'Orders'
         
-        # Aggregate by cluster
-        cluster_summary = []
-        
         # Check if we have SKU/ASIN columns from advertised products
         # The advertised product report gets merged with "_advertised" suffix
         # After SmartMapper: "Advertised SKU" -> "SKU", then add_suffix -> "SKU_advertised"
@@ -250,79 +423,10 @@ class AIInsightsModule(BaseFeature):
         else:
             st.warning("⚠️ No 'Advertised SKU' column found. Upload Advertised Product Report in Data Hub to see product names.")
         
-        for cluster_id in range(n_clusters):
-            cluster_data = data[data['cluster'] == cluster_id]
-            
-            if len(cluster_data) < 3:
-                continue
-            
-            # Get performance metrics
-            total_impressions = cluster_data[imp_col].sum()
-            total_clicks = cluster_data[clicks_col].sum()
-            total_spend = safe_numeric(cluster_data[spend_col]).sum()
-            total_sales = safe_numeric(cluster_data[sales_col]).sum() if sales_col else 0
-            total_orders = cluster_data[orders_col].sum()
-            
-            # Get top terms
-            top_terms = cluster_data.groupby(term_col)[imp_col].sum().nlargest(5).index.tolist()
-            
-            # Get advertised SKUs/ASINs for this cluster
-            advertised_skus = []
-            if sku_col:
-                skus = cluster_data[sku_col].dropna().unique().tolist()
-                # Remove empty strings and filter
-                skus = [str(s).strip() for s in skus if str(s).strip() and str(s).strip().lower() != 'nan']
-                advertised_skus.extend(skus[:5])  # Top 5 SKUs
-            if asin_col:
-                asins = cluster_data[asin_col].dropna().unique().tolist()
-                # Remove empty strings and filter
-                asins = [str(a).strip() for a in asins if str(a).strip() and str(a).strip().lower() != 'nan']
-                # Only add ASINs if they're different from SKUs already added
-                for asin in asins[:5]:
-                    if asin not in advertised_skus:
-                        advertised_skus.append(asin)
-            
-            # Better conversion logic:
-            # Converting term = term with at least 1 order
-            # Non-converting term = term with clicks but 0 orders (actual waste)
-            term_performance = cluster_data.groupby(term_col).agg({
-                clicks_col: 'sum',
-                orders_col: 'sum',
-                spend_col: lambda x: safe_numeric(x).sum()
-            })
-            
-            converting_terms = len(term_performance[term_performance[orders_col] > 0])
-            # Non-converting = has clicks but zero orders (these are wasters)
-            non_converting_terms = len(term_performance[
-                (term_performance[clicks_col] > 0) & (term_performance[orders_col] == 0)
-            ])
-            
-            # Wasted spend = spend on terms that got clicks but zero orders
-            wasted_spend_data = term_performance[
-                (term_performance[clicks_col] > 0) & (term_performance[orders_col] == 0)
-            ]
-            wasted = wasted_spend_data[spend_col].sum() if len(wasted_spend_data) > 0 else 0
-            
-            # Waste percentage of THIS cluster's spend (not total)
-            waste_pct = (wasted / total_spend * 100) if total_spend > 0 else 0
-            
-            cluster_summary.append({
-                'cluster_id': cluster_id + 1,
-                'size': len(cluster_data),
-                'top_terms': top_terms,
-                'advertised_products': advertised_skus if advertised_skus else ['No SKU data'],
-                'impressions': int(total_impressions),
-                'clicks': int(total_clicks),
-                'spend': float(total_spend),
-                'sales': float(total_sales),
-                'orders': int(total_orders),
-                'converting_terms': converting_terms,
-                'non_converting_terms': non_converting_terms,
-                'wasted_spend': float(wasted),
-                'waste_pct': float(waste_pct),
-                'ctr': (total_clicks / total_impressions * 100) if total_impressions > 0 else 0,
-                'cvr': (total_orders / total_clicks * 100) if total_clicks > 0 else 0
-            })
+        cluster_summary = summarize_clusters(
+            data, n_clusters, term_col, imp_col, clicks_col, spend_col, orders_col,
+            sales_col=sales_col, sku_col=sku_col, asin_col=asin_col
+        )
         
         cluster_df = pd.DataFrame(cluster_summary)
         
@@ -16,6 +16,7 @@ from features.optimizer.core import (
     CVR_CONFIG,
     OPTIMIZATION_PROFILES
 )
+from features.optimizer.feature_frame import build_feature_frame
 from features.optimizer.strategies.harvest import identify_harvest_candidates
 from features.optimizer.strategies.negatives import identify_negative_candidates
 from features.optimizer.strategies.bids import calculate_bid_optimizations
@@ -182,19 +183,21 @@ class OptimizerModule(BaseFeature):
         return calculate_account_health(df)
 
     def _run_analysis(self, df):
-        """Executes the core optimization logic (UNCHANGED)."""
-        df, date_info = prepare_data(df, self.config)
-        benchmarks = calculate_account_benchmarks(df, self.config)
+        """Executes the core optimization logic."""
+        # Prepared data, benchmarks and normalized keys (memoized per input frame + config subset)
+        features = build_feature_frame(df, self.config)
+        df, date_info, benchmarks = features.df, features.date_info, features.benchmarks
         universal_median = benchmarks.get('universal_median_roas', self.config.get("TARGET_ROAS", 2.5))
         
-        matcher = ExactMatcher(df)
+        # Exact keyword index only depends on the data - reused across what-if reruns
+        matcher = features.cached("exact_matcher", lambda: ExactMatcher(df))
         
-        harvest = identify_harvest_candidates(df, self.config, matcher, benchmarks)
-        neg_kw, neg_pt, your_products = identify_negative_candidates(df, self.config, harvest, benchmarks)
+        harvest = identify_harvest_candidates(df, self.config, matcher, benchmarks, features=features)
+        neg_kw, neg_pt, your_products = identify_negative_candidates(df, self.config, harvest, benchmarks, features=features)
         
         neg_set = set(zip(neg_kw["Campaign Name"], neg_kw["Ad Group Name"], neg_kw["Term"].str.lower()))
         data_days = date_info.get("days", 7) if date_info else 7
-        bids_ex, bids_pt, bids_agg, bids_auto = calculate_bid_optimizations(df, self.config, set(harvest["Customer Search Term"].str.lower()), neg_set, universal_median, data_days=data_days)
+        bids_ex, bids_pt, bids_agg, bids_auto = calculate_bid_optimizations(df, self.config, set(harvest["Customer Search Term"].str.lower()), neg_set, universal_median, data_days=data_days, features=features)
         
         heatmap = create_heatmap(df, self.config, harvest, neg_kw, neg_pt, pd.concat([bids_ex, bids_pt]), pd.concat([bids_agg, bids_auto]))
         
@@ -204,7 +207,7 @@ class OptimizerModule(BaseFeature):
             "bids_exact": bids_ex, "bids_pt": bids_pt, "bids_agg": bids_agg, "bids_auto": bids_auto,
             "direct_bids": pd.concat([bids_ex, bids_pt]),
             "agg_bids": pd.concat([bids_agg, bids_auto]), "heatmap": heatmap,
-            "simulation": run_simulation(df, pd.concat([bids_ex, bids_pt]), pd.concat([bids_agg, bids_auto]), harvest, self.config, date_info)
+            "simulation": run_simulation(df, pd.concat([bids_ex, bids_pt]), pd.concat([bids_agg, bids_auto]), harvest, self.config, date_info, features=features)
         }
         st.session_state['optimizer_results_refactored'] = self.results
 
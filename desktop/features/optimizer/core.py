@@ -151,6 +151,15 @@ def prepare_data(df: pd.DataFrame, config: dict) -> Tuple[pd.DataFrame, Dict[str
     Validate and prepare data for optimization.
     Returns prepared DataFrame and date_info dict.
     """
+    df, date_info = prepare_base_data(df)
+    return add_campaign_roas(df, config), date_info
+
+
+def prepare_base_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Config-independent part of prepare_data (columns, Targeting, derived metrics, date range).
+    The feature frame caches this per input frame so threshold changes never redo it.
+    """
     df = df.copy()
     # Ensure numeric columns (using shared utility)
     df = ensure_numeric_columns(df, inplace=True)
@@ -208,7 +217,10 @@ def prepare_data(df: pd.DataFrame, config: dict) -> Tuple[pd.DataFrame, Dict[str
     # 3. Normalize Auto targeting types for consistent grouping
     # e.g., "Close-Match" -> "close-match", "Close Match" -> "close-match"
     # Using shared normalize_auto_targeting from features.constants
-    df["Targeting"] = df["Targeting"].apply(normalize_auto_targeting)
+    # (each distinct value normalized once)
+    codes, uniques = pd.factorize(df["Targeting"])
+    normalized = np.array([normalize_auto_targeting(v) for v in uniques], dtype=object)
+    df["Targeting"] = normalized[codes]
     
     # Sales/Orders attributed columns
     df["Sales_Attributed"] = df["Sales"]
@@ -218,18 +230,22 @@ def prepare_data(df: pd.DataFrame, config: dict) -> Tuple[pd.DataFrame, Dict[str
     # optimizer.py uses decimal format: 0.05 = 5%
     df = calculate_ppc_metrics(df, percentage_format='decimal', inplace=True)
     
-    # Campaign-level metrics
+    # Detect date range
+    date_info = detect_date_range(df)
+    
+    return df, date_info
+
+
+def add_campaign_roas(df: pd.DataFrame, config: dict) -> pd.DataFrame:
+    """Campaign-level ROAS column (TARGET_ROAS for campaigns without spend) on a copy of df."""
+    df = df.copy()
     camp_stats = df.groupby("Campaign Name")[["Sales", "Spend"]].transform("sum")
     df["Campaign_ROAS"] = np.where(
         camp_stats["Spend"] > 0, 
         camp_stats["Sales"] / camp_stats["Spend"], 
         config["TARGET_ROAS"]
     )
-    
-    # Detect date range
-    date_info = detect_date_range(df)
-    
-    return df, date_info
+    return df
 
 
 def detect_date_range(df: pd.DataFrame) -> dict:
@@ -271,6 +287,14 @@ def detect_date_range(df: pd.DataFrame) -> dict:
 
 @st.cache_data(show_spinner=False)
 def calculate_account_benchmarks(df: pd.DataFrame, config: dict) -> dict:
+    """
+    Calculate account-level CVR benchmarks for dynamic thresholds (cached wrapper).
+    See compute_account_benchmarks.
+    """
+    return compute_account_benchmarks(df, config)
+
+
+def compute_account_benchmarks(df: pd.DataFrame, config: dict) -> dict:
     """
     Calculate account-level CVR benchmarks for dynamic thresholds.
     
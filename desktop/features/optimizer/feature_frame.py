@@ -0,0 +1,351 @@
+"""
+Optimizer Feature Frame
+Precomputed, memoized inputs shared by the harvest, negatives and bid strategies and the simulator.
+
+A run used to re-derive the same things in every strategy (prepared data, benchmarks,
+prefix-stripped search terms, lower/stripped keys, bucket masks). build_feature_frame
+computes them once per input frame and caches each stage by a content hash of the frame
+plus only the config keys that stage reads, so changing one threshold reruns just the
+stage that depends on it:
+
+    prepare / keys / baseline   <- input frame only
+    campaign_roas               <- + TARGET_ROAS
+    benchmarks                  <- + SOFT_NEGATIVE_MULT, HARD_STOP_MULTIPLIER, HARVEST_CLICKS, TARGET_ROAS
+
+Strategies memoize their own threshold-independent aggregates (harvest term groups,
+negative candidate groups, bid bucket aggregates) through FeatureFrame.cached, so a
+what-if rerun only recomputes the classification columns.
+
+Usage:
+    features = build_feature_frame(df, config)
+    harvest = identify_harvest_candidates(features.df, config, matcher, features.benchmarks, features=features)
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from features.optimizer.core import prepare_base_data, add_campaign_roas, compute_account_benchmarks
+from features.optimizer.simulation import _calculate_baseline
+from features.bulk_export import strip_targeting_prefix
+from core.data_loader import is_asin
+
+# Config keys read by each config-dependent stage
+CAMPAIGN_ROAS_CONFIG_KEYS = ("TARGET_ROAS",)
+BENCHMARK_CONFIG_KEYS = ("SOFT_NEGATIVE_MULT", "HARD_STOP_MULTIPLIER", "HARVEST_CLICKS", "TARGET_ROAS")
+
+# Campaigns that receive harvested keywords (excluded from discovery / isolation negatives)
+HARVEST_DEST_PATTERN = r'harvestexact|harvest_exact|_exact_|exactmatch'
+
+# Targeting expressions that are NOT actual search queries (asin= is allowed after prefix stripping)
+TARGETING_EXPRESSION_PATTERNS = [
+    r'^close-match$', r'^loose-match$', r'^substitutes$', r'^complements$', r'^auto$',
+    r'^category=', r'^keyword-group=',
+]
+
+AUTO_TYPES = {'close-match', 'loose-match', 'substitutes', 'complements', 'auto'}
+
+
+# ==========================================
+# BUCKET DETECTION
+# ==========================================
+
+def is_pt_targeting(targeting_val) -> bool:
+    t = str(targeting_val).lower().strip()
+    if "asin=" in t or "asin-expanded=" in t:
+        return True
+    if is_asin(t) and not t.startswith("category"):
+        return True
+    return False
+
+
+def is_category_targeting(targeting_val) -> bool:
+    t = str(targeting_val).lower().strip()
+    return t.startswith("category=") or (t.startswith("category") and "=" in t)
+
+
+def is_auto_targeting(targeting_val) -> bool:
+    return str(targeting_val).lower().strip() in AUTO_TYPES
+
+
+# ==========================================
+# FEATURE KEYS
+# ==========================================
+
+def _per_unique(values: pd.Series, fn: Callable[[pd.Series], Any]) -> np.ndarray:
+    """Apply a Series -> Series transform to the distinct values only, then broadcast back."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return np.asarray(fn(pd.Series(uniques, dtype=object)))[codes]
+
+
+def _column(df: pd.DataFrame, col: str) -> pd.Series:
+    """df[col], or blanks when the column is missing (same as row.get(col, ""))."""
+    if col in df.columns:
+        return df[col]
+    return pd.Series("", index=df.index, dtype=object)
+
+
+def _lower_strip(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.strip().str.lower()
+
+
+def compute_feature_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalized keys and masks for every row of a prepared frame (aligned to df.index).
+
+    Columns:
+        cst_norm / targeting_norm   - lower/stripped Customer Search Term / Targeting
+        campaign_key / ad_group_key - stripped Campaign / Ad Group Name
+        cst_clean                   - CST with asin= prefixes stripped, lower/stripped (isolation negatives)
+        harvest_term                - CST (or Targeting) with asin= prefixes stripped (harvest grouping key)
+        is_exact_match / is_pt_match / is_harvest_dest / is_discovery / is_search_query
+        bucket                      - Exact / Product Targeting / Broad/Phrase / Auto / Category / ''
+    """
+    cst = _column(df, "Customer Search Term")
+    targeting = _column(df, "Targeting")
+    match_type = _column(df, "Match Type")
+    campaign = _column(df, "Campaign Name")
+    ad_group = _column(df, "Ad Group Name")
+
+    keys = pd.DataFrame(index=df.index)
+    keys["cst_norm"] = _per_unique(cst, _lower_strip)
+    keys["targeting_norm"] = _per_unique(targeting, _lower_strip)
+    keys["campaign_key"] = _per_unique(campaign, lambda u: u.astype(str).str.strip())
+    keys["ad_group_key"] = _per_unique(ad_group, lambda u: u.astype(str).str.strip())
+
+    strip_prefix = lambda u: u.map(strip_targeting_prefix)
+    keys["cst_clean"] = _per_unique(cst, lambda u: _lower_strip(strip_prefix(u)))
+    harvest_source = cst if "Customer Search Term" in df.columns else targeting
+    keys["harvest_term"] = _per_unique(harvest_source, strip_prefix)
+    keys["is_search_query"] = ~_per_unique(
+        keys["harvest_term"],
+        lambda u: u.str.lower().str.strip().str.match('|'.join(TARGETING_EXPRESSION_PATTERNS), na=False)
+    ).astype(bool)
+
+    keys["is_exact_match"] = _per_unique(match_type, lambda u: u.str.contains("exact", case=False, na=False)).astype(bool)
+    keys["is_pt_match"] = _per_unique(match_type, lambda u: u.str.upper().isin(["PT", "PRODUCT TARGETING"])).astype(bool)
+    keys["is_harvest_dest"] = _per_unique(campaign, lambda u: u.str.contains(HARVEST_DEST_PATTERN, case=False, na=False)).astype(bool)
+    keys["is_discovery"] = ~keys["is_exact_match"] & ~keys["is_pt_match"] & ~keys["is_harvest_dest"]
+
+    # Mutually exclusive bid buckets (PT and Category targets take precedence over Auto match types)
+    mt_lower = pd.Series(_per_unique(match_type, lambda u: u.str.lower()), index=df.index)
+    pt_targeting = _per_unique(targeting, lambda u: u.map(is_pt_targeting)).astype(bool)
+    category_targeting = _per_unique(targeting, lambda u: u.map(is_category_targeting)).astype(bool)
+    auto_targeting = _per_unique(targeting, lambda u: u.map(is_auto_targeting)).astype(bool)
+    auto_match = mt_lower.isin(["auto", "-"]).to_numpy()
+
+    auto = (auto_targeting | auto_match) & ~pt_targeting & ~category_targeting
+    pt = pt_targeting & ~auto
+    category = category_targeting & ~auto & ~pt
+    keyword = ~pt & ~category & ~auto
+    exact = (mt_lower == "exact").to_numpy() & keyword
+    broad_phrase = mt_lower.isin(["broad", "phrase"]).to_numpy() & keyword
+    keys["bucket"] = np.select(
+        [exact, pt, broad_phrase, auto, category],
+        ["Exact", "Product Targeting", "Broad/Phrase", "Auto", "Category"],
+        default=""
+    ).astype(object)
+    return keys
+
+
+# ==========================================
+# STAGE CACHE
+# ==========================================
+
+def _sizeof(value: Any, seen: Optional[set] = None) -> int:
+    """
+    Approximate in-memory size of a stage result in bytes: frames and arrays (deep), containers,
+    and plain objects such as ExactMatcher through their attributes. Shared objects count once.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return int(value.nbytes) + sum(_sizeof(v, seen) for v in value.ravel())
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(k, seen) + _sizeof(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_sizeof(v, seen) for v in value)
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        return sys.getsizeof(value) + _sizeof(vars(value), seen)
+    return sys.getsizeof(value)
+
+
+class _StageCache:
+    """
+    Thread-safe LRU of stage results keyed by (stage, frame fingerprint, config subset),
+    bounded by the estimated bytes of the results (like core.query_cache).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+
+    def get_or_compute(self, stage: str, key: Optional[Tuple], compute: Callable[[], Any]) -> Any:
+        if key is None:  # unhashable input frame - no caching
+            return compute()
+        full_key = (stage,) + key
+        with self._lock:
+            if full_key in self._entries:
+                self._entries.move_to_end(full_key)
+                self.hits[stage] = self.hits.get(stage, 0) + 1
+                return self._entries[full_key][0]
+        value = compute()
+        size = _sizeof(value)
+        with self._lock:
+            self.misses[stage] = self.misses.get(stage, 0) + 1
+            if size > self.max_bytes:
+                return value  # Larger than the whole budget - don't cache
+            if full_key in self._entries:
+                self._bytes -= self._entries.pop(full_key)[1]
+            self._entries[full_key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits.clear()
+            self.misses.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'hits': dict(self.hits), 'misses': dict(self.misses), 'entries': len(self._entries),
+                    'evictions': self.evictions, 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+
+# Process-wide (shared by all sessions); bounded by memory rather than entry count
+_stage_cache = _StageCache(int(os.getenv("OPTIMIZER_FEATURE_CACHE_MB", "512")) * 1024 * 1024)
+
+
+def frame_fingerprint(df: pd.DataFrame) -> Optional[str]:
+    """Content hash of a DataFrame (values, index, columns and dtypes); None if it can't be hashed."""
+    try:
+        row_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    except (TypeError, ValueError):
+        return None
+    digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16)
+    digest.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    return digest.hexdigest()
+
+
+def _config_subset(config: dict, keys: Tuple[str, ...]) -> Tuple:
+    return tuple((k, config.get(k)) for k in keys)
+
+
+def mask_digest(mask: np.ndarray) -> str:
+    """Short hash of a boolean row mask (cache key for aggregates over a filtered frame)."""
+    return hashlib.blake2b(np.packbits(np.asarray(mask, dtype=bool)).tobytes() + str(len(mask)).encode(), digest_size=16).hexdigest()
+
+
+# ==========================================
+# FEATURE FRAME
+# ==========================================
+
+@dataclass
+class FeatureFrame:
+    """Prepared optimizer input plus everything derived from it once per run. Treat as read-only."""
+    df: pd.DataFrame                 # prepare_data output
+    date_info: Dict[str, Any]
+    benchmarks: Dict[str, Any]       # calculate_account_benchmarks output
+    keys: pd.DataFrame               # compute_feature_keys(df), aligned to df.index
+    baseline: Dict[str, Any]         # simulator baseline totals
+    fingerprint: Optional[str] = None
+
+    def cached(self, stage: str, compute: Callable[[], Any], *key: Hashable) -> Any:
+        """
+        Memoize a threshold-independent derivation of this frame across runs.
+        `key` must capture every input besides the frame itself; results are shared, treat as read-only.
+        """
+        if self.fingerprint is None:
+            return compute()
+        return _stage_cache.get_or_compute(stage, (self.fingerprint,) + key, compute)
+
+    def keys_for(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Keys for df: the precomputed ones when df is this frame, else computed on the fly."""
+        if df is self.df:
+            return self.keys
+        return compute_feature_keys(df)
+
+
+def feature_keys(df: pd.DataFrame, features: Optional[FeatureFrame] = None) -> pd.DataFrame:
+    """compute_feature_keys(df), reusing features.keys when they were built for this frame."""
+    if features is not None:
+        return features.keys_for(df)
+    return compute_feature_keys(df)
+
+
+def cache_for(df: pd.DataFrame, features: Optional[FeatureFrame] = None) -> Callable[..., Any]:
+    """features.cached when features were built for df, else a pass-through (compute every time)."""
+    if features is not None and features.df is df:
+        return features.cached
+    return lambda stage, compute, *key: compute()
+
+
+def build_feature_frame(df: pd.DataFrame, config: dict) -> FeatureFrame:
+    """
+    Prepare df and derive the shared optimizer features, memoized per stage.
+    Equivalent to prepare_data + calculate_account_benchmarks + compute_feature_keys.
+    """
+    fingerprint = frame_fingerprint(df)
+    data_key = (fingerprint,) if fingerprint is not None else None
+
+    base, date_info = _stage_cache.get_or_compute("prepare", data_key, lambda: prepare_base_data(df))
+    keys = _stage_cache.get_or_compute("keys", data_key, lambda: compute_feature_keys(base))
+    baseline = _stage_cache.get_or_compute("baseline", data_key, lambda: _calculate_baseline(base))
+
+    def _stage_key(config_keys):
+        return data_key + _config_subset(config, config_keys) if data_key is not None else None
+
+    prepared = _stage_cache.get_or_compute(
+        "campaign_roas", _stage_key(CAMPAIGN_ROAS_CONFIG_KEYS), lambda: add_campaign_roas(base, config)
+    )
+    # Benchmarks only read Clicks/Orders/Spend/Sales, which Campaign_ROAS doesn't touch
+    benchmarks = _stage_cache.get_or_compute(
+        "benchmarks", _stage_key(BENCHMARK_CONFIG_KEYS), lambda: compute_account_benchmarks(base, config)
+    )
+
+    return FeatureFrame(
+        df=prepared,
+        date_info=dict(date_info),
+        benchmarks=dict(benchmarks),
+        keys=keys,
+        baseline=dict(baseline),
+        fingerprint=fingerprint,
+    )
+
+
+def feature_cache_stats() -> Dict[str, Any]:
+    """Per-stage hit/miss counters and memory footprint of the feature frame cache."""
+    return _stage_cache.stats()
+
+
+def clear_feature_cache():
+    """Drop all memoized feature frame stages."""
+    _stage_cache.clear()
@@ -4,49 +4,70 @@ Handles logging of optimization events to the database.
 """
 
 import pandas as pd
+import numpy as np
 import uuid
 import streamlit as st
 from core.db_manager import get_db_manager
+from core.action_log import ACTION_COLUMNS
 
-def log_optimization_events(results: dict, client_id: str, report_date: str):
+def _column(df: pd.DataFrame, col: str, default) -> pd.Series:
+    """Column as object values, or a constant when the result frame lacks it (row.get semantics)."""
+    if col in df.columns:
+        return df[col].astype(object)
+    return pd.Series([default] * len(df), index=df.index, dtype=object)
+
+
+def _project(df: pd.DataFrame, **fields) -> dict:
+    """Project a result frame onto the action schema as object arrays (constants broadcast, missing fields NULL)."""
+    n = len(df)
+    actions = {}
+    for col in ACTION_COLUMNS:
+        value = fields.get(col)
+        if isinstance(value, (pd.Series, np.ndarray)):
+            actions[col] = np.asarray(value, dtype=object)
+        else:
+            actions[col] = np.full(n, value, dtype=object)
+    return actions
+
+
+def build_optimization_actions(results: dict) -> pd.DataFrame:
     """
-    Standardizes and logs optimization actions (bids, negatives, harvests).
-    
-    If user has already accepted actions this session (optimizer_actions_accepted=True),
-    writes directly to DB and shows undo toast.
-    Otherwise, stores in session state for confirmation when leaving optimizer tab.
+    Columnar action log for an optimizer run: each result frame is projected onto
+    the actions_log schema, concatenated once and deduplicated.
     """
-    
-    batch_id = str(uuid.uuid4())[:8]
-    actions_to_log = []
+    frames = []
 
     # 1. Process Negative Keywords
-    for _, row in results.get('neg_kw', pd.DataFrame()).iterrows():
-        actions_to_log.append({
-            'entity_name': 'Keyword',
-            'action_type': 'NEGATIVE',
-            'old_value': 'ENABLED',
-            'new_value': 'PAUSED',
-            'reason': row.get('Reason', 'Low efficiency / Waste'),
-            'campaign_name': row.get('Campaign Name', ''),
-            'ad_group_name': row.get('Ad Group Name', ''),
-            'target_text': row.get('Term', ''),
-            'match_type': row.get('Match Type', 'NEGATIVE')
-        })
+    neg_kw = results.get('neg_kw', pd.DataFrame())
+    if not neg_kw.empty:
+        frames.append(_project(
+            neg_kw,
+            entity_name='Keyword',
+            action_type='NEGATIVE',
+            old_value='ENABLED',
+            new_value='PAUSED',
+            reason=_column(neg_kw, 'Reason', 'Low efficiency / Waste'),
+            campaign_name=_column(neg_kw, 'Campaign Name', ''),
+            ad_group_name=_column(neg_kw, 'Ad Group Name', ''),
+            target_text=_column(neg_kw, 'Term', ''),
+            match_type=_column(neg_kw, 'Match Type', 'NEGATIVE'),
+        ))
 
     # 2. Process Negative Product Targets (ASINs)
-    for _, row in results.get('neg_pt', pd.DataFrame()).iterrows():
-        actions_to_log.append({
-            'entity_name': 'ASIN',
-            'action_type': 'NEGATIVE',
-            'old_value': 'ENABLED',
-            'new_value': 'PAUSED',
-            'reason': row.get('Reason', 'Low efficiency / Waste'),
-            'campaign_name': row.get('Campaign Name', ''),
-            'ad_group_name': row.get('Ad Group Name', ''),
-            'target_text': row.get('Term', ''),
-            'match_type': 'TARGETING_EXPRESSION'
-        })
+    neg_pt = results.get('neg_pt', pd.DataFrame())
+    if not neg_pt.empty:
+        frames.append(_project(
+            neg_pt,
+            entity_name='ASIN',
+            action_type='NEGATIVE',
+            old_value='ENABLED',
+            new_value='PAUSED',
+            reason=_column(neg_pt, 'Reason', 'Low efficiency / Waste'),
+            campaign_name=_column(neg_pt, 'Campaign Name', ''),
+            ad_group_name=_column(neg_pt, 'Ad Group Name', ''),
+            target_text=_column(neg_pt, 'Term', ''),
+            match_type='TARGETING_EXPRESSION',
+        ))
 
     # 3. Process Bid Optimizations (Combined)
     bid_dfs = [
@@ -57,64 +78,74 @@ def log_optimization_events(results: dict, client_id: str, report_date: str):
     ]
     for b_df in bid_dfs:
         if b_df.empty: continue
-        for _, row in b_df.iterrows():
-            actions_to_log.append({
-                'entity_name': 'Target',
-                'action_type': 'BID_CHANGE',
-                'old_value': str(row.get('Current Bid', '')),
-                'new_value': str(row.get('New Bid', '')),
-                'reason': row.get('Reason', 'Portfolio Optimization'),
-                'campaign_name': row.get('Campaign Name', ''),
-                'ad_group_name': row.get('Ad Group Name', ''),
-                'target_text': row.get('Targeting', ''),
-                'match_type': row.get('Match Type', '')
-            })
+        frames.append(_project(
+            b_df,
+            entity_name='Target',
+            action_type='BID_CHANGE',
+            old_value=_column(b_df, 'Current Bid', '').astype(str),
+            new_value=_column(b_df, 'New Bid', '').astype(str),
+            reason=_column(b_df, 'Reason', 'Portfolio Optimization'),
+            campaign_name=_column(b_df, 'Campaign Name', ''),
+            ad_group_name=_column(b_df, 'Ad Group Name', ''),
+            target_text=_column(b_df, 'Targeting', ''),
+            match_type=_column(b_df, 'Match Type', ''),
+        ))
 
     # 4. Process Harvests - WITH WINNER SOURCE TRACKING
-    for _, row in results.get('harvest', pd.DataFrame()).iterrows():
-        # Determine winner source campaign and new campaign name
-        winner_campaign = row.get('Campaign Name', '')
-        search_term = row.get('Customer Search Term', '')
-        
-        # Generate new campaign name (you can customize this logic)
-        new_campaign = f"Harvest_Exact_{winner_campaign}" if winner_campaign else "Harvest_Exact_Campaign"
-        
-        actions_to_log.append({
-            'entity_name': 'Keyword',
-            'action_type': 'HARVEST',
-            'old_value': 'DISCOVERY',
-            'new_value': 'PROMOTED',
-            'reason': f"Conv: {row.get('Orders', 0)} orders",
-            'campaign_name': winner_campaign,  # Source campaign
-            'ad_group_name': row.get('Ad Group Name', ''),
-            'target_text': search_term,
-            'match_type': 'EXACT',
+    harvest = results.get('harvest', pd.DataFrame())
+    if not harvest.empty:
+        # Winner source campaign and the exact campaign it is being moved to
+        winner_campaign = _column(harvest, 'Campaign Name', '')
+        has_winner = np.frompyfunc(bool, 1, 1)(winner_campaign.to_numpy()).astype(bool)
+        new_campaign = np.where(has_winner, "Harvest_Exact_" + winner_campaign.astype(str), "Harvest_Exact_Campaign")
+
+        frames.append(_project(
+            harvest,
+            entity_name='Keyword',
+            action_type='HARVEST',
+            old_value='DISCOVERY',
+            new_value='PROMOTED',
+            reason="Conv: " + _column(harvest, 'Orders', 0).astype(str) + " orders",
+            campaign_name=winner_campaign,  # Source campaign
+            ad_group_name=_column(harvest, 'Ad Group Name', ''),
+            target_text=_column(harvest, 'Customer Search Term', ''),
+            match_type='EXACT',
             # NEW FIELDS FOR IMPACT ANALYSIS:
-            'winner_source_campaign': winner_campaign,  # Which campaign won
-            'new_campaign_name': new_campaign,  # Where it's being moved
-            'before_match_type': row.get('Match Type', 'broad'),  # Original match type
-            'after_match_type': 'exact'  # Harvested to exact
-        })
+            winner_source_campaign=winner_campaign,  # Which campaign won
+            new_campaign_name=new_campaign,  # Where it's being moved
+            before_match_type=_column(harvest, 'Match Type', 'broad'),  # Original match type
+            after_match_type='exact'  # Harvested to exact
+        ))
 
+    if not frames:
+        return pd.DataFrame(columns=ACTION_COLUMNS)
+    actions = pd.DataFrame({col: np.concatenate([f[col] for f in frames]) for col in ACTION_COLUMNS})
 
     # === DEDUPLICATE ACTIONS ===
     # Remove duplicates that would violate the unique constraint:
     # (client_id, action_date, target_text, action_type, campaign_name)
     # Keep the last occurrence (most recent values for the same target)
-    seen_keys = {}
-    for i, action in enumerate(actions_to_log):
-        key = (
-            action.get('target_text', '').lower().strip(),
-            action.get('action_type', ''),
-            action.get('campaign_name', '').strip()
-        )
-        seen_keys[key] = i  # Overwrite with latest index
+    dedupe_key = pd.DataFrame({
+        'target': actions['target_text'].astype(str).str.lower().str.strip(),
+        'action_type': actions['action_type'],
+        'campaign': actions['campaign_name'].astype(str).str.strip(),
+    })
+    return actions[~dedupe_key.duplicated(keep='last')].reset_index(drop=True)
+
+
+def log_optimization_events(results: dict, client_id: str, report_date: str):
+    """
+    Standardizes and logs optimization actions (bids, negatives, harvests).
     
-    # Build deduplicated list (keeping only the last occurrence of each key)
-    unique_indices = set(seen_keys.values())
-    actions_to_log = [a for i, a in enumerate(actions_to_log) if i in unique_indices]
+    If user has already accepted actions this session (optimizer_actions_accepted=True),
+    writes directly to DB and shows undo toast.
+    Otherwise, stores in session state for confirmation when leaving optimizer tab.
+    """
+    
+    batch_id = str(uuid.uuid4())[:8]
+    actions_to_log = build_optimization_actions(results)
 
-    if not actions_to_log:
+    if actions_to_log.empty:
         return 0
     
     # PENDING ACTIONS WORKFLOW: Store actions in session state for confirmation on tab exit
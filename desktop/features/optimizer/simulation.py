@@ -7,22 +7,31 @@ import pandas as pd
 import numpy as np
 from features.optimizer.core import ELASTICITY_SCENARIOS
 
+# Sensitivity analysis: bid change scaled by each multiplier under "expected" elasticity
+SENSITIVITY_ADJUSTMENTS = ["-30%", "-20%", "-10%", "+0%", "+10%", "+20%", "+30%"]
+SENSITIVITY_MULTIPLIERS = [0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3]
+
 def run_simulation(
     df: pd.DataFrame,
     direct_bids: pd.DataFrame,
     agg_bids: pd.DataFrame,
     harvest_df: pd.DataFrame,
     config: dict,
-    date_info: dict
+    date_info: dict,
+    features=None
 ) -> dict:
     """
     Simulate the impact of proposed bid changes on future performance.
     Uses elasticity model with scenario analysis.
+    `features` (build_feature_frame) supplies the precomputed baseline for its frame.
     """
     num_weeks = date_info.get("weeks", 1.0)
     
     # Calculate current baseline (raw)
-    current_raw = _calculate_baseline(df)
+    if features is not None and features.df is df:
+        current_raw = features.baseline
+    else:
+        current_raw = _calculate_baseline(df)
     current = _normalize_to_weekly(current_raw, num_weeks)
     
     # Combine bid changes
@@ -58,17 +67,21 @@ def run_simulation(
         hold_count = hold_mask.sum()
         actual_changes = (~hold_mask).sum()
     
-    # Run scenarios
-    scenarios = {}
-    for name, elasticity in ELASTICITY_SCENARIOS.items():
-        forecast_raw = _forecast_scenario(all_bids, harvest_df, elasticity, current_raw, config)
-        forecast = _normalize_to_weekly(forecast_raw, num_weeks)
-        scenarios[name] = forecast
+    # Run all elasticity scenarios and sensitivity points in one broadcasted pass
+    inputs = _forecast_inputs(all_bids, harvest_df, current_raw, config)
+    scenario_names = list(ELASTICITY_SCENARIOS)
+    points = [(ELASTICITY_SCENARIOS[name], 1.0) for name in scenario_names]
+    points += [(ELASTICITY_SCENARIOS["expected"], mult) for mult in SENSITIVITY_MULTIPLIERS]
+    forecasts = _forecast_points(inputs, current_raw, points)
     
+    scenarios = {
+        name: _normalize_to_weekly(forecast, num_weeks)
+        for name, forecast in zip(scenario_names, forecasts)
+    }
     scenarios["current"] = current
     
     # Calculate sensitivity
-    sensitivity_df = _calculate_sensitivity(all_bids, harvest_df, ELASTICITY_SCENARIOS["expected"], current_raw, config, num_weeks)
+    sensitivity_df = _sensitivity_frame(forecasts[len(scenario_names):], num_weeks)
     
     # Analyze risks
     risk_analysis = _analyze_risks(all_bids)
@@ -126,157 +139,179 @@ def _normalize_to_weekly(metrics: dict, num_weeks: float) -> dict:
         "ctr": metrics.get("ctr", 0)
     }
 
-def _forecast_scenario(
+
+def _numeric(df: pd.DataFrame, col: str) -> np.ndarray:
+    """Column as float array (missing column / non-numeric / NaN → 0)."""
+    if df.empty or col not in df.columns:
+        return np.zeros(len(df))
+    return pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+
+
+def _forecast_inputs(
     bid_changes: pd.DataFrame,
     harvest_df: pd.DataFrame,
-    elasticity: dict,
     baseline: dict,
     config: dict
 ) -> dict:
-    """Forecast performance for a single scenario."""
-    forecasted_changes = []
+    """
+    Scenario-independent forecast inputs as arrays.
     
-    # Part 1: Process bid changes
+    Per-target rates (CPC, CVR, AOV, ROAS) for non-hold bid changes are computed once;
+    harvest deltas don't depend on elasticity, so they are pre-summed here.
+    """
     if not bid_changes.empty:
-        for _, row in bid_changes.iterrows():
-            bid_change_pct = row.get("Bid_Change_Pct", 0)
-            reason = str(row.get("Reason", "")).lower()
-            
-            # Skip holds
-            if "hold" in reason or abs(bid_change_pct) < 0.005:
-                continue
-            
-            current_clicks = float(row.get("Clicks", 0) or 0)
-            current_spend = float(row.get("Spend", 0) or 0)
-            current_orders = float(row.get("Orders", 0) or 0)
-            current_sales = float(row.get("Sales", 0) or 0)
-            current_cpc = float(row.get("CPC", 0) or row.get("Cost Per Click (CPC)", 0) or 0)
-            
-            if current_clicks == 0 and current_cpc == 0:
-                continue
-            
-            current_cvr = current_orders / current_clicks if current_clicks > 0 else 0
-            current_aov = current_sales / current_orders if current_orders > 0 else 0
-            current_roas = current_sales / current_spend if current_spend > 0 else 0
-            
-            if current_aov == 0 and baseline["orders"] > 0:
-                current_aov = baseline["sales"] / baseline["orders"]
-            
-            # Calculate baseline ROAS for comparison
-            baseline_roas = baseline["sales"] / baseline["spend"] if baseline["spend"] > 0 else 1.0
-            
-            # Apply elasticity with ROAS-aware adjustment
-            new_cpc = current_cpc * (1 + elasticity["cpc"] * bid_change_pct)
-            new_clicks = current_clicks * (1 + elasticity["clicks"] * bid_change_pct)
-            
-            # KEY FIX: When DECREASING bids on LOW-ROAS targets, CVR doesn't decrease
-            # because we're cutting wasteful traffic, not good traffic
-            if bid_change_pct < 0 and current_roas < baseline_roas:
-                # Below-average ROAS target: cutting this traffic is GOOD
-                # CVR stays same or improves slightly (removing untargeted clicks)
-                new_cvr = current_cvr * (1 + abs(elasticity["cvr"] * bid_change_pct * 0.2))
-            else:
-                # Normal case: CVR follows elasticity
-                new_cvr = current_cvr * (1 + elasticity["cvr"] * bid_change_pct)
-            
-            new_orders = new_clicks * new_cvr
-            new_sales = new_orders * current_aov
-            new_spend = new_clicks * new_cpc
-            
-            forecasted_changes.append({
-                "delta_clicks": new_clicks - current_clicks,
-                "delta_spend": new_spend - current_spend,
-                "delta_sales": new_sales - current_sales,
-                "delta_orders": new_orders - current_orders
-            })
+        reason = bid_changes["Reason"].astype(str).str.lower() if "Reason" in bid_changes.columns else pd.Series("", index=bid_changes.index)
+        clicks = _numeric(bid_changes, "Clicks")
+        cpc = _numeric(bid_changes, "CPC")
+        cpc = np.where(cpc != 0, cpc, _numeric(bid_changes, "Cost Per Click (CPC)"))
+        # Skip holds and targets without any traffic/CPC history
+        keep = ~reason.str.contains("hold", regex=False).to_numpy() & ~((clicks == 0) & (cpc == 0))
+    else:
+        keep = np.zeros(0, dtype=bool)
     
-    # Part 2: Process harvest campaigns
+    rows = bid_changes[keep] if keep.any() else pd.DataFrame()
+    clicks = _numeric(rows, "Clicks")
+    spend = _numeric(rows, "Spend")
+    orders = _numeric(rows, "Orders")
+    sales = _numeric(rows, "Sales")
+    cpc = _numeric(rows, "CPC")
+    cpc = np.where(cpc != 0, cpc, _numeric(rows, "Cost Per Click (CPC)"))
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cvr = np.where(clicks > 0, orders / clicks, 0.0)
+        aov = np.where(orders > 0, sales / orders, 0.0)
+        roas = np.where(spend > 0, sales / spend, 0.0)
+    if baseline["orders"] > 0:
+        aov = np.where(aov == 0, baseline["sales"] / baseline["orders"], aov)
+    
+    # Harvest campaigns: exact match launch at 90% CPC with CVR uplift
+    harvest_delta = {"clicks": 0.0, "spend": 0.0, "sales": 0.0, "orders": 0.0}
+    harvest_count = 0
     if not harvest_df.empty:
         efficiency = config.get("HARVEST_EFFICIENCY_MULTIPLIER", 1.15)
+        base_clicks = _numeric(harvest_df, "Clicks")
+        eligible = base_clicks >= 5
+        base_clicks = base_clicks[eligible]
+        base_spend = _numeric(harvest_df, "Spend")[eligible]
+        base_orders = _numeric(harvest_df, "Orders")[eligible]
+        base_sales = _numeric(harvest_df, "Sales")[eligible]
+        base_cpc = _numeric(harvest_df, "CPC")[eligible]
         
-        for _, row in harvest_df.iterrows():
-            base_clicks = float(row.get("Clicks", 0) or 0)
-            base_spend = float(row.get("Spend", 0) or 0)
-            base_orders = float(row.get("Orders", 0) or 0)
-            base_sales = float(row.get("Sales", 0) or 0)
-            base_cpc = float(row.get("CPC", 0) or 0)
-            
-            if base_clicks < 5:
-                continue
-            
-            # Use launch multiplier (2x) for harvest bids
-            launch_mult = config.get("HARVEST_LAUNCH_MULTIPLIER", 2.0)
-            base_cvr = base_orders / base_clicks if base_clicks > 0 else 0
-            base_aov = base_sales / base_orders if base_orders > 0 else 0
-            
-            fore_clicks = base_clicks
-            fore_cpc = base_cpc * 0.90  # Exact match is typically more efficient
-            fore_cvr = base_cvr * efficiency  # 1.15x CVR improvement (default)
-            
-            fore_orders = fore_clicks * fore_cvr
-            fore_sales = fore_orders * base_aov
-            fore_spend = fore_clicks * fore_cpc
-            
-            forecasted_changes.append({
-                "delta_clicks": fore_clicks - base_clicks,
-                "delta_spend": fore_spend - base_spend,  # Should be NEGATIVE (savings!)
-                "delta_sales": fore_sales - base_sales,  # Should be POSITIVE (better CVR!)
-                "delta_orders": fore_orders - base_orders
-            })
-    
-    # Aggregate changes
-    if not forecasted_changes:
-        return baseline.copy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            base_cvr = base_orders / base_clicks
+            base_aov = np.where(base_orders > 0, base_sales / base_orders, 0.0)
+        fore_orders = base_clicks * (base_cvr * efficiency)
+        harvest_delta = {
+            "clicks": 0.0,
+            "spend": float(np.sum(base_clicks * (base_cpc * 0.90) - base_spend)),  # Should be NEGATIVE (savings!)
+            "sales": float(np.sum(fore_orders * base_aov - base_sales)),  # Should be POSITIVE (better CVR!)
+            "orders": float(np.sum(fore_orders - base_orders)),
+        }
+        harvest_count = int(eligible.sum())
     
-    total_delta = {
-        "clicks": sum(fc["delta_clicks"] for fc in forecasted_changes),
-        "spend": sum(fc["delta_spend"] for fc in forecasted_changes),
-        "sales": sum(fc["delta_sales"] for fc in forecasted_changes),
-        "orders": sum(fc["delta_orders"] for fc in forecasted_changes)
+    return {
+        "bid_change_pct": _numeric(rows, "Bid_Change_Pct"),
+        "clicks": clicks,
+        "spend": spend,
+        "orders": orders,
+        "sales": sales,
+        "cpc": cpc,
+        "cvr": cvr,
+        "aov": aov,
+        "roas": roas,
+        "harvest_delta": harvest_delta,
+        "harvest_count": harvest_count,
     }
+
+
+def _forecast_points(inputs: dict, baseline: dict, points: list) -> list:
+    """
+    Forecast every (elasticity, bid multiplier) point in one broadcasted pass.
     
-    new_clicks = max(0, baseline["clicks"] + total_delta["clicks"])
-    new_spend = max(0, baseline["spend"] + total_delta["spend"])
-    new_sales = max(0, baseline["sales"] + total_delta["sales"])
-    new_orders = max(0, baseline["orders"] + total_delta["orders"])
+    Arrays are shaped (points, targets); returns one forecast dict per point.
+    """
+    elasticity_cpc = np.array([e["cpc"] for e, _ in points], dtype=float)[:, None]
+    elasticity_clicks = np.array([e["clicks"] for e, _ in points], dtype=float)[:, None]
+    elasticity_cvr = np.array([e["cvr"] for e, _ in points], dtype=float)[:, None]
+    multipliers = np.array([m for _, m in points], dtype=float)[:, None]
     
-    return {
-        "clicks": new_clicks,
-        "spend": new_spend,
-        "sales": new_sales,
-        "orders": new_orders,
-        "impressions": baseline.get("impressions", 0),
-        "cpc": new_spend / new_clicks if new_clicks > 0 else 0,
-        "cvr": new_orders / new_clicks if new_clicks > 0 else 0,
-        "roas": new_sales / new_spend if new_spend > 0 else 0,
-        "acos": (new_spend / new_sales * 100) if new_sales > 0 else 0,
-        "ctr": baseline.get("ctr", 0)
+    bid_change_pct = inputs["bid_change_pct"][None, :] * multipliers
+    clicks, spend, orders, sales = inputs["clicks"], inputs["spend"], inputs["orders"], inputs["sales"]
+    cvr, aov = inputs["cvr"], inputs["aov"]
+    
+    # Changes under half a percent are treated as no-ops
+    active = np.abs(bid_change_pct) >= 0.005
+    
+    new_cpc = inputs["cpc"] * (1 + elasticity_cpc * bid_change_pct)
+    new_clicks = clicks * (1 + elasticity_clicks * bid_change_pct)
+    
+    # KEY FIX: When DECREASING bids on LOW-ROAS targets, CVR doesn't decrease
+    # because we're cutting wasteful traffic, not good traffic
+    baseline_roas = baseline["sales"] / baseline["spend"] if baseline["spend"] > 0 else 1.0
+    cutting_waste = (bid_change_pct < 0) & (inputs["roas"] < baseline_roas)
+    new_cvr = np.where(
+        cutting_waste,
+        cvr * (1 + np.abs(elasticity_cvr * bid_change_pct * 0.2)),
+        cvr * (1 + elasticity_cvr * bid_change_pct)
+    )
+    
+    new_orders = new_clicks * new_cvr
+    new_sales = new_orders * aov
+    new_spend = new_clicks * new_cpc
+    
+    delta = {
+        "clicks": np.where(active, new_clicks - clicks, 0.0).sum(axis=1),
+        "spend": np.where(active, new_spend - spend, 0.0).sum(axis=1),
+        "sales": np.where(active, new_sales - sales, 0.0).sum(axis=1),
+        "orders": np.where(active, new_orders - orders, 0.0).sum(axis=1),
     }
+    contributions = active.sum(axis=1) + inputs["harvest_count"]
+    harvest_delta = inputs["harvest_delta"]
+    
+    forecasts = []
+    for i in range(len(points)):
+        if contributions[i] == 0:
+            forecasts.append(baseline.copy())
+            continue
+        
+        new_clicks_total = max(0, baseline["clicks"] + float(delta["clicks"][i]) + harvest_delta["clicks"])
+        new_spend_total = max(0, baseline["spend"] + float(delta["spend"][i]) + harvest_delta["spend"])
+        new_sales_total = max(0, baseline["sales"] + float(delta["sales"][i]) + harvest_delta["sales"])
+        new_orders_total = max(0, baseline["orders"] + float(delta["orders"][i]) + harvest_delta["orders"])
+        
+        forecasts.append({
+            "clicks": new_clicks_total,
+            "spend": new_spend_total,
+            "sales": new_sales_total,
+            "orders": new_orders_total,
+            "impressions": baseline.get("impressions", 0),
+            "cpc": new_spend_total / new_clicks_total if new_clicks_total > 0 else 0,
+            "cvr": new_orders_total / new_clicks_total if new_clicks_total > 0 else 0,
+            "roas": new_sales_total / new_spend_total if new_spend_total > 0 else 0,
+            "acos": (new_spend_total / new_sales_total * 100) if new_sales_total > 0 else 0,
+            "ctr": baseline.get("ctr", 0)
+        })
+    
+    return forecasts
 
-def _calculate_sensitivity(
+
+def _forecast_scenario(
     bid_changes: pd.DataFrame,
     harvest_df: pd.DataFrame,
     elasticity: dict,
     baseline: dict,
-    config: dict,
-    num_weeks: float
-) -> pd.DataFrame:
-    """Calculate sensitivity analysis at different bid adjustment levels."""
-    adjustments = ["-30%", "-20%", "-10%", "+0%", "+10%", "+20%", "+30%"]
-    multipliers = [0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3]
-    
+    config: dict
+) -> dict:
+    """Forecast performance for a single scenario."""
+    inputs = _forecast_inputs(bid_changes, harvest_df, baseline, config)
+    return _forecast_points(inputs, baseline, [(elasticity, 1.0)])[0]
+
+
+def _sensitivity_frame(forecasts: list, num_weeks: float) -> pd.DataFrame:
+    """Sensitivity table from forecasts at SENSITIVITY_MULTIPLIERS (same order)."""
     results = []
-    for adj, mult in zip(adjustments, multipliers):
-        # Scale bid changes
-        if not bid_changes.empty:
-            scaled_bids = bid_changes.copy()
-            scaled_bids["Bid_Change_Pct"] = scaled_bids["Bid_Change_Pct"] * mult
-        else:
-            scaled_bids = pd.DataFrame()
-        
-        forecast = _forecast_scenario(scaled_bids, harvest_df, elasticity, baseline, config)
+    for adj, forecast in zip(SENSITIVITY_ADJUSTMENTS, forecasts):
         normalized = _normalize_to_weekly(forecast, num_weeks)
-        
         results.append({
             "Bid_Adjustment": adj,
             "Spend": normalized["spend"],
@@ -288,46 +323,59 @@ def _calculate_sensitivity(
     
     return pd.DataFrame(results)
 
+
+def _calculate_sensitivity(
+    bid_changes: pd.DataFrame,
+    harvest_df: pd.DataFrame,
+    elasticity: dict,
+    baseline: dict,
+    config: dict,
+    num_weeks: float
+) -> pd.DataFrame:
+    """Calculate sensitivity analysis at different bid adjustment levels."""
+    inputs = _forecast_inputs(bid_changes, harvest_df, baseline, config)
+    forecasts = _forecast_points(inputs, baseline, [(elasticity, mult) for mult in SENSITIVITY_MULTIPLIERS])
+    return _sensitivity_frame(forecasts, num_weeks)
+
+
 def _analyze_risks(bid_changes: pd.DataFrame) -> dict:
     """Analyze risks in proposed bid changes."""
     if bid_changes.empty:
         return {"summary": {"high_risk_count": 0, "medium_risk_count": 0, "low_risk_count": 0}, "high_risk": []}
     
-    high_risk = []
-    medium_risk = 0
-    low_risk = 0
+    # Classify all non-hold rows at once; only high-risk rows need per-row detail
+    reason = bid_changes["Reason"].astype(str).str.lower() if "Reason" in bid_changes.columns else pd.Series("", index=bid_changes.index)
+    candidates = bid_changes[~reason.str.contains("hold", regex=False).to_numpy()]
+    bid_change = candidates["Bid_Change_Pct"].abs() if "Bid_Change_Pct" in candidates.columns else pd.Series(0, index=candidates.index)
+    clicks = candidates["Clicks"] if "Clicks" in candidates.columns else pd.Series(0, index=candidates.index)
     
-    for _, row in bid_changes.iterrows():
-        reason = str(row.get("Reason", "")).lower()
-        if "hold" in reason:
-            continue
-        
-        bid_change = row.get("Bid_Change_Pct", 0)
-        clicks = row.get("Clicks", 0)
-        
-        risk_factors = []
-        
-        # Large bid change
-        if abs(bid_change) > 0.25:
-            risk_factors.append(f"Large change ({bid_change*100:+.0f}%)")
+    large_change = (bid_change > 0.25).to_numpy()  # Large bid change
+    low_data = (clicks < 10).to_numpy()  # Low data
+    factor_count = large_change.astype(int) + low_data.astype(int)
+    is_high = (factor_count >= 2) | (bid_change > 0.40).to_numpy()
+    medium_risk = int(((factor_count == 1) & ~is_high).sum())
+    low_risk = int(((factor_count == 0) & ~is_high).sum())
+    
+    high = candidates[is_high]
+    if high.empty:
+        high_risk = []
+    else:
+        def col(name: str, fallback) -> pd.Series:
+            return high[name] if name in high.columns else fallback
         
-        # Low data
-        if clicks < 10:
-            risk_factors.append(f"Low data ({clicks} clicks)")
+        signed_change = col("Bid_Change_Pct", pd.Series(0, index=high.index)).to_numpy(dtype=float)
+        change_txt = pd.Series(np.char.mod("%+.0f%%", signed_change * 100), index=high.index)
+        large_txt = ("Large change (" + change_txt + ")").where(large_change[is_high], "")
+        low_txt = ("Low data (" + clicks[is_high].astype(str) + " clicks)").where(low_data[is_high], "")
+        separator = pd.Series(np.where(large_change[is_high] & low_data[is_high], ", ", ""), index=high.index)
         
-        # Classify
-        if len(risk_factors) >= 2 or abs(bid_change) > 0.40:
-            high_risk.append({
-                "keyword": row.get("Targeting", row.get("Customer Search Term", "")),
-                "campaign": row.get("Campaign Name", ""),
-                "bid_change": f"{bid_change*100:+.0f}%",
-                "current_bid": row.get("CPC", row.get("Cost Per Click (CPC)", 0)),
-                "factors": ", ".join(risk_factors)
-            })
-        elif len(risk_factors) == 1:
-            medium_risk += 1
-        else:
-            low_risk += 1
+        high_risk = pd.DataFrame({
+            "keyword": col("Targeting", col("Customer Search Term", pd.Series("", index=high.index))),
+            "campaign": col("Campaign Name", pd.Series("", index=high.index)),
+            "bid_change": change_txt,
+            "current_bid": col("CPC", col("Cost Per Click (CPC)", pd.Series(0, index=high.index))),
+            "factors": large_txt + separator + low_txt,
+        }).to_dict("records")
     
     return {
         "summary": {
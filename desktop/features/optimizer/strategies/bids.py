@@ -8,6 +8,7 @@ import numpy as np
 import streamlit as st
 from typing import Tuple, Dict, Any, Optional, Set
 from features.optimizer.core import BID_LIMITS, calculate_account_benchmarks
+from features.optimizer.feature_frame import FeatureFrame, cache_for, feature_keys, mask_digest
 from features.optimizer.strategies.negatives import enrich_with_ids
 from core.data_hub import DataHub
 from core.data_loader import is_asin
@@ -17,13 +18,30 @@ from dev_resources.tests.bulk_validation_spec import (
     validate_recommendation
 )
 
+# VISIBILITY BOOST CONFIG
+VISIBILITY_BOOST_MIN_DAYS = 14  # Need at least 2 weeks of data
+VISIBILITY_BOOST_MAX_IMPRESSIONS = 100  # Below this = not winning auctions
+VISIBILITY_BOOST_PCT = 0.30  # 30% boost
+VISIBILITY_BOOST_ELIGIBLE_TYPES = {"exact", "phrase", "broad", "close-match"}  # Only these get boosted
+
+# Columns read when building bid recommendation objects
+REC_COLUMNS = ["Campaign Name", "Ad Group Name", "CampaignId", "AdGroupId", "Campaign Targeting Type",
+               "Targeting", "Match Type", "Current Bid", "New Bid", "Decision_Basis", "Bucket"]
+
+
+def _is_truthy(values: pd.Series) -> np.ndarray:
+    """Python truthiness per element (NaN is truthy; None, 0 and '' are not)."""
+    return np.frompyfunc(bool, 1, 1)(values.to_numpy(dtype=object)).astype(bool)
+
+
 def calculate_bid_optimizations(
     df: pd.DataFrame, 
     config: dict, 
     harvested_terms: Set[str] = None,
     negative_terms: Set[Tuple[str, str, str]] = None,
     universal_median_roas: float = None,
-    data_days: int = 7  # Number of days in dataset for visibility boost detection
+    data_days: int = 7,  # Number of days in dataset for visibility boost detection
+    features: FeatureFrame = None
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
     Calculate optimal bid adjustments using vNext Bucketed Logic.
@@ -35,35 +53,20 @@ def calculate_bid_optimizations(
     4. Auto/Category (close-match, loose-match, substitutes, complements, category=)
     
     MANDATORY: Bleeders (Sales=0 with Clicks >= threshold) are EXCLUDED.
+    
+    `features` (build_feature_frame) supplies precomputed keys and bucket labels.
     """
     harvested_terms = harvested_terms or set()
     negative_terms = negative_terms or set()
+    keys = feature_keys(df, features)
+    cache = cache_for(df, features)
     
     # 1. Global Exclusions
-    def is_excluded(row):
-        # Get both Customer Search Term AND Targeting values
-        cst = str(row.get("Customer Search Term", "")).strip().lower()
-        targeting = str(row.get("Targeting", "")).strip().lower()
-        
-        # Check Harvest - if EITHER column matches harvested terms, exclude
-        if cst in harvested_terms or targeting in harvested_terms:
-            return True
-            
-        # Check Negatives (Campaign, AdGroup, Term)
-        camp = str(row.get("Campaign Name", "")).strip()
-        ag = str(row.get("Ad Group Name", "")).strip()
-        
-        # Check against both CST and Targeting
-        neg_key_cst = (camp, ag, cst)
-        neg_key_targeting = (camp, ag, targeting)
-        if neg_key_cst in negative_terms or neg_key_targeting in negative_terms:
-            return True
-            
-        return False
-        
-    # Apply Exclusion Filter
-    mask_excluded = df.apply(is_excluded, axis=1)
+    mask_excluded = _excluded_mask(keys, harvested_terms, negative_terms)
     df_clean = df[~mask_excluded].copy()
+    bucket = keys["bucket"].to_numpy()[~mask_excluded]
+    # Shared grouping key for _process_bucket
+    df_clean["_targeting_norm"] = keys["targeting_norm"].to_numpy()[~mask_excluded]
     
     if df_clean.empty:
         empty = pd.DataFrame(columns=["Campaign Name", "Ad Group Name", "Targeting", "Match Type", "Current Bid", "New Bid"])
@@ -100,94 +103,32 @@ def calculate_bid_optimizations(
             universal_median_roas = config.get("TARGET_ROAS", 2.5)
             print(f"⚠️ Insufficient data, using TARGET_ROAS: {universal_median_roas:.2f}x")
     
-    # 2. Define bucket detection helpers
-    AUTO_TYPES = {'close-match', 'loose-match', 'substitutes', 'complements', 'auto'}
-    
-    def is_auto_or_category(targeting_val):
-        t = str(targeting_val).lower().strip()
-        if t.startswith("category=") or "category" in t:
-            return True
-        if t in AUTO_TYPES:
-            return True
-        return False
-    
-    def is_pt_targeting(targeting_val):
-        t = str(targeting_val).lower().strip()
-        if "asin=" in t or "asin-expanded=" in t:
-            return True
-        if is_asin(t) and not t.startswith("category"):
-            return True
-        return False
-    
-    def is_category_targeting(targeting_val):
-        t = str(targeting_val).lower().strip()
-        return t.startswith("category=") or (t.startswith("category") and "=" in t)
-    
-    # 3. Build mutually exclusive bucket masks
-    # CRITICAL: Auto bucket should ONLY include genuine auto targeting types (close-match, loose-match, etc.)
+    # 2. Mutually exclusive bucket masks (see feature_frame.compute_feature_keys)
+    # CRITICAL: Auto bucket only includes genuine auto targeting types (close-match, loose-match, etc.)
     # NOT asin-expanded or category targets, even if match_type is "auto" or "-"
+    mask_exact = bucket == "Exact"
+    mask_pt = bucket == "Product Targeting"
+    mask_broad_phrase = bucket == "Broad/Phrase"
+    mask_auto = bucket == "Auto"
+    mask_category = bucket == "Category"
+    
+    # 3. Process each bucket
+    # Aggregates only depend on the data and the excluded rows, so what-if reruns with the
+    # same exclusions reuse them and recompute just the bid classification.
+    exclusion_key = mask_digest(mask_excluded)
+    
+    def process(mask, min_clicks, bucket_name):
+        aggregated = cache(
+            "bid_bucket", lambda: _aggregate_bucket(df_clean[mask], bucket_name), bucket_name, exclusion_key
+        )
+        return _classify_bucket(aggregated, config, min_clicks=min_clicks, bucket_name=bucket_name,
+                                universal_median_roas=universal_median_roas, data_days=data_days)
     
-    # First identify PT and Category targets (takes precedence)
-    mask_pt_targeting = df_clean["Targeting"].apply(is_pt_targeting)
-    mask_category_targeting = df_clean["Targeting"].apply(is_category_targeting)
-    
-    # Auto bucket: targeting type is in AUTO_TYPES AND NOT a PT/Category target
-    mask_auto_by_targeting = df_clean["Targeting"].apply(lambda x: str(x).lower().strip() in AUTO_TYPES)
-    mask_auto_by_matchtype = df_clean["Match Type"].str.lower().isin(["auto", "-"])
-    mask_auto = (mask_auto_by_targeting | mask_auto_by_matchtype) & (~mask_pt_targeting) & (~mask_category_targeting)
-    
-    # PT bucket: PT targeting AND not auto
-    mask_pt = mask_pt_targeting & (~mask_auto)
-    
-    # Category bucket: Category targeting AND not auto/PT
-    mask_category = mask_category_targeting & (~mask_auto) & (~mask_pt)
-    
-    # Exact bucket: Match Type is exact AND not PT/Category/Auto
-    mask_exact = (
-        (df_clean["Match Type"].str.lower() == "exact") & 
-        (~mask_pt) & 
-        (~mask_category) &
-        (~mask_auto)
-    )
-    
-    # Broad/Phrase bucket: Match Type is broad/phrase AND not PT/Category/Auto
-    mask_broad_phrase = (
-        df_clean["Match Type"].str.lower().isin(["broad", "phrase"]) & 
-        (~mask_pt) & 
-        (~mask_category) &
-        (~mask_auto)
-    )
-    
-    # 4. Process each bucket
-    bids_exact = _process_bucket(df_clean[mask_exact], config, 
-                                  min_clicks=config.get("MIN_CLICKS_EXACT", 5), 
-                                  bucket_name="Exact",
-                                  universal_median_roas=universal_median_roas,
-                                  data_days=data_days)
-    
-    bids_pt = _process_bucket(df_clean[mask_pt], config, 
-                               min_clicks=config.get("MIN_CLICKS_PT", 5), 
-                               bucket_name="Product Targeting",
-                               universal_median_roas=universal_median_roas,
-                               data_days=data_days)
-    
-    bids_agg = _process_bucket(df_clean[mask_broad_phrase], config, 
-                                min_clicks=config.get("MIN_CLICKS_BROAD", 10), 
-                                bucket_name="Broad/Phrase",
-                                universal_median_roas=universal_median_roas,
-                                data_days=data_days)
-    
-    bids_auto = _process_bucket(df_clean[mask_auto], config, 
-                                 min_clicks=config.get("MIN_CLICKS_AUTO", 10), 
-                                 bucket_name="Auto",
-                                 universal_median_roas=universal_median_roas,
-                                 data_days=data_days)
-    
-    bids_category = _process_bucket(df_clean[mask_category], config, 
-                                     min_clicks=config.get("MIN_CLICKS_CATEGORY", 10), 
-                                     bucket_name="Category",
-                                     universal_median_roas=universal_median_roas,
-                                     data_days=data_days)
+    bids_exact = process(mask_exact, config.get("MIN_CLICKS_EXACT", 5), "Exact")
+    bids_pt = process(mask_pt, config.get("MIN_CLICKS_PT", 5), "Product Targeting")
+    bids_agg = process(mask_broad_phrase, config.get("MIN_CLICKS_BROAD", 10), "Broad/Phrase")
+    bids_auto = process(mask_auto, config.get("MIN_CLICKS_AUTO", 10), "Auto")
+    bids_category = process(mask_category, config.get("MIN_CLICKS_CATEGORY", 10), "Category")
     
     # Combine auto and category for backwards compatibility (displayed as "Auto/Category")
     bids_auto_combined = pd.concat([bids_auto, bids_category], ignore_index=True) if not bids_category.empty else bids_auto
@@ -197,11 +138,15 @@ def calculate_bid_optimizations(
         st.session_state["consolidation_negatives"] = []
     
     # Apply deduplication to exact and PT buckets (most common for duplicates)
-    bids_exact = deduplicate_bucket(bids_exact, "Exact")
-    bids_pt = deduplicate_bucket(bids_pt, "PT")
+    # (which rows survive depends only on Targeting/ROAS, so the plan is cached with the aggregates)
+    bids_exact = deduplicate_bucket(bids_exact, "Exact", plan=cache(
+        "bid_dedupe", lambda: _dedupe_plan(bids_exact), "Exact", exclusion_key))
+    bids_pt = deduplicate_bucket(bids_pt, "PT", plan=cache(
+        "bid_dedupe", lambda: _dedupe_plan(bids_pt), "PT", exclusion_key))
     
     # FINAL ENRICHMENT: Ensure IDs are present for Bulk Export
-    bulk = DataHub().get_data('bulk_id_mapping')
+    # (one shared index, so the bulk file is normalized once for all four buckets)
+    bulk = DataHub().get_bulk_id_index()
     
     bids_exact = enrich_with_ids(bids_exact, bulk)
     bids_pt = enrich_with_ids(bids_pt, bulk)
@@ -211,13 +156,45 @@ def calculate_bid_optimizations(
     return bids_exact, bids_pt, bids_agg, bids_auto_combined
 
 
+def _excluded_mask(keys: pd.DataFrame, harvested_terms: Set[str],
+                   negative_terms: Set[Tuple[str, str, str]]) -> np.ndarray:
+    """
+    Rows to drop before bidding: the search term OR targeting is harvested, or
+    (campaign, ad group, search term / targeting) is a negative.
+    """
+    cst = keys["cst_norm"]
+    targeting = keys["targeting_norm"]
+    
+    # Check Harvest - if EITHER column matches harvested terms, exclude
+    excluded = (cst.isin(harvested_terms) | targeting.isin(harvested_terms)).to_numpy()
+    
+    # Check Negatives (Campaign, AdGroup, Term) against both CST and Targeting
+    neg_keys = [k for k in negative_terms if all(isinstance(v, str) for v in k)]
+    if neg_keys:
+        negatives = pd.MultiIndex.from_tuples(neg_keys)
+        for term in (cst, targeting):
+            row_keys = pd.MultiIndex.from_arrays([keys["campaign_key"], keys["ad_group_key"], term])
+            excluded |= row_keys.isin(negatives)
+    return excluded
+
+
 def _process_bucket(segment_df: pd.DataFrame, config: dict, min_clicks: int, bucket_name: str, universal_median_roas: float, data_days: int = 7) -> pd.DataFrame:
     """Unified bucket processor with Bucket Median ROAS classification."""
+    return _classify_bucket(_aggregate_bucket(segment_df, bucket_name), config, min_clicks, bucket_name,
+                            universal_median_roas, data_days)
+
+
+def _aggregate_bucket(segment_df: pd.DataFrame, bucket_name: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Threshold-independent half of _process_bucket: per-target aggregates (with ROAS) and
+    ad group totals. Returns None for an empty segment.
+    """
     if segment_df.empty:
-        return pd.DataFrame()
+        return None
     
     segment_df = segment_df.copy()
-    segment_df["_targeting_norm"] = segment_df["Targeting"].astype(str).str.strip().str.lower()
+    if "_targeting_norm" not in segment_df.columns:
+        segment_df["_targeting_norm"] = segment_df["Targeting"].astype(str).str.strip().str.lower()
     
     has_keyword_id = "KeywordId" in segment_df.columns and segment_df["KeywordId"].notna().any()
     has_targeting_id = "TargetingId" in segment_df.columns and segment_df["TargetingId"].notna().any()
@@ -231,11 +208,13 @@ def _process_bucket(segment_df: pd.DataFrame, config: dict, min_clicks: int, buc
         # This preserves targeting type while avoiding individual ASIN grouping
         segment_df["_group_key"] = segment_df["_targeting_norm"]
     elif has_keyword_id or has_targeting_id:
-        # For keywords/PT: use IDs for grouping
-        segment_df["_group_key"] = segment_df.apply(
-            lambda r: str(r.get("KeywordId") or r.get("TargetingId") or r["_targeting_norm"]).strip(),
-            axis=1
-        )
+        # For keywords/PT: use IDs for grouping (KeywordId → TargetingId → targeting text)
+        group_key = segment_df["_targeting_norm"]
+        for id_col in ("TargetingId", "KeywordId"):
+            if id_col in segment_df.columns:
+                ids = segment_df[id_col].astype(object)
+                group_key = ids.where(_is_truthy(ids), group_key)
+        segment_df["_group_key"] = group_key.astype(str).str.strip()
     else:
         # Fallback: use normalized targeting text
         segment_df["_group_key"] = segment_df["_targeting_norm"]
@@ -260,6 +239,23 @@ def _process_bucket(segment_df: pd.DataFrame, config: dict, min_clicks: int, buc
     grouped = grouped.drop(columns=["_group_key"], errors="ignore")
     grouped["ROAS"] = np.where(grouped["Spend"] > 0, grouped["Sales"] / grouped["Spend"], 0)
     
+    adgroup_stats = grouped.groupby(["Campaign Name", "Ad Group Name"]).agg({
+        "Clicks": "sum", "Spend": "sum", "Sales": "sum", "Orders": "sum"
+    }).reset_index()
+    adgroup_stats["AG_ROAS"] = np.where(adgroup_stats["Spend"] > 0, adgroup_stats["Sales"] / adgroup_stats["Spend"], 0)
+    adgroup_stats["AG_Clicks"] = adgroup_stats["Clicks"]
+    return grouped, adgroup_stats
+
+
+def _classify_bucket(aggregated: Optional[Tuple[pd.DataFrame, pd.DataFrame]], config: dict, min_clicks: int,
+                     bucket_name: str, universal_median_roas: float, data_days: int = 7) -> pd.DataFrame:
+    """Threshold-dependent half of _process_bucket: baseline, bid decisions and recommendations."""
+    if aggregated is None:
+        return pd.DataFrame()
+    
+    grouped, adgroup_stats = aggregated
+    grouped = grouped.copy()  # aggregates may be shared across runs
+    
     # Calculate bucket ROAS using spend-weighted average (Total Sales / Total Spend)
     bucket_with_spend = grouped[grouped["Spend"] > 0]
     bucket_sample_size = len(bucket_with_spend)
@@ -293,66 +289,10 @@ def _process_bucket(segment_df: pd.DataFrame, config: dict, min_clicks: int, buc
     
     print(f"[{bucket_name}] Baseline: {baseline_roas:.2f}x ({baseline_source})")
     
-    adgroup_stats = grouped.groupby(["Campaign Name", "Ad Group Name"]).agg({
-        "Clicks": "sum", "Spend": "sum", "Sales": "sum", "Orders": "sum"
-    }).reset_index()
-    adgroup_stats["AG_ROAS"] = np.where(adgroup_stats["Spend"] > 0, adgroup_stats["Sales"] / adgroup_stats["Spend"], 0)
-    adgroup_stats["AG_Clicks"] = adgroup_stats["Clicks"]
-    adgroup_lookup = adgroup_stats.set_index(["Campaign Name", "Ad Group Name"])[["AG_ROAS", "AG_Clicks"]].to_dict('index')
-    
-    alpha = config.get("ALPHA", config.get("ALPHA_EXACT", 0.20))
-    if "Broad" in bucket_name or "Auto" in bucket_name:
-        alpha = config.get("ALPHA_BROAD", alpha * 0.8)
-    
-    # VISIBILITY BOOST CONFIG
-    VISIBILITY_BOOST_MIN_DAYS = 14  # Need at least 2 weeks of data
-    VISIBILITY_BOOST_MAX_IMPRESSIONS = 100  # Below this = not winning auctions
-    VISIBILITY_BOOST_PCT = 0.30  # 30% boost
-    VISIBILITY_BOOST_ELIGIBLE_TYPES = {"exact", "phrase", "broad", "close-match"}  # Only these get boosted
-    
-    def apply_optimization(r):
-        clicks = r["Clicks"]
-        impressions = r.get("Impressions", 0)
-        roas = r["ROAS"]
-        targeting = str(r.get("Targeting", "")).strip().lower()
-        match_type = str(r.get("Match Type", "")).strip().lower()
-        
-        # Priority: Bid (from bulk) → Ad Group Default Bid (from bulk) → CPC (from STR)
-        base_bid = float(
-            r.get("Bid") if pd.notna(r.get("Bid")) and r.get("Bid") > 0 else
-            r.get("Ad Group Default Bid") if pd.notna(r.get("Ad Group Default Bid")) and r.get("Ad Group Default Bid") > 0 else
-            r.get("Current Bid", 0) or r.get("CPC", 0) or 0
-        )
-        
-        if base_bid <= 0:
-            return 0.0, "Hold: No Bid/CPC Data", "Hold (No Data)"
-        
-        # VISIBILITY BOOST
-        is_eligible_for_boost = (
-            match_type in VISIBILITY_BOOST_ELIGIBLE_TYPES or
-            targeting in VISIBILITY_BOOST_ELIGIBLE_TYPES
-        )
-        
-        if (is_eligible_for_boost and 
-            data_days >= VISIBILITY_BOOST_MIN_DAYS and 
-            impressions < VISIBILITY_BOOST_MAX_IMPRESSIONS):
-            new_bid = round(base_bid * (1 + VISIBILITY_BOOST_PCT), 2)
-            return new_bid, f"Visibility Boost: Only {impressions} impressions in {data_days} days", "Visibility Boost (+30%)"
-        
-        if clicks >= min_clicks and roas > 0:
-            return _classify_and_bid(roas, baseline_roas, base_bid, alpha, f"targeting|{bucket_name}", config)
-        
-        ag_key = (r["Campaign Name"], r.get("Ad Group Name", ""))
-        ag_stats = adgroup_lookup.get(ag_key, {})
-        if ag_stats.get("AG_Clicks", 0) >= min_clicks and ag_stats.get("AG_ROAS", 0) > 0:
-            return _classify_and_bid(ag_stats["AG_ROAS"], baseline_roas, base_bid, alpha * 0.5, f"adgroup|{bucket_name}", config)
-        
-        return base_bid, f"Hold: Insufficient data ({clicks} clicks)", "Hold (Insufficient Data)"
-    
-    opt_results = grouped.apply(apply_optimization, axis=1)
-    grouped["New Bid"] = opt_results.apply(lambda x: x[0])
-    grouped["Reason"] = opt_results.apply(lambda x: x[1])
-    grouped["Decision_Basis"] = opt_results.apply(lambda x: x[2])
+    new_bid, reason, decision = _compute_bids(grouped, adgroup_stats, config, min_clicks, data_days)
+    grouped["New Bid"] = new_bid
+    grouped["Reason"] = reason
+    grouped["Decision_Basis"] = decision
     grouped["Bucket"] = bucket_name
     
     # SYNC: Create recommendation objects for validation
@@ -395,11 +335,89 @@ def _process_bucket(segment_df: pd.DataFrame, config: dict, min_clicks: int, buc
                 # If validation fails, just return None, don't crash
                 return None
             
-        grouped['recommendation'] = grouped.apply(create_bid_rec, axis=1)
+        rec_cols = [c for c in REC_COLUMNS if c in grouped.columns]
+        grouped['recommendation'] = [create_bid_rec(row) for row in grouped[rec_cols].to_dict('records')]
     
     return grouped
 
 
+def _compute_bids(grouped: pd.DataFrame, adgroup_stats: pd.DataFrame, config: dict,
+                  min_clicks: int, data_days: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Columnar bid decision for every aggregated target in a bucket.
+    
+    Decision priority per row:
+    1. No bid source → Hold (No Data)
+    2. Visibility boost (eligible type, enough days, starved of impressions)
+    3. Target-level ROAS classification (enough clicks, ROAS > 0)
+    4. Ad group-level ROAS classification
+    5. Hold (Insufficient Data)
+    
+    Returns (New Bid, Reason, Decision_Basis) arrays aligned with grouped.
+    """
+    n = len(grouped)
+    
+    # Priority: Bid (from bulk) → Ad Group Default Bid (from bulk) → Current Bid / CPC (from STR)
+    # Lowest priority first; each higher source overrides where it applies.
+    base = pd.Series(0.0, index=grouped.index, dtype=object)
+    for col in ("CPC", "Current Bid"):
+        if col in grouped.columns:
+            base = grouped[col].astype(object).where(_is_truthy(grouped[col]), base)
+    for col in ("Ad Group Default Bid", "Bid"):
+        if col in grouped.columns:
+            base = grouped[col].where(grouped[col].notna() & (grouped[col] > 0), base)
+    base_bid = base.to_numpy(dtype=float)
+    
+    clicks = grouped["Clicks"]
+    impressions = grouped["Impressions"] if "Impressions" in grouped.columns else pd.Series(0, index=grouped.index)
+    roas = grouped["ROAS"].to_numpy(dtype=float)
+    
+    def _boost_type(col: str) -> np.ndarray:
+        # Normalize each distinct value once instead of every row
+        if col not in grouped.columns:
+            return np.zeros(n, dtype=bool)
+        codes, uniques = pd.factorize(grouped[col].astype(object), use_na_sentinel=False)
+        eligible_uniques = pd.Series(uniques, dtype=object).astype(str).str.strip().str.lower().isin(VISIBILITY_BOOST_ELIGIBLE_TYPES)
+        return eligible_uniques.to_numpy()[codes]
+    
+    ag = grouped[["Campaign Name", "Ad Group Name"]].merge(
+        adgroup_stats[["Campaign Name", "Ad Group Name", "AG_ROAS", "AG_Clicks"]],
+        on=["Campaign Name", "Ad Group Name"], how="left"
+    )
+    ag_roas = ag["AG_ROAS"].fillna(0).to_numpy(dtype=float)
+    ag_clicks = ag["AG_Clicks"].fillna(0).to_numpy()
+    
+    no_data = base_bid <= 0
+    eligible = _boost_type("Match Type") | _boost_type("Targeting")
+    boost = ~no_data & eligible & (data_days >= VISIBILITY_BOOST_MIN_DAYS) & (impressions < VISIBILITY_BOOST_MAX_IMPRESSIONS).to_numpy()
+    direct = ~no_data & ~boost & (clicks >= min_clicks).to_numpy() & (roas > 0)
+    adgroup = ~no_data & ~boost & ~direct & (ag_clicks >= min_clicks) & (ag_roas > 0)
+    hold = ~no_data & ~boost & ~direct & ~adgroup
+    
+    new_bid = np.zeros(n, dtype=float)
+    reason = np.full(n, "Hold: No Bid/CPC Data", dtype=object)
+    decision = np.full(n, "Hold (No Data)", dtype=object)
+    
+    if boost.any():
+        # Python round() (not np.round) so half-cent cases round exactly as before
+        new_bid[boost] = [round(b * (1 + VISIBILITY_BOOST_PCT), 2) for b in base_bid[boost].tolist()]
+        reason[boost] = ("Visibility Boost: Only " + impressions[boost].astype(str) + f" impressions in {data_days} days").to_numpy()
+        decision[boost] = "Visibility Boost (+30%)"
+    
+    for mask, source_roas in ((direct, roas), (adgroup, ag_roas)):
+        if mask.any():
+            new_bid[mask], reason[mask], decision[mask] = _classify_and_bid_vectorized(
+                source_roas[mask], base_bid[mask], config
+            )
+    
+    if hold.any():
+        new_bid[hold] = base_bid[hold]
+        reason[hold] = ("Hold: Insufficient data (" + clicks[hold].astype(str) + " clicks)").to_numpy()
+        decision[hold] = "Hold (Insufficient Data)"
+    
+    return new_bid, reason, decision
+
+
 def _classify_and_bid(roas: float, median_roas: float, base_bid: float, alpha: float, 
                       data_source: str, config: dict) -> Tuple[float, str, str]:
     """
@@ -459,68 +477,124 @@ def _classify_and_bid(roas: float, median_roas: float, base_bid: float, alpha: f
     
     return new_bid, reason, action
 
-def deduplicate_bucket(bids_df, bucket_name):
-    """Deduplicate keywords that appear in multiple campaigns within the same bucket."""
+
+def _classify_and_bid_vectorized(roas: np.ndarray, base_bid: np.ndarray,
+                                 config: dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Array form of _classify_and_bid: same formula, caps, limits and reason text."""
+    target_roas = config.get("TARGET_ROAS", 2.5)
+    up_throttle = config.get("BID_UP_THROTTLE", 0.50)
+    down_throttle = config.get("BID_DOWN_THROTTLE", 0.50)
+    max_change_pct = config.get("MAX_BID_CHANGE", 0.25)
+    
+    gap = (roas / target_roas) - 1
+    up = gap > 0
+    down = gap < 0
+    
+    new_bid = np.where(up, base_bid * (1 + gap * up_throttle),
+                       np.where(down, base_bid * (1 + gap * down_throttle), base_bid))
+    
+    # Reason text is only formatted for the rows that take each branch
+    roas_txt = np.char.mod("%.2f", roas).astype(object)
+    reason = np.empty(len(roas), dtype=object)
+    stable = ~up & ~down
+    reason[stable] = "Stable: ROAS " + roas_txt[stable] + " matches Target"
+    for mask, label, sign, throttle in ((up, "Promote", "+", up_throttle), (down, "Bid Down", "", down_throttle)):
+        if mask.any():
+            gap_txt = np.char.mod("%.1f%%", gap[mask] * 100).astype(object)  # same as f"{gap:.1%}"
+            reason[mask] = f"{label}: ROAS " + roas_txt[mask] + f" (Gap {sign}" + gap_txt + f") × {throttle} Throttle"
+    action = np.where(up, "promote", np.where(down, "bid_down", "stable")).astype(object)
+    
+    # Cap Step Size (Per Run Safety Logic)
+    max_allowed_step = base_bid * (1 + max_change_pct)
+    min_allowed_step = base_bid * (1 - max_change_pct)
+    capped = (new_bid > base_bid) & (new_bid > max_allowed_step)
+    floored = (new_bid < base_bid) & (new_bid < min_allowed_step)
+    new_bid = np.where(capped, max_allowed_step, np.where(floored, min_allowed_step, new_bid))
+    reason[capped] += f" [Capped +{max_change_pct:.0%}]"
+    reason[floored] += f" [Floored -{max_change_pct:.0%}]"
+    
+    # Global Limits (Floor/Ceiling) - fmax matches max() when base_bid is NaN
+    min_bid_limit = np.fmax(BID_LIMITS["MIN_BID_FLOOR"], base_bid * BID_LIMITS["MIN_BID_MULTIPLIER"])
+    max_bid_limit = base_bid * BID_LIMITS["MAX_BID_MULTIPLIER"]
+    
+    return np.clip(new_bid, min_bid_limit, max_bid_limit), reason, action
+
+
+def deduplicate_bucket(bids_df, bucket_name, plan=None):
+    """
+    Deduplicate keywords that appear in multiple campaigns within the same bucket.
+    `plan` is a precomputed _dedupe_plan(bids_df) (it only depends on Targeting and ROAS).
+    """
     if bids_df.empty:
         return bids_df
     
+    if plan is None:
+        plan = _dedupe_plan(bids_df)
+    if plan is None:
+        return bids_df.copy()
+    keep_rows, is_winner, consolidation_negatives = plan
+    
+    # Store consolidation negatives in session state for the negatives tab
+    if consolidation_negatives:
+        existing = st.session_state.get("consolidation_negatives", [])
+        st.session_state["consolidation_negatives"] = existing + [dict(neg) for neg in consolidation_negatives]
+    
+    # Keep only winners (highest ROAS for each duplicate group) + all non-duplicates
+    result = bids_df.iloc[keep_rows].reset_index(drop=True)
+    result.loc[is_winner, "Reason"] = result.loc[is_winner, "Reason"].astype(str) + " [Best ROAS among duplicates]"
+    return result
+
+
+def _dedupe_plan(bids_df):
+    """
+    Rows deduplicate_bucket keeps and the consolidation negatives it flags.
+    
+    Returns None when there are no duplicates, else (keep_rows, is_winner, consolidation_negatives):
+    positions of all non-duplicates followed by the best-ROAS row of each duplicate group,
+    a mask of those winners, and one consolidation negative per losing row.
+    """
+    if bids_df.empty:
+        return None
+    
     # Normalize targeting for comparison
-    bids_df = bids_df.copy()
-    bids_df["_target_norm"] = bids_df["Targeting"].astype(str).str.strip().str.lower()
+    target_norm = bids_df["Targeting"].astype(str).str.strip().str.lower()
     
     # Find duplicates (same keyword in different campaigns)
-    dup_mask = bids_df.duplicated(subset=["_target_norm"], keep=False)
+    dup_mask = target_norm.duplicated(keep=False).to_numpy()
     
     if not dup_mask.any():
-        bids_df.drop(columns=["_target_norm"], inplace=True)
-        return bids_df
+        return None
+    
+    campaigns = bids_df["Campaign Name"].tolist()
+    ad_groups = bids_df["Ad Group Name"].tolist() if "Ad Group Name" in bids_df.columns else [""] * len(bids_df)
+    targets = bids_df["Targeting"].tolist()
+    roas = bids_df["ROAS"].tolist()
     
     # For each duplicate group, keep highest ROAS, flag others
+    dups = pd.DataFrame({"_target_norm": target_norm.to_numpy()[dup_mask], "ROAS": bids_df["ROAS"].to_numpy()[dup_mask],
+                         "_pos": np.flatnonzero(dup_mask)})
+    winners = []
     consolidation_negatives = []
-    
-    for target, group in bids_df[dup_mask].groupby("_target_norm"):
-        if len(group) <= 1:
-            continue
-        
+    for target, group in dups.groupby("_target_norm"):
         # Sort by ROAS descending
-        sorted_group = group.sort_values("ROAS", ascending=False)
-        winner = sorted_group.iloc[0]
-        losers = sorted_group.iloc[1:]
+        order = group.sort_values("ROAS", ascending=False)["_pos"].tolist()
+        winner = order[0]
+        winners.append(winner)
         
         # Flag losers for consolidation negative
-        for _, loser in losers.iterrows():
+        for loser in order[1:]:
             consolidation_negatives.append({
                 "Type": "Consolidation",
-                "Campaign Name": loser["Campaign Name"],
-                "Ad Group Name": loser.get("Ad Group Name", ""),
-                "Term": loser["Targeting"],
-                "Is_ASIN": is_asin(str(loser["Targeting"])),
-                "Winner_Campaign": winner["Campaign Name"],
-                "Winner_ROAS": winner["ROAS"],
-                "Loser_ROAS": loser["ROAS"],
-                "Reason": f"Consolidation: Same keyword exists in {winner['Campaign Name']} with higher ROAS ({winner['ROAS']:.2f} vs {loser['ROAS']:.2f})"
+                "Campaign Name": campaigns[loser],
+                "Ad Group Name": ad_groups[loser],
+                "Term": targets[loser],
+                "Is_ASIN": is_asin(str(targets[loser])),
+                "Winner_Campaign": campaigns[winner],
+                "Winner_ROAS": roas[winner],
+                "Loser_ROAS": roas[loser],
+                "Reason": f"Consolidation: Same keyword exists in {campaigns[winner]} with higher ROAS ({roas[winner]:.2f} vs {roas[loser]:.2f})"
             })
     
-    # Store consolidation negatives in session state for the negatives tab
-    if consolidation_negatives:
-        existing = st.session_state.get("consolidation_negatives", [])
-        st.session_state["consolidation_negatives"] = existing + consolidation_negatives
-    
-    # Keep only winners (highest ROAS for each duplicate group) + all non-duplicates
-    non_dups = bids_df[~dup_mask].copy()
-    
-    winners = []
-    for target, group in bids_df[dup_mask].groupby("_target_norm"):
-        winner_row = group.sort_values("ROAS", ascending=False).iloc[0:1]
-        winner_row = winner_row.copy()
-        winner_row["Reason"] = winner_row["Reason"].astype(str) + " [Best ROAS among duplicates]"
-        winners.append(winner_row)
-    
-    if winners:
-        winners_df = pd.concat(winners, ignore_index=True)
-        result = pd.concat([non_dups, winners_df], ignore_index=True)
-    else:
-        result = non_dups
-    
-    result.drop(columns=["_target_norm"], inplace=True, errors="ignore")
-    return result
+    keep_rows = np.concatenate([np.flatnonzero(~dup_mask), np.array(winners, dtype=int)])
+    is_winner = np.arange(len(keep_rows)) >= (~dup_mask).sum()
+    return keep_rows, is_winner, consolidation_negatives
@@ -8,13 +8,14 @@ import numpy as np
 import streamlit as st
 from utils.matchers import ExactMatcher
 from features.optimizer.core import calculate_account_benchmarks, DEFAULT_CONFIG
-from features.bulk_export import strip_targeting_prefix
+from features.optimizer.feature_frame import FeatureFrame, cache_for, feature_keys
 
 def identify_harvest_candidates(
     df: pd.DataFrame, 
     config: dict, 
     matcher: ExactMatcher,
-    account_benchmarks: dict = None
+    account_benchmarks: dict = None,
+    features: FeatureFrame = None
 ) -> pd.DataFrame:
     """
     Identify high-performing search terms to harvest as exact match keywords.
@@ -24,95 +25,43 @@ def identify_harvest_candidates(
     - Uses BUCKET median ROAS (not campaign ROAS) for consistent baseline
     - Uses CVR-based dynamic min orders
     - Winner score: Sales + ROAS×5 (reduced from ×10)
+    
+    `features` (build_feature_frame) supplies precomputed masks and prefix-stripped terms.
     """
     
     # Use benchmarks if provided
     if account_benchmarks is None:
-        account_benchmarks = calculate_account_benchmarks(df, config)
+        account_benchmarks = features.benchmarks if features is not None else calculate_account_benchmarks(df, config)
     
     universal_median_roas = account_benchmarks.get('universal_median_roas', config.get("TARGET_ROAS", 2.5))
     
     # Use dynamic min orders from CVR analysis
     min_orders_threshold = account_benchmarks.get('harvest_min_orders', config["HARVEST_ORDERS"])
     
-    # Filter for discovery campaigns (non-exact, non-PT)
-    # Exclude: exact match types, PT campaigns, and harvest destination campaigns
-    harvest_dest_pattern = r'harvestexact|harvest_exact|_exact_|exactmatch'
-    
-    # Discovery = non-exact match type AND not a harvest destination campaign
-    discovery_mask = (
-        (~df["Match Type"].str.contains("exact", case=False, na=False)) &
-        (~df["Match Type"].str.upper().isin(["PT", "PRODUCT TARGETING"])) &
-        (~df["Campaign Name"].str.contains(harvest_dest_pattern, case=False, na=False))
-    )
-    discovery_df = df[discovery_mask].copy()
-    
-    if discovery_df.empty:
-        return pd.DataFrame(columns=["Harvest_Term", "Campaign Name", "Ad Group Name", "ROAS", "Spend", "Sales", "Orders"])
-    
-    # CRITICAL: Use Customer Search Term for harvest (actual user queries)
-    # NOT Targeting (which contains targeting expressions like close-match, category=, etc.)
-    harvest_column = "Customer Search Term" if "Customer Search Term" in discovery_df.columns else "Targeting"
+    keys = feature_keys(df, features)
+    cache = cache_for(df, features)
     
-    # PT PREFIX STRIPPING: Strip asin= and asin-expanded= prefixes so clean ASINs can be harvested
-    discovery_df[harvest_column] = discovery_df[harvest_column].apply(strip_targeting_prefix)
+    # Term aggregates and winner rows don't depend on any threshold - reused across what-if reruns
+    grouped, winner_rows, discovery_rows = cache("harvest_groups", lambda: _harvest_term_groups(df, keys))
     
-    # CRITICAL: Filter OUT targeting expressions that are NOT actual search queries
-    # NOTE: asin= and asin-expanded= are now ALLOWED after prefix stripping
-    targeting_expression_patterns = [
-        r'^close-match$', r'^loose-match$', r'^substitutes$', r'^complements$', r'^auto$',
-        r'^category=', r'^keyword-group=',  # PT (asin=) now allowed
-    ]
-    
-    # Create mask for rows that are actual search queries (not targeting expressions)
-    is_actual_search_query = ~discovery_df[harvest_column].str.lower().str.strip().str.match(
-        '|'.join(targeting_expression_patterns), na=False
-    )
-    
-    # Filter to only actual search queries
-    discovery_df = discovery_df[is_actual_search_query].copy()
-    
-    if discovery_df.empty:
+    if grouped is None:
         return pd.DataFrame(columns=["Harvest_Term", "Campaign Name", "Ad Group Name", "ROAS", "Spend", "Sales", "Orders"])
     
-    # Aggregate by Customer Search Term for harvest
-    agg_cols = {
-        "Impressions": "sum", "Clicks": "sum", "Spend": "sum",
-        "Sales": "sum", "Orders": "sum", "CPC": "mean"
-    }
-    
-    # Also keep Targeting for reference
-    if "Targeting" in discovery_df.columns and harvest_column != "Targeting":
-        agg_cols["Targeting"] = "first"
-    
-    grouped = discovery_df.groupby(harvest_column, as_index=False).agg(agg_cols)
-    grouped["ROAS"] = np.where(grouped["Spend"] > 0, grouped["Sales"] / grouped["Spend"], 0)
-    
-    # Rename to Harvest_Term for consistency
-    grouped = grouped.rename(columns={harvest_column: "Harvest_Term"})
-    grouped["Customer Search Term"] = grouped["Harvest_Term"]
-    
-    # CHANGE #3: Winner selection score rebalanced (ROAS×5 instead of ×10)
-    # Get metadata from BEST performing instance (winner selection)
-    # Rank by Sales (primary), then ROAS (secondary)
-    discovery_df["_perf_score"] = discovery_df["Sales"] + (discovery_df["ROAS"] * 5)
-    discovery_df["_rank"] = discovery_df.groupby("Customer Search Term")["_perf_score"].rank(
-        method="first", ascending=False
-    )
-    
     # Build metadata columns list
     meta_cols = ["Customer Search Term", "Campaign Name", "Ad Group Name", "Campaign_ROAS"]
-    if "CampaignId" in discovery_df.columns:
+    if "CampaignId" in df.columns:
         meta_cols.append("CampaignId")
-    if "AdGroupId" in discovery_df.columns:
+    if "AdGroupId" in df.columns:
         meta_cols.append("AdGroupId")
-    if "SKU_advertised" in discovery_df.columns:
+    if "SKU_advertised" in df.columns:
         meta_cols.append("SKU_advertised")
-    if "ASIN_advertised" in discovery_df.columns:
+    if "ASIN_advertised" in df.columns:
         meta_cols.append("ASIN_advertised")
     
-    # Get winner row for each Customer Search Term value
-    meta_df = discovery_df[discovery_df["_rank"] == 1][meta_cols].drop_duplicates("Customer Search Term")
+    # Get winner row for each Customer Search Term value (Campaign_ROAS read from the current frame)
+    meta_df = df.iloc[winner_rows][meta_cols].copy()
+    meta_df["Customer Search Term"] = keys["harvest_term"].to_numpy()[winner_rows]
+    meta_df = meta_df.drop_duplicates("Customer Search Term")
     merged = pd.merge(grouped, meta_df, on="Customer Search Term", how="left")
     
     # Ensure Customer Search Term column exists for downstream compatibility
@@ -151,18 +100,17 @@ def identify_harvest_candidates(
     
     # Apply harvest thresholds (Tier 2)
     # High-ROAS term exception
-    def calculate_roas_threshold(row):
-        term_roas = row["ROAS"]
-        if term_roas >= universal_median_roas:
-            return term_roas >= (universal_median_roas * config["HARVEST_ROAS_MULT"])
-        else:
-            return term_roas >= (baseline_roas * config["HARVEST_ROAS_MULT"])
+    term_roas = merged["ROAS"]
+    pass_roas = pd.Series(np.where(
+        term_roas >= universal_median_roas,
+        term_roas >= (universal_median_roas * config["HARVEST_ROAS_MULT"]),
+        term_roas >= (baseline_roas * config["HARVEST_ROAS_MULT"])
+    ), index=merged.index)
 
     # Individual threshold checks for debugging
     pass_clicks = merged["Clicks"] >= config["HARVEST_CLICKS"]
     pass_orders = merged["Orders"] >= min_orders_threshold  # CHANGE #5: CVR-based dynamic threshold
     # pass_sales = merged["Sales"] >= config["HARVEST_SALES"]  # REMOVED: Currency threshold doesn't work across geos
-    pass_roas = merged.apply(calculate_roas_threshold, axis=1)
     
     # Currency-based threshold (HARVEST_SALES) removed - only clicks, orders, ROAS matter
     harvest_mask = pass_clicks & pass_orders & pass_roas
@@ -171,7 +119,7 @@ def identify_harvest_candidates(
     
     # DEBUG: Show why terms fail
     print(f"\n=== HARVEST DEBUG ===")
-    print(f"Discovery rows: {len(discovery_df)}")
+    print(f"Discovery rows: {discovery_rows}")
     print(f"Grouped search terms: {len(grouped)}")
     print(f"Threshold config: Clicks>={config['HARVEST_CLICKS']}, Orders>={min_orders_threshold} (CVR-based), ROAS>{config['HARVEST_ROAS_MULT']}x bucket median")
     print(f"Pass clicks: {pass_clicks.sum()}, Pass orders: {pass_orders.sum()}, Pass ROAS: {pass_roas.sum()}")
@@ -183,21 +131,15 @@ def identify_harvest_candidates(
             print(f"  - '{r['Customer Search Term']}': {r['Clicks']} clicks, {r['Orders']} orders, ${r['Sales']:.2f} sales")
     
     # Dedupe against existing exact keywords
-    survivors = []
-    deduped = []
-    for _, row in candidates.iterrows():
-        matched, match_info = matcher.find_match(row["Customer Search Term"], config["DEDUPE_SIMILARITY"])
-        if not matched:
-            survivors.append(row)
-        else:
-            deduped.append((row["Customer Search Term"], match_info))
+    matches = matcher.find_matches(candidates["Customer Search Term"], config["DEDUPE_SIMILARITY"])
+    is_new = np.array([not matched for matched, _ in matches], dtype=bool)
     
     print(f"\\nDedupe results:")
-    print(f"  - Survivors (new harvest): {len(survivors)}")
-    print(f"  - Deduped (already exist): {len(deduped)}")
+    print(f"  - Survivors (new harvest): {int(is_new.sum())}")
+    print(f"  - Deduped (already exist): {int((~is_new).sum())}")
     print(f"=== END HARVEST DEBUG ===\\n")
     
-    survivors_df = pd.DataFrame(survivors)
+    survivors_df = candidates[is_new].copy()
     
     if not survivors_df.empty:
         # Calculate New Bid using priority: Bid → Ad Group Default Bid → Current Bid → CPC
@@ -217,3 +159,55 @@ def identify_harvest_candidates(
         survivors_df = survivors_df.sort_values("Sales", ascending=False)
     
     return survivors_df
+
+
+def _harvest_term_groups(df: pd.DataFrame, keys: pd.DataFrame):
+    """
+    Threshold-independent harvest aggregates.
+    
+    Returns (grouped, winner_rows, discovery_rows): per-term metrics (None when there are
+    no discovery rows), positions in df of each term's best performing row, and the
+    number of discovery rows.
+    """
+    # Filter for discovery campaigns (non-exact, non-PT)
+    # Discovery = non-exact match type AND not a PT / harvest destination campaign
+    # CRITICAL: Filter OUT targeting expressions that are NOT actual search queries
+    # NOTE: asin= and asin-expanded= are ALLOWED after prefix stripping
+    discovery_mask = (keys["is_discovery"] & keys["is_search_query"]).to_numpy()
+    discovery_df = df[discovery_mask].copy()
+    
+    if discovery_df.empty:
+        return None, np.array([], dtype=int), 0
+    
+    # CRITICAL: Use Customer Search Term for harvest (actual user queries)
+    # NOT Targeting (which contains targeting expressions like close-match, category=, etc.)
+    harvest_column = "Customer Search Term" if "Customer Search Term" in discovery_df.columns else "Targeting"
+    
+    # PT PREFIX STRIPPING: asin= and asin-expanded= prefixes stripped so clean ASINs can be harvested
+    discovery_df[harvest_column] = keys["harvest_term"].to_numpy()[discovery_mask]
+    
+    # Aggregate by Customer Search Term for harvest
+    agg_cols = {
+        "Impressions": "sum", "Clicks": "sum", "Spend": "sum",
+        "Sales": "sum", "Orders": "sum", "CPC": "mean"
+    }
+    
+    # Also keep Targeting for reference
+    if "Targeting" in discovery_df.columns and harvest_column != "Targeting":
+        agg_cols["Targeting"] = "first"
+    
+    grouped = discovery_df.groupby(harvest_column, as_index=False).agg(agg_cols)
+    grouped["ROAS"] = np.where(grouped["Spend"] > 0, grouped["Sales"] / grouped["Spend"], 0)
+    
+    # Rename to Harvest_Term for consistency
+    grouped = grouped.rename(columns={harvest_column: "Harvest_Term"})
+    grouped["Customer Search Term"] = grouped["Harvest_Term"]
+    
+    # CHANGE #3: Winner selection score rebalanced (ROAS×5 instead of ×10)
+    # Get metadata from BEST performing instance (winner selection)
+    # Rank by Sales (primary), then ROAS (secondary)
+    perf_score = discovery_df["Sales"] + (discovery_df["ROAS"] * 5)
+    rank = perf_score.groupby(discovery_df["Customer Search Term"]).rank(method="first", ascending=False)
+    winner_rows = np.flatnonzero(discovery_mask)[(rank == 1).to_numpy()]
+    
+    return grouped, winner_rows, len(discovery_df)
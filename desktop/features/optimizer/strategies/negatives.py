@@ -8,8 +8,9 @@ import numpy as np
 import streamlit as st
 from typing import Tuple, Dict, Any, Optional, Set
 from features.optimizer.core import calculate_account_benchmarks
-from features.bulk_export import strip_targeting_prefix
+from features.optimizer.feature_frame import FeatureFrame, cache_for, feature_keys
 from core.data_hub import DataHub
+from core.id_index import BulkIdIndex
 from core.data_loader import is_asin
 from dev_resources.tests.bulk_validation_spec import (
     OptimizationRecommendation,
@@ -17,33 +18,28 @@ from dev_resources.tests.bulk_validation_spec import (
     validate_recommendation
 )
 
-def enrich_with_ids(df: pd.DataFrame, bulk: pd.DataFrame) -> pd.DataFrame:
+def enrich_with_ids(df: pd.DataFrame, bulk) -> pd.DataFrame:
     """
     Unified high-precision ID mapping helper.
     Matches by Campaign, Ad Group, and Targeting Text (Keyword/PT).
     Synchronizes OptimizationRecommendation objects.
+    
+    `bulk` may be the bulk DataFrame or a prebuilt BulkIdIndex
+    (DataHub.get_bulk_id_index) so repeated calls skip re-normalizing the bulk file.
     """
-    if df.empty or bulk is None or bulk.empty:
+    index = bulk if isinstance(bulk, BulkIdIndex) else BulkIdIndex(bulk)
+    if df.empty or index.empty:
         return df
-        
-    def normalize_for_mapping(series):
-        """
-        Normalize and strip prefixes for robust matching.
-        e.g., 'asin="B0123"' -> 'b0123', 'category="123"' -> '123'
-        """
-        s = series.astype(str).str.strip().str.lower()
-        # Remove common prefixes and quotes
-        s = s.str.replace(r'^(asin|category|asin-expanded|keyword-group)=', '', regex=True)
-        s = s.str.replace(r'^"', '', regex=True).str.replace(r'"$', '', regex=True)
-        # Final alphanumeric cleanup
-        return s.str.replace(r'[^a-z0-9]', '', regex=True)
-    
-    df = df.copy()
-    bulk = bulk.copy()
-    
-    # Normalize for mapping
-    df['_camp_norm'] = normalize_for_mapping(df['Campaign Name'])
-    df['_ag_norm'] = normalize_for_mapping(df.get('Ad Group Name', pd.Series([''] * len(df))))
+    
+    df = df.reset_index(drop=True)
+    n = len(df)
+    
+    # Normalize for mapping (distinct values only, resolved to index codes)
+    camp = index.encode(df['Campaign Name'], 'mapping')
+    if 'Ad Group Name' in df.columns:
+        ag = index.encode(df['Ad Group Name'], 'mapping')
+    else:
+        ag = index.encode_constant('', n, 'mapping')
     
     # Initialize ID columns if missing to avoid KeyError during resolution
     for col in ['KeywordId', 'TargetingId']:
@@ -52,102 +48,51 @@ def enrich_with_ids(df: pd.DataFrame, bulk: pd.DataFrame) -> pd.DataFrame:
     
     # For general targeting (Search Term or Targeting column)
     target_col = 'Term' if 'Term' in df.columns else 'Targeting'
-    df['_target_norm'] = normalize_for_mapping(df[target_col])
+    target = index.encode(df[target_col], 'mapping')
     
-    bulk['_camp_norm'] = normalize_for_mapping(bulk['Campaign Name'])
-    bulk['_ag_norm'] = normalize_for_mapping(bulk.get('Ad Group Name', pd.Series([''] * len(bulk))))
+    # Candidate ID frames in priority order
+    candidates = []
     
     # Precise Match 1: Keywords
     # CRITICAL: Include Match Type to distinguish phrase/exact versions of the same keyword
-    kw_col = next((c for c in ['Customer Search Term', 'Keyword Text', 'keyword_text'] if c in bulk.columns), None)
-    if kw_col:
-        bulk['_kw_norm'] = normalize_for_mapping(bulk[kw_col])
-        # Normalize Match Type for both df and bulk
-        df['_match_norm'] = df['Match Type'].astype(str).str.lower().str.strip() if 'Match Type' in df.columns else ''
-        bulk['_match_norm'] = bulk['Match Type'].astype(str).str.lower().str.strip() if 'Match Type' in bulk.columns else ''
-        
-        # STRICT LOOKUP: Include Match Type to prevent collision between phrase/exact/broad
-        # Use groupby().first() to ensure 1-to-1 mapping and prevent row explosion
-        kw_base = bulk[bulk['KeywordId'].notna() & (bulk['KeywordId'] != "") & (bulk['KeywordId'] != "nan")][
-            ['_camp_norm', '_ag_norm', '_kw_norm', '_match_norm', 'KeywordId', 'CampaignId', 'AdGroupId']
-        ]
-        kw_lookup = kw_base.groupby(['_camp_norm', '_ag_norm', '_kw_norm', '_match_norm']).first().reset_index()
+    kw_strict = index.optimizer_keyword_table(strict=True)
+    if kw_strict is not None:
+        if 'Match Type' in df.columns:
+            match = index.encode(df['Match Type'], 'match')
+        else:
+            match = index.encode_constant('', n, 'match')
         
         # STRATEGY 1: Strict match (Campaign + AG + Keyword + Match Type)
-        df = df.merge(
-            kw_lookup.rename(columns={'_kw_norm': '_target_norm'}),
-            on=['_camp_norm', '_ag_norm', '_target_norm', '_match_norm'],
-            how='left',
-            suffixes=('', '_bulk_kw')
-        )
-        
+        candidates.append(kw_strict.find([camp, ag, target, match], df.index))
         # STRATEGY 2: Fallback for unmatched rows (ignore Match Type)
-        # Only fill if KeywordId is still missing after strict match
-        strict_matched = df.get('KeywordId_bulk_kw', pd.Series([np.nan]*len(df))).notna()
-        if (~strict_matched).any():
-            # Relaxed lookup: Campaign + AG + Keyword only (take first ID for each)
-            kw_lookup_relaxed = kw_base.groupby(['_camp_norm', '_ag_norm', '_kw_norm'])[
-                ['KeywordId', 'CampaignId', 'AdGroupId']
-            ].first().reset_index()
-            kw_lookup_relaxed = kw_lookup_relaxed.rename(columns={
-                '_kw_norm': '_target_norm', 
-                'KeywordId': 'KeywordId_relaxed', 
-                'CampaignId': 'CampaignId_relaxed', 
-                'AdGroupId': 'AdGroupId_relaxed'
-            })
-            df = df.merge(
-                kw_lookup_relaxed,
-                on=['_camp_norm', '_ag_norm', '_target_norm'],
-                how='left',
-                suffixes=('', '_relax')
-            )
-            # Only use relaxed match if strict match failed
-            for col in ['KeywordId', 'CampaignId', 'AdGroupId']:
-                relaxed_col = f'{col}_relaxed'
-                bulk_kw_col = f'{col}_bulk_kw'
-                if relaxed_col in df.columns:
-                    if bulk_kw_col in df.columns:
-                        df[bulk_kw_col] = df[bulk_kw_col].fillna(df[relaxed_col])
-                    else:
-                        df[bulk_kw_col] = df[relaxed_col]
-                    df.drop(columns=[relaxed_col], inplace=True, errors='ignore')
-        
+        candidates.append(index.optimizer_keyword_table(strict=False).find([camp, ag, target], df.index))
+    
     # Precise Match 2: Product Targeting
-    pt_col = next((c for c in ['TargetingExpression', 'Product Targeting Expression', 'targeting_expression'] if c in bulk.columns), None)
-    if pt_col:
-        bulk['_pt_norm'] = normalize_for_mapping(bulk[pt_col])
-        pt_lookup = bulk[bulk['TargetingId'].notna() & (bulk['TargetingId'] != "") & (bulk['TargetingId'] != "nan")][['_camp_norm', '_ag_norm', '_pt_norm', 'TargetingId', 'CampaignId', 'AdGroupId']].drop_duplicates()
-        
-        df = df.merge(
-            pt_lookup.rename(columns={'_pt_norm': '_target_norm'}),
-            on=['_camp_norm', '_ag_norm', '_target_norm'],
-            how='left',
-            suffixes=('', '_bulk_pt')
-        )
-
+    pt_lookup = index.optimizer_pt_table()
+    if pt_lookup is not None:
+        candidates.append(pt_lookup.find([camp, ag, target], df.index))
+    
     # Resolve IDs
-    id_cols = ['CampaignId', 'AdGroupId', 'KeywordId', 'TargetingId']
-    for col in id_cols:
+    # Priority: Existing > Strict Keyword Match > Relaxed Keyword Match > Exact PT Match
+    for col in ['CampaignId', 'AdGroupId', 'KeywordId', 'TargetingId']:
+        sources = [found[col] for found in candidates if col in found.columns]
+        if col not in df.columns and sources:
+            df[col] = sources.pop(0)
         if col in df.columns:
             df[col] = df[col].replace('', np.nan).replace('nan', np.nan)
-            
-        col_kw = f'{col}_bulk_kw'
-        col_pt = f'{col}_bulk_pt'
-        
-        # Priority: Exact Keyword Match > Exact PT Match > Existing
-        if col_kw in df.columns:
-            df[col] = df[col].fillna(df[col_kw])
-        if col_pt in df.columns:
-            df[col] = df[col].fillna(df[col_pt])
-            
+        for values in sources:
+            df[col] = df[col].fillna(values)
+    
     # Fallback: Campaign/Ad Group IDs if still missing
-    missing_basics = df.get('CampaignId', pd.Series([np.nan]*len(df))).isna() | df.get('AdGroupId', pd.Series([np.nan]*len(df))).isna()
-    if missing_basics.any():
-        fallback_lookup = bulk.groupby(['_camp_norm', '_ag_norm'])[['CampaignId', 'AdGroupId']].first().reset_index()
-        df = df.merge(fallback_lookup, on=['_camp_norm', '_ag_norm'], how='left', suffixes=('', '_fallback'))
-        
-        df['CampaignId'] = df.get('CampaignId', pd.Series([np.nan]*len(df))).fillna(df.get('CampaignId_fallback', pd.Series([np.nan]*len(df))))
-        df['AdGroupId'] = df.get('AdGroupId', pd.Series([np.nan]*len(df))).fillna(df.get('AdGroupId_fallback', pd.Series([np.nan]*len(df))))
+    missing_basics = df.get('CampaignId', pd.Series([np.nan]*n)).isna() | df.get('AdGroupId', pd.Series([np.nan]*n)).isna()
+    fallback_lookup = index.optimizer_fallback_table()
+    if missing_basics.any() and fallback_lookup is not None:
+        fallback = fallback_lookup.find([camp, ag], df.index)
+        for col in fallback.columns:
+            if col not in df.columns:
+                df[col] = fallback[col]
+            else:
+                df[col] = df[col].fillna(fallback[col])
 
     # Sync Recommendation Objects
     if 'recommendation' in df.columns:
@@ -174,7 +119,7 @@ def enrich_with_ids(df: pd.DataFrame, bulk: pd.DataFrame) -> pd.DataFrame:
         df['recommendation'] = df.apply(sync_rec, axis=1)
 
     # Cleanup internal columns
-    drop_cols = [c for c in df.columns if c.startswith('_') or c.endswith('_bulk_kw') or c.endswith('_bulk_pt') or c.endswith('_fallback')]
+    drop_cols = [c for c in df.columns if c.startswith('_')]
     df.drop(columns=drop_cols, inplace=True, errors='ignore')
     
     return df
@@ -184,7 +129,8 @@ def identify_negative_candidates(
     df: pd.DataFrame, 
     config: dict, 
     harvest_df: pd.DataFrame,
-    account_benchmarks: dict = None
+    account_benchmarks: dict = None,
+    features: FeatureFrame = None
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
     Identify negative keyword candidates:
@@ -195,11 +141,16 @@ def identify_negative_candidates(
     CHANGES:
     - Uses CVR-based dynamic thresholds for hard stop
     
+    `features` (build_feature_frame) supplies precomputed masks and cleaned search terms.
+    
     Returns: (keyword_negatives_df, product_target_negatives_df, your_products_review_df)
     """
     # Get account benchmarks for CVR-based thresholds
     if account_benchmarks is None:
-        account_benchmarks = calculate_account_benchmarks(df, config)
+        account_benchmarks = features.benchmarks if features is not None else calculate_account_benchmarks(df, config)
+    
+    keys = feature_keys(df, features)
+    cache = cache_for(df, features)
     
     soft_threshold = account_benchmarks['soft_threshold']
     hard_stop_threshold = account_benchmarks['hard_stop_threshold']
@@ -214,43 +165,19 @@ def identify_negative_candidates(
             harvest_df["Customer Search Term"].astype(str).str.strip().str.lower()
         )
         
-        # Strip PT prefixes from main df for accurate matching
-        df_cst_clean = df["Customer Search Term"].apply(strip_targeting_prefix).astype(str).str.strip().str.lower()
-        
-        # Find all occurrences in non-exact campaigns
-        # EXCLUDE harvest destination campaigns from receiving isolation negatives
-        harvest_dest_pattern = r'harvestexact|harvest_exact|_exact_|exactmatch'
-        is_harvest_destination = df["Campaign Name"].str.contains(harvest_dest_pattern, case=False, na=False)
-        
-        isolation_mask = (
-            df_cst_clean.isin(harvested_terms) &
-            (~df["Match Type"].str.contains("exact", case=False, na=False)) &
-            (~df["Match Type"].str.upper().isin(["PT", "PRODUCT TARGETING"])) &
-            (~is_harvest_destination)
-        )
-        
-        isolation_df = df[isolation_mask].copy()
-        # Store the cleaned term for grouping
-        isolation_df["_cst_clean"] = df_cst_clean[isolation_mask]
-        
         # Aggregate logic for Isolation Negatives (Fix for "metrics broken down by date")
-        if not isolation_df.empty:
-            # Group by CLEANED term to match harvest (prefixes already stripped)
-            agg_cols = {"Clicks": "sum", "Spend": "sum"}
-            meta_cols = {c: "first" for c in ["CampaignId", "AdGroupId", "KeywordId", "TargetingId", "Campaign Targeting Type"] if c in isolation_df.columns}
-            
-            isolation_agg = isolation_df.groupby(
-                ["Campaign Name", "Ad Group Name", "_cst_clean"], as_index=False
-            ).agg({**agg_cols, **meta_cols})
-            isolation_agg = isolation_agg.rename(columns={"_cst_clean": "Customer Search Term"})
-            
+        # Groups over all discovery rows are threshold-independent (cached); keep the harvested terms
+        isolation_groups = cache("isolation_groups", lambda: _isolation_groups(df, keys))
+        isolation_agg = isolation_groups[isolation_groups["Customer Search Term"].isin(harvested_terms)]
+        
+        if not isolation_agg.empty:
             # Get winner campaign for each term (to exclude from negation)
             winner_camps = dict(zip(
                 harvest_df["Customer Search Term"].str.lower(),
                 harvest_df["Campaign Name"]
             ))
             
-            for _, row in isolation_agg.iterrows():
+            for row in isolation_agg.to_dict('records'):
                 campaign = row["Campaign Name"]
                 ad_group = row["Ad Group Name"]
                 term = str(row["Customer Search Term"]).strip().lower()
@@ -296,23 +223,10 @@ def identify_negative_candidates(
                 })
     
     # Stage 2: Performance negatives (bleeders) - CVR-BASED THRESHOLDS
-    non_exact_mask = ~df["Match Type"].str.contains("exact", case=False, na=False)
-    # Don't filter Sales==0 yet - wait until aggregated
-    bleeders = df[non_exact_mask].copy()
+    # Don't filter Sales==0 yet - wait until aggregated (groups are threshold-independent, cached)
+    bleeder_agg = cache("bleeder_groups", lambda: _bleeder_groups(df, keys))
     
-    if not bleeders.empty:
-        # Group by lowercased term to avoid case-based duplicates
-        bleeders['_term_norm_group'] = bleeders['Customer Search Term'].astype(str).str.strip().str.lower()
-        
-        # Aggregate by campaign + ad group + term
-        agg_cols = {"Clicks": "sum", "Spend": "sum", "Impressions": "sum", "Sales": "sum"}
-        meta_cols = {c: "first" for c in ["CampaignId", "AdGroupId", "KeywordId", "TargetingId", "Campaign Targeting Type"] if c in bleeders.columns}
-        
-        bleeder_agg = bleeders.groupby(
-            ["Campaign Name", "Ad Group Name", "_term_norm_group"], as_index=False
-        ).agg({**agg_cols, **meta_cols})
-        bleeder_agg = bleeder_agg.rename(columns={"_term_norm_group": "Customer Search Term"})
-        
+    if bleeder_agg is not None:
         # Apply CVR-based thresholds (Sales == 0 AND Clicks > threshold)
         # Currency threshold removed - only clicks-based logic
         bleeder_mask = (
@@ -320,7 +234,7 @@ def identify_negative_candidates(
             (bleeder_agg["Clicks"] >= soft_threshold)
         )
         
-        for _, row in bleeder_agg[bleeder_mask].iterrows():
+        for row in bleeder_agg[bleeder_mask].to_dict('records'):
             campaign = row["Campaign Name"]
             ad_group = row["Ad Group Name"]
             term = str(row["Customer Search Term"]).strip().lower()
@@ -405,7 +319,7 @@ def identify_negative_candidates(
     # FINAL ENRICHMENT: Map IDs from Bulk for export
     # NOTE: Calling DataHub() inside might cause circular imports if not careful.
     # It's better to pass ID mapping as argument, but for now we'll assume DataHub is safe here.
-    neg_df = enrich_with_ids(neg_df, DataHub().get_data('bulk_id_mapping'))
+    neg_df = enrich_with_ids(neg_df, DataHub().get_bulk_id_index())
     
     # Split into keywords vs product targets
     neg_kw = neg_df[~neg_df["Is_ASIN"]].copy()
@@ -422,3 +336,45 @@ def identify_negative_candidates(
     st.session_state['asin_mapper_integration_stats'] = asin_mapper_stats
     
     return neg_kw, neg_pt, your_products_df
+
+
+def _isolation_groups(df: pd.DataFrame, keys: pd.DataFrame) -> pd.DataFrame:
+    """
+    Discovery rows (non-exact, non-PT, not a harvest destination) aggregated by
+    campaign + ad group + cleaned search term - the isolation candidates for any harvest set.
+    """
+    # PT prefixes stripped from main df for accurate matching
+    discovery_mask = keys["is_discovery"].to_numpy()
+    isolation_df = df[discovery_mask].copy()
+    # Store the cleaned term for grouping
+    isolation_df["_cst_clean"] = keys["cst_clean"].to_numpy()[discovery_mask]
+    
+    # Group by CLEANED term to match harvest (prefixes already stripped)
+    agg_cols = {"Clicks": "sum", "Spend": "sum"}
+    meta_cols = {c: "first" for c in ["CampaignId", "AdGroupId", "KeywordId", "TargetingId", "Campaign Targeting Type"] if c in isolation_df.columns}
+    
+    isolation_agg = isolation_df.groupby(
+        ["Campaign Name", "Ad Group Name", "_cst_clean"], as_index=False
+    ).agg({**agg_cols, **meta_cols})
+    return isolation_agg.rename(columns={"_cst_clean": "Customer Search Term"})
+
+
+def _bleeder_groups(df: pd.DataFrame, keys: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Non-exact rows aggregated by campaign + ad group + lowercased term (None if there are none)."""
+    non_exact_mask = ~keys["is_exact_match"].to_numpy()
+    bleeders = df[non_exact_mask].copy()
+    
+    if bleeders.empty:
+        return None
+    
+    # Group by lowercased term to avoid case-based duplicates
+    bleeders['_term_norm_group'] = keys["cst_norm"].to_numpy()[non_exact_mask]
+    
+    # Aggregate by campaign + ad group + term
+    agg_cols = {"Clicks": "sum", "Spend": "sum", "Impressions": "sum", "Sales": "sum"}
+    meta_cols = {c: "first" for c in ["CampaignId", "AdGroupId", "KeywordId", "TargetingId", "Campaign Targeting Type"] if c in bleeders.columns}
+    
+    bleeder_agg = bleeders.groupby(
+        ["Campaign Name", "Ad Group Name", "_term_norm_group"], as_index=False
+    ).agg({**agg_cols, **meta_cols})
+    return bleeder_agg.rename(columns={"_term_norm_group": "Customer Search Term"})
@@ -6,6 +6,53 @@ Visualizes performance data using a matrix heatmap.
 import pandas as pd
 import numpy as np
 
+GROUP_KEYS = ["Campaign Name", "Ad Group Name"]
+
+# Count column -> (icon, noun) in the Actions_Taken text
+ACTION_LABELS = {
+    "Harvest_Count": ("💎", "harvests"),
+    "Negative_Count": ("🛑", "negatives"),
+    "Bid_Increase_Count": ("⬆️", "increases"),
+    "Bid_Decrease_Count": ("⬇️", "decreases"),
+}
+
+
+def _keyed(actions: pd.DataFrame):
+    """Action rows that can match an ad group ("" as the ad group when the frame has none), or None."""
+    if actions.empty or "Campaign Name" not in actions.columns:
+        return None
+    if "Ad Group Name" not in actions.columns:
+        actions = actions.assign(**{"Ad Group Name": ""})
+    return actions
+
+
+def _reason_rows(actions: pd.DataFrame):
+    """Non-null reasons of an action frame as strings, with their keys."""
+    if "Reason" not in actions.columns:
+        return None
+    reasons = actions.loc[actions["Reason"].notna().to_numpy(), GROUP_KEYS + ["Reason"]]
+    return reasons.assign(Reason=reasons["Reason"].astype(str))
+
+
+def _summarize_reasons(reasons: pd.DataFrame) -> pd.Series:
+    """Per ad group: first 3 unique reasons in sorted order, "..." when there are more."""
+    reasons = reasons[reasons["Reason"] != ""].drop_duplicates().sort_values("Reason", kind="stable")
+    shown = reasons[reasons.groupby(GROUP_KEYS).cumcount() < 3].groupby(GROUP_KEYS)["Reason"].agg("; ".join)
+    more = reasons.groupby(GROUP_KEYS).size().reindex(shown.index) > 3
+    return shown + np.where(more, "...", "")
+
+
+def _score(series: pd.Series, high_is_better: bool = True) -> np.ndarray:
+    """2/1/0 by the 33rd/67th percentile of the positive values (1 for all when fewer than 2)."""
+    valid = series[series > 0]
+    if len(valid) < 2:
+        return np.ones(len(series), dtype=np.int64)
+    p33, p67 = valid.quantile(0.33), valid.quantile(0.67)
+    if high_is_better:
+        return np.select([series >= p67, series >= p33], [2, 1], 0)
+    return np.select([series <= p33, series <= p67], [2, 1], 0)
+
+
 def create_heatmap(
     df: pd.DataFrame,
     config: dict,
@@ -16,102 +63,77 @@ def create_heatmap(
     agg_bids: pd.DataFrame
 ) -> pd.DataFrame:
     """Create performance heatmap with action tracking."""
-    grouped = df.groupby(["Campaign Name", "Ad Group Name"]).agg({
+    grouped = df.groupby(GROUP_KEYS).agg({
         "Clicks": "sum", "Spend": "sum", "Sales_Attributed": "sum",
         "Orders_Attributed": "sum", "Impressions": "sum"
     }).reset_index()
-    
+
     # Rename to standard names for consistency
     grouped = grouped.rename(columns={"Sales_Attributed": "Sales", "Orders_Attributed": "Orders"})
-    
+
     grouped["CTR"] = np.where(grouped["Impressions"] > 0, grouped["Clicks"] / grouped["Impressions"] * 100, 0)
     grouped["CVR"] = np.where(grouped["Clicks"] > 0, grouped["Orders"] / grouped["Clicks"] * 100, 0)
     grouped["ROAS"] = np.where(grouped["Spend"] > 0, grouped["Sales"] / grouped["Spend"], 0)
     grouped["ACoS"] = np.where(grouped["Sales"] > 0, grouped["Spend"] / grouped["Sales"] * 100, 999)
-    
-    grouped["Harvest_Count"] = 0
-    grouped["Negative_Count"] = 0
-    grouped["Bid_Increase_Count"] = 0
-    grouped["Bid_Decrease_Count"] = 0
-    grouped["Actions_Taken"] = ""
-    
+
     all_bids = pd.concat([direct_bids, agg_bids]) if not direct_bids.empty or not agg_bids.empty else pd.DataFrame()
     negatives_df = pd.concat([neg_kw, neg_pt]) if not neg_kw.empty or not neg_pt.empty else pd.DataFrame()
 
-    for idx, row in grouped.iterrows():
-        camp, ag = row["Campaign Name"], row["Ad Group Name"]
-        
-        # Safely filter dataframes even if empty or missing columns
-        h_match = pd.DataFrame()
-        if not harvest_df.empty and "Campaign Name" in harvest_df.columns:
-            h_match = harvest_df[(harvest_df["Campaign Name"] == camp) & (harvest_df.get("Ad Group Name", "") == ag)]
-            
-        n_match = pd.DataFrame()
-        if not negatives_df.empty and "Campaign Name" in negatives_df.columns:
-            n_match = negatives_df[(negatives_df["Campaign Name"] == camp) & (negatives_df.get("Ad Group Name", "") == ag)]
-            
-        b_match = pd.DataFrame()
-        if not all_bids.empty and "Campaign Name" in all_bids.columns:
-            b_match = all_bids[(all_bids["Campaign Name"] == camp) & (all_bids.get("Ad Group Name", "") == ag)]
-        
-        grouped.at[idx, "Harvest_Count"] = len(h_match)
-        grouped.at[idx, "Negative_Count"] = len(n_match)
-        
-        # Collect reasons for Actions
-        reasons = []
-        if not h_match.empty and "Reason" in h_match.columns:
-            reasons.extend(h_match["Reason"].dropna().astype(str).unique().tolist())
-            
-        if not n_match.empty and "Reason" in n_match.columns:
-            reasons.extend(n_match["Reason"].dropna().astype(str).unique().tolist())
-            
-        if not b_match.empty and "New Bid" in b_match.columns:
-            cur_bids = b_match.get("Current Bid", b_match.get("CPC", 0))
-            grouped.at[idx, "Bid_Increase_Count"] = (b_match["New Bid"] > cur_bids).sum()
-            grouped.at[idx, "Bid_Decrease_Count"] = (b_match["New Bid"] < cur_bids).sum()
-            
-            if "Reason" in b_match.columns:
-                reasons.extend(b_match["Reason"].dropna().astype(str).unique().tolist())
-            
-        actions = []
-        if grouped.at[idx, "Harvest_Count"] > 0: actions.append(f"💎 {int(grouped.at[idx, 'Harvest_Count'])} harvests")
-        if grouped.at[idx, "Negative_Count"] > 0: actions.append(f"🛑 {int(grouped.at[idx, 'Negative_Count'])} negatives")
-        if grouped.at[idx, "Bid_Increase_Count"] > 0: actions.append(f"⬆️ {int(grouped.at[idx, 'Bid_Increase_Count'])} increases")
-        if grouped.at[idx, "Bid_Decrease_Count"] > 0: actions.append(f"⬇️ {int(grouped.at[idx, 'Bid_Decrease_Count'])} decreases")
-        
-        if actions:
-            grouped.at[idx, "Actions_Taken"] = " | ".join(actions)
-            # Summarize reasons (top 3 unique)
-            unique_reasons = sorted(list(set([r for r in reasons if r])))
-            if unique_reasons:
-                grouped.at[idx, "Reason_Summary"] = "; ".join(unique_reasons[:3]) + ("..." if len(unique_reasons) > 3 else "")
-            else:
-                grouped.at[idx, "Reason_Summary"] = "Multiple actions"
-        elif row["Clicks"] < config.get("MIN_CLICKS_EXACT", 5):
-            grouped.at[idx, "Actions_Taken"] = "⏸️ Hold (Low volume)"
-            grouped.at[idx, "Reason_Summary"] = "Low data volume"
-        else:
-            grouped.at[idx, "Actions_Taken"] = "✅ No action needed"
-            
-            # Provide more specific status based on performance
-            if row["Sales"] == 0 and row["Spend"] > 10:
-                grouped.at[idx, "Reason_Summary"] = "Zero Sales (Monitoring)"
-            elif row["ROAS"] < config.get("TARGET_ROAS", 2.5) * 0.8:
-                grouped.at[idx, "Reason_Summary"] = "Low Efficiency (Monitoring)"
-            else:
-                grouped.at[idx, "Reason_Summary"] = "Stable Performance"
+    # One groupby per action frame (rows with a missing key match no ad group)
+    counts, reasons = [], []
+    harvest = _keyed(harvest_df)
+    if harvest is not None:
+        counts.append(harvest.groupby(GROUP_KEYS).size().rename("Harvest_Count"))
+        reasons.append(_reason_rows(harvest))
+    negatives = _keyed(negatives_df)
+    if negatives is not None:
+        counts.append(negatives.groupby(GROUP_KEYS).size().rename("Negative_Count"))
+        reasons.append(_reason_rows(negatives))
+    bids = _keyed(all_bids)
+    if bids is not None and "New Bid" in bids.columns:
+        cur_bids = bids.get("Current Bid", bids.get("CPC", 0))
+        changes = bids[GROUP_KEYS].assign(
+            Bid_Increase_Count=(bids["New Bid"] > cur_bids).to_numpy(),
+            Bid_Decrease_Count=(bids["New Bid"] < cur_bids).to_numpy(),
+        )
+        counts.append(changes.groupby(GROUP_KEYS).sum())
+        reasons.append(_reason_rows(bids))
+    reasons = [r for r in reasons if r is not None]
+
+    # Join onto the ad groups by key
+    keys = pd.MultiIndex.from_frame(grouped[GROUP_KEYS])
+    actions = pd.concat(counts, axis=1).reindex(keys) if counts else pd.DataFrame(index=keys)
+    for col in ACTION_LABELS:
+        grouped[col] = actions[col].fillna(0).to_numpy(dtype=np.int64) if col in actions.columns else 0
+    summary = _summarize_reasons(pd.concat(reasons, ignore_index=True)).reindex(keys) if reasons else None
+
+    # "💎 2 harvests | ⬆️ 1 increases" for the non-zero counts
+    taken = pd.Series("", index=grouped.index, dtype=object)
+    for col, (icon, noun) in ACTION_LABELS.items():
+        label = f"{icon} " + grouped[col].astype(str) + f" {noun}"
+        taken = taken.mask(grouped[col] > 0, taken + np.where(taken == "", "", " | ") + label)
+    has_actions = (taken != "").to_numpy()
+    low_volume = (grouped["Clicks"] < config.get("MIN_CLICKS_EXACT", 5)).to_numpy()
+
+    grouped["Actions_Taken"] = np.select(
+        [has_actions, low_volume], [taken.to_numpy(), "⏸️ Hold (Low volume)"], "✅ No action needed"
+    )
+    # Provide more specific status based on performance
+    reason_summary = (summary.fillna("Multiple actions").to_numpy() if summary is not None
+                      else np.full(len(grouped), "Multiple actions", dtype=object))
+    grouped["Reason_Summary"] = np.select(
+        [has_actions, low_volume,
+         ((grouped["Sales"] == 0) & (grouped["Spend"] > 10)).to_numpy(),
+         (grouped["ROAS"] < config.get("TARGET_ROAS", 2.5) * 0.8).to_numpy()],
+        [reason_summary, "Low data volume", "Zero Sales (Monitoring)", "Low Efficiency (Monitoring)"],
+        "Stable Performance"
+    )
 
     # Priority Scoring
-    def score(val, series, high_is_better=True):
-        valid = series[series > 0]
-        if len(valid) < 2: return 1
-        p33, p67 = valid.quantile(0.33), valid.quantile(0.67)
-        return (2 if val >= p67 else 1 if val >= p33 else 0) if high_is_better else (2 if val <= p33 else 1 if val <= p67 else 0)
-
-    grouped["Overall_Score"] = (grouped.apply(lambda r: score(r["CTR"], grouped["CTR"]), axis=1) + 
-                                grouped.apply(lambda r: score(r["CVR"], grouped["CVR"]), axis=1) + 
-                                grouped.apply(lambda r: score(r["ROAS"], grouped["ROAS"]), axis=1) + 
-                                grouped.apply(lambda r: score(r["ACoS"], grouped["ACoS"], False), axis=1)) / 4
-    
-    grouped["Priority"] = grouped["Overall_Score"].apply(lambda x: "🔴 High" if x < 0.7 else ("🟡 Medium" if x < 1.3 else "🟢 Good"))
+    grouped["Overall_Score"] = (_score(grouped["CTR"]) + _score(grouped["CVR"]) +
+                                _score(grouped["ROAS"]) + _score(grouped["ACoS"], False)) / 4
+
+    grouped["Priority"] = np.select(
+        [grouped["Overall_Score"] < 0.7, grouped["Overall_Score"] < 1.3], ["🔴 High", "🟡 Medium"], "🟢 Good"
+    )
     return grouped.sort_values("Overall_Score")
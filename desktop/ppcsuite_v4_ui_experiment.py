@@ -77,6 +77,7 @@ def run_seeding():
 # Delay heavy feature imports by moving them into routing/main logic
 from ui.layout import setup_page, render_sidebar, render_home
 from core.data_hub import DataHub
+from core.state_versions import bump_state_version
 from core.db_manager import DatabaseManager, get_db_manager
 from utils.matchers import ExactMatcher
 from utils.formatters import format_currency
@@ -934,10 +935,12 @@ def run_consolidated_optimizer():
                 "simulation": simulation,
                 "date_info": date_info,
                 "df": df_prep,
-                "health": health  # ADDED for Home Cockpit sync
+                "health": health,  # ADDED for Home Cockpit sync
+                "run_id": datetime.now().isoformat()  # AI Assistant knowledge cache version
             }
             # SAVE ITERATION TO CACHE
             st.session_state['latest_optimizer_run'] = r
+            bump_state_version('latest_optimizer_run')
             st.session_state['optimizer_config_cache'] = opt.config.copy()
             
     # UNPACK RESULTS (From Cache or Fresh Run)
@@ -1169,7 +1172,7 @@ def run_consolidated_optimizer():
             ):
                 # Get pending actions from session state
                 pending = st.session_state.get('pending_actions')
-                if pending and pending.get('actions'):
+                if pending and len(pending.get('actions', [])) > 0:
                     from core.db_manager import get_db_manager
                     db = get_db_manager(st.session_state.get('test_mode', False))
                     
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Benchmark: columnar optimizer action log vs the former iterrows() builder and
+per-row inserts.
+
+Builds synthetic optimizer results (negatives, four bid buckets, harvests with
+duplicate targets and missing values), checks build_optimization_actions yields
+the same actions as the former loop, then writes them through
+DatabaseManager.log_action_batch (SQLite, temp file) and - when DATABASE_URL is
+set - PostgresManager.log_action_batch, comparing the stored actions_log rows with
+the former per-row writers and checking delete_action_batch (undo).
+
+Usage:
+    python scripts/benchmark_action_log.py [bid_rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from core.action_log import ACTION_COLUMNS, ACTION_LOG_COLUMNS
+from core.db_manager import DatabaseManager
+from features.optimizer.logging import build_optimization_actions
+
+
+def build_actions_rowwise(results: dict) -> list:
+    """Former iterrows() action builder from log_optimization_events (reference implementation)."""
+    actions_to_log = []
+
+    # 1. Process Negative Keywords
+    for _, row in results.get('neg_kw', pd.DataFrame()).iterrows():
+        actions_to_log.append({
+            'entity_name': 'Keyword',
+            'action_type': 'NEGATIVE',
+            'old_value': 'ENABLED',
+            'new_value': 'PAUSED',
+            'reason': row.get('Reason', 'Low efficiency / Waste'),
+            'campaign_name': row.get('Campaign Name', ''),
+            'ad_group_name': row.get('Ad Group Name', ''),
+            'target_text': row.get('Term', ''),
+            'match_type': row.get('Match Type', 'NEGATIVE')
+        })
+
+    # 2. Process Negative Product Targets (ASINs)
+    for _, row in results.get('neg_pt', pd.DataFrame()).iterrows():
+        actions_to_log.append({
+            'entity_name': 'ASIN',
+            'action_type': 'NEGATIVE',
+            'old_value': 'ENABLED',
+            'new_value': 'PAUSED',
+            'reason': row.get('Reason', 'Low efficiency / Waste'),
+            'campaign_name': row.get('Campaign Name', ''),
+            'ad_group_name': row.get('Ad Group Name', ''),
+            'target_text': row.get('Term', ''),
+            'match_type': 'TARGETING_EXPRESSION'
+        })
+
+    # 3. Process Bid Optimizations (Combined)
+    bid_dfs = [
+        results.get('bids_exact', pd.DataFrame()),
+        results.get('bids_pt', pd.DataFrame()),
+        results.get('bids_agg', pd.DataFrame()),
+        results.get('bids_auto', pd.DataFrame())
+    ]
+    for b_df in bid_dfs:
+        if b_df.empty: continue
+        for _, row in b_df.iterrows():
+            actions_to_log.append({
+                'entity_name': 'Target',
+                'action_type': 'BID_CHANGE',
+                'old_value': str(row.get('Current Bid', '')),
+                'new_value': str(row.get('New Bid', '')),
+                'reason': row.get('Reason', 'Portfolio Optimization'),
+                'campaign_name': row.get('Campaign Name', ''),
+                'ad_group_name': row.get('Ad Group Name', ''),
+                'target_text': row.get('Targeting', ''),
+                'match_type': row.get('Match Type', '')
+            })
+
+    # 4. Process Harvests - WITH WINNER SOURCE TRACKING
+    for _, row in results.get('harvest', pd.DataFrame()).iterrows():
+        # Determine winner source campaign and new campaign name
+        winner_campaign = row.get('Campaign Name', '')
+        search_term = row.get('Customer Search Term', '')
+        
+        # Generate new campaign name (you can customize this logic)
+        new_campaign = f"Harvest_Exact_{winner_campaign}" if winner_campaign else "Harvest_Exact_Campaign"
+        
+        actions_to_log.append({
+            'entity_name': 'Keyword',
+            'action_type': 'HARVEST',
+            'old_value': 'DISCOVERY',
+            'new_value': 'PROMOTED',
+            'reason': f"Conv: {row.get('Orders', 0)} orders",
+            'campaign_name': winner_campaign,  # Source campaign
+            'ad_group_name': row.get('Ad Group Name', ''),
+            'target_text': search_term,
+            'match_type': 'EXACT',
+            # NEW FIELDS FOR IMPACT ANALYSIS:
+            'winner_source_campaign': winner_campaign,  # Which campaign won
+            'new_campaign_name': new_campaign,  # Where it's being moved
+            'before_match_type': row.get('Match Type', 'broad'),  # Original match type
+            'after_match_type': 'exact'  # Harvested to exact
+        })
+
+
+    # === DEDUPLICATE ACTIONS ===
+    # Remove duplicates that would violate the unique constraint:
+    # (client_id, action_date, target_text, action_type, campaign_name)
+    # Keep the last occurrence (most recent values for the same target)
+    seen_keys = {}
+    for i, action in enumerate(actions_to_log):
+        key = (
+            action.get('target_text', '').lower().strip(),
+            action.get('action_type', ''),
+            action.get('campaign_name', '').strip()
+        )
+        seen_keys[key] = i  # Overwrite with latest index
+    
+    # Build deduplicated list (keeping only the last occurrence of each key)
+    unique_indices = set(seen_keys.values())
+    actions_to_log = [a for i, a in enumerate(actions_to_log) if i in unique_indices]
+    return actions_to_log
+
+
+def log_action_batch_rowwise(db: DatabaseManager, actions: list, client_id: str, batch_id: str, date_str: str) -> int:
+    """Former SQLite per-row insert loop (reference implementation)."""
+    with db._get_connection() as conn:
+        cursor = conn.cursor()
+        for action in actions:
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO actions_log ({", ".join(ACTION_LOG_COLUMNS)})
+                VALUES ({", ".join("?" * len(ACTION_LOG_COLUMNS))})
+            """, (
+                date_str, client_id, batch_id,
+                action.get('entity_name', ''), action.get('action_type', 'UNKNOWN'),
+                str(action.get('old_value', '')), str(action.get('new_value', '')),
+                action.get('reason', ''), action.get('campaign_name', ''), action.get('ad_group_name', ''),
+                action.get('target_text', ''), action.get('match_type', ''),
+                action.get('winner_source_campaign'), action.get('new_campaign_name'),
+                action.get('before_match_type'), action.get('after_match_type'),
+            ))
+    return len(actions)
+
+
+def build_results(rows: int) -> dict:
+    rng = np.random.default_rng(17)
+
+    def frame(n, text_col, extra):
+        df = pd.DataFrame({
+            "Campaign Name": [f"Campaign {i}" for i in rng.integers(0, 200, n)],
+            "Ad Group Name": [f"AG {i}" for i in rng.integers(0, 40, n)],
+            text_col: [f"Term {i}" if i % 7 else f" TERM {i} " for i in rng.integers(0, n, n)],
+            "Match Type": rng.choice(np.array(["exact", "phrase", "broad"], dtype=object), n),
+        })
+        for col, values in extra.items():
+            df[col] = values(n)
+        return df
+
+    bid_extra = {
+        "Current Bid": lambda n: np.where(rng.random(n) < 0.05, np.nan, np.round(rng.uniform(0.1, 3, n), 2)),
+        "New Bid": lambda n: np.round(rng.uniform(0.1, 3, n), 2),
+        "Reason": lambda n: rng.choice(np.array(["Bid up", "Bid down", "Hold"], dtype=object), n),
+        "Impressions": lambda n: rng.integers(0, 1000, n),
+    }
+    harvest = frame(rows // 4, "Customer Search Term", {"Orders": lambda n: rng.integers(1, 9, n)})
+    harvest.loc[harvest.index[::50], "Campaign Name"] = ""
+    return {
+        "neg_kw": frame(rows // 4, "Term", {"Reason": lambda n: np.full(n, "Bleeder", dtype=object)}),
+        "neg_pt": frame(rows // 10, "Term", {}).drop(columns=["Match Type"]),
+        "bids_exact": frame(rows, "Targeting", bid_extra),
+        "bids_pt": frame(rows // 2, "Targeting", bid_extra).drop(columns=["Reason"]),
+        "bids_agg": pd.DataFrame(),
+        "bids_auto": frame(rows // 4, "Targeting", bid_extra),
+        "harvest": harvest,
+    }
+
+
+def records(actions) -> list:
+    """Comparable action tuples (missing fields and NaN as None)."""
+    df = pd.DataFrame(list(actions)) if isinstance(actions, list) else actions
+    df = df.reindex(columns=ACTION_COLUMNS).astype(object)
+    return list(df.where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def stored_rows(db, client_id: str) -> list:
+    cols = ", ".join(c for c in ACTION_LOG_COLUMNS if c not in ("client_id", "batch_id"))
+    with db._get_connection() as conn:
+        rows = pd.read_sql(f"SELECT {cols} FROM actions_log WHERE client_id = {db.placeholder} ORDER BY target_text, action_type, campaign_name",
+                           conn, params=(client_id,))
+    rows["action_date"] = rows["action_date"].astype(str).str[:10]
+    return list(rows.astype(object).where(rows.notna(), None).itertuples(index=False, name=None))
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def check_sqlite(actions_list: list, actions_df: pd.DataFrame):
+    with tempfile.TemporaryDirectory() as tmp:
+        old_db = DatabaseManager(Path(tmp) / "rowwise.db")
+        db = DatabaseManager(Path(tmp) / "columnar.db")
+        batch = str(uuid.uuid4())[:8]
+        _, t_old = timed(log_action_batch_rowwise, old_db, actions_list, "client", batch, "2024-06-30")
+        saved, t_new = timed(db.log_action_batch, actions_df, "client", batch, "2024-06-30")
+        assert stored_rows(old_db, "client") == stored_rows(db, "client"), "SQLite actions_log rows differ"
+        # list-of-dict callers still work
+        assert db.log_action_batch(actions_list[:100], "dicts", batch, "2024-06-30") == 100
+        deleted = db.delete_action_batch("client", batch)
+        assert deleted == saved and not stored_rows(db, "client"), "undo left rows behind"
+    print(f"SQLite write    {saved:>7,} rows | row-wise {t_old:6.2f}s | bulk {t_new:6.3f}s | {t_old / t_new:5.1f}x | undo ok")
+
+
+def check_postgres(actions_list: list, actions_df: pd.DataFrame):
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        print("Postgres        skipped (set DATABASE_URL to compare the COPY path)")
+        return
+    from core.postgres_manager import PostgresManager
+    db = PostgresManager(db_url)
+    clients = [f"bench_{uuid.uuid4().hex[:6]}" for _ in range(2)]
+    try:
+        batch = str(uuid.uuid4())[:8]
+        old = pd.DataFrame(actions_list).reindex(columns=ACTION_COLUMNS)
+        old = old.drop_duplicates(subset=["target_text", "action_type", "campaign_name"], keep="first")
+        old_count, t_old = timed(_log_action_batch_execute_values, db, old, clients[0], batch, "2024-06-30")
+        saved, t_new = timed(db.log_action_batch, actions_df, clients[1], batch, "2024-06-30")
+        assert saved == old_count
+        assert stored_rows(db, clients[0]) == stored_rows(db, clients[1]), "Postgres actions_log rows differ"
+        assert db.delete_action_batch(clients[1], batch) == saved, "undo left rows behind"
+        print(f"Postgres write  {saved:>7,} rows | execute_values {t_old:6.2f}s | COPY {t_new:6.3f}s | {t_old / t_new:5.1f}x | undo ok")
+    finally:
+        for client in clients:
+            db.delete_action_batch(client, batch)
+
+
+def _log_action_batch_execute_values(db, actions: pd.DataFrame, client_id: str, batch_id: str, date_str: str) -> int:
+    """Former Postgres insert path: Python tuples through execute_values."""
+    from psycopg2.extras import execute_values
+    data = [(date_str, client_id, batch_id) + tuple(None if pd.isna(v) else v for v in row)
+            for row in actions.astype(object).itertuples(index=False, name=None)]
+    data = [row[:5] + (str(row[5]), str(row[6])) + row[7:] for row in data]
+    with db._get_connection() as conn:
+        with conn.cursor() as cursor:
+            execute_values(cursor, f"INSERT INTO actions_log ({', '.join(ACTION_LOG_COLUMNS)}) VALUES %s", data)
+    return len(data)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    results = build_results(rows)
+    total = sum(len(df) for df in results.values())
+    print(f"Optimizer results: {total:,} rows\n")
+
+    expected, t_old = timed(build_actions_rowwise, results)
+    actual, t_new = timed(build_optimization_actions, results)
+    assert records(expected) == records(actual), "actions differ"
+    print(f"Build actions   {len(actual):>7,} rows | iterrows {t_old:6.2f}s | columnar {t_new:6.3f}s | {t_old / t_new:5.1f}x")
+
+    check_sqlite(expected, actual)
+    check_postgres(expected, actual)
+
+    print("\n✅ Columnar action log identical to row-wise logging")
+
+
+if __name__ == "__main__":
+    main()
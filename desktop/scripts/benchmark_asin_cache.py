@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark: WAL-mode ASIN cache (per-thread connections, bulk API) vs the former ASINCache.
+
+Checks, against temporary database files:
+  - a cache file written by the former ASINCache opens with the new schema and its
+    entries stay readable until lookup_date + TTL
+  - get_many/set_many round trips, only_missing placeholders never overwrite live API
+    data, per-entry TTLs expire, evict() enforces the size cap, and stats() counts
+    hits/misses/evictions
+  - populating own-product placeholders (DataHub._populate_asin_cache) with one
+    set_many vs the former per-row get + set
+  - concurrent "upload" writer threads and "mapper" reader threads on one cache file,
+    former shared connection vs new per-thread WAL connections
+
+Usage:
+    python scripts/benchmark_asin_cache.py [asins] [threads]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from core.asin_cache import ASINCache
+
+
+class ASINCacheReference:
+    """Former ASINCache (reference implementation)."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS asin_lookups (
+                asin TEXT, marketplace TEXT, data TEXT, lookup_date TIMESTAMP,
+                PRIMARY KEY (asin, marketplace)
+            )
+        ''')
+        self.conn.commit()
+
+    def get(self, asin, marketplace='AE'):
+        cutoff = datetime.now() - timedelta(days=30)
+        cursor = self.conn.execute('''
+            SELECT data FROM asin_lookups WHERE asin = ? AND marketplace = ? AND lookup_date > ?
+        ''', (asin.upper(), marketplace, str(cutoff)))
+        result = cursor.fetchone()
+        return json.loads(result[0]) if result else None
+
+    def set(self, asin, marketplace, data, lookup_date=None):
+        self.conn.execute('''
+            INSERT OR REPLACE INTO asin_lookups (asin, marketplace, data, lookup_date) VALUES (?, ?, ?, ?)
+        ''', (asin.upper(), marketplace, json.dumps(data), str(lookup_date or datetime.now())))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def product(asin, **extra):
+    return {'asin': asin, 'title': f'Product {asin}', 'brand': 'Brand', 'status': 'success', **extra}
+
+
+def check_semantics(tmp):
+    # Former cache file: one fresh entry, one 40 days old (already expired under the 30-day TTL)
+    path = os.path.join(tmp, 'legacy.db')
+    old = ASINCacheReference(path)
+    old.set('B0FRESH001', 'AE', product('B0FRESH001'))
+    old.set('B0STALE001', 'AE', product('B0STALE001'), lookup_date=datetime.now() - timedelta(days=40))
+    old.close()
+    cache = ASINCache(path, eviction_interval=0)
+    assert cache.get('b0fresh001') == product('B0FRESH001')
+    assert cache.get('B0STALE001') is None
+    cache.close()
+
+    path = os.path.join(tmp, 'semantics.db')
+    cache = ASINCache(path, max_entries=50, eviction_interval=0)
+    entries = [(f'B0SEM{i:05d}', product(f'B0SEM{i:05d}')) for i in range(40)]
+    assert cache.set_many('AE', entries) == 40
+    found = cache.get_many([a.lower() for a, _ in entries] + ['B0MISSING1'], 'AE')
+    assert found == dict(entries) and cache.get_many([entries[0][0]], 'US') == {}
+
+    # Placeholders only fill gaps: live API data is kept, duplicates keep the first placeholder
+    placeholders = [(entries[0][0], product(entries[0][0], is_own_product=True)),
+                    ('B0OWN00001', product('B0OWN00001', is_own_product=True)),
+                    ('B0OWN00001', product('B0OWN00001', title='second'))]
+    assert cache.set_many('AE', placeholders, only_missing=True) == 1
+    assert cache.get(entries[0][0]) == entries[0][1]
+    assert cache.get('B0OWN00001')['title'] == 'Product B0OWN00001'
+
+    # Per-entry TTL: a short-lived entry expires, and expired entries can be replaced by placeholders
+    cache.set('B0SHORT001', 'AE', product('B0SHORT001'), ttl_days=0.5 / 86400)
+    time.sleep(0.6)
+    assert cache.get('B0SHORT001') is None
+    assert cache.set_many('AE', [('B0SHORT001', product('B0SHORT001', is_own_product=True))], only_missing=True) == 1
+    cache.set('B0SHORT002', 'AE', product('B0SHORT002'), ttl_days=0.5 / 86400)
+    time.sleep(0.6)
+
+    # Size cap: 20 more entries push the table over 50; soonest-expiring go first
+    cache.set_many('AE', [(f'B0CAP{i:05d}', product(f'B0CAP{i:05d}')) for i in range(20)], ttl_days=365)
+    expired, over = cache.evict()
+    stats = cache.stats()
+    assert (expired, over) == (1, 12) and stats['entries'] == 50, (expired, over, stats)
+    assert all(cache.get(f'B0CAP{i:05d}') for i in range(20))
+    assert stats['evictions'] == 13 and stats['hits'] > 0 and stats['misses'] > 0
+    cache.close()
+    print(f"semantics ok | stats: {stats}")
+
+
+def check_populate(tmp, n):
+    asins = [f'B0POP{i:05d}' for i in range(n)]
+    placeholder = lambda asin: product(asin, is_own_product=True)
+
+    old = ASINCacheReference(os.path.join(tmp, 'populate_old.db'))
+    t0 = time.perf_counter()
+    for asin in asins:
+        if not old.get(asin):
+            old.set(asin, 'AE', placeholder(asin))
+    t_old = time.perf_counter() - t0
+    old.close()
+
+    cache = ASINCache(os.path.join(tmp, 'populate_new.db'), eviction_interval=0)
+    t0 = time.perf_counter()
+    written = cache.set_many('AE', [(asin, placeholder(asin)) for asin in asins], only_missing=True)
+    t_new = time.perf_counter() - t0
+    assert written == n and len(cache.get_many(asins)) == n
+    cache.close()
+    print(f"populate {n:,} placeholders | former get+set per row {t_old:6.2f}s | set_many {t_new:6.3f}s")
+
+
+def hammer(make_cache, path, threads, n, shared):
+    """Writers cache lookups one by one (uploads) while readers probe them (mapper sessions); same work for both caches."""
+    errors = []
+    shared_cache = make_cache(path) if shared else None
+    workers = max(threads // 2, 1)
+
+    def writer(w):
+        cache = shared_cache or make_cache(path)
+        try:
+            for i in range(n):
+                cache.set(f'B0W{w:02d}{i:05d}', 'AE', product(f'B0W{w:02d}{i:05d}'))
+        except sqlite3.Error as e:
+            errors.append(repr(e))
+
+    def reader(r):
+        cache = shared_cache or make_cache(path)
+        try:
+            for _ in range(5):
+                for i in range(n):
+                    cache.get(f'B0W{r:02d}{i:05d}')
+        except sqlite3.Error as e:
+            errors.append(repr(e))
+
+    pool = [threading.Thread(target=writer, args=(w,)) for w in range(workers)]
+    pool += [threading.Thread(target=reader, args=(r,)) for r in range(workers)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - t0, errors
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    with tempfile.TemporaryDirectory() as tmp:
+        check_semantics(tmp)
+        check_populate(tmp, n)
+
+        t_old, errors_old = hammer(ASINCacheReference, os.path.join(tmp, 'hammer_old.db'), threads, n // 5,
+                                   shared=True)
+        t_new, errors_new = hammer(lambda p: ASINCache(p, eviction_interval=0),
+                                   os.path.join(tmp, 'hammer_new.db'), threads, n // 5, shared=False)
+        assert not errors_new, errors_new
+        ops = threads // 2 * (n // 5) * 6
+        print(f"{threads // 2} upload writers + {threads // 2} mapper readers ({ops:,} ops) | "
+              f"former shared connection {t_old:6.2f}s ({len(errors_old)} errors) | WAL per-thread {t_new:6.2f}s")
+
+    print("\n✅ ASIN cache keeps lookup semantics with TTL, size cap and concurrent access")
+
+
+if __name__ == '__main__':
+    main()
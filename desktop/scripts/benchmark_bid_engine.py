@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark: columnar bid engine vs the former row-wise apply_optimization.
+
+Builds a synthetic aggregated bucket (default 200k targets) covering every decision
+path (no data, visibility boost, target-level, ad group fallback, hold), checks that
+_compute_bids produces identical New Bid / Reason / Decision_Basis columns and that
+the ID-based group key matches the former row-wise lambda, then prints timings.
+
+Usage:
+    python scripts/benchmark_bid_engine.py [rows]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from features.optimizer.strategies.bids import (
+    VISIBILITY_BOOST_ELIGIBLE_TYPES,
+    VISIBILITY_BOOST_MAX_IMPRESSIONS,
+    VISIBILITY_BOOST_MIN_DAYS,
+    VISIBILITY_BOOST_PCT,
+    _classify_and_bid,
+    _compute_bids,
+    _is_truthy,
+)
+
+CONFIG = {"TARGET_ROAS": 2.5, "BID_UP_THROTTLE": 0.5, "BID_DOWN_THROTTLE": 0.5, "MAX_BID_CHANGE": 0.25}
+MIN_CLICKS = 5
+
+
+def apply_optimization_rowwise(grouped, adgroup_stats, config, min_clicks, data_days):
+    """Former per-row decision from _process_bucket (reference implementation)."""
+    adgroup_lookup = adgroup_stats.set_index(["Campaign Name", "Ad Group Name"])[["AG_ROAS", "AG_Clicks"]].to_dict('index')
+
+    def apply_optimization(r):
+        clicks = r["Clicks"]
+        impressions = r.get("Impressions", 0)
+        roas = r["ROAS"]
+        targeting = str(r.get("Targeting", "")).strip().lower()
+        match_type = str(r.get("Match Type", "")).strip().lower()
+
+        base_bid = float(
+            r.get("Bid") if pd.notna(r.get("Bid")) and r.get("Bid") > 0 else
+            r.get("Ad Group Default Bid") if pd.notna(r.get("Ad Group Default Bid")) and r.get("Ad Group Default Bid") > 0 else
+            r.get("Current Bid", 0) or r.get("CPC", 0) or 0
+        )
+        if base_bid <= 0:
+            return 0.0, "Hold: No Bid/CPC Data", "Hold (No Data)"
+
+        is_eligible_for_boost = (
+            match_type in VISIBILITY_BOOST_ELIGIBLE_TYPES or
+            targeting in VISIBILITY_BOOST_ELIGIBLE_TYPES
+        )
+        if (is_eligible_for_boost and
+                data_days >= VISIBILITY_BOOST_MIN_DAYS and
+                impressions < VISIBILITY_BOOST_MAX_IMPRESSIONS):
+            new_bid = round(base_bid * (1 + VISIBILITY_BOOST_PCT), 2)
+            return new_bid, f"Visibility Boost: Only {impressions} impressions in {data_days} days", "Visibility Boost (+30%)"
+
+        if clicks >= min_clicks and roas > 0:
+            return _classify_and_bid(roas, 0, base_bid, 0.2, "targeting", config)
+
+        ag_stats = adgroup_lookup.get((r["Campaign Name"], r.get("Ad Group Name", "")), {})
+        if ag_stats.get("AG_Clicks", 0) >= min_clicks and ag_stats.get("AG_ROAS", 0) > 0:
+            return _classify_and_bid(ag_stats["AG_ROAS"], 0, base_bid, 0.1, "adgroup", config)
+
+        return base_bid, f"Hold: Insufficient data ({clicks} clicks)", "Hold (Insufficient Data)"
+
+    opt_results = grouped.apply(apply_optimization, axis=1)
+    return (
+        opt_results.apply(lambda x: x[0]),
+        opt_results.apply(lambda x: x[1]),
+        opt_results.apply(lambda x: x[2]),
+    )
+
+
+def build_bucket(rows: int) -> pd.DataFrame:
+    """Synthetic output of the _process_bucket aggregation step."""
+    rng = np.random.default_rng(7)
+    clicks = np.where(rng.random(rows) < 0.5, rng.integers(0, 3, rows), rng.integers(0, 40, rows))
+    spend = np.round(clicks * rng.uniform(0.2, 3.0, rows), 2)
+    sales = np.where(rng.random(rows) < 0.4, 0.0, np.round(spend * rng.uniform(0.1, 8.0, rows), 2))
+    grouped = pd.DataFrame({
+        "Campaign Name": [f"Campaign {i}" for i in rng.integers(0, rows // 200 + 1, rows)],
+        "Ad Group Name": [f"AG {i}" for i in rng.integers(0, 2_000, rows)],
+        "Clicks": clicks,
+        "Spend": spend,
+        "Sales": sales,
+        "Impressions": rng.integers(0, 400, rows),
+        "Orders": rng.integers(0, 5, rows),
+        "Current Bid": np.where(rng.random(rows) < 0.1, np.nan, np.round(rng.uniform(0.0, 3.0, rows), 2)),
+        "CPC": np.where(rng.random(rows) < 0.2, 0.0, np.round(rng.uniform(0.1, 2.5, rows), 3)),
+        "Ad Group Default Bid": np.where(rng.random(rows) < 0.7, np.nan, np.round(rng.uniform(-0.1, 2.0, rows), 2)),
+        "Bid": np.where(rng.random(rows) < 0.5, np.nan, np.round(rng.uniform(-0.1, 4.0, rows), 2)),
+        "Match Type": rng.choice(np.array(["EXACT", "broad", "Phrase", "-", None], dtype=object), rows),
+        "Targeting": rng.choice(np.array(["running shoes", "close-match", "loose-match", "asin=\"B0ABC12345\"", None], dtype=object), rows),
+    })
+    grouped.loc[rng.random(rows) < 0.02, ["Current Bid", "CPC", "Bid", "Ad Group Default Bid"]] = 0.0
+    grouped["ROAS"] = np.where(grouped["Spend"] > 0, grouped["Sales"] / grouped["Spend"], 0)
+    return grouped
+
+
+def build_adgroup_stats(grouped: pd.DataFrame) -> pd.DataFrame:
+    adgroup_stats = grouped.groupby(["Campaign Name", "Ad Group Name"]).agg({
+        "Clicks": "sum", "Spend": "sum", "Sales": "sum", "Orders": "sum"
+    }).reset_index()
+    adgroup_stats["AG_ROAS"] = np.where(adgroup_stats["Spend"] > 0, adgroup_stats["Sales"] / adgroup_stats["Spend"], 0)
+    adgroup_stats["AG_Clicks"] = adgroup_stats["Clicks"]
+    return adgroup_stats
+
+
+def check_group_keys(rows: int):
+    rng = np.random.default_rng(3)
+    segment = pd.DataFrame({
+        "KeywordId": rng.choice(np.array([None, np.nan, "", "123456789", 0, 987654321.0], dtype=object), rows),
+        "TargetingId": rng.choice(np.array([None, "T-42", np.nan, 0.0, " T-7 "], dtype=object), rows),
+        "_targeting_norm": rng.choice(np.array(["running shoes", " trail shoes", "nan"], dtype=object), rows),
+    })
+    expected = segment.apply(
+        lambda r: str(r.get("KeywordId") or r.get("TargetingId") or r["_targeting_norm"]).strip(), axis=1
+    )
+    group_key = segment["_targeting_norm"]
+    for id_col in ("TargetingId", "KeywordId"):
+        ids = segment[id_col].astype(object)
+        group_key = ids.where(_is_truthy(ids), group_key)
+    actual = group_key.astype(str).str.strip()
+    assert expected.equals(actual), "Group key mismatch"
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    grouped = build_bucket(rows)
+    adgroup_stats = build_adgroup_stats(grouped)
+    print(f"Synthetic bucket: {rows:,} targets\n")
+
+    check_group_keys(50_000)
+    print("Group keys            identical to row-wise lambda")
+
+    for data_days in (7, 30):
+        t0 = time.perf_counter()
+        exp_bid, exp_reason, exp_basis = apply_optimization_rowwise(grouped, adgroup_stats, CONFIG, MIN_CLICKS, data_days)
+        t_row = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        new_bid, reason, basis = _compute_bids(grouped, adgroup_stats, CONFIG, MIN_CLICKS, data_days)
+        t_vec = time.perf_counter() - t0
+
+        assert np.array_equal(exp_bid.to_numpy(dtype=float), new_bid, equal_nan=True), "New Bid mismatch"
+        assert list(exp_reason) == list(reason), "Reason mismatch"
+        assert list(exp_basis) == list(basis), "Decision_Basis mismatch"
+        paths = pd.Series(basis).value_counts().to_dict()
+        print(f"data_days={data_days:<3}  row-wise {t_row:7.2f}s | columnar {t_vec:6.3f}s | {t_row / t_vec:6.1f}x  {paths}")
+
+    print("\n✅ Columnar bids identical to row-wise apply_optimization")
+
+
+if __name__ == "__main__":
+    main()
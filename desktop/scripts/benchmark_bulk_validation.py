@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: columnar validate_bulk_export vs the former iterrows() orchestrator.
+
+Builds bulk export frames from cases covering each rule in
+dev_resources/tests/bulk_validation_spec.py (isolation/bleeder negatives, bid
+limits, Auto campaign keywords) plus blank/NaN/malformed edge values, tiles them
+to 50k rows, checks the ValidationResult issues are identical (same codes,
+messages, values and order), and prints timings.
+
+Usage:
+    python scripts/benchmark_bulk_validation.py [rows]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from core.bulk_validation import (
+    NegativeType,
+    ValidationResult,
+    detect_negative_type,
+    validate_auto_campaign,
+    validate_bid_update,
+    validate_bleeder_negative,
+    validate_bulk_export,
+    validate_isolation_negative,
+)
+
+
+def validate_bulk_export_rowwise(df, export_type="negatives", currency="USD", campaign_cache=None):
+    """Former per-row orchestrator (reference implementation)."""
+    all_issues = []
+    campaign_cache = campaign_cache or {}
+    for idx, row in df.iterrows():
+        row_dict = row.to_dict()
+        row_num = idx + 2
+        if export_type == "negatives":
+            match_type = str(row_dict.get("Match Type", "")).lower()
+            neg_type = detect_negative_type(match_type)
+            if neg_type == NegativeType.ISOLATION:
+                all_issues.extend(validate_isolation_negative(row_dict, row_num))
+            elif neg_type == NegativeType.BLEEDER:
+                all_issues.extend(validate_bleeder_negative(row_dict, row_num))
+        if export_type == "bids" or row_dict.get("Bid") or row_dict.get("New Bid"):
+            all_issues.extend(validate_bid_update(row_dict, row_num, currency))
+        campaign_type = campaign_cache.get(row_dict.get("Campaign Name", ""), "Manual")
+        all_issues.extend(validate_auto_campaign(row_dict, row_num, campaign_type))
+    return df, ValidationResult(issues=all_issues)
+
+
+# (Campaign Name, Ad Group Name, Ad Group Id, Match Type, State, Bid)
+NEGATIVE_CASES = [
+    ("Camp A", "", None, "campaign negative exact", "enabled", None),          # valid isolation
+    ("Camp A", "AG 1", None, "campaign negative exact", "enabled", None),      # ISO001
+    ("Camp A", None, "123", "Campaign Negative Broad", "enabled", None),       # ISO001 + ISO002
+    ("Camp A", np.nan, None, " campaign negative phrase", "paused", None),     # ISO002 (no strip) + ISO003
+    ("Camp A", "", None, "campaign negative phrase", "archived", 0.5),         # ISO003 + ISO004
+    ("Camp A", "", None, "campaign negative exact", np.nan, "  "),             # ISO003 ('nan' state)
+    ("Camp B", "AG 2", None, "negative exact", "enabled", None),               # valid bleeder
+    ("Camp B", "", None, "negative phrase", "enabled", None),                  # BLD001
+    ("Camp B", None, np.nan, "negative exact campaign", "enabled", "$1,200.5"),  # BLD001 + BLD002 + BID002 (max)
+    ("Auto Camp", "AG 3", None, "exact", "enabled", "abc"),                    # BID002 (invalid) + AUTO001
+    ("Auto Camp", "AG 3", None, "negative exact", "enabled", 0.01),            # BID002 (min)
+    ("Camp C", "AG 4", None, "broad", "enabled", "nan"),                       # 'nan' string parses
+    ("Camp C", "AG 4", None, None, None, 0),                                   # falsy bid skipped
+]
+
+# (Campaign Name, Match Type, Bid, New Bid)
+BID_CASES = [
+    ("Camp A", "exact", 0.75, None),
+    ("Camp A", "exact", None, 0.05),
+    ("Camp A", "phrase", "", "4000"),
+    ("Auto Camp", "broad", "1_000", None),
+    ("Auto Camp", "close-match", None, None),
+    ("Camp B", "exact", "oops", 1.0),
+    ("Camp B", "exact", 0, np.nan),
+    ("Camp B", "exact", "$0.09", None),
+]
+
+CAMPAIGN_CACHE = {"Auto Camp": "Auto", "Camp A": "Manual"}
+
+
+def build_frame(cases, columns, rows):
+    reps = rows // len(cases) + 1
+    return pd.DataFrame(cases * reps, columns=columns).iloc[:rows].reset_index(drop=True)
+
+
+def run(name, df, **kwargs):
+    t0 = time.perf_counter()
+    _, expected = validate_bulk_export_rowwise(df, **kwargs)
+    t_row = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    _, actual = validate_bulk_export(df, **kwargs)
+    t_vec = time.perf_counter() - t0
+    assert expected.issues == actual.issues, f"{name}: issues differ"
+    print(f"{name:<10} {len(actual.issues):>7,} issues | row-wise {t_row:6.2f}s | columnar {t_vec:6.3f}s | {t_row / t_vec:6.1f}x")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    print(f"Bulk exports: {rows:,} rows\n")
+
+    negatives = build_frame(NEGATIVE_CASES, ["Campaign Name", "Ad Group Name", "Ad Group Id", "Match Type", "State", "Bid"], rows)
+    run("negatives", negatives, export_type="negatives", currency="USD", campaign_cache=CAMPAIGN_CACHE)
+
+    bids = build_frame(BID_CASES, ["Campaign Name", "Match Type", "Bid", "New Bid"], rows)
+    run("bids", bids, export_type="bids", currency="AED", campaign_cache=CAMPAIGN_CACHE)
+
+    harvest = bids.drop(columns=["Bid"]).rename(columns={"New Bid": "Max Bid"})
+    harvest["New Bid"] = np.where(np.arange(rows) % 3 == 0, 0.5, np.nan)
+    run("harvest", harvest, export_type="harvest", currency="USD")
+
+    print("\n✅ Columnar validation identical to per-row validators")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compact DataHub session store vs the former full object-dtype frames.
+
+Builds a synthetic Search Term Report, Advertised Product Report, bulk ID file and
+category map, stores them through DataHub (bare-mode session state) and runs the
+hub's enrichment, then:
+  - checks get_data / get_enriched_data / get_summary return exactly the frames and
+    numbers the former store held (same values, same dtypes), with the bulk ID index
+    reading the compact bulk frame
+  - checks enriched_data is held as a sidecar of the STR (only added columns stored)
+  - prints the per-session memory report and the cost of rebuilding frames on access
+
+Usage:
+    python scripts/benchmark_compact_session.py [str_rows]
+"""
+
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import streamlit as st
+
+from core.compact_frame import CompactFrame
+from core.data_hub import DataHub
+from core.id_index import BulkIdIndex
+from core.mapping_engine import MappingEngine
+
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+
+def make_datasets(rows, seed=11):
+    rng = np.random.default_rng(seed)
+    n_camp, n_ag = 300, 1_200
+    campaigns = np.array([f"SP | Brand {i % 30} | {['Exact', 'Broad', 'Auto', 'PT'][i % 4]} {i}" for i in range(n_camp)], dtype=object)
+    ag_camp = rng.integers(0, n_camp, n_ag)
+    ad_groups = np.array([f"AG {i} {['bottles', 'bags', 'toys'][i % 3]}" for i in range(n_ag)], dtype=object)
+    keywords = np.array([f"kids water bottle {i}" for i in range(8_000)], dtype=object)
+    asins = np.array([f"B0{i:08d}" for i in range(2_000)], dtype=object)
+
+    ag = rng.integers(0, n_ag, rows)
+    targeting = np.where(rng.random(rows) < 0.7, rng.choice(keywords, rows),
+                         'asin="' + rng.choice(asins, rows).astype(object) + '"')
+    spend = rng.gamma(1.3, 4, rows).round(2)
+    str_df = pd.DataFrame({
+        'Date': pd.Timestamp('2026-08-01') + pd.to_timedelta(rng.integers(0, 30, rows), unit='D'),
+        'Campaign Name': campaigns[ag_camp[ag]],
+        'Ad Group Name': ad_groups[ag],
+        'Targeting': targeting,
+        'Match Type': rng.choice(['EXACT', 'BROAD', 'PHRASE', 'PT', 'AUTO'], rows).astype(object),
+        'Customer Search Term': np.array([f"search term {i}" for i in rng.integers(0, rows // 3, rows)], dtype=object),
+        'Portfolio name': rng.choice(['Core', 'Launch', None], rows),
+        'Impressions': rng.integers(0, 2_000, rows),
+        'Clicks': rng.integers(0, 40, rows),
+        'Orders': rng.poisson(0.4, rows),
+        'Spend': spend,
+        'Sales': np.where(rng.random(rows) < 0.25, rng.uniform(20, 900, rows), 0).round(2),
+        'CPC': spend / np.maximum(rng.integers(1, 9, rows), 1),
+    })
+
+    apr = pd.DataFrame({
+        'Campaign Name': campaigns[ag_camp],
+        'Ad Group Name': ad_groups,
+        'SKU': [f"SKU-{i % 400}" for i in range(n_ag)],
+        'ASIN': rng.choice(asins, n_ag),
+    })
+
+    kw_rows = 20_000
+    kw_ag = rng.integers(0, n_ag, kw_rows)
+    bulk = pd.DataFrame({
+        'Entity': 'Keyword',
+        'Campaign Name': campaigns[ag_camp[kw_ag]],
+        'Ad Group Name': ad_groups[kw_ag],
+        'CampaignId': 300_000_000_000_000 + ag_camp[kw_ag],
+        'AdGroupId': 400_000_000_000_000 + kw_ag,
+        'KeywordId': (500_000_000_000_000 + np.arange(kw_rows)).astype(str),
+        'Customer Search Term': rng.choice(keywords, kw_rows),
+        'Match Type': rng.choice(['exact', 'broad', 'phrase'], kw_rows).astype(object),
+        'Ad Group Default Bid': rng.uniform(0.2, 3, kw_rows).round(2),
+    })
+
+    category_map = pd.DataFrame({
+        'SKU': [f"SKU-{i}" for i in range(400)],
+        'Category': [['Drinkware', 'Bags', 'Toys'][i % 3] for i in range(400)],
+        'Sub-Category': [f"Sub {i % 17}" for i in range(400)],
+    })
+    return str_df, apr, bulk, category_map
+
+
+def former_enrich(str_df, apr, bulk, category_map):
+    """Former DataHub._enrich_data over the stored DataFrames (reference implementation)."""
+    enriched = str_df.copy()
+    enriched, _ = MappingEngine.map_sku_from_apr(enriched, apr)
+    enriched, _ = MappingEngine.map_ids_from_bulk(enriched, BulkIdIndex(bulk))
+    enriched, _ = MappingEngine.map_category(enriched, category_map)
+    return enriched
+
+
+def former_summary(str_df, apr, bulk, category_map):
+    """Former DataHub.get_summary over the stored DataFrames (reference implementation)."""
+    return {
+        'search_terms': len(str_df),
+        'total_clicks': str_df['Clicks'].sum(),
+        'total_spend': str_df['Spend'].sum(),
+        'campaigns': str_df['Campaign Name'].nunique(),
+        'advertised_products': len(apr),
+        'unique_asins': apr['ASIN'].nunique(),
+        'mapped_campaigns': bulk['Campaign Name'].nunique(),
+        'mapped_adgroups': bulk['Ad Group Name'].nunique(),
+        'categorized_skus': len(category_map),
+    }
+
+
+def deep_mb(df):
+    return df.memory_usage(index=True, deep=True).sum() / 1024 ** 2
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    str_df, apr, bulk, category_map = make_datasets(rows)
+
+    t0 = time.perf_counter()
+    expected = former_enrich(str_df, apr, bulk, category_map)
+    t_former_enrich = time.perf_counter() - t0
+
+    hub = DataHub()
+    t0 = time.perf_counter()
+    hub._store('search_term_report', str_df)
+    hub._store('advertised_product_report', apr)
+    hub._store('bulk_id_mapping', bulk)
+    hub._store('category_mapping', category_map)
+    t_store = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    hub._enrich_data()
+    t_enrich = time.perf_counter() - t0
+
+    # Same frames, same dtypes
+    for name, original in [('search_term_report', str_df), ('advertised_product_report', apr),
+                           ('bulk_id_mapping', bulk), ('category_mapping', category_map)]:
+        pd.testing.assert_frame_equal(hub.get_data(name), original)
+    t0 = time.perf_counter()
+    enriched = hub.get_enriched_data()
+    t_rebuild = time.perf_counter() - t0
+    pd.testing.assert_frame_equal(enriched, expected)
+    assert {'SKU_advertised', 'CampaignId', 'KeywordId', 'Category'} <= set(enriched.columns)
+    assert enriched['KeywordId'].notna().any() and enriched['Category'].notna().any()
+    assert hub.get_summary() == former_summary(str_df, apr, bulk, category_map)
+
+    stored = st.session_state.unified_data['enriched_data']
+    assert isinstance(stored, CompactFrame) and stored.base is st.session_state.unified_data['search_term_report']
+    assert set(stored.memory()['sidecar_columns']) == set(expected.columns) - set(str_df.columns)
+
+    # Stored frames hand out independent copies
+    first = hub.get_data('search_term_report')
+    first.loc[:, 'Spend'] = -1.0
+    assert (hub.get_data('search_term_report')['Spend'] >= 0).all()
+
+    former_mb = sum(deep_mb(df) for df in (str_df, expected, apr, bulk, category_map))
+    report = hub.get_memory_report()
+    stored_mb = report.loc[report['Dataset'] == 'TOTAL', 'Stored MB'].iloc[0]
+
+    with pd.option_context('display.width', 120, 'display.float_format', '{:,.1f}'.format):
+        print(report.to_string(index=False))
+    print(f"\n{rows:,} STR rows | former session store {former_mb:7.1f} MB | compact {stored_mb:7.1f} MB "
+          f"| {former_mb / stored_mb:4.1f}x smaller")
+    print(f"store {t_store:5.2f}s | enrich {t_enrich:5.2f}s (former {t_former_enrich:5.2f}s) "
+          f"| rebuild enriched_data on access {t_rebuild:5.2f}s")
+    print("\n✅ Compact session store returns the same frames in a fraction of the memory")
+
+
+if __name__ == '__main__':
+    main()
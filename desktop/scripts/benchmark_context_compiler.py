@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Benchmark: token-budgeted chat context vs the former full knowledge graph prompt.
+
+Builds the assistant's knowledge graph for a small and a large synthetic account
+(DataHub in bare-mode session state, an optimizer run, a stand-in impact database),
+then for a set of analyst questions:
+  - compares the former prompt (system prompt with the full methodology + the whole
+    knowledge graph as indent=2 JSON) with the compiled one, in estimated tokens
+  - checks the compiled context stays within ASSISTANT_CONTEXT_TOKENS at every account
+    size, is valid JSON, and holds each included section exactly as summarize() left it
+  - checks ranking: methodology questions get platform_knowledge, a question naming a
+    search term gets the sections that mention it, and sections that don't fit a tight
+    budget are named in "_omitted"
+  - checks per-request metrics are recorded and prints the prompt build time
+
+Usage:
+    python scripts/benchmark_context_compiler.py [large_account_rows]
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import streamlit as st
+
+# Configure logging before AssistantModule's basicConfig(filename='assistant_debug.log') can,
+# so running the benchmark never writes a log file into the tree.
+logging.basicConfig(handlers=[logging.NullHandler()], force=True)
+
+import features.assistant as module
+from core.data_hub import DataHub
+from features.assistant import AssistantModule
+from features.assistant_context import (ASSISTANT_CONTEXT_TOKENS, ASSISTANT_CONTEXT_TOP_N, ContextCompiler,
+                                        context_metrics, estimate_tokens, summarize)
+
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+QUESTIONS = [
+    "Where am I losing money?",
+    "What should I scale next month?",
+    "How is the decision impact calculated, and why is market drag excluded?",
+    "Analyze the search term 'kids water bottle 17 steel 3' across my campaigns",
+    "What's my biggest opportunity?",
+]
+
+
+def make_account(rows, n_camp, n_kw, seed):
+    rng = np.random.default_rng(seed)
+    campaigns = np.array([f"SP | Brand {i % 40} | {['Exact', 'Broad', 'Auto', 'PT'][i % 4]} {i}" for i in range(n_camp)], dtype=object)
+    kw = rng.integers(0, n_kw, rows)
+    camp = (kw * 7 + rng.integers(0, 3, rows)) % n_camp  # terms run in a few campaigns each
+    str_df = pd.DataFrame({
+        'Date': pd.Timestamp('2026-06-01') + pd.to_timedelta(rng.integers(0, 60, rows), unit='D'),
+        'Campaign Name': campaigns[camp],
+        'Ad Group Name': np.array([f"AG {c % 90}" for c in camp], dtype=object),
+        'Match Type': rng.choice(['EXACT', 'BROAD', 'PHRASE', 'AUTO'], rows).astype(object),
+        'Customer Search Term': np.array([f"kids water bottle {k} steel {k % 7}" for k in kw], dtype=object),
+        'KeywordId': (700_000_000_000 + kw).astype(str).astype(object),
+        'Impressions': rng.integers(0, 2_000, rows),
+        'Clicks': rng.integers(0, 40, rows),
+        'Orders': rng.poisson(0.4, rows),
+        'Spend': rng.gamma(1.3, 4, rows).round(2),
+        'Sales': np.where(rng.random(rows) < 0.25, rng.uniform(20, 900, rows), 0).round(2),
+    })
+    terms = str_df['Customer Search Term'].drop_duplicates().to_numpy()
+    ids = str_df['KeywordId'].drop_duplicates().to_numpy()
+    n = len(ids)
+    opt_res = {
+        'harvest': pd.DataFrame({'Customer Search Term': terms[: len(terms) // 10], 'Spend': 10.0, 'Sales': 60.0,
+                                 'Orders': 2, 'CPC': 0.8}),
+        'neg_kw': pd.DataFrame({'Term': terms[len(terms) // 20: len(terms) // 5], 'Spend': 4.0}),
+        'neg_pt': pd.DataFrame({'Term': ['asin="B0000000001"'], 'Spend': 3.0}),
+        'direct_bids': pd.DataFrame({'KeywordId': ids, 'CPC': rng.uniform(0.3, 2, n).round(2),
+                                     'New Bid': rng.uniform(0.3, 2.5, n).round(2), 'Clicks': rng.integers(0, 60, n),
+                                     'Reason': 'Scale winner'}),
+        'agg_bids': pd.DataFrame(),
+        'simulation': {'scenarios': {'current': {'spend': 12_000, 'sales': 40_000, 'roas': 3.3},
+                                     'expected': {'spend': 11_100, 'sales': 43_500, 'roas': 3.9}}},
+        'run_id': f"run-{seed}",
+    }
+    return str_df, opt_res
+
+
+class StandInDb:
+    def get_action_impact(self, client_id, **kwargs):
+        return pd.DataFrame()
+
+
+def former_prompt(assistant):
+    """Former chat prompt: full system prompt + whole knowledge graph (reference implementation)."""
+    data_context = assistant._get_context()
+    return [
+        {"role": "system", "content": assistant.system_prompt},
+        {"role": "system", "content": f"KNOWLEDGE GRAPH (Your complete dataset analysis):\n{data_context}"}
+    ]
+
+
+def prompt_tokens(messages):
+    return sum(estimate_tokens(m['content']) for m in messages)
+
+
+def load_account(rows, n_camp, n_kw, seed):
+    str_df, opt_res = make_account(rows, n_camp, n_kw, seed)
+    DataHub()._store('search_term_report', str_df)
+    st.session_state['active_account_id'] = f"acct_{seed}"
+    st.session_state['data_upload_timestamp'] = float(seed)
+    st.session_state['latest_optimizer_run'] = opt_res
+
+
+def check_compiled(assistant, question):
+    """Compiled prompt for question; checks budget, JSON validity and section content."""
+    history = [{"role": "user", "content": question}]
+    t0 = time.perf_counter()
+    messages = assistant._build_chat_messages(history)
+    elapsed = time.perf_counter() - t0
+    metrics = st.session_state['assistant_context_metrics']
+    context = messages[1]['content'].split("\n", 1)[1]
+    assert metrics['context_tokens'] == estimate_tokens(context) <= ASSISTANT_CONTEXT_TOKENS, metrics
+    compiled = json.loads(context)
+    knowledge, _ = assistant._get_knowledge()
+    sections = dict(knowledge, platform_knowledge=assistant._get_platform_methodology())
+    for name in metrics['sections']:
+        top_n = metrics['trimmed'].get(name, ASSISTANT_CONTEXT_TOP_N)
+        assert compiled[name] == json.loads(json.dumps(summarize(sections[name], top_n), default=str)), name
+    assert set(metrics['sections']) | set(metrics['omitted']) == set(sections)
+    assert messages[0]['content'] == assistant.chat_system_prompt and messages[2:] == history
+    return metrics, compiled, elapsed
+
+
+def main():
+    large_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+    module.get_db_manager = lambda test_mode=False: StandInDb()
+    assistant = AssistantModule()
+    assert "START DOCUMENTATION" in assistant.chat_system_prompt
+    assert assistant._get_platform_methodology() not in assistant.chat_system_prompt
+
+    results = {}
+    for label, rows, n_camp, n_kw, seed in [("small", 20_000, 40, 2_000, 1), ("large", large_rows, 1_500, 60_000, 2)]:
+        load_account(rows, n_camp, n_kw, seed)
+        t0 = time.perf_counter()
+        former = former_prompt(assistant)  # builds (and caches) the knowledge graph
+        t_build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        former = former_prompt(assistant)
+        t_former = time.perf_counter() - t0
+        runs = [check_compiled(assistant, q) for q in QUESTIONS]
+        results[label] = (rows, prompt_tokens(former), t_build, t_former, runs)
+
+    # Ranking follows the question
+    _, (_, _, _, _, runs) = list(results.items())[1]
+    by_question = dict(zip(QUESTIONS, runs))
+    methodology = by_question[QUESTIONS[2]][0]['sections']
+    assert methodology.index('platform_knowledge') < 3 and 'module_context' in methodology[:3], methodology
+    named, named_context, _ = by_question[QUESTIONS[3]]
+    assert 'kids water bottle 17 steel 3' in json.dumps(named_context) or named['omitted'], named
+    losing = by_question[QUESTIONS[0]][0]['sections']
+    assert losing[0] == 'strategic_insights', losing
+    assert 'platform_knowledge' not in losing[:5]
+
+    # A tight budget names what it left out
+    knowledge, _ = assistant._get_knowledge()
+    tight = ContextCompiler(budget_tokens=800).compile(knowledge, QUESTIONS[0])
+    assert tight.tokens <= 800 and tight.omitted and json.loads(tight.text)['_omitted'] == tight.omitted
+
+    stats = context_metrics.stats()
+    assert stats['requests'] == len(QUESTIONS) * len(results)
+
+    print(f"context budget {ASSISTANT_CONTEXT_TOKENS:,} tokens | top {ASSISTANT_CONTEXT_TOP_N} entries per list")
+    for label, (rows, former_tokens, t_build, t_former, runs) in results.items():
+        compiled_tokens = [m['prompt_tokens'] for m, _, _ in runs]
+        build_ms = [t * 1000 for _, _, t in runs]
+        avg = sum(compiled_tokens) / len(compiled_tokens)
+        print(f"{label:5s} account {rows:>9,} rows | former prompt ~{former_tokens:>7,} tokens "
+              f"(graph build {t_build:5.2f}s, cached {t_former * 1000:6.1f} ms) | compiled ~{avg:>6,.0f} tokens "
+              f"({former_tokens / avg:4.1f}x smaller), built in {max(build_ms):5.1f} ms max")
+    for question, (metrics, _, _) in by_question.items():
+        print(f"  {question[:58]:58s} -> {', '.join(metrics['sections'][:3])}"
+              f"{' | omitted ' + str(len(metrics['omitted'])) if metrics['omitted'] else ''}")
+    print(f"context metrics: avg prompt {stats['avg_prompt_tokens']:,} tokens, "
+          f"avg build {stats['avg_build_ms']} ms, p95 {stats['p95_build_ms']} ms")
+    print("\n✅ Chat prompts fit the token budget with the sections the question needs")
+
+
+if __name__ == '__main__':
+    main()
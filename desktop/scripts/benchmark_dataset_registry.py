@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Benchmark: shared account dataset registry vs per-session st.cache_data copies.
+
+Simulates several sessions on the same account reading target stats (account actuals)
+and impact data through features.impact.data.fetchers with a stand-in database, then:
+  - checks every session's frames and summaries equal the former fetchers' results
+  - checks views are read-only where shared (an in-place write raises), that assigning a
+    column or mutating a summary in one session doesn't leak into another, and that
+    concurrent first reads load the dataset once
+  - checks an upload (invalidate) makes the next read reload
+  - compares memory held for N sessions: the former st.cache_data entries (one pickle per
+    cache_version) plus each session's unpickled copy, vs the registry's Arrow tables
+    plus each session's view; and the per-read cost
+
+Usage:
+    python scripts/benchmark_dataset_registry.py [rows] [sessions]
+"""
+
+import gc
+import importlib.util
+import os
+import pickle
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from core.dataset_registry import dataset_registry
+
+# Load the fetchers module by path (the features.impact package also imports its plotly UI)
+_spec = importlib.util.spec_from_file_location(
+    'impact_fetchers', os.path.join(os.path.dirname(__file__), '../features/impact/data/fetchers.py'))
+fetchers = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fetchers)
+
+
+def make_target_stats(rows, seed=5):
+    rng = np.random.default_rng(seed)
+    n_camp = 400
+    # Strings as the DB driver returns them: a fresh object per row
+    campaigns = [f"SP | Brand {i % 40} | {['Exact', 'Broad', 'Auto', 'PT'][i % 4]} {i}" for i in range(n_camp)]
+    camp = rng.integers(0, n_camp, rows)
+    kw = rng.integers(0, rows // 5, rows)
+    return pd.DataFrame({
+        'Date': pd.Timestamp('2026-01-05') + pd.to_timedelta(7 * rng.integers(0, 40, rows), unit='D'),
+        'Campaign Name': [''.join(campaigns[c]) for c in camp],
+        'Ad Group Name': [f"AG {c % 97}" for c in camp],
+        'Targeting': [f"kids water bottle {k}" for k in kw],
+        'Customer Search Term': [f"kids water bottle {k} steel" for k in kw],
+        'Match Type': rng.choice(['exact', 'broad', 'phrase', None], rows),
+        'Spend': rng.gamma(1.3, 4, rows).round(2),
+        'Sales': np.where(rng.random(rows) < 0.2, rng.uniform(20, 900, rows), 0).round(2),
+        'Orders': rng.poisson(0.3, rows),
+        'Clicks': rng.integers(0, 15, rows),
+        'Impressions': rng.integers(0, 900, rows),
+    })
+
+
+def make_impact(rows, seed=6):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'action_date': pd.Timestamp('2026-06-01') + pd.to_timedelta(rng.integers(0, 90, rows), unit='D'),
+        'action_type': rng.choice(['BID_CHANGE', 'NEGATIVE', 'HARVEST'], rows),
+        'target_text': [f"target {i}" for i in rng.integers(0, rows // 2, rows)],
+        'before_sales': rng.uniform(0, 500, rows),
+        'before_clicks': rng.integers(0, 80, rows),
+        'observed_after_sales': rng.uniform(0, 500, rows),
+        'decision_impact': rng.normal(0, 50, rows),
+        'market_tag': rng.choice(['Offensive Win', 'Defensive Win', 'Gap', None], rows),
+    })
+    summary = {'total_actions': rows, 'validated': {'decision_impact': 1234.5}, 'by_action_type': {'BID_CHANGE': 10}}
+    return df, summary
+
+
+class StandInDb:
+    """Database stand-in: returns fresh frames like a real read; counts reads."""
+
+    def __init__(self, stats, impact):
+        self.stats, self.impact = stats, impact
+        self.reads = 0
+
+    def get_target_stats_df(self, client_id):
+        self.reads += 1
+        time.sleep(0.05)  # Query latency
+        df = self.stats.copy(deep=True)
+        df['Date'] = df['Date'].dt.date  # DB returns dates
+        return df
+
+    def get_action_impact(self, client_id, before_days=14, after_days=14):
+        self.reads += 1
+        return self.impact[0].copy(deep=True)
+
+    def get_impact_summary(self, client_id, before_days=14, after_days=14):
+        return pickle.loads(pickle.dumps(self.impact[1]))
+
+
+def former_fetchers(db):
+    """Former fetchers under st.cache_data: one pickle per cache key, unpickled on every call (reference)."""
+    cache = {}
+
+    def cached(fn):
+        def wrapper(*args):
+            key = (fn.__name__,) + args
+            if key not in cache:
+                cache[key] = pickle.dumps(fn(*args), protocol=pickle.HIGHEST_PROTOCOL)
+            return pickle.loads(cache[key])
+        return wrapper
+
+    @cached
+    def fetch_impact_data(client_id, test_mode, before_days, after_days, cache_version):
+        impact_df = db.get_action_impact(client_id, before_days=before_days, after_days=after_days)
+        full_summary = db.get_impact_summary(client_id, before_days=before_days, after_days=after_days)
+        return impact_df, full_summary
+
+    @cached
+    def fetch_account_actuals(client_id, cache_version):
+        df = db.get_target_stats_df(client_id)
+        if df.empty:
+            return pd.DataFrame()
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df
+
+    return fetch_impact_data, fetch_account_actuals, cache
+
+
+def session_versions(sessions):
+    # Sessions that never uploaded share 'init'; one colleague uploaded earlier today
+    return ["v19_perf_init"] * (sessions - 1) + ["v19_perf_1760612345.1"]
+
+
+def traced(fn):
+    """Result of fn and the bytes it left allocated (Python heap + Arrow pool)."""
+    gc.collect()
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, (held + pa.total_allocated_bytes() - arrow_before) / 1024 ** 2
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    client_id = 'bench_client'
+    db = StandInDb(make_target_stats(rows), make_impact(rows // 20))
+    fetchers.get_db_manager = lambda test_mode=False: db
+    versions = session_versions(sessions)
+
+    # --- Former: per-cache_version pickles + one unpickled copy per session ---
+    old_impact, old_actuals, old_cache = former_fetchers(db)
+
+    def run_former():
+        return [(old_actuals(client_id, v), old_impact(client_id, False, 14, 14, v)) for v in versions]
+
+    former, t_former, mb_former = traced(run_former)
+    former_reads, db.reads = db.reads, 0
+
+    # --- Registry: one Arrow copy per account + one view per session ---
+    dataset_registry.invalidate()
+
+    def run_registry():
+        return [(fetchers.fetch_account_actuals(client_id, v),
+                 fetchers.fetch_impact_data(client_id, False, 14, 14, v)) for v in versions]
+
+    shared, t_shared, mb_shared = traced(run_registry)
+    shared_reads = db.reads
+
+    # Same frames and summaries in every session
+    for (old_df, (old_imp, old_sum)), (new_df, (new_imp, new_sum)) in zip(former, shared):
+        pd.testing.assert_frame_equal(new_df, old_df)
+        pd.testing.assert_frame_equal(new_imp, old_imp)
+        assert new_sum == old_sum
+    assert shared_reads == 2, shared_reads  # actuals + impact, once for the account
+
+    # Copy on write: shared columns are read-only, private changes don't leak
+    first_df, (first_imp, first_sum) = shared[0]
+    other_df, (other_imp, other_sum) = shared[1]
+    try:
+        first_df.loc[first_df['Spend'] > 5, 'Spend'] = 0.0
+        raise AssertionError("in-place write into a shared column did not raise")
+    except ValueError:
+        pass
+    first_imp['is_mature'] = True
+    first_imp['decision_impact'] = 0.0
+    first_sum['validated']['confidence'] = 'High'
+    assert 'is_mature' not in other_imp.columns and other_imp['decision_impact'].ne(0).any()
+    assert 'confidence' not in other_sum['validated']
+    subset = first_df[first_df['Clicks'] > 3].copy()
+    subset.loc[:, 'Spend'] = 0.0  # private copies are writable
+    assert other_df['Spend'].gt(0).any()
+
+    # Concurrent first reads load once
+    dataset_registry.invalidate(client_id)
+    db.reads = 0
+    threads = [threading.Thread(target=fetchers.fetch_account_actuals, args=(client_id, v)) for v in versions]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert db.reads == 1, db.reads
+
+    # Upload invalidates: next read reloads
+    dataset_registry.invalidate(client_id)
+    fetchers.fetch_account_actuals(client_id, versions[0])
+    assert db.reads == 2, db.reads
+
+    # Per-read cost once loaded
+    n = 20
+    t0 = time.perf_counter()
+    for _ in range(n):
+        old_actuals(client_id, versions[0])
+    t_old_read = (time.perf_counter() - t0) / n
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fetchers.fetch_account_actuals(client_id, versions[0])
+    t_new_read = (time.perf_counter() - t0) / n
+
+    del first_df, first_imp, other_df, other_imp, subset
+    stats = dataset_registry.stats()
+    print(f"{rows:,} target_stats rows + {rows // 20:,} impact rows | {sessions} sessions on one account")
+    print(f"former st.cache_data   {mb_former:7.1f} MB held ({len(old_cache)} pickled entries + {sessions} copies) "
+          f"| {former_reads} DB reads | {t_former:5.2f}s")
+    print(f"shared registry        {mb_shared:7.1f} MB held (1 Arrow copy per dataset + {sessions} views) "
+          f"| {shared_reads} DB reads | {t_shared:5.2f}s | {mb_former / mb_shared:4.1f}x less memory")
+    print(f"read once loaded       former {t_old_read * 1000:6.1f} ms | registry view {t_new_read * 1000:6.1f} ms")
+    print(f"registry stats: {stats['entries']} entries, {stats['bytes'] / 1024 ** 2:.1f} MB, "
+          f"{stats['hits']} hits / {stats['misses']} misses, {stats['fallbacks']} fallbacks")
+    print("\n✅ Sessions on one account share one read-only copy of each dataset")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pruned batch ExactMatcher vs the former token-candidate difflib scan.
+
+Builds an account with 20k exact keywords over a small vocabulary (so common tokens
+like "for", "kids", "set" produce large candidate sets), checks that find_matches
+returns the same (match, score) as the former find_match on a sample of search terms
+at the 0.90 and 0.85 (DEDUPE_SIMILARITY) thresholds (equal-scoring keywords resolve to
+the lexicographically first), then times find_matches on up to 1M search terms.
+
+Usage:
+    python scripts/benchmark_exact_matcher.py [max_terms]
+"""
+
+import difflib
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from utils.matchers import ExactMatcher
+
+COMMON = ["for", "kids", "set", "with", "and", "women", "men", "pack", "of", "the"]
+PRODUCTS = ["water bottle", "yoga mat", "lunch box", "school bag", "phone case", "desk lamp",
+            "toy car", "puzzle", "crayons", "notebook", "backpack", "steel flask", "sipper",
+            "tiffin", "pencil box", "art kit", "building blocks", "doll house", "board game"]
+MODIFIERS = ["blue", "pink", "large", "small", "1l", "500ml", "insulated", "leakproof", "premium",
+             "cute", "cartoon", "stainless", "bpa free", "gift", "combo", "2", "3", "4", "xl"]
+
+
+class ExactMatcherReference:
+    """Former ExactMatcher (reference implementation)."""
+
+    def __init__(self, df):
+        match_col = "Match Type" if "Match Type" in df.columns else "Match"
+        match_types = df[match_col].astype(str).fillna("")
+        exact_rows = df[match_types.str.contains("exact", case=False, na=False)]
+        term_col = "Customer Search Term" if "Customer Search Term" in df.columns else "Term"
+        self.exact_keywords = set(exact_rows[term_col].astype(str).apply(self.normalize_text).unique())
+        self.token_index = defaultdict(set)
+        for kw in self.exact_keywords:
+            for t in self.get_tokens(kw):
+                self.token_index[t].add(kw)
+
+    def normalize_text(self, s):
+        if not isinstance(s, str): return ""
+        return re.sub(r'[^a-zA-Z0-9\s]', '', s.lower())
+
+    def get_tokens(self, s):
+        return set(self.normalize_text(s).split())
+
+    def candidates(self, norm_term):
+        """Keywords sharing a token with norm_term (the set find_match scores)."""
+        found = set()
+        for t in self.get_tokens(norm_term):
+            found.update(self.token_index.get(t, ()))
+        return found
+
+    def find_match(self, term, threshold=0.90):
+        norm_term = self.normalize_text(str(term))
+        if not norm_term: return None, 0.0
+        if norm_term in self.exact_keywords: return norm_term, 1.0
+        candidates = set()
+        for t in self.get_tokens(norm_term):
+            if t in self.token_index:
+                candidates.update(self.token_index[t])
+        if not candidates: return None, 0.0
+        best_match, best_score = None, 0.0
+        for cand in candidates:
+            score = difflib.SequenceMatcher(None, norm_term, cand).ratio()
+            if score > best_score:
+                best_score, best_match = score, cand
+        if best_score >= threshold: return best_match, best_score
+        return None, 0.0
+
+
+def random_phrases(rng, n):
+    product = rng.choice(PRODUCTS, n)
+    mod = rng.choice(MODIFIERS, n)
+    common = rng.choice(COMMON, n)
+    tail = rng.choice(["kids", "girls", "boys", "school", "office", "travel", "gym", ""], n)
+    shape = rng.integers(0, 4, n)
+    phrases = np.where(shape == 0, mod + " " + product,
+              np.where(shape == 1, product + " " + common + " " + tail,
+              np.where(shape == 2, mod + " " + product + " " + common + " " + tail,
+                       product + " " + mod)))
+    return pd.Series(phrases).str.strip().str.replace(r"\s+", " ", regex=True)
+
+
+def perturb(rng, phrases):
+    """Typos, plurals, punctuation and word drops so terms land near (not on) keywords."""
+    out = []
+    for p, kind, pos in zip(phrases, rng.integers(0, 5, len(phrases)), rng.random(len(phrases))):
+        i = int(pos * len(p))
+        if kind == 0:
+            p = p[:i] + p[i + 1:]
+        elif kind == 1:
+            p = p + "s"
+        elif kind == 2:
+            p = p[:i] + "-" + p[i:].upper()
+        elif kind == 3:
+            p = " ".join(p.split()[:-1]) or p
+        out.append(p)
+    return out
+
+
+def build_terms(rng, keywords, n):
+    kinds = rng.integers(0, 3, n)
+    near = perturb(rng, rng.choice(keywords, n))
+    fresh = random_phrases(rng, n).tolist()
+    exact = rng.choice(keywords, n).tolist()
+    return [e if k == 0 else (near[i] if k == 1 else fresh[i]) for i, (k, e) in enumerate(zip(kinds, exact))]
+
+
+def main():
+    max_terms = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(11)
+    keywords = random_phrases(rng, 60_000).drop_duplicates().head(20_000).tolist()
+    df = pd.DataFrame({
+        "Customer Search Term": keywords + random_phrases(rng, 5_000).tolist(),
+        "Match Type": ["Exact"] * len(keywords) + ["Broad"] * 5_000,
+    })
+
+    t0 = time.perf_counter()
+    reference = ExactMatcherReference(df)
+    t_ref_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    matcher = ExactMatcher(df)
+    t_build = time.perf_counter() - t0
+    assert matcher.exact_keywords == reference.exact_keywords
+    print(f"{len(matcher.exact_keywords):,} exact keywords | build former {t_ref_build:.2f}s | new {t_build:.2f}s\n")
+
+    sample = build_terms(rng, keywords, 3_000) + ["", "   ", "for", "kids set", None, 12345]
+    for threshold in (0.90, 0.85):
+        t0 = time.perf_counter()
+        expected = [reference.find_match(t, threshold) for t in sample]
+        t_ref = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        actual = matcher.find_matches(sample, threshold)
+        t_new = time.perf_counter() - t0
+        ties = 0
+        for term, (e_match, e_score), (a_match, a_score) in zip(sample, expected, actual):
+            assert e_score == a_score, (term, e_match, e_score, a_match, a_score)
+            if e_match != a_match:
+                # Equal-scoring keywords: the former scan picked one in set iteration order,
+                # find_matches the lexicographically first
+                norm = matcher.normalize_text(str(term))
+                tied = [c for c in reference.candidates(norm)
+                        if difflib.SequenceMatcher(None, norm, c).ratio() == e_score]
+                assert a_match == min(tied), (term, a_match, tied)
+                ties += 1
+        assert [matcher.find_match(t, threshold) for t in sample[:200]] == actual[:200]
+        matched = sum(m is not None for m, _ in actual)
+        print(f"threshold {threshold:.2f}: {len(sample):,} terms, {matched:,} matched ({ties} ties) | "
+              f"former {t_ref:6.2f}s ({len(sample) / t_ref:8,.0f}/s) | new {t_new:6.2f}s ({len(sample) / t_new:8,.0f}/s)")
+
+    print()
+    n = 10_000
+    while n <= max_terms:
+        terms = build_terms(rng, keywords, n)
+        t0 = time.perf_counter()
+        results = matcher.find_matches(terms, 0.90)
+        elapsed = time.perf_counter() - t0
+        matched = sum(m is not None for m, _ in results)
+        print(f"find_matches {n:>9,} terms ({len(set(terms)):>9,} unique) | {elapsed:7.2f}s | "
+              f"{n / elapsed:9,.0f} terms/s | {matched:,} matched")
+        n *= 10
+
+    print("\n✅ ExactMatcher.find_matches identical to the former difflib scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Benchmark: optimizer feature frame vs per-strategy feature derivation.
+
+Builds a synthetic search term report (default 200k rows) with mixed-case/padded
+terms, asin= / category= expressions, auto targeting spellings, harvest destination
+campaigns and missing Match Types, then checks that:
+  - build_feature_frame(...).df equals the former prepare_data (row-wise normalization)
+  - the precomputed keys reproduce each strategy's former masks and cleaned terms
+  - the vectorized bid exclusion matches the former row-wise is_excluded
+  - the bucket labels match the former per-row bucket masks
+and prints cold / warm / single-threshold-change timings with per-stage cache hits.
+
+Usage:
+    python scripts/benchmark_feature_frame.py [rows]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from features.bulk_export import strip_targeting_prefix
+from features.constants import normalize_auto_targeting
+from features.optimizer.core import DEFAULT_CONFIG, compute_account_benchmarks, detect_date_range
+from features.optimizer.feature_frame import (
+    build_feature_frame,
+    clear_feature_cache,
+    compute_feature_keys,
+    feature_cache_stats,
+)
+from features.optimizer.strategies.bids import _excluded_mask
+from core.data_loader import is_asin
+from utils.metrics import calculate_ppc_metrics, ensure_numeric_columns
+
+
+def prepare_data_reference(df, config):
+    """Former prepare_data (reference implementation)."""
+    df = df.copy()
+    df = ensure_numeric_columns(df, inplace=True)
+    df["CPC"] = np.where(df["Clicks"] > 0, df["Spend"] / df["Clicks"], 0)
+    col_map = {"Campaign": "Campaign Name", "AdGroup": "Ad Group Name", "Term": "Customer Search Term", "Match": "Match Type"}
+    for old, new in col_map.items():
+        if old in df.columns and new not in df.columns:
+            df[new] = df[old]
+    if "Match Type" not in df.columns:
+        df["Match Type"] = "broad"
+    df["Match Type"] = df["Match Type"].fillna("broad").astype(str)
+    if "Targeting" not in df.columns:
+        if "Keyword" in df.columns:
+            df["Targeting"] = df["Keyword"].replace("", np.nan)
+        else:
+            df["Targeting"] = pd.Series([np.nan] * len(df))
+    else:
+        df["Targeting"] = df["Targeting"].replace("", np.nan)
+    if "TargetingExpression" in df.columns:
+        df["Targeting"] = df["TargetingExpression"].fillna(df["Targeting"])
+    df["Targeting"] = df["Targeting"].fillna("")
+    exact_mask = df["Match Type"].str.lower() == "exact"
+    missing_targeting = (df["Targeting"] == "") | (df["Targeting"] == "*")
+    df.loc[exact_mask & missing_targeting, "Targeting"] = df.loc[exact_mask & missing_targeting, "Customer Search Term"]
+    generic_targeting = (df["Targeting"] == "") | (df["Targeting"] == "*")
+    df.loc[~exact_mask & generic_targeting, "Targeting"] = df.loc[~exact_mask & generic_targeting, "Match Type"]
+    df["Targeting"] = df["Targeting"].astype(str)
+    df["Targeting"] = df["Targeting"].apply(normalize_auto_targeting)
+    df["Sales_Attributed"] = df["Sales"]
+    df["Orders_Attributed"] = df["Orders"]
+    df = calculate_ppc_metrics(df, percentage_format='decimal', inplace=True)
+    camp_stats = df.groupby("Campaign Name")[["Sales", "Spend"]].transform("sum")
+    df["Campaign_ROAS"] = np.where(camp_stats["Spend"] > 0, camp_stats["Sales"] / camp_stats["Spend"], config["TARGET_ROAS"])
+    return df, detect_date_range(df)
+
+
+def strategy_features_reference(df):
+    """Former per-strategy derivations from harvest.py / negatives.py / bids.py (reference)."""
+    harvest_dest_pattern = r'harvestexact|harvest_exact|_exact_|exactmatch'
+    out = {}
+    # harvest.py
+    discovery = (
+        (~df["Match Type"].str.contains("exact", case=False, na=False)) &
+        (~df["Match Type"].str.upper().isin(["PT", "PRODUCT TARGETING"])) &
+        (~df["Campaign Name"].str.contains(harvest_dest_pattern, case=False, na=False))
+    )
+    harvest_term = df["Customer Search Term"].apply(strip_targeting_prefix)
+    patterns = [r'^close-match$', r'^loose-match$', r'^substitutes$', r'^complements$', r'^auto$', r'^category=', r'^keyword-group=']
+    search_query = ~harvest_term.str.lower().str.strip().str.match('|'.join(patterns), na=False)
+    out["harvest_rows"] = (discovery & search_query).to_numpy()
+    out["harvest_term"] = harvest_term.to_numpy()
+    # negatives.py
+    out["cst_clean"] = df["Customer Search Term"].apply(strip_targeting_prefix).astype(str).str.strip().str.lower().to_numpy()
+    out["isolation_base"] = discovery.to_numpy()
+    out["non_exact"] = (~df["Match Type"].str.contains("exact", case=False, na=False)).to_numpy()
+    out["bleeder_term"] = df["Customer Search Term"].astype(str).str.strip().str.lower().to_numpy()
+    # bids.py bucket masks
+    auto_types = {'close-match', 'loose-match', 'substitutes', 'complements', 'auto'}
+
+    def is_pt_targeting(v):
+        t = str(v).lower().strip()
+        return "asin=" in t or "asin-expanded=" in t or (is_asin(t) and not t.startswith("category"))
+
+    def is_category_targeting(v):
+        t = str(v).lower().strip()
+        return t.startswith("category=") or (t.startswith("category") and "=" in t)
+
+    pt_t = df["Targeting"].apply(is_pt_targeting)
+    cat_t = df["Targeting"].apply(is_category_targeting)
+    auto = (df["Targeting"].apply(lambda x: str(x).lower().strip() in auto_types) |
+            df["Match Type"].str.lower().isin(["auto", "-"])) & ~pt_t & ~cat_t
+    pt = pt_t & ~auto
+    cat = cat_t & ~auto & ~pt
+    exact = (df["Match Type"].str.lower() == "exact") & ~pt & ~cat & ~auto
+    broad = df["Match Type"].str.lower().isin(["broad", "phrase"]) & ~pt & ~cat & ~auto
+    out["buckets"] = {"Exact": exact, "Product Targeting": pt, "Broad/Phrase": broad, "Auto": auto, "Category": cat}
+    return out
+
+
+def is_excluded_reference(df, harvested_terms, negative_terms):
+    """Former row-wise bid exclusion (reference implementation)."""
+    def is_excluded(row):
+        cst = str(row.get("Customer Search Term", "")).strip().lower()
+        targeting = str(row.get("Targeting", "")).strip().lower()
+        if cst in harvested_terms or targeting in harvested_terms:
+            return True
+        camp = str(row.get("Campaign Name", "")).strip()
+        ag = str(row.get("Ad Group Name", "")).strip()
+        return (camp, ag, cst) in negative_terms or (camp, ag, targeting) in negative_terms
+    return df.apply(is_excluded, axis=1).to_numpy(dtype=bool)
+
+
+def build_report(rows, seed=7):
+    rng = np.random.default_rng(seed)
+    campaigns = [f"Camp {i}" for i in range(120)] + ["Brand HarvestExact", "Shoes_exact_2024", " Camp 3 "]
+    match_types = np.array(["exact", "broad", "phrase", "auto", "-", "Exact", "PT", "Product Targeting", None], dtype=object)
+    targeting = np.array(["close-match", "Close Match", "loose_match", "substitutes", "complements", "*", "", None,
+                          'asin="B01ABCDEF1"', 'asin-expanded="B02ABCDEF2"', 'category="Toys"', "water bottle",
+                          "Steel Bottle", "b0cxyz1234"], dtype=object)
+    terms = [f"search term {i}" for i in range(rows // 20)] + ['asin="B01ABCDEF1"', "B01ABCDEF1", "close-match",
+                                                               'category="toys"', "Search Term 1 ", " SEARCH TERM 2"]
+    df = pd.DataFrame({
+        "Campaign Name": rng.choice(campaigns, rows),
+        "Ad Group Name": rng.choice([f"AG {i}" for i in range(10)] + [" AG 1"], rows),
+        "Match Type": rng.choice(match_types, rows),
+        "Targeting": rng.choice(targeting, rows),
+        "Customer Search Term": rng.choice(terms, rows),
+        "Impressions": rng.integers(0, 500, rows),
+        "Clicks": rng.integers(0, 30, rows),
+        "Spend": rng.gamma(1.2, 8, rows).round(2),
+        "Orders": rng.poisson(0.6, rows),
+        "Date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 30, rows), unit="D"),
+    })
+    df["Sales"] = (df["Orders"] * rng.uniform(5, 40, rows)).round(2)
+    return df
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # benchmarks print their summary
+        result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    report = build_report(rows)
+    config = dict(DEFAULT_CONFIG)
+    print(f"Search term report: {rows:,} rows\n")
+
+    # Former run: prepare_data + benchmarks + each strategy's own derivations
+    def reference_run():
+        df, date_info = prepare_data_reference(report, config)
+        benchmarks = compute_account_benchmarks(df, config)
+        return df, date_info, benchmarks, strategy_features_reference(df)
+    (ref_df, ref_dates, ref_bench, ref), t_ref = timed(reference_run)
+
+    clear_feature_cache()
+    features, t_cold = timed(lambda: build_feature_frame(report, config))
+    pd.testing.assert_frame_equal(features.df, ref_df)
+    assert features.date_info == ref_dates and features.benchmarks == ref_bench
+
+    keys = features.keys
+    assert np.array_equal((keys["is_discovery"] & keys["is_search_query"]).to_numpy(), ref["harvest_rows"])
+    assert np.array_equal(keys["harvest_term"].to_numpy(), ref["harvest_term"])
+    assert np.array_equal(keys["cst_clean"].to_numpy(), ref["cst_clean"])
+    assert np.array_equal(keys["is_discovery"].to_numpy(), ref["isolation_base"])
+    assert np.array_equal(~keys["is_exact_match"].to_numpy(), ref["non_exact"])
+    assert np.array_equal(keys["cst_norm"].to_numpy(), ref["bleeder_term"])
+    for name, mask in ref["buckets"].items():
+        assert np.array_equal((keys["bucket"] == name).to_numpy(), mask.to_numpy()), name
+    print("Parity: prepared frame, benchmarks, harvest/negative masks, cleaned terms and buckets ✓")
+
+    # Exclusion: harvested terms and negatives (incl. padded / non-string keys that never match)
+    df = features.df
+    sample = df.sample(min(len(df), 5_000), random_state=1)
+    harvested = set(sample["Customer Search Term"].str.lower().head(300)) | {"close-match"}
+    negatives = set(zip(sample["Campaign Name"].str.strip(), sample["Ad Group Name"].str.strip(),
+                        sample["Targeting"].str.lower().str.strip()))
+    negatives |= {(" Camp 3 ", "AG 1", "search term 5"), ("Camp 1", np.nan, "search term 9")}
+    expected, t_row = timed(lambda: is_excluded_reference(df, harvested, negatives))
+    actual, t_vec = timed(lambda: _excluded_mask(compute_feature_keys(df), harvested, negatives))
+    assert np.array_equal(expected, actual)
+    print(f"Bid exclusion: {expected.sum():,} rows excluded | row-wise {t_row:6.2f}s | vectorized (incl. keys) {t_vec:6.3f}s\n")
+
+    _, t_warm = timed(lambda: build_feature_frame(report, config))
+    _, t_harvest = timed(lambda: build_feature_frame(report, {**config, "HARVEST_ROAS_MULT": 0.95, "MIN_CLICKS_EXACT": 12}))
+    changed, t_target = timed(lambda: build_feature_frame(report, {**config, "TARGET_ROAS": 4.0}))
+    assert changed.keys is features.keys and changed.df is not features.df
+
+    print(f"former prepare + benchmarks + derivations  {t_ref:7.3f}s")
+    print(f"feature frame (cold)                       {t_cold:7.3f}s")
+    print(f"feature frame (warm, same config)          {t_warm:7.3f}s")
+    print(f"  HARVEST_ROAS_MULT / MIN_CLICKS changed   {t_harvest:7.3f}s  (no stage reruns)")
+    print(f"  TARGET_ROAS changed                      {t_target:7.3f}s  (campaign_roas + benchmarks rerun)")
+    print(f"cache: {feature_cache_stats()}")
+
+    print("\n✅ Feature frame identical to per-strategy derivation")
+
+
+if __name__ == "__main__":
+    main()
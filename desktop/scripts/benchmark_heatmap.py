@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Benchmark: vectorized optimizer heatmap vs the former per-ad-group loop.
+
+Builds a synthetic account (search term rows over a few thousand ad groups) and a set of
+optimizer actions with the awkward cases the optimizer produces: repeated actions, action
+frames without an "Ad Group Name" column, missing keys and reasons, bids with "Current Bid"
+next to bids with only "CPC", and empty frames. Then:
+  - checks create_heatmap returns the same frame as the former implementation (iterrows()
+    with three boolean filters per ad group + four row-wise apply() score passes),
+    including row order after the sort, for several action mixes
+  - prints the timings
+
+Usage:
+    python scripts/benchmark_heatmap.py [ad_groups] [actions]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from features.optimizer.ui.heatmap import create_heatmap
+
+REASONS = np.array(["Scale winner", "Cut bleeder", "Zero sales after 20 clicks", "High ACoS", "Converting term",
+                    "Irrelevant ASIN", "", None], dtype=object)
+
+
+def former_create_heatmap(df, config, harvest_df, neg_kw, neg_pt, direct_bids, agg_bids):
+    """Former create_heatmap (reference implementation)."""
+    grouped = df.groupby(["Campaign Name", "Ad Group Name"]).agg({
+        "Clicks": "sum", "Spend": "sum", "Sales_Attributed": "sum",
+        "Orders_Attributed": "sum", "Impressions": "sum"
+    }).reset_index()
+    grouped = grouped.rename(columns={"Sales_Attributed": "Sales", "Orders_Attributed": "Orders"})
+    grouped["CTR"] = np.where(grouped["Impressions"] > 0, grouped["Clicks"] / grouped["Impressions"] * 100, 0)
+    grouped["CVR"] = np.where(grouped["Clicks"] > 0, grouped["Orders"] / grouped["Clicks"] * 100, 0)
+    grouped["ROAS"] = np.where(grouped["Spend"] > 0, grouped["Sales"] / grouped["Spend"], 0)
+    grouped["ACoS"] = np.where(grouped["Sales"] > 0, grouped["Spend"] / grouped["Sales"] * 100, 999)
+    grouped["Harvest_Count"] = 0
+    grouped["Negative_Count"] = 0
+    grouped["Bid_Increase_Count"] = 0
+    grouped["Bid_Decrease_Count"] = 0
+    grouped["Actions_Taken"] = ""
+
+    all_bids = pd.concat([direct_bids, agg_bids]) if not direct_bids.empty or not agg_bids.empty else pd.DataFrame()
+    negatives_df = pd.concat([neg_kw, neg_pt]) if not neg_kw.empty or not neg_pt.empty else pd.DataFrame()
+
+    for idx, row in grouped.iterrows():
+        camp, ag = row["Campaign Name"], row["Ad Group Name"]
+        h_match = pd.DataFrame()
+        if not harvest_df.empty and "Campaign Name" in harvest_df.columns:
+            h_match = harvest_df[(harvest_df["Campaign Name"] == camp) & (harvest_df.get("Ad Group Name", "") == ag)]
+        n_match = pd.DataFrame()
+        if not negatives_df.empty and "Campaign Name" in negatives_df.columns:
+            n_match = negatives_df[(negatives_df["Campaign Name"] == camp) & (negatives_df.get("Ad Group Name", "") == ag)]
+        b_match = pd.DataFrame()
+        if not all_bids.empty and "Campaign Name" in all_bids.columns:
+            b_match = all_bids[(all_bids["Campaign Name"] == camp) & (all_bids.get("Ad Group Name", "") == ag)]
+
+        grouped.at[idx, "Harvest_Count"] = len(h_match)
+        grouped.at[idx, "Negative_Count"] = len(n_match)
+
+        reasons = []
+        if not h_match.empty and "Reason" in h_match.columns:
+            reasons.extend(h_match["Reason"].dropna().astype(str).unique().tolist())
+        if not n_match.empty and "Reason" in n_match.columns:
+            reasons.extend(n_match["Reason"].dropna().astype(str).unique().tolist())
+        if not b_match.empty and "New Bid" in b_match.columns:
+            cur_bids = b_match.get("Current Bid", b_match.get("CPC", 0))
+            grouped.at[idx, "Bid_Increase_Count"] = (b_match["New Bid"] > cur_bids).sum()
+            grouped.at[idx, "Bid_Decrease_Count"] = (b_match["New Bid"] < cur_bids).sum()
+            if "Reason" in b_match.columns:
+                reasons.extend(b_match["Reason"].dropna().astype(str).unique().tolist())
+
+        actions = []
+        if grouped.at[idx, "Harvest_Count"] > 0: actions.append(f"💎 {int(grouped.at[idx, 'Harvest_Count'])} harvests")
+        if grouped.at[idx, "Negative_Count"] > 0: actions.append(f"🛑 {int(grouped.at[idx, 'Negative_Count'])} negatives")
+        if grouped.at[idx, "Bid_Increase_Count"] > 0: actions.append(f"⬆️ {int(grouped.at[idx, 'Bid_Increase_Count'])} increases")
+        if grouped.at[idx, "Bid_Decrease_Count"] > 0: actions.append(f"⬇️ {int(grouped.at[idx, 'Bid_Decrease_Count'])} decreases")
+
+        if actions:
+            grouped.at[idx, "Actions_Taken"] = " | ".join(actions)
+            unique_reasons = sorted(list(set([r for r in reasons if r])))
+            if unique_reasons:
+                grouped.at[idx, "Reason_Summary"] = "; ".join(unique_reasons[:3]) + ("..." if len(unique_reasons) > 3 else "")
+            else:
+                grouped.at[idx, "Reason_Summary"] = "Multiple actions"
+        elif row["Clicks"] < config.get("MIN_CLICKS_EXACT", 5):
+            grouped.at[idx, "Actions_Taken"] = "⏸️ Hold (Low volume)"
+            grouped.at[idx, "Reason_Summary"] = "Low data volume"
+        else:
+            grouped.at[idx, "Actions_Taken"] = "✅ No action needed"
+            if row["Sales"] == 0 and row["Spend"] > 10:
+                grouped.at[idx, "Reason_Summary"] = "Zero Sales (Monitoring)"
+            elif row["ROAS"] < config.get("TARGET_ROAS", 2.5) * 0.8:
+                grouped.at[idx, "Reason_Summary"] = "Low Efficiency (Monitoring)"
+            else:
+                grouped.at[idx, "Reason_Summary"] = "Stable Performance"
+
+    def score(val, series, high_is_better=True):
+        valid = series[series > 0]
+        if len(valid) < 2: return 1
+        p33, p67 = valid.quantile(0.33), valid.quantile(0.67)
+        return (2 if val >= p67 else 1 if val >= p33 else 0) if high_is_better else (2 if val <= p33 else 1 if val <= p67 else 0)
+
+    grouped["Overall_Score"] = (grouped.apply(lambda r: score(r["CTR"], grouped["CTR"]), axis=1) +
+                                grouped.apply(lambda r: score(r["CVR"], grouped["CVR"]), axis=1) +
+                                grouped.apply(lambda r: score(r["ROAS"], grouped["ROAS"]), axis=1) +
+                                grouped.apply(lambda r: score(r["ACoS"], grouped["ACoS"], False), axis=1)) / 4
+    grouped["Priority"] = grouped["Overall_Score"].apply(lambda x: "🔴 High" if x < 0.7 else ("🟡 Medium" if x < 1.3 else "🟢 Good"))
+    return grouped.sort_values("Overall_Score")
+
+
+def make_account(n_ad_groups, seed=25):
+    rng = np.random.default_rng(seed)
+    n_camp = max(n_ad_groups // 12, 2)
+    camp = rng.integers(0, n_camp, n_ad_groups)
+    ad_groups = pd.DataFrame({
+        "Campaign Name": np.array([f"SP | Brand {c % 30} | {['Exact', 'Broad', 'Auto', 'PT'][c % 4]} {c}" for c in camp], dtype=object),
+        "Ad Group Name": np.array([f"AG {i}" if i % 97 else "" for i in range(n_ad_groups)], dtype=object),
+    }).drop_duplicates(ignore_index=True)
+    rows = len(ad_groups) * 8
+    pick = rng.integers(0, len(ad_groups), rows)
+    clicks = rng.integers(0, 12, rows)
+    orders = rng.binomial(clicks, 0.08)
+    return pd.DataFrame({
+        "Campaign Name": ad_groups["Campaign Name"].to_numpy()[pick],
+        "Ad Group Name": ad_groups["Ad Group Name"].to_numpy()[pick],
+        "Impressions": clicks * rng.integers(5, 60, rows),
+        "Clicks": clicks,
+        "Spend": (clicks * rng.uniform(0.2, 2.5, rows)).round(2),
+        "Sales_Attributed": (orders * rng.uniform(10, 60, rows)).round(2),
+        "Orders_Attributed": orders,
+    }), ad_groups
+
+
+def make_actions(ad_groups, n_actions, seed=26):
+    rng = np.random.default_rng(seed)
+
+    def sample(n, with_ad_group=True):
+        pick = rng.integers(0, len(ad_groups), n)
+        frame = pd.DataFrame({"Campaign Name": ad_groups["Campaign Name"].to_numpy()[pick]})
+        if with_ad_group:
+            frame["Ad Group Name"] = ad_groups["Ad Group Name"].to_numpy()[pick]
+            frame.loc[rng.random(n) < 0.01, "Ad Group Name"] = None   # missing key
+        frame.loc[rng.random(n) < 0.01, "Campaign Name"] = np.nan
+        frame["Reason"] = rng.choice(REASONS, n)
+        return frame
+
+    n = n_actions // 6
+    harvest = sample(n).assign(Term=lambda f: [f"term {i}" for i in range(len(f))])
+    neg_kw = sample(n)
+    neg_pt = sample(n // 4, with_ad_group=False)        # campaign-level negatives
+    direct = sample(2 * n).assign(**{"Current Bid": rng.uniform(0.3, 2, 2 * n).round(2)})
+    direct["New Bid"] = np.where(rng.random(2 * n) < 0.1, direct["Current Bid"],
+                                 rng.uniform(0.3, 2.5, 2 * n).round(2))
+    direct.loc[rng.random(2 * n) < 0.02, "New Bid"] = np.nan
+    agg = sample(n).assign(CPC=rng.uniform(0.3, 2, n).round(2)).drop(columns="Reason")
+    agg["New Bid"] = (agg["CPC"] * rng.choice([0.8, 1.0, 1.2], n)).round(2)
+    return harvest, neg_kw, neg_pt, direct, agg
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    n_ad_groups = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    n_actions = int(sys.argv[2]) if len(sys.argv) > 2 else 30_000
+    df, ad_groups = make_account(n_ad_groups)
+    harvest, neg_kw, neg_pt, direct, agg = make_actions(ad_groups, n_actions)
+    empty = pd.DataFrame()
+    config = {"MIN_CLICKS_EXACT": 5, "TARGET_ROAS": 2.5}
+
+    cases = {
+        "all actions": (harvest, neg_kw, neg_pt, direct, agg),
+        "CPC bids only": (harvest, neg_kw, empty, agg, empty),
+        "no reasons": (harvest.drop(columns="Reason"), neg_kw.drop(columns="Reason"), empty, agg, empty),
+        "bids without New Bid": (empty, empty, neg_pt, direct.drop(columns="New Bid"), empty),
+        "no actions": (empty, empty, empty, empty, empty),
+    }
+    timings = {}
+    for label, frames in cases.items():
+        expected, t_former = timed(former_create_heatmap, df, config, *frames)
+        result, t_new = timed(create_heatmap, df, config, *frames)
+        pd.testing.assert_frame_equal(result, expected)
+        timings[label] = (t_former, t_new)
+
+    # Small account: fewer than two positive values per metric scores everything 1
+    small = df[df["Campaign Name"] == df["Campaign Name"].iloc[0]].head(1)
+    pd.testing.assert_frame_equal(create_heatmap(small, config, *cases["all actions"]),
+                                  former_create_heatmap(small, config, *cases["all actions"]))
+
+    # No ad groups at all
+    no_rows = create_heatmap(df.head(0), config, *cases["all actions"])
+    assert no_rows.empty and "Priority" in no_rows.columns
+
+    n_total = sum(len(f) for f in cases["all actions"])
+    print(f"{len(ad_groups):,} ad groups | {len(df):,} rows | {n_total:,} actions")
+    for label, (t_former, t_new) in timings.items():
+        print(f"{label:22s} former {t_former:7.2f}s | vectorized {t_new * 1000:7.1f} ms | "
+              f"{t_former / t_new:6.0f}x faster")
+    print("\n✅ Heatmap matches the former implementation without a per-ad-group loop")
+
+
+if __name__ == '__main__':
+    main()
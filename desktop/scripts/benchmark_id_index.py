@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Benchmark: BulkIdIndex-backed ID resolution vs the former merge-based helpers.
+
+Builds a synthetic bulk file (keywords with phrase/exact collisions, ASIN/category
+and auto PT rows, messy quoting/casing) and a matching Search Term Report, checks
+that enrich_with_ids and MappingEngine.map_ids_from_bulk return the same frames
+as the former per-call merge implementations, then times the optimizer pattern of
+four enrichment calls against one bulk file.
+
+Usage:
+    python scripts/benchmark_id_index.py [bulk_rows] [report_rows]
+"""
+
+import os
+import sys
+import time
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from core.id_index import BulkIdIndex
+from core.mapping_engine import MappingEngine
+from features.optimizer.strategies.negatives import enrich_with_ids
+
+
+def enrich_with_ids_merge(df: pd.DataFrame, bulk: pd.DataFrame) -> pd.DataFrame:
+    """Former merge-based enrich_with_ids (reference implementation, without recommendation sync)."""
+    if df.empty or bulk is None or bulk.empty:
+        return df
+        
+    def normalize_for_mapping(series):
+        """
+        Normalize and strip prefixes for robust matching.
+        e.g., 'asin="B0123"' -> 'b0123', 'category="123"' -> '123'
+        """
+        s = series.astype(str).str.strip().str.lower()
+        # Remove common prefixes and quotes
+        s = s.str.replace(r'^(asin|category|asin-expanded|keyword-group)=', '', regex=True)
+        s = s.str.replace(r'^"', '', regex=True).str.replace(r'"$', '', regex=True)
+        # Final alphanumeric cleanup
+        return s.str.replace(r'[^a-z0-9]', '', regex=True)
+    
+    df = df.copy()
+    bulk = bulk.copy()
+    
+    # Normalize for mapping
+    df['_camp_norm'] = normalize_for_mapping(df['Campaign Name'])
+    df['_ag_norm'] = normalize_for_mapping(df.get('Ad Group Name', pd.Series([''] * len(df))))
+    
+    # Initialize ID columns if missing to avoid KeyError during resolution
+    for col in ['KeywordId', 'TargetingId']:
+        if col not in df.columns:
+            df[col] = np.nan
+    
+    # For general targeting (Search Term or Targeting column)
+    target_col = 'Term' if 'Term' in df.columns else 'Targeting'
+    df['_target_norm'] = normalize_for_mapping(df[target_col])
+    
+    bulk['_camp_norm'] = normalize_for_mapping(bulk['Campaign Name'])
+    bulk['_ag_norm'] = normalize_for_mapping(bulk.get('Ad Group Name', pd.Series([''] * len(bulk))))
+    
+    # Precise Match 1: Keywords
+    # CRITICAL: Include Match Type to distinguish phrase/exact versions of the same keyword
+    kw_col = next((c for c in ['Customer Search Term', 'Keyword Text', 'keyword_text'] if c in bulk.columns), None)
+    if kw_col:
+        bulk['_kw_norm'] = normalize_for_mapping(bulk[kw_col])
+        # Normalize Match Type for both df and bulk
+        df['_match_norm'] = df['Match Type'].astype(str).str.lower().str.strip() if 'Match Type' in df.columns else ''
+        bulk['_match_norm'] = bulk['Match Type'].astype(str).str.lower().str.strip() if 'Match Type' in bulk.columns else ''
+        
+        # STRICT LOOKUP: Include Match Type to prevent collision between phrase/exact/broad
+        # Use groupby().first() to ensure 1-to-1 mapping and prevent row explosion
+        kw_base = bulk[bulk['KeywordId'].notna() & (bulk['KeywordId'] != "") & (bulk['KeywordId'] != "nan")][
+            ['_camp_norm', '_ag_norm', '_kw_norm', '_match_norm', 'KeywordId', 'CampaignId', 'AdGroupId']
+        ]
+        kw_lookup = kw_base.groupby(['_camp_norm', '_ag_norm', '_kw_norm', '_match_norm']).first().reset_index()
+        
+        # STRATEGY 1: Strict match (Campaign + AG + Keyword + Match Type)
+        df = df.merge(
+            kw_lookup.rename(columns={'_kw_norm': '_target_norm'}),
+            on=['_camp_norm', '_ag_norm', '_target_norm', '_match_norm'],
+            how='left',
+            suffixes=('', '_bulk_kw')
+        )
+        
+        # STRATEGY 2: Fallback for unmatched rows (ignore Match Type)
+        # Only fill if KeywordId is still missing after strict match
+        strict_matched = df.get('KeywordId_bulk_kw', pd.Series([np.nan]*len(df))).notna()
+        if (~strict_matched).any():
+            # Relaxed lookup: Campaign + AG + Keyword only (take first ID for each)
+            kw_lookup_relaxed = kw_base.groupby(['_camp_norm', '_ag_norm', '_kw_norm'])[
+                ['KeywordId', 'CampaignId', 'AdGroupId']
+            ].first().reset_index()
+            kw_lookup_relaxed = kw_lookup_relaxed.rename(columns={
+                '_kw_norm': '_target_norm', 
+                'KeywordId': 'KeywordId_relaxed', 
+                'CampaignId': 'CampaignId_relaxed', 
+                'AdGroupId': 'AdGroupId_relaxed'
+            })
+            df = df.merge(
+                kw_lookup_relaxed,
+                on=['_camp_norm', '_ag_norm', '_target_norm'],
+                how='left',
+                suffixes=('', '_relax')
+            )
+            # Only use relaxed match if strict match failed
+            for col in ['KeywordId', 'CampaignId', 'AdGroupId']:
+                relaxed_col = f'{col}_relaxed'
+                bulk_kw_col = f'{col}_bulk_kw'
+                if relaxed_col in df.columns:
+                    if bulk_kw_col in df.columns:
+                        df[bulk_kw_col] = df[bulk_kw_col].fillna(df[relaxed_col])
+                    else:
+                        df[bulk_kw_col] = df[relaxed_col]
+                    df.drop(columns=[relaxed_col], inplace=True, errors='ignore')
+        
+    # Precise Match 2: Product Targeting
+    pt_col = next((c for c in ['TargetingExpression', 'Product Targeting Expression', 'targeting_expression'] if c in bulk.columns), None)
+    if pt_col:
+        bulk['_pt_norm'] = normalize_for_mapping(bulk[pt_col])
+        pt_lookup = bulk[bulk['TargetingId'].notna() & (bulk['TargetingId'] != "") & (bulk['TargetingId'] != "nan")][['_camp_norm', '_ag_norm', '_pt_norm', 'TargetingId', 'CampaignId', 'AdGroupId']].drop_duplicates()
+        
+        df = df.merge(
+            pt_lookup.rename(columns={'_pt_norm': '_target_norm'}),
+            on=['_camp_norm', '_ag_norm', '_target_norm'],
+            how='left',
+            suffixes=('', '_bulk_pt')
+        )
+
+    # Resolve IDs
+    id_cols = ['CampaignId', 'AdGroupId', 'KeywordId', 'TargetingId']
+    for col in id_cols:
+        if col in df.columns:
+            df[col] = df[col].replace('', np.nan).replace('nan', np.nan)
+            
+        col_kw = f'{col}_bulk_kw'
+        col_pt = f'{col}_bulk_pt'
+        
+        # Priority: Exact Keyword Match > Exact PT Match > Existing
+        if col_kw in df.columns:
+            df[col] = df[col].fillna(df[col_kw])
+        if col_pt in df.columns:
+            df[col] = df[col].fillna(df[col_pt])
+            
+    # Fallback: Campaign/Ad Group IDs if still missing
+    missing_basics = df.get('CampaignId', pd.Series([np.nan]*len(df))).isna() | df.get('AdGroupId', pd.Series([np.nan]*len(df))).isna()
+    if missing_basics.any():
+        fallback_lookup = bulk.groupby(['_camp_norm', '_ag_norm'])[['CampaignId', 'AdGroupId']].first().reset_index()
+        df = df.merge(fallback_lookup, on=['_camp_norm', '_ag_norm'], how='left', suffixes=('', '_fallback'))
+        
+        df['CampaignId'] = df.get('CampaignId', pd.Series([np.nan]*len(df))).fillna(df.get('CampaignId_fallback', pd.Series([np.nan]*len(df))))
+        df['AdGroupId'] = df.get('AdGroupId', pd.Series([np.nan]*len(df))).fillna(df.get('AdGroupId_fallback', pd.Series([np.nan]*len(df))))
+
+    # Cleanup internal columns
+    drop_cols = [c for c in df.columns if c.startswith('_') or c.endswith('_bulk_kw') or c.endswith('_bulk_pt') or c.endswith('_fallback')]
+    df.drop(columns=drop_cols, inplace=True, errors='ignore')
+
+    return df
+
+
+def map_ids_from_bulk_merge(df: pd.DataFrame, bulk: pd.DataFrame) -> Tuple[pd.DataFrame, dict]:
+    """Former merge-based MappingEngine.map_ids_from_bulk (reference implementation)."""
+    stats = {'method': 'bulk', 'campaign_id_matched': 0, 'keyword_id_matched': 0, 
+             'targeting_id_matched': 0, 'total': len(df)}
+
+    if bulk is None or df is None:
+        return df, stats
+
+    enriched = df.copy()
+
+    # ========== PHASE 1: Campaign & AdGroup IDs ===========
+    if 'Campaign Name' in enriched.columns and 'Campaign Name' in bulk.columns:
+        if 'CampaignId' in bulk.columns:
+            # Normalize keys
+            enriched['_camp_norm'] = MappingEngine.normalize(enriched['Campaign Name'])
+
+            bulk_norm = bulk.copy()
+            bulk_norm['_camp_norm'] = MappingEngine.normalize(bulk_norm['Campaign Name'])
+
+            # Prepare merge columns
+            merge_cols = ['_camp_norm', 'CampaignId']
+            on_keys = ['_camp_norm']
+
+            if 'Ad Group Name' in enriched.columns and 'Ad Group Name' in bulk.columns and 'AdGroupId' in bulk.columns:
+                enriched['_ag_norm'] = MappingEngine.normalize(enriched['Ad Group Name'])
+                bulk_norm['_ag_norm'] = MappingEngine.normalize(bulk_norm['Ad Group Name'])
+                merge_cols.extend(['_ag_norm', 'AdGroupId'])
+                on_keys.append('_ag_norm')
+
+            # Dedupe and merge - CRITICAL: Use groupby().first() to enforce 1-to-1 mapping
+            # drop_duplicates() alone keeps duplicates if IDs differ for same name
+            # Fix: Exclude keys from value selection to avoid 'already exists' error on reset_index
+            val_cols = [c for c in merge_cols if c not in on_keys]
+            id_lookup = bulk_norm.groupby(on_keys)[val_cols].first().reset_index()
+            enriched = enriched.merge(id_lookup, on=on_keys, how='left')
+
+            # Stats
+            if 'CampaignId' in enriched.columns:
+                stats['campaign_id_matched'] = enriched['CampaignId'].notna().sum()
+
+            # Cleanup
+            enriched.drop(columns=['_camp_norm', '_ag_norm'], inplace=True, errors='ignore')
+
+    # ========== PHASE 2: Keyword & Targeting IDs ===========
+    if 'Targeting' in enriched.columns:
+        # Detect keyword column in bulk (try multiple names)
+        kw_col = next((c for c in ['Keyword Text', 'Customer Search Term', 'keyword_text', 'Keyword'] if c in bulk.columns), None)
+        pt_col = next((c for c in ['Product Targeting Expression', 'TargetingExpression', 'targeting_expression'] if c in bulk.columns), None)
+
+        # Detect ID columns - TRY BOTH FORMATS (with and without spaces)
+        kwid_col = next((c for c in ['Keyword ID', 'KeywordId', 'keyword_id', 'Keyword Id'] if c in bulk.columns), None)
+        ptid_col = next((c for c in ['Product Targeting ID', 'TargetingId', 'targeting_id', 'Product Targeting Id'] if c in bulk.columns), None)
+
+        # Prepare enriched normalized keys
+        enriched['_camp_norm'] = MappingEngine.normalize(enriched['Campaign Name'])
+        enriched['_ag_norm'] = MappingEngine.normalize(enriched['Ad Group Name'])
+        enriched['_target_norm'] = MappingEngine.normalize_targeting(enriched['Targeting'])
+
+        # ----- Keyword ID -----
+        if kw_col and kwid_col:
+            # Filter bulk to only keyword rows (non-empty keyword text)
+            kw_lookup = bulk[bulk[kw_col].notna() & (bulk[kw_col].astype(str).str.strip() != '')].copy()
+
+            if not kw_lookup.empty:
+                kw_lookup = kw_lookup[['Campaign Name', 'Ad Group Name', kw_col, kwid_col, 'Match Type']].copy()
+
+                kw_lookup['_camp_norm'] = MappingEngine.normalize(kw_lookup['Campaign Name'])
+                kw_lookup['_ag_norm'] = MappingEngine.normalize(kw_lookup['Ad Group Name'])
+                kw_lookup['_target_norm'] = MappingEngine.normalize_targeting(kw_lookup[kw_col])
+                kw_lookup['_match_norm'] = kw_lookup['Match Type'].astype(str).str.lower().str.strip()
+
+                # ENRICHED (STR) Normalization
+                enriched['_match_norm'] = enriched['Match Type'].astype(str).str.lower().str.strip() if 'Match Type' in enriched.columns else ''
+
+                # CRITICAL: Standardize to 'KeywordId' (no space) for internal use
+                kw_lookup = kw_lookup.rename(columns={kwid_col: 'KeywordId'})
+
+                # STRATEGY 1: Strict Match (Campaign + AG + Keyword + Match Type)
+                # This handles the "phrase" vs "exact" collision correctly
+                strict_lookup = kw_lookup.groupby(['_camp_norm', '_ag_norm', '_target_norm', '_match_norm'])['KeywordId'].first().reset_index()
+                enriched = enriched.merge(strict_lookup, on=['_camp_norm', '_ag_norm', '_target_norm', '_match_norm'], how='left', suffixes=('', '_strict'))
+
+                if 'KeywordId_strict' in enriched.columns:
+                    if 'KeywordId' not in enriched.columns:
+                        enriched['KeywordId'] = enriched['KeywordId_strict']
+                    else:
+                        enriched['KeywordId'] = enriched['KeywordId'].fillna(enriched['KeywordId_strict'])
+                    enriched.drop(columns=['KeywordId_strict'], inplace=True, errors='ignore')
+
+                # STRATEGY 2: Relaxed Match (Campaign + AG + Keyword) - Fallback
+                # Only for rows that didn't match strictly (e.g. if Match Type is missing or formatted differently)
+                relaxed_lookup = kw_lookup.groupby(['_camp_norm', '_ag_norm', '_target_norm'])['KeywordId'].first().reset_index()
+                enriched = enriched.merge(relaxed_lookup, on=['_camp_norm', '_ag_norm', '_target_norm'], how='left', suffixes=('', '_relaxed'))
+
+                if 'KeywordId_relaxed' in enriched.columns:
+                    if 'KeywordId' not in enriched.columns:
+                        enriched['KeywordId'] = enriched['KeywordId_relaxed']
+                    else:
+                        enriched['KeywordId'] = enriched['KeywordId'].fillna(enriched['KeywordId_relaxed'])
+                    enriched.drop(columns=['KeywordId_relaxed'], inplace=True, errors='ignore')
+
+                # Cleanup specific normalization col
+                enriched.drop(columns=['_match_norm'], inplace=True, errors='ignore')
+
+                stats['keyword_id_matched'] = enriched['KeywordId'].notna().sum()
+
+        # ----- Targeting ID -----
+        if pt_col and ptid_col:
+            pt_lookup = bulk[bulk[pt_col].notna() & (bulk[pt_col].astype(str).str.strip() != '')].copy()
+
+            if not pt_lookup.empty:
+                pt_lookup = pt_lookup[['Campaign Name', 'Ad Group Name', pt_col, ptid_col]].copy()
+                pt_lookup['_camp_norm'] = MappingEngine.normalize(pt_lookup['Campaign Name'])
+                pt_lookup['_ag_norm'] = MappingEngine.normalize(pt_lookup['Ad Group Name'])
+                pt_lookup['_target_norm'] = MappingEngine.normalize_targeting(pt_lookup[pt_col])
+
+                # CRITICAL: Standardize to 'TargetingId' (no space) for internal use
+                pt_lookup = pt_lookup.rename(columns={ptid_col: 'TargetingId'})
+
+                # Check if it's auto targeting (close-match, loose-match, etc.)
+                pt_lookup['_is_auto'] = pt_lookup['_target_norm'].str.contains('closematch|loosematch|substitutes|complements', regex=True)
+
+                # Split: Auto PT vs ASIN/Category PT
+                auto_pt = pt_lookup[pt_lookup['_is_auto']].copy()
+                specific_pt = pt_lookup[~pt_lookup['_is_auto']].copy()
+
+                # For ASIN/Category PT: Strict match on targeting expression
+                if not specific_pt.empty:
+                    # CRITICAL: Enforce uniqueness on join keys
+                    specific_pt = specific_pt.groupby(['_camp_norm', '_ag_norm', '_target_norm'])['TargetingId'].first().reset_index()
+                    enriched = enriched.merge(specific_pt, on=['_camp_norm', '_ag_norm', '_target_norm'], how='left', suffixes=('', '_spec'))
+
+                    if 'TargetingId_spec' in enriched.columns:
+                        if 'TargetingId' not in enriched.columns:
+                            enriched['TargetingId'] = enriched['TargetingId_spec']
+                        else:
+                            enriched['TargetingId'] = enriched['TargetingId'].fillna(enriched['TargetingId_spec'])
+                        enriched.drop(columns=['TargetingId_spec'], inplace=True, errors='ignore')
+
+                # For Auto PT: Match on campaign + ad group only
+                if not auto_pt.empty:
+                    auto_agg = auto_pt.groupby(['_camp_norm', '_ag_norm'])['TargetingId'].first().reset_index()
+                    enriched = enriched.merge(auto_agg, on=['_camp_norm', '_ag_norm'], how='left', suffixes=('', '_auto'))
+
+                    if 'TargetingId_auto' in enriched.columns:
+                        if 'TargetingId' not in enriched.columns:
+                            enriched['TargetingId'] = enriched['TargetingId_auto']
+                        else:
+                            enriched['TargetingId'] = enriched['TargetingId'].fillna(enriched['TargetingId_auto'])
+                        enriched.drop(columns=['TargetingId_auto'], inplace=True, errors='ignore')
+
+                stats['targeting_id_matched'] = enriched['TargetingId'].notna().sum()
+
+        # Cleanup
+        enriched.drop(columns=['_camp_norm', '_ag_norm', '_target_norm'], inplace=True, errors='ignore')
+
+    # ========== PHASE 3: Bid Columns ===========
+    # Map Ad Group Default Bid and Keyword Bid from bulk file
+    if 'Ad Group Default Bid' in bulk.columns or 'Bid' in bulk.columns:
+        # Normalize keys for matching
+        enriched['_camp_norm'] = MappingEngine.normalize(enriched['Campaign Name'])
+        enriched['_ag_norm'] = MappingEngine.normalize(enriched['Ad Group Name'])
+
+        bulk_norm = bulk.copy()
+        bulk_norm['_camp_norm'] = MappingEngine.normalize(bulk_norm['Campaign Name'])
+        bulk_norm['_ag_norm'] = MappingEngine.normalize(bulk_norm['Ad Group Name'])
+
+        # Build bid lookup: Campaign + Ad Group -> Bid values
+        bid_cols = ['_camp_norm', '_ag_norm']
+        if 'Ad Group Default Bid' in bulk.columns:
+            bid_cols.append('Ad Group Default Bid')
+        if 'Bid' in bulk.columns:
+            bid_cols.append('Bid')
+
+        # Aggregate: take mean of available bids per Campaign + Ad Group
+        agg_dict = {col: 'mean' for col in bid_cols if col not in ['_camp_norm', '_ag_norm']}
+        bid_lookup = bulk_norm[bid_cols].groupby(['_camp_norm', '_ag_norm']).agg(agg_dict).reset_index()
+
+        # Merge bid data
+        enriched = enriched.merge(bid_lookup, on=['_camp_norm', '_ag_norm'], how='left', suffixes=('', '_bulk'))
+
+        # Handle suffix conflicts
+        for col in ['Ad Group Default Bid', 'Bid']:
+            bulk_col = f'{col}_bulk'
+            if bulk_col in enriched.columns:
+                if col not in enriched.columns:
+                    enriched[col] = enriched[bulk_col]
+                else:
+                    enriched[col] = enriched[col].fillna(enriched[bulk_col])
+                enriched.drop(columns=[bulk_col], inplace=True, errors='ignore')
+
+        # Stats
+        if 'Ad Group Default Bid' in enriched.columns:
+            stats['default_bid_matched'] = enriched['Ad Group Default Bid'].notna().sum()
+        if 'Bid' in enriched.columns:
+            stats['bid_matched'] = enriched['Bid'].notna().sum()
+
+        # Cleanup
+        enriched.drop(columns=['_camp_norm', '_ag_norm'], inplace=True, errors='ignore')
+
+    return enriched, stats
+
+
+def build_bulk(rows: int) -> pd.DataFrame:
+    """Bulk ID mapping with one keyword or PT per row and unique PT keys."""
+    rng = np.random.default_rng(11)
+    camp = rng.integers(0, max(rows // 400, 2), rows)
+    ag = rng.integers(0, 20, rows)
+    term = rng.integers(0, 3_000, rows)
+    kind = rng.choice(np.array(["kw", "asin", "cat", "auto"]), rows, p=[0.6, 0.2, 0.1, 0.1])
+    auto_types = np.array(["close-match", "loose-match", "substitutes", "complements"])
+
+    bulk = pd.DataFrame({
+        "Campaign Name": [f"Campaign {c}" if c % 3 else f" CAMPAIGN-{c} " for c in camp],
+        "Ad Group Name": [f"Ad Group {a}" for a in ag],
+        "CampaignId": (100_000 + camp).astype(np.int64),
+        "AdGroupId": (500_000 + camp * 100 + ag).astype(np.int64),
+        "Match Type": np.where(kind == "kw", rng.choice(np.array(["Exact", "PHRASE", "broad"]), rows), None),
+        "Keyword Text": np.where(kind == "kw", [f"Running Shoes {t}" for t in term], None),
+        "KeywordId": np.where(kind == "kw", [f"K{i}" for i in range(rows)], None),
+        "Product Targeting Expression": np.select(
+            [kind == "asin", kind == "cat", kind == "auto"],
+            [[f'asin="B0{t:08d}"' for t in term], [f'category="{t}"' for t in term], auto_types[term % 4]],
+            None,
+        ),
+        "TargetingId": np.where(kind != "kw", [f"T{i}" for i in range(rows)], None),
+        "Ad Group Default Bid": np.round(rng.uniform(0.2, 2.0, rows), 2),
+        "Bid": np.where(kind == "kw", np.round(rng.uniform(0.1, 3.0, rows), 2), np.nan),
+    })
+    # Unique PT keys: the former PT merge exploded rows on duplicates
+    pt_rows = bulk["TargetingId"].notna()
+    pt_key = bulk[["Campaign Name", "Ad Group Name", "Product Targeting Expression"]].astype(str).agg("|".join, axis=1)
+    bulk = bulk[~(pt_rows & pt_key.duplicated())].reset_index(drop=True)
+    bulk["TargetingExpression"] = bulk["Product Targeting Expression"]
+    return bulk
+
+
+def build_report(bulk: pd.DataFrame, rows: int) -> pd.DataFrame:
+    """Report rows drawn from the bulk file with casing/spacing noise plus unmatched rows."""
+    rng = np.random.default_rng(5)
+    src = bulk.iloc[rng.integers(0, len(bulk), rows)].reset_index(drop=True)
+    targeting = src["Keyword Text"].fillna(src["Product Targeting Expression"]).astype(str)
+    noisy = rng.random(rows) < 0.3
+    targeting = targeting.where(~noisy, targeting.str.upper())
+    unmatched = rng.random(rows) < 0.1
+    targeting = targeting.where(~unmatched, "unknown term")
+    match = src["Match Type"].where(rng.random(rows) < 0.8, "EXACT")
+    return pd.DataFrame({
+        "Campaign Name": src["Campaign Name"].str.strip(),
+        "Ad Group Name": src["Ad Group Name"].str.upper(),
+        "Targeting": targeting,
+        "Customer Search Term": targeting.str.lower(),
+        "Match Type": match.fillna("-"),
+        "Clicks": rng.integers(0, 50, rows),
+        "Spend": np.round(rng.uniform(0, 20, rows), 2),
+    })
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    bulk_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    report_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    bulk = build_bulk(bulk_rows)
+    report = build_report(bulk, report_rows)
+    print(f"Bulk file: {len(bulk):,} rows | report: {len(report):,} rows\n")
+
+    # MappingEngine.map_ids_from_bulk
+    (expected, exp_stats), t_old = timed(map_ids_from_bulk_merge, report, bulk)
+    (actual, stats), t_new = timed(MappingEngine.map_ids_from_bulk, report, bulk)
+    pd.testing.assert_frame_equal(expected, actual)
+    assert exp_stats == stats, f"stats differ: {exp_stats} vs {stats}"
+    print(f"map_ids_from_bulk   merge {t_old:6.2f}s | index (cold) {t_new:6.3f}s | {t_old / t_new:5.1f}x")
+
+    # enrich_with_ids on both target columns, with and without pre-existing IDs
+    partial = report.drop(columns=["Customer Search Term"]).copy()
+    partial["CampaignId"] = np.where(np.arange(len(partial)) % 4 == 0, "nan", "")
+    variants = {
+        "Targeting": report.drop(columns=["Customer Search Term"]),
+        "Term": report.rename(columns={"Customer Search Term": "Term"}),
+        "existing IDs": partial,
+    }
+    for name, df in variants.items():
+        expected = enrich_with_ids_merge(df, bulk)
+        actual = enrich_with_ids(df, bulk)
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=False)
+        print(f"enrich_with_ids     {name:<13} identical ({actual['KeywordId'].notna().sum():,} KW / {actual['TargetingId'].notna().sum():,} PT IDs)")
+
+    # Optimizer pattern: four buckets enriched against the same bulk file
+    buckets = [report.iloc[i::4].drop(columns=["Customer Search Term"]) for i in range(4)]
+    t0 = time.perf_counter()
+    for bucket in buckets:
+        enrich_with_ids_merge(bucket, bulk)
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    index = BulkIdIndex(bulk)
+    for bucket in buckets:
+        enrich_with_ids(bucket, index)
+    t_new = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for bucket in buckets:
+        enrich_with_ids(bucket, index)
+    t_warm = time.perf_counter() - t0
+    print(f"\n4 buckets           merge {t_old:6.2f}s | index (cold) {t_new:6.3f}s | warm {t_warm:6.3f}s | {t_old / t_warm:5.1f}x warm")
+    print(f"Index tables: {index.stats()}")
+
+    print("\n✅ Indexed ID resolution identical to merge-based helpers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark: incremental what-if optimizer reruns vs full recomputation.
+
+Runs the optimizer pipeline (harvest -> negatives -> bids -> simulation) once on a
+synthetic search term report, then once per single-slider change (TARGET_ROAS,
+ALPHA, HARVEST_ROAS_MULT, MIN_CLICKS_*, SOFT_NEGATIVE_MULT). Each warm rerun reuses
+the cached harvest/negative/bid aggregates, and its outputs are checked against a
+from-scratch run without a feature frame. The cached dedupe plan is also checked
+against the former deduplicate_bucket, including the consolidation negatives it
+stores in session state.
+
+Usage:
+    python scripts/benchmark_incremental_optimizer.py [rows]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+import types
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from features.optimizer.core import DEFAULT_CONFIG, prepare_data, compute_account_benchmarks
+from features.optimizer.feature_frame import build_feature_frame, clear_feature_cache, feature_cache_stats
+from features.optimizer.simulation import run_simulation
+from features.optimizer.strategies import bids as bids_module
+from features.optimizer.strategies.bids import calculate_bid_optimizations, deduplicate_bucket
+from features.optimizer.strategies.harvest import identify_harvest_candidates
+from features.optimizer.strategies.negatives import identify_negative_candidates
+from core.data_loader import is_asin
+from utils.matchers import ExactMatcher
+
+from benchmark_feature_frame import build_report
+
+SLIDER_CHANGES = [
+    {"TARGET_ROAS": 4.0},
+    {"ALPHA_EXACT": 0.40, "ALPHA_BROAD": 0.35},
+    {"HARVEST_ROAS_MULT": 0.60},
+    {"MIN_CLICKS_EXACT": 12, "MIN_CLICKS_BROAD": 15},
+    {"SOFT_NEGATIVE_MULT": 3.0},
+    {"BID_UP_THROTTLE": 0.7, "MAX_BID_CHANGE": 0.40},
+]
+
+
+def deduplicate_bucket_reference(bids_df, bucket_name, session_state):
+    """Former deduplicate_bucket (reference implementation)."""
+    if bids_df.empty:
+        return bids_df
+    bids_df = bids_df.copy()
+    bids_df["_target_norm"] = bids_df["Targeting"].astype(str).str.strip().str.lower()
+    dup_mask = bids_df.duplicated(subset=["_target_norm"], keep=False)
+    if not dup_mask.any():
+        bids_df.drop(columns=["_target_norm"], inplace=True)
+        return bids_df
+    consolidation_negatives = []
+    for target, group in bids_df[dup_mask].groupby("_target_norm"):
+        if len(group) <= 1:
+            continue
+        sorted_group = group.sort_values("ROAS", ascending=False)
+        winner = sorted_group.iloc[0]
+        for _, loser in sorted_group.iloc[1:].iterrows():
+            consolidation_negatives.append({
+                "Type": "Consolidation",
+                "Campaign Name": loser["Campaign Name"],
+                "Ad Group Name": loser.get("Ad Group Name", ""),
+                "Term": loser["Targeting"],
+                "Is_ASIN": is_asin(str(loser["Targeting"])),
+                "Winner_Campaign": winner["Campaign Name"],
+                "Winner_ROAS": winner["ROAS"],
+                "Loser_ROAS": loser["ROAS"],
+                "Reason": f"Consolidation: Same keyword exists in {winner['Campaign Name']} with higher ROAS ({winner['ROAS']:.2f} vs {loser['ROAS']:.2f})"
+            })
+    if consolidation_negatives:
+        session_state["consolidation_negatives"] = session_state.get("consolidation_negatives", []) + consolidation_negatives
+    non_dups = bids_df[~dup_mask].copy()
+    winners = []
+    for target, group in bids_df[dup_mask].groupby("_target_norm"):
+        winner_row = group.sort_values("ROAS", ascending=False).iloc[0:1].copy()
+        winner_row["Reason"] = winner_row["Reason"].astype(str) + " [Best ROAS among duplicates]"
+        winners.append(winner_row)
+    result = pd.concat([non_dups, pd.concat(winners, ignore_index=True)], ignore_index=True)
+    result.drop(columns=["_target_norm"], inplace=True, errors="ignore")
+    return result
+
+
+def run_pipeline(report, config, incremental):
+    """One optimizer run; with incremental=True strategies reuse cached aggregates via the feature frame."""
+    if incremental:
+        features = build_feature_frame(report, config)
+        df, date_info, benchmarks = features.df, features.date_info, features.benchmarks
+        matcher = features.cached("exact_matcher", lambda: ExactMatcher(df))
+        kwargs = {"features": features}
+    else:
+        df, date_info = prepare_data(report, config)
+        benchmarks = compute_account_benchmarks(df, config)
+        matcher = ExactMatcher(df)
+        kwargs = {}
+    harvest = identify_harvest_candidates(df, config, matcher, benchmarks, **kwargs)
+    neg_kw, neg_pt, _ = identify_negative_candidates(df, config, harvest, benchmarks, **kwargs)
+    neg_set = set(zip(neg_kw["Campaign Name"], neg_kw["Ad Group Name"], neg_kw["Term"].str.lower()))
+    bids = calculate_bid_optimizations(df, config, set(harvest["Customer Search Term"].str.lower()), neg_set,
+                                       benchmarks["universal_median_roas"], data_days=date_info["days"], **kwargs)
+    simulation = run_simulation(df, pd.concat([bids[0], bids[1]]), pd.concat([bids[2], bids[3]]), harvest,
+                                config, date_info, **kwargs)
+    return {"harvest": harvest, "neg_kw": neg_kw, "neg_pt": neg_pt, "bids": bids, "simulation": simulation}
+
+
+def comparable(frame):
+    """Recommendation objects compared by id and validation outcome."""
+    frame = frame.copy()
+    if "recommendation" in frame.columns:
+        frame["recommendation"] = frame["recommendation"].map(
+            lambda rec: None if rec is None else (rec.recommendation_id, str(rec.validation_result)))
+    return frame
+
+
+def assert_same(expected, actual, label):
+    for name in ("harvest", "neg_kw", "neg_pt"):
+        pd.testing.assert_frame_equal(comparable(expected[name]), comparable(actual[name]), obj=f"{label} {name}")
+    for i, (e, a) in enumerate(zip(expected["bids"], actual["bids"])):
+        pd.testing.assert_frame_equal(comparable(e), comparable(a), obj=f"{label} bids[{i}]")
+    assert repr(expected["simulation"]) == repr(actual["simulation"]), f"{label}: simulation differs"
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # strategies print debug summaries
+        result = fn()
+    return result, time.perf_counter() - t0
+
+
+def check_dedupe_plan(rows):
+    rng = np.random.default_rng(3)
+    bucket = pd.DataFrame({
+        "Campaign Name": rng.choice([f"Camp {i}" for i in range(30)], rows),
+        "Ad Group Name": rng.choice(["AG 1", "AG 2"], rows),
+        "Targeting": rng.choice([f"Keyword {i}" for i in range(rows // 3)] + [" keyword 1", "KEYWORD 2"], rows),
+        "ROAS": rng.choice([0.0, 1.5, 2.5, 4.0], rows),
+        "Reason": rng.choice(["Hold", "Promote"], rows),
+    })
+    reference_state, state = {}, {}
+    expected, t_ref = timed(lambda: deduplicate_bucket_reference(bucket, "Exact", reference_state))
+    original_st = bids_module.st
+    bids_module.st = types.SimpleNamespace(session_state=state)
+    try:
+        actual, t_new = timed(lambda: deduplicate_bucket(bucket, "Exact"))
+    finally:
+        bids_module.st = original_st
+    pd.testing.assert_frame_equal(expected, actual)
+    assert reference_state["consolidation_negatives"] == state["consolidation_negatives"]
+    print(f"dedupe ({rows:,} targets, {len(state['consolidation_negatives']):,} consolidations) | "
+          f"former {t_ref:6.2f}s | plan {t_new:6.3f}s")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    report = build_report(rows)
+    # Exact keywords get their own terms so discovery terms survive harvest dedupe
+    exact = report["Match Type"].astype(str).str.lower().eq("exact").to_numpy()
+    report.loc[exact, "Customer Search Term"] = np.random.default_rng(5).choice(
+        [f"exact keyword {i}" for i in range(rows // 100)], exact.sum())
+    print(f"Search term report: {rows:,} rows\n")
+
+    check_dedupe_plan(20_000)
+
+    clear_feature_cache()
+    _, t_cold = timed(lambda: run_pipeline(report, dict(DEFAULT_CONFIG), incremental=True))
+    print(f"\ncold run (builds feature frame + aggregates)   {t_cold:7.2f}s")
+
+    for change in SLIDER_CHANGES:
+        config = {**DEFAULT_CONFIG, **change}
+        expected, t_full = timed(lambda: run_pipeline(report, config, incremental=False))
+        actual, t_incr = timed(lambda: run_pipeline(report, config, incremental=True))
+        assert_same(expected, actual, str(change))
+        label = ", ".join(f"{k}={v}" for k, v in change.items())
+        print(f"{label:<42} full {t_full:6.2f}s | incremental {t_incr:6.2f}s | {t_full / t_incr:5.1f}x")
+
+    print(f"\ncache: {feature_cache_stats()}")
+    print("\n✅ Incremental reruns identical to full recomputation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark: incremental AI assistant knowledge graph vs a full rebuild on every chat turn.
+
+Stores a synthetic Search Term Report through DataHub (bare-mode session state), adds an
+optimizer run and a stand-in database for decision impact, then:
+  - checks the context JSON equals the former _get_context (granular dataset with the
+    iterrows() bid merge + every analysis + json.dumps) on the first turn, after an
+    optimizer re-run, after a target ROAS change, after a new upload and without data
+  - checks the vectorized bid merge matches the former iterrows() bids_map
+  - checks a follow-up question reuses the cached JSON (no dataset build, no DB read)
+    and that each change recomputes only the sections that read the changed input
+
+Usage:
+    python scripts/benchmark_knowledge_graph.py [str_rows]
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import streamlit as st
+
+# Configure logging before AssistantModule's basicConfig(filename='assistant_debug.log') can,
+# so running the benchmark never writes a log file into the tree.
+logging.basicConfig(handlers=[logging.NullHandler()], force=True)
+
+import features.assistant as module
+from features.assistant import AssistantModule, KNOWLEDGE_SECTIONS
+from core.data_hub import DataHub
+from core.state_versions import bump_state_version
+
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+DATA_SECTIONS = [n for n, inputs in KNOWLEDGE_SECTIONS.items() if 'data' in inputs]
+
+
+def make_str(rows, seed=21):
+    rng = np.random.default_rng(seed)
+    n_camp, n_kw = 250, 12_000
+    campaigns = np.array([f"SP | Brand {i % 25} | {['Exact', 'Broad', 'Auto', 'PT'][i % 4]} {i}" for i in range(n_camp)], dtype=object)
+    kw = rng.integers(0, n_kw, rows)
+    camp = kw % n_camp
+    spend = rng.gamma(1.3, 4, rows).round(2)
+    return pd.DataFrame({
+        'Date': pd.Timestamp('2026-06-01') + pd.to_timedelta(rng.integers(0, 90, rows), unit='D'),
+        'Campaign Name': campaigns[camp],
+        'Ad Group Name': np.array([f"AG {c % 90}" for c in camp], dtype=object),
+        'Targeting': np.array([f"kids water bottle {k}" for k in kw], dtype=object),
+        'Match Type': rng.choice(['EXACT', 'BROAD', 'PHRASE', 'AUTO'], rows).astype(object),
+        'Customer Search Term': np.array([f"kids water bottle {k} steel {k % 7}" for k in kw], dtype=object),
+        'KeywordId': (700_000_000_000 + kw).astype(str).astype(object),
+        'Impressions': rng.integers(0, 2_000, rows),
+        'Clicks': rng.integers(0, 40, rows),
+        'Orders': rng.poisson(0.4, rows),
+        'Spend': spend,
+        'Sales': np.where(rng.random(rows) < 0.25, rng.uniform(20, 900, rows), 0).round(2),
+    })
+
+
+def make_optimizer_run(str_df, run_id, seed=22):
+    rng = np.random.default_rng(seed)
+    terms = str_df['Customer Search Term'].drop_duplicates().sample(2_000, random_state=seed).to_numpy()
+    ids = str_df['KeywordId'].drop_duplicates().sample(3_000, random_state=seed).to_numpy()
+    ids = np.concatenate([ids, ids[:200], ['nan'] * 20])  # repeated and missing IDs
+    n = len(ids)
+    return {
+        'harvest': pd.DataFrame({'Customer Search Term': terms[:600], 'Spend': rng.uniform(1, 80, 600),
+                                 'Sales': rng.uniform(0, 400, 600), 'Orders': rng.integers(0, 9, 600),
+                                 'CPC': rng.uniform(0.3, 2, 600)}),
+        'neg_kw': pd.DataFrame({'Term': terms[500:1_400], 'Spend': rng.uniform(1, 60, 900)}),
+        'neg_pt': pd.DataFrame({'Term': [f'asin="B0{i:08d}"' for i in range(300)], 'Spend': rng.uniform(1, 30, 300)}),
+        'direct_bids': pd.DataFrame({'KeywordId': ids, 'CPC': rng.uniform(0.3, 2, n).round(2),
+                                     'New Bid': rng.uniform(0.3, 2.5, n).round(2), 'Clicks': rng.integers(0, 60, n),
+                                     'Reason': rng.choice(['Scale winner', 'Cut bleeder', 'Hold'], n)}),
+        'agg_bids': pd.DataFrame(),
+        'simulation': {'scenarios': {'current': {'spend': 12_000, 'sales': 40_000, 'roas': 3.3},
+                                     'expected': {'spend': 11_100, 'sales': 43_500, 'roas': 3.9}}},
+        'run_id': run_id,
+    }
+
+
+class StandInDb:
+    """Database stand-in for decision impact: fixed query latency, counts reads."""
+
+    def __init__(self):
+        self.reads = 0
+
+    def get_action_impact(self, client_id, **kwargs):
+        self.reads += 1
+        time.sleep(0.05)  # Query latency
+        return pd.DataFrame()
+
+
+def former_merge_bids(master, bids_df):
+    """Former bid merge: bids_map built with iterrows() (reference implementation)."""
+    bids_map = {}
+    id_col = 'KeywordId' if 'KeywordId' in bids_df.columns else 'TargetingId'
+    for _, row in bids_df.iterrows():
+        key = str(row[id_col])
+        if key and key != 'nan':
+            bids_map[key] = {
+                'New Bid': row.get('New Bid'),
+                'Original Bid': row.get('Cost Per Click (CPC)', row.get('CPC')),
+                'Reason': row.get('Reason', '')
+            }
+    master['Optimized_Bid'] = master[id_col].astype(str).map(lambda x: bids_map.get(x, {}).get('New Bid'))
+    master['Bid_Reason'] = master[id_col].astype(str).map(lambda x: bids_map.get(x, {}).get('Reason', ''))
+    return master
+
+
+def former_get_context(assistant):
+    """Former _get_context: dataset + every section + json.dumps on every turn (reference implementation)."""
+    df = assistant._construct_granular_dataset()
+    if df.empty:
+        knowledge = {
+            "error": "No Search Term Report loaded yet. Upload in Data Hub for full analysis.",
+            "data_status": assistant._summarize_data_status(),
+            "module_context": assistant._gather_module_context()
+        }
+        return json.dumps(knowledge, indent=2, default=str)
+    opt_res = st.session_state.get('optimizer_results') or st.session_state.get('latest_optimizer_run')
+    if opt_res:
+        df = former_merge_bids(df, opt_res['direct_bids'])
+    knowledge = {name: assistant._knowledge_section(name, df) for name in KNOWLEDGE_SECTIONS}
+    return json.dumps(knowledge, indent=2, default=str)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    str_df = make_str(rows)
+    db = StandInDb()
+    module.get_db_manager = lambda test_mode=False: db
+    # Decision impact only ages when step 6 says so, however long the former rebuilds take
+    module.ASSISTANT_IMPACT_TTL = 1e9
+
+    hub = DataHub()
+    hub._store('search_term_report', str_df)
+    st.session_state['active_account_id'] = 'bench_client'
+    st.session_state['client_id'] = 'bench_client'
+    st.session_state['data_upload_timestamp'] = 1760600000.0
+    st.session_state['latest_optimizer_run'] = make_optimizer_run(str_df, '2026-10-16T09:00:00')
+    bump_state_version('latest_optimizer_run')
+
+    assistant, reference = AssistantModule(), AssistantModule()
+    builds, recomputed = [], []
+    construct, section = assistant._construct_granular_dataset, assistant._knowledge_section
+
+    def counted_construct():
+        builds.append(1)
+        return construct()
+
+    def counted_section(name, df):
+        recomputed.append(name)
+        return section(name, df)
+
+    assistant._construct_granular_dataset = counted_construct
+    assistant._knowledge_section = counted_section
+
+    def turn():
+        builds.clear()
+        recomputed.clear()
+        db.reads = 0
+        t0 = time.perf_counter()
+        text = assistant._get_context()
+        return text, time.perf_counter() - t0
+
+    def former():
+        t0 = time.perf_counter()
+        text = former_get_context(reference)
+        return text, time.perf_counter() - t0
+
+    # Vectorized bid merge == former iterrows() bids_map
+    master = construct()
+    expected_bids = former_merge_bids(master.copy(), st.session_state['latest_optimizer_run']['direct_bids'])
+    pd.testing.assert_series_equal(master['Optimized_Bid'].astype(float), expected_bids['Optimized_Bid'].astype(float))
+    pd.testing.assert_series_equal(master['Bid_Reason'], expected_bids['Bid_Reason'])
+
+    # 1. First question: full build, same context
+    expected, t_former = former()
+    context, t_cold = turn()
+    assert context == expected
+    assert len(builds) == 1 and recomputed == list(KNOWLEDGE_SECTIONS)
+
+    # 2. Follow-up question: cached JSON, no dataset build, no DB read
+    context, t_warm = turn()
+    assert context == expected and not builds and not recomputed and db.reads == 0
+
+    # 3. Optimizer re-run: only the sections that read optimizer output
+    run = make_optimizer_run(str_df, '2026-10-16T09:30:00', seed=23)
+    st.session_state['latest_optimizer_run'] = run
+    bump_state_version('latest_optimizer_run')
+    context, t_optimizer = turn()
+    assert context == former()[0]
+    assert set(recomputed) == {n for n, inputs in KNOWLEDGE_SECTIONS.items() if 'optimizer' in inputs}
+
+    # 4. Target ROAS change: account health and strategic insights only
+    st.session_state['opt_target_roas'] = 4.0
+    context, t_settings = turn()
+    assert context == former()[0]
+    assert set(recomputed) == {'account_health', 'strategic_insights'}
+
+    # 5. New upload: every data section, and decision impact is re-read (not data_status)
+    hub._store('search_term_report', make_str(rows, seed=24))
+    st.session_state['data_upload_timestamp'] = 1760700000.0
+    context, t_upload = turn()
+    assert context == former()[0]
+    assert set(recomputed) == set(DATA_SECTIONS) | {'module_context'}
+
+    # 6. Impact TTL elapsed: only the DB-backed sections
+    module.ASSISTANT_IMPACT_TTL, ttl = 1e-9, module.ASSISTANT_IMPACT_TTL
+    context, _ = turn()
+    module.ASSISTANT_IMPACT_TTL = ttl
+    assert set(recomputed) == {n for n, inputs in KNOWLEDGE_SECTIONS.items() if 'impact' in inputs}
+    assert db.reads == 2
+    context, _ = turn()  # TTL is counted from that read
+    assert not recomputed and db.reads == 0
+
+    # 7. No data loaded: reduced context, then no rebuild on the follow-up
+    hub._store('search_term_report', None)
+    st.session_state['active_account_id'] = None
+    st.session_state['data_upload_timestamp'] = None
+    context, _ = turn()
+    assert context == former()[0] and json.loads(context)['error'].startswith("No Search Term Report")
+    context, _ = turn()
+    assert not builds and not recomputed
+
+    print(f"{rows:,} STR rows | {len(run['direct_bids']):,} bid recommendations | {len(KNOWLEDGE_SECTIONS)} sections")
+    print(f"former _get_context (every turn)  {t_former:6.2f}s")
+    print(f"first question (cold)              {t_cold:6.2f}s")
+    print(f"follow-up question (cached JSON)   {t_warm * 1000:6.2f} ms | {t_former / t_warm:,.0f}x faster")
+    print(f"after optimizer re-run             {t_optimizer:6.2f}s | "
+          f"{sum('optimizer' in i for i in KNOWLEDGE_SECTIONS.values())} sections")
+    print(f"after target ROAS change           {t_settings:6.2f}s | 2 sections")
+    print(f"after new upload                   {t_upload:6.2f}s | {len(DATA_SECTIONS) + 1} sections")
+    print("\n✅ Knowledge graph is built once per data/optimizer version and rebuilt section by section")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Benchmark: keyword cluster engine vs the former in-request KMeans + per-cluster loop.
+
+Builds a synthetic search term report with themed terms, then:
+  - checks that summarize_clusters (single groupby) equals the former per-cluster
+    filter loop, including top terms, SKU/ASIN lists and waste metrics
+  - checks that small accounts (< MINIBATCH_MIN_TERMS unique terms) get the same
+    labels and K as the former KMeans/silhouette selection
+  - times the MiniBatchKMeans path (warm-started K search, sampled silhouette) on
+    larger term sets, against the former selection where that finishes in reasonable time
+
+Usage:
+    python scripts/benchmark_kw_cluster.py [max_terms]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sklearn.cluster import KMeans
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import silhouette_score
+
+from core.data_loader import safe_numeric
+from features.kw_cluster import MINIBATCH_MIN_TERMS, cluster_search_terms, summarize_clusters
+
+THEMES = {
+    "bottle": ["water bottle", "steel bottle", "sipper", "flask", "kids bottle", "gym bottle"],
+    "bag": ["school bag", "backpack", "lunch bag", "tote bag", "laptop bag"],
+    "toy": ["toy car", "building blocks", "puzzle", "doll house", "board game", "rc car"],
+    "stationery": ["pencil box", "crayons", "notebook", "art kit", "color pens", "sketch book"],
+    "kitchen": ["lunch box", "tiffin", "casserole", "storage jar", "spice box"],
+}
+MODIFIERS = ["for kids", "for girls", "for boys", "1 litre", "500ml", "premium", "cute", "cartoon",
+             "set of 2", "combo", "gift", "insulated", "bpa free", "large", "small", "pink", "blue"]
+
+
+def make_terms(rng, n):
+    heads = [h for items in THEMES.values() for h in items]
+    head = rng.choice(heads, n)
+    mod = rng.choice(MODIFIERS, n)
+    brand = rng.choice(["", "", "milton", "skybags", "funskool", "faber", "cello"], n)
+    suffix = rng.integers(0, max(n // 20, 1), n).astype(str)
+    return pd.Series(brand + " " + head + " " + mod + " " + suffix).str.strip().unique()
+
+
+def make_report(rng, terms, rows):
+    data = pd.DataFrame({
+        "Customer Search Term": rng.choice(np.append(terms, [None]), rows),
+        "Impressions": rng.integers(0, 400, rows),
+        "Clicks": rng.integers(0, 12, rows),
+        "Spend": np.where(rng.random(rows) < 0.1, "₹" + rng.gamma(1.2, 8, rows).round(2).astype(str),
+                          rng.gamma(1.2, 8, rows).round(2).astype(str)),
+        "Orders": rng.poisson(0.4, rows),
+    })
+    data["Sales"] = (data["Orders"] * rng.uniform(50, 400, rows)).round(2)
+    data["SKU_advertised"] = rng.choice(["SKU-1", " SKU-2", "nan", "", None, "SKU-3", "SKU-4", "SKU-5", "SKU-6"], rows)
+    data["ASIN_advertised"] = rng.choice(["B0AAA11111", "B0BBB22222", "SKU-1", None], rows)
+    return data
+
+
+def summarize_clusters_reference(data, n_clusters, term_col, imp_col, clicks_col, spend_col, orders_col,
+                                 sales_col, sku_col, asin_col):
+    """Former per-cluster loop from AIInsightsModule.analyze (reference implementation)."""
+    cluster_summary = []
+    for cluster_id in range(n_clusters):
+        cluster_data = data[data['cluster'] == cluster_id]
+        if len(cluster_data) < 3:
+            continue
+        total_impressions = cluster_data[imp_col].sum()
+        total_clicks = cluster_data[clicks_col].sum()
+        total_spend = safe_numeric(cluster_data[spend_col]).sum()
+        total_sales = safe_numeric(cluster_data[sales_col]).sum() if sales_col else 0
+        total_orders = cluster_data[orders_col].sum()
+        top_terms = cluster_data.groupby(term_col)[imp_col].sum().nlargest(5).index.tolist()
+        advertised_skus = []
+        if sku_col:
+            skus = cluster_data[sku_col].dropna().unique().tolist()
+            skus = [str(s).strip() for s in skus if str(s).strip() and str(s).strip().lower() != 'nan']
+            advertised_skus.extend(skus[:5])
+        if asin_col:
+            asins = cluster_data[asin_col].dropna().unique().tolist()
+            asins = [str(a).strip() for a in asins if str(a).strip() and str(a).strip().lower() != 'nan']
+            for asin in asins[:5]:
+                if asin not in advertised_skus:
+                    advertised_skus.append(asin)
+        term_performance = cluster_data.groupby(term_col).agg({
+            clicks_col: 'sum',
+            orders_col: 'sum',
+            spend_col: lambda x: safe_numeric(x).sum()
+        })
+        converting_terms = len(term_performance[term_performance[orders_col] > 0])
+        non_converting_terms = len(term_performance[
+            (term_performance[clicks_col] > 0) & (term_performance[orders_col] == 0)
+        ])
+        wasted_spend_data = term_performance[
+            (term_performance[clicks_col] > 0) & (term_performance[orders_col] == 0)
+        ]
+        wasted = wasted_spend_data[spend_col].sum() if len(wasted_spend_data) > 0 else 0
+        waste_pct = (wasted / total_spend * 100) if total_spend > 0 else 0
+        cluster_summary.append({
+            'cluster_id': cluster_id + 1,
+            'size': len(cluster_data),
+            'top_terms': top_terms,
+            'advertised_products': advertised_skus if advertised_skus else ['No SKU data'],
+            'impressions': int(total_impressions),
+            'clicks': int(total_clicks),
+            'spend': float(total_spend),
+            'sales': float(total_sales),
+            'orders': int(total_orders),
+            'converting_terms': converting_terms,
+            'non_converting_terms': non_converting_terms,
+            'wasted_spend': float(wasted),
+            'waste_pct': float(waste_pct),
+            'ctr': (total_clicks / total_impressions * 100) if total_impressions > 0 else 0,
+            'cvr': (total_orders / total_clicks * 100) if total_clicks > 0 else 0
+        })
+    return cluster_summary
+
+
+def select_k_reference(search_terms):
+    """Former K selection + final fit (reference implementation)."""
+    tfidf_matrix = TfidfVectorizer(max_features=150, ngram_range=(1, 2), min_df=1, max_df=0.9).fit_transform(search_terms)
+    min_clusters, max_clusters = 3, min(35, len(search_terms) // 10)
+    if max_clusters <= min_clusters:
+        n_clusters = min_clusters
+    else:
+        scores = []
+        K_range = range(min_clusters, min(max_clusters + 1, min_clusters + 10))
+        for k in K_range:
+            labels = KMeans(n_clusters=k, random_state=42, n_init=10).fit_predict(tfidf_matrix)
+            scores.append(silhouette_score(tfidf_matrix, labels))
+        n_clusters = list(K_range)[scores.index(max(scores))]
+    return KMeans(n_clusters=n_clusters, random_state=42, n_init=10).fit_predict(tfidf_matrix), n_clusters
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def check_summary(rng):
+    terms = make_terms(rng, 3_000)
+    data = make_report(rng, terms, 200_000)
+    labels = rng.integers(0, 30, len(terms))
+    data["cluster"] = data["Customer Search Term"].map(dict(zip(terms, labels)))
+    args = (data, 30, "Customer Search Term", "Impressions", "Clicks", "Spend", "Orders")
+    for kwargs in ({"sales_col": "Sales", "sku_col": "SKU_advertised", "asin_col": "ASIN_advertised"},
+                   {"sales_col": None, "sku_col": None, "asin_col": "ASIN_advertised"}):
+        expected, t_ref = timed(lambda: summarize_clusters_reference(*args, **kwargs))
+        actual, t_new = timed(lambda: summarize_clusters(*args, **kwargs))
+        pd.testing.assert_frame_equal(pd.DataFrame(expected), pd.DataFrame(actual), check_dtype=False)
+    print(f"cluster summary ({len(data):,} rows, 30 clusters) | former {t_ref:6.2f}s | groupby {t_new:6.2f}s")
+
+
+def main():
+    max_terms = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = np.random.default_rng(21)
+    check_summary(rng)
+
+    terms = make_terms(rng, 2_500)
+    (ref_labels, ref_k), t_ref = timed(lambda: select_k_reference(terms))
+    (labels, k, _), t_new = timed(lambda: cluster_search_terms(terms))
+    assert k == ref_k and np.array_equal(labels, ref_labels)
+    print(f"small account ({len(terms):,} terms) | K={k} identical | former {t_ref:6.2f}s | new {t_new:6.2f}s\n")
+
+    n = MINIBATCH_MIN_TERMS * 2
+    while n <= max_terms:
+        terms = make_terms(rng, n)
+        (labels, k, tested), t_new = timed(lambda: cluster_search_terms(terms))
+        tfidf = TfidfVectorizer(max_features=150, ngram_range=(1, 2), min_df=1, max_df=0.9).fit_transform(terms)
+        sample = min(5_000, len(terms))
+        quality = silhouette_score(tfidf, labels, sample_size=sample, random_state=0)
+        line = f"{len(terms):>8,} terms | K={k:<2} (tested {tested[0]}-{tested[-1]}) | minibatch {t_new:6.2f}s | silhouette {quality:.3f}"
+        if len(terms) <= 40_000:
+            (ref_labels, ref_k), t_ref = timed(lambda: select_k_reference(terms))
+            ref_quality = silhouette_score(tfidf, ref_labels, sample_size=sample, random_state=0)
+            line += f" | former {t_ref:7.2f}s (K={ref_k}, silhouette {ref_quality:.3f})"
+        print(line)
+        n *= 4
+
+    print("\n✅ Cluster engine matches the former summaries and small-account clustering")
+
+
+if __name__ == "__main__":
+    main()
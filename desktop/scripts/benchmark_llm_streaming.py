@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streamed assistant replies vs the former blocking LLM call.
+
+Starts a local stub of the Claude messages and OpenAI chat completions endpoints that
+answers with server-sent events (chunked, one event per token with a fixed delay) or,
+without "stream", with the whole reply as JSON after the same total time. Then:
+  - compares time-to-first-token of _call_llm(stream=True) with the blocking call, and
+    checks the streamed text equals the blocking reply (UTF-8 included) for both providers
+  - checks a 429 before the stream starts is retried, a Claude failure before the first
+    token falls back to OpenAI, and an error mid-stream keeps the partial reply and
+    appends the error
+  - checks closing the stream (the user navigated away) or setting cancel closes the
+    connection, so the stub stops sending tokens
+  - checks the no-API-key message is streamed as text
+
+Usage:
+    python scripts/benchmark_llm_streaming.py [token_delay_seconds]
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+REPLY = ("Your biggest leak is **Auto campaigns**: AED 1,250 spent on 'kids bottle' variants with zero orders. "
+         "Negate the 14 exact terms → save ~AED 5,400/month ✅. Scale 'stainless kids bottle' (ROAS 6.2) by +20%.")
+TOKENS = [REPLY[i:i + 6] for i in range(0, len(REPLY), 6)]
+
+
+class SseStub:
+    """Local stand-in for the Claude and OpenAI APIs, streaming or not."""
+
+    def __init__(self, first_token_delay, token_delay):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.lock = threading.Lock()
+        self.reset()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client closed a kept-alive connection
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                provider = 'claude' if self.path.endswith('/messages') else 'openai'
+                with stub.lock:
+                    stub.requests.append((provider, bool(body.get('stream'))))
+                    status = stub.status.get(provider, [200]).pop(0) if stub.status.get(provider) else 200
+                if status != 200:
+                    return self._json(status, {'error': {'type': 'stub_error', 'status': status}},
+                                      {'Retry-After': '0'} if status == 429 else None)
+                if not body.get('stream'):
+                    time.sleep(stub.first_token_delay + stub.token_delay * len(TOKENS))
+                    reply = ({'content': [{'type': 'text', 'text': REPLY}]} if provider == 'claude'
+                             else {'choices': [{'message': {'role': 'assistant', 'content': REPLY}}]})
+                    return self._json(200, reply)
+                self._stream(provider)
+
+            def _stream(self, provider):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')  # no charset, like the real APIs
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                try:
+                    time.sleep(stub.first_token_delay)
+                    if provider == 'claude':
+                        self._event('message_start', {'type': 'message_start', 'message': {'role': 'assistant'}})
+                        self._event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                                            'content_block': {'type': 'text', 'text': ''}})
+                        self._chunk(b': keep-alive\n\n')
+                    for i, token in enumerate(TOKENS):
+                        if provider == 'claude' and i == stub.claude_error_after:
+                            self._event('error', {'type': 'error', 'error': {'type': 'overloaded_error'}})
+                            return self._chunk(b'')
+                        if provider == 'claude':
+                            self._event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                                                'delta': {'type': 'text_delta', 'text': token}})
+                        else:
+                            self._event(None, {'choices': [{'index': 0, 'delta': {'content': token}}]})
+                        with stub.lock:
+                            stub.tokens_sent += 1
+                        time.sleep(stub.token_delay)
+                    if provider == 'claude':
+                        self._event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+                        self._event('message_stop', {'type': 'message_stop'})
+                    else:
+                        self._chunk(b'data: [DONE]\n\n')
+                    self._chunk(b'')
+                except (BrokenPipeError, ConnectionResetError):
+                    with stub.lock:
+                        stub.aborted += 1
+
+            def _event(self, name, payload):
+                data = json.dumps(payload, ensure_ascii=False)
+                self._chunk(((f"event: {name}\n" if name else "") + f"data: {data}\n\n").encode('utf-8'))
+
+            def _chunk(self, data):
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        with self.lock:
+            self.requests = []
+            self.status = {}  # provider -> statuses for the next requests
+            self.claude_error_after = None
+            self.tokens_sent = 0
+            self.aborted = 0
+
+
+def use_keys(claude=True, openai=True):
+    for name, enabled in (("CLAUDE_API_KEY", claude), ("OPENAI_API_KEY", openai)):
+        if enabled:
+            os.environ[name] = "test-key"
+        else:
+            os.environ.pop(name, None)
+
+
+def timed_stream(stream):
+    """(text, seconds to first chunk, seconds to last chunk)"""
+    t0 = time.perf_counter()
+    first, chunks = None, []
+    for chunk in stream:
+        first = first if first is not None else time.perf_counter() - t0
+        chunks.append(chunk)
+    return "".join(chunks), first, time.perf_counter() - t0
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def main():
+    token_delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.03
+    stub = SseStub(first_token_delay=0.3, token_delay=token_delay)
+    os.environ.update({"CLAUDE_API_URL": f"{stub.base}/v1/messages",
+                       "OPENAI_API_URL": f"{stub.base}/v1/chat/completions",
+                       "LLM_REQUESTS_PER_SECOND": "50"})
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    import features.assistant as module
+    from features.assistant import AssistantModule
+
+    assistant = AssistantModule()
+    messages = [{"role": "system", "content": "KNOWLEDGE GRAPH: {}"},
+                {"role": "user", "content": "Where am I losing money?"}]
+    results = {}
+
+    for provider, keys in (("claude", dict(claude=True, openai=False)), ("openai", dict(claude=False, openai=True))):
+        use_keys(**keys)
+        stub.reset()
+        t0 = time.perf_counter()
+        blocking = assistant._call_llm(messages)
+        t_blocking = time.perf_counter() - t0
+        assert blocking == REPLY, blocking
+
+        stub.reset()
+        streamed, ttft, total = timed_stream(assistant._call_llm(messages, stream=True))
+        assert streamed == REPLY, streamed
+        assert stub.requests == [(provider, True)]
+        assert ttft < t_blocking / 3, (ttft, t_blocking)
+        results[provider] = (t_blocking, ttft, total)
+
+    # 429 before the stream starts: retried under the shared rate limiter
+    use_keys(claude=True, openai=False)
+    stub.reset()
+    stub.status = {'claude': [429]}
+    streamed, _, _ = timed_stream(assistant._call_llm(messages, stream=True))
+    assert streamed == REPLY and stub.requests == [('claude', True), ('claude', True)]
+
+    # Claude fails before its first token: falls back to OpenAI
+    use_keys(claude=True, openai=True)
+    stub.reset()
+    stub.status = {'claude': [400]}
+    streamed, _, _ = timed_stream(assistant._call_llm(messages, stream=True))
+    assert streamed == REPLY and stub.requests == [('claude', True), ('openai', True)]
+
+    # Error mid-stream: the partial reply stays, the error is appended, no second provider
+    stub.reset()
+    stub.claude_error_after = 5
+    streamed, _, _ = timed_stream(assistant._call_llm(messages, stream=True))
+    assert streamed.startswith("".join(TOKENS[:5]) + "\n\n❌ Error communicating with AI"), streamed
+    assert stub.requests == [('claude', True)]
+
+    # User navigates away: closing the stream closes the connection and the stub stops
+    stub.reset()
+    stream = assistant._call_llm(messages, stream=True)
+    seen = [next(stream) for _ in range(3)]
+    stream.close()
+    assert wait_for(lambda: stub.aborted == 1), "stub kept streaming after the reply was closed"
+    assert stub.tokens_sent < len(TOKENS) / 2, stub.tokens_sent
+    closed_after = stub.tokens_sent
+
+    # Same through a cancel event (e.g. a non-UI caller)
+    stub.reset()
+    cancel = threading.Event()
+    chunks = []
+    for chunk in assistant._call_llm(messages, stream=True, cancel=cancel):
+        chunks.append(chunk)
+        if len(chunks) == 3:
+            cancel.set()
+    assert "".join(chunks) == "".join(TOKENS[:3]) and "".join(seen) == "".join(TOKENS[:3])
+    assert wait_for(lambda: stub.aborted == 1) and stub.tokens_sent < len(TOKENS) / 2
+
+    # No API key: the message is streamed as the reply
+    use_keys(claude=False, openai=False)
+    assert "".join(assistant._call_llm(messages, stream=True)) == module.NO_API_KEY_MESSAGE
+
+    stub.server.shutdown()
+    print(f"{len(TOKENS)} tokens | stub first token after 0.30s, then {token_delay * 1000:.0f} ms per token")
+    for provider, (t_blocking, ttft, total) in results.items():
+        print(f"{provider:6s} blocking reply {t_blocking:5.2f}s | streamed: first token {ttft * 1000:6.1f} ms "
+              f"({t_blocking / ttft:4.1f}x sooner), complete {total:5.2f}s")
+    print(f"closed after 3 tokens: stub stopped after {closed_after}/{len(TOKENS)} tokens")
+    print("\n✅ Assistant replies stream token by token and stop when the reader goes away")
+
+
+if __name__ == '__main__':
+    main()
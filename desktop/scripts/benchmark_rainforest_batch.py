@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent RainforestClient.batch_lookup vs the former sequential loop.
+
+Starts a local stub of the Rainforest product endpoint (fixed latency, a few
+not-found ASINs, and ASINs that answer 503 once to exercise the retry policy), then:
+  - runs the former batch_lookup (lookup_asin per ASIN: single-row cache probe,
+    rate-limiter sleep, blocking request) against a fresh cache
+  - runs the new batch_lookup against another fresh cache and checks the results
+    are identical, in input order, with every ASIN requested once (plus retries)
+  - checks the shared token bucket kept request starts within the rate limit
+  - reruns the batch to check cached ASINs are served from one bulk cache probe
+
+Usage:
+    python scripts/benchmark_rainforest_batch.py [asins] [latency_seconds] [requests_per_second]
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from api.rainforest_client import RainforestClient
+
+
+class StubRainforest(BaseHTTPRequestHandler):
+    """Rainforest 'product' request stub."""
+
+    latency = 0.3
+    lock = threading.Lock()
+    requests = []          # (asin, start time)
+    flaky = set()          # ASINs that fail once with 503
+    failed_once = set()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        asin = query['asin'][0]
+        with self.lock:
+            self.requests.append((asin, time.monotonic()))
+            fail = asin in self.flaky and asin not in self.failed_once
+            if fail:
+                self.failed_once.add(asin)
+        time.sleep(self.latency)
+        if fail:
+            self._reply(503, {'error': 'busy'})
+        elif asin.endswith('0'):
+            self._reply(200, {'request_info': {'success': False}, 'error': 'Product not found'})
+        else:
+            self._reply(200, {'product': {
+                'title': f'Product {asin}',
+                'brand': f'Brand {asin[-2:]}',
+                'buybox_winner': {'name': 'Seller', 'price': {'value': 49.0, 'currency': 'AED'}},
+                'rating': 4.2,
+                'ratings_total': 120,
+                'categories': [{'name': 'Home'}, {'name': 'Kitchen'}],
+                'availability': {'raw': 'In Stock'},
+            }})
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def former_batch_lookup(client, asin_list, marketplace='AE'):
+    """Former batch_lookup (reference implementation)."""
+    results = []
+    for asin in asin_list:
+        results.append(client.lookup_asin(asin, marketplace))
+    return results
+
+
+def max_starts_per_window(starts, window):
+    starts = sorted(starts)
+    best, j = 0, 0
+    for i in range(len(starts)):
+        while starts[i] - starts[j] >= window:
+            j += 1
+        best = max(best, i - j + 1)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    StubRainforest.latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    rps = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubRainforest)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/request'
+
+    asins = [f'B0TEST{i:04d}' for i in range(n)]
+    asins += asins[:3]  # repeated ASINs are looked up once
+    StubRainforest.flaky = set(asins[1:n:7])
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        former = RainforestClient('test', cache_db=os.path.join(tmp, 'former.db'), base_url=base_url,
+                                  requests_per_second=rps, max_workers=1)
+        t0 = time.perf_counter()
+        expected = former_batch_lookup(former, asins)
+        t_former = time.perf_counter() - t0
+
+        StubRainforest.requests.clear()
+        StubRainforest.failed_once.clear()
+        client = RainforestClient('test', cache_db=os.path.join(tmp, 'new.db'), base_url=base_url,
+                                  requests_per_second=rps, max_workers=8)
+        progress = []
+        t0 = time.perf_counter()
+        actual = client.batch_lookup(asins, progress_callback=lambda done, total: progress.append((done, total)))
+        t_new = time.perf_counter() - t0
+        requested = [asin for asin, _ in StubRainforest.requests]
+        starts = [start for _, start in StubRainforest.requests]
+
+        StubRainforest.requests.clear()
+        t0 = time.perf_counter()
+        rerun = client.batch_lookup(asins)
+        t_rerun = time.perf_counter() - t0
+        rerun_requests = len(StubRainforest.requests)
+
+    assert actual == expected, "batch results differ from sequential lookups"
+    assert [r['asin'] for r in actual] == asins
+    assert sorted(requested) == sorted([*set(asins), *StubRainforest.flaky]), "each ASIN requested once (plus one retry)"
+    assert progress[-1] == (n, n)
+    peak = max_starts_per_window(starts, 1.0)
+    assert peak <= rps + 1, f"{peak} requests in one second with limit {rps}/s"
+    # Only lookups that failed (not found) are requested again
+    not_found = {r['asin'] for r in expected if r['status'] != 'success'}
+    assert rerun == expected and rerun_requests == len(not_found)
+
+    hits = len(set(asins)) - len(not_found)
+    print(f"{len(asins)} ASINs ({n} unique, {len(StubRainforest.flaky)} flaky) | stub latency {StubRainforest.latency}s | limit {rps}/s")
+    print(f"former sequential batch_lookup   {t_former:6.2f}s")
+    print(f"concurrent batch_lookup          {t_new:6.2f}s | {t_former / t_new:4.1f}x | peak {peak} requests/s")
+    print(f"rerun (bulk cache probe)         {t_rerun:6.3f}s | {hits} cache hits, {rerun_requests} requests")
+    print("\n✅ Concurrent batch lookup matches sequential lookups within the rate limit")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent, cached client-report narratives vs the former sequential loop.
+
+Starts a local mock of the Claude messages endpoint (fixed latency per request,
+deterministic replies, scripted 429s / 500s) and points features.assistant at it, then:
+  - runs the former generate_report_narratives loop (one blocking request per panel)
+    and the concurrent pipeline on the same knowledge graph, and checks both send the
+    same prompts and return the same narratives
+  - checks a 429 with Retry-After is retried under the shared rate limiter instead of
+    failing the panel, and that concurrent requests never exceed LLM_MAX_WORKERS
+  - reopens the report (all panels served from the narrative cache, no requests), then
+    changes one panel's data (only that panel and the executive summary are re-asked)
+  - makes one panel fail permanently: NarrativeGenerationError carries the panels that
+    succeeded, and the failed panel is not cached
+
+Usage:
+    python scripts/benchmark_report_narratives.py [latency_seconds]
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+PANELS = ["performance", "health", "portfolio", "impact", "actions", "match_type", "executive_summary"]
+PANEL_MARKERS = {  # text that identifies each panel's prompt
+    "performance": "Based on these performance metrics", "health": "Account health analysis",
+    "portfolio": "Campaign portfolio breakdown", "impact": "Decision impact measurement",
+    "actions": "Optimization actions executed", "match_type": "Match type performance analysis",
+    "executive_summary": "EXECUTIVE SUMMARY",
+}
+
+
+class MockLLM:
+    """Local stand-in for the Claude messages API."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = []          # (panel, prompt) per request, retries included
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.throttle_once = set()  # panels answered 429 on their next request
+        self.fail = set()           # panels answered 500 on every request
+
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                prompt = body['messages'][-1]['content']
+                panel = next(p for p, marker in PANEL_MARKERS.items() if marker in prompt)
+                with mock.lock:
+                    mock.requests.append((panel, prompt))
+                    mock.in_flight += 1
+                    mock.max_in_flight = max(mock.max_in_flight, mock.in_flight)
+                    throttled = panel in mock.throttle_once
+                    mock.throttle_once.discard(panel)
+                try:
+                    time.sleep(mock.latency)
+                    if throttled:
+                        return self._reply(429, {'error': 'rate_limit_error'}, {'Retry-After': '1'})
+                    if panel in mock.fail:
+                        return self._reply(500, {'error': 'overloaded'})
+                    digest = hashlib.sha256(prompt.encode()).hexdigest()[:12]
+                    if panel == 'executive_summary':
+                        text = json.dumps({'achievements': [f"Win {digest}"], 'areas_to_watch': ["ROAS < 2.5 segments"],
+                                           'next_steps': ["Monitor market forces"]})
+                    else:
+                        text = f"{panel} narrative {digest}."
+                    self._reply(200, {'content': [{'type': 'text', 'text': text}]})
+                finally:
+                    with mock.lock:
+                        mock.in_flight -= 1
+
+            def _reply(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/messages"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        with self.lock:
+            self.requests.clear()
+            self.max_in_flight = 0
+
+
+def make_knowledge():
+    return {
+        "dataset_overview": {"spend": 12500.0, "sales": 48100.0, "roas": 3.85, "orders": 912, "cvr": 9.1},
+        "account_health": {"status": "Healthy", "score": 78, "optimization_opportunities": {"negatives": 41}},
+        "campaign_portfolio": {"winners": ["SP | Brand | Exact"], "losers": ["SP | Generic | Broad"],
+                               "concentration": {"top5_share": 0.62}},
+        "term_analysis": {"top_terms": ["kids water bottle"]},
+        "strategic_insights": [{"type": "match_type_efficiency", "best": "exact"}],
+        "optimization_impact": {"date_range": "Aug 1 - Aug 28", "net_summary": {"net": 2100.0},
+                                "negatives": {"count": 41}, "harvests": {"count": 12}, "bids": {"count": 230}},
+        "module_context": {"decision_impact": {"attributed_impact": 3400.0, "actions": 283}},
+    }
+
+
+def former_call_llm(messages, url, api_key):
+    """Former _call_llm -> _call_claude: one blocking request, no retry (no OpenAI key configured)."""
+    payload = {"model": "claude-3-5-sonnet-20241022", "max_tokens": 4000, "temperature": 0.4,
+               "messages": [m for m in messages if m["role"] != "system"],
+               "system": "\n\n".join(m["content"] for m in messages if m["role"] == "system")}
+    try:
+        response = requests.post(url, headers={"x-api-key": api_key, "anthropic-version": "2023-06-01",
+                                               "Content-Type": "application/json"}, json=payload, timeout=60)
+        response.raise_for_status()
+        return response.json()['content'][0]['text']
+    except Exception:
+        return "⚠️ No AI API Key configured. Please add CLAUDE_API_KEY or OPENAI_API_KEY to .streamlit/secrets.toml"
+
+
+def former_generate(assistant, knowledge, panels, url, api_key):
+    """Former generate_report_narratives loop: panels one after another (reference implementation)."""
+    # Same prompt builders; only the request path is swapped for the former one
+    assistant._cached_llm_call = lambda messages, keys=None, parse=None, refresh=False: (
+        parse(former_call_llm(messages, url, api_key)) if parse else former_call_llm(messages, url, api_key).strip())
+    try:
+        narratives = {}
+        for panel in panels:
+            if panel == "executive_summary":
+                narratives[panel] = assistant._generate_executive_summary(knowledge)
+            else:
+                narratives[panel] = assistant._generate_panel_narrative(panel, assistant._extract_panel_context(panel, knowledge))
+        return narratives
+    finally:
+        del assistant._cached_llm_call
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    mock = MockLLM(latency)
+    os.environ.update({"CLAUDE_API_URL": mock.url, "CLAUDE_API_KEY": "test-key", "LLM_MAX_WORKERS": "4",
+                       "LLM_REQUESTS_PER_SECOND": "8"})
+    os.environ.pop("OPENAI_API_KEY", None)
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    import features.assistant as module
+    from features.assistant import AssistantModule, NarrativeGenerationError, narrative_cache
+
+    knowledge = make_knowledge()
+    assistant = AssistantModule()
+    assistant._get_knowledge = lambda: (copy.deepcopy(knowledge), True)
+
+    # 1. Former sequential loop vs concurrent pipeline (cold cache)
+    expected, t_former = timed(lambda: former_generate(assistant, knowledge, PANELS, mock.url, "test-key"))
+    former_prompts = sorted(p for _, p in mock.requests)
+    mock.reset()
+    narratives, t_cold = timed(lambda: assistant.generate_report_narratives(PANELS))
+    assert narratives == expected, (narratives, expected)
+    assert sorted(p for _, p in mock.requests) == former_prompts
+    assert list(narratives) == PANELS
+    max_in_flight = mock.max_in_flight
+    assert max_in_flight <= module.LLM_MAX_WORKERS
+
+    # 2. A 429 is retried (Retry-After) instead of failing the panel
+    narrative_cache.clear()
+    mock.reset()
+    mock.throttle_once = {"portfolio"}
+    throttled, t_throttled = timed(lambda: assistant.generate_report_narratives(PANELS))
+    assert throttled == expected
+    assert [p for p, _ in mock.requests].count("portfolio") == 2
+
+    # Former loop on the same 429: the panel silently became an error message
+    mock.throttle_once = {"portfolio"}
+    former_throttled = former_generate(assistant, knowledge, PANELS, mock.url, "test-key")
+    assert former_throttled["portfolio"].startswith("⚠️")
+
+    # 3. Reopen: every panel from the narrative cache
+    mock.reset()
+    reopened, t_warm = timed(lambda: assistant.generate_report_narratives(PANELS))
+    assert reopened == expected and not mock.requests
+
+    # One panel's data changes: only that panel (and the summary over all data) are re-asked
+    knowledge["module_context"]["decision_impact"]["attributed_impact"] = 3550.0
+    changed = assistant.generate_report_narratives(PANELS)
+    assert sorted(p for p, _ in mock.requests) == ["executive_summary", "impact"]
+    assert changed["impact"] != expected["impact"] and changed["health"] == expected["health"]
+
+    # 4. A panel failing permanently keeps the others
+    knowledge["optimization_impact"]["negatives"]["count"] = 44  # actions panel + summary change
+    mock.reset()
+    mock.fail = {"actions"}
+    try:
+        assistant.generate_report_narratives(PANELS)
+        raise AssertionError("expected NarrativeGenerationError")
+    except NarrativeGenerationError as e:
+        partial = e.narratives
+        assert len(e.errors) == 1 and e.errors[0].startswith("actions:")
+    assert partial["actions"] == module.FALLBACK_PANEL_NARRATIVE
+    assert partial["impact"] == changed["impact"] and "narrative" in partial["performance"]
+    mock.fail = set()
+    mock.reset()
+    retried = assistant.generate_report_narratives(PANELS)
+    assert [p for p, _ in mock.requests] == ["actions"]  # the failed panel only
+    assert "narrative" in retried["actions"]
+
+    mock.server.shutdown()
+    print(f"{len(PANELS)} panels | mock LLM latency {latency:.2f}s | {module.LLM_MAX_WORKERS} workers")
+    print(f"former sequential loop    {t_former:6.2f}s")
+    print(f"concurrent (cold cache)   {t_cold:6.2f}s | {t_former / t_cold:4.1f}x faster | "
+          f"max {max_in_flight} in flight")
+    print(f"with one 429 (retried)    {t_throttled:6.2f}s | former: panel replaced by an error message")
+    print(f"reopen (cached)           {t_warm * 1000:6.1f} ms | 0 requests")
+    print(f"narrative cache: {narrative_cache.stats()}")
+    print("\n✅ Report narratives generate concurrently, survive 429s and reuse unchanged panels")
+
+
+if __name__ == '__main__':
+    main()
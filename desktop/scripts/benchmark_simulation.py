@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Benchmark: broadcasted scenario forecaster vs the former iterrows() forecaster.
+
+Builds a synthetic bid-change frame (default 50k rows) plus harvest rows, runs every
+elasticity scenario and sensitivity point through the former per-row forecaster and
+through run_simulation's single broadcasted pass, checks the results agree (float
+summation order differs, so values are compared with a 1e-9 relative tolerance),
+and prints timings.
+
+Usage:
+    python scripts/benchmark_simulation.py [rows]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add desktop to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from features.optimizer.core import ELASTICITY_SCENARIOS
+from features.optimizer.simulation import (
+    SENSITIVITY_MULTIPLIERS,
+    _analyze_risks,
+    _calculate_baseline,
+    run_simulation,
+)
+
+
+def forecast_scenario_rowwise(
+    bid_changes: pd.DataFrame,
+    harvest_df: pd.DataFrame,
+    elasticity: dict,
+    baseline: dict,
+    config: dict
+) -> dict:
+    """Former per-row forecaster from simulation.py (reference implementation)."""
+    forecasted_changes = []
+    
+    # Part 1: Process bid changes
+    if not bid_changes.empty:
+        for _, row in bid_changes.iterrows():
+            bid_change_pct = row.get("Bid_Change_Pct", 0)
+            reason = str(row.get("Reason", "")).lower()
+            
+            # Skip holds
+            if "hold" in reason or abs(bid_change_pct) < 0.005:
+                continue
+            
+            current_clicks = float(row.get("Clicks", 0) or 0)
+            current_spend = float(row.get("Spend", 0) or 0)
+            current_orders = float(row.get("Orders", 0) or 0)
+            current_sales = float(row.get("Sales", 0) or 0)
+            current_cpc = float(row.get("CPC", 0) or row.get("Cost Per Click (CPC)", 0) or 0)
+            
+            if current_clicks == 0 and current_cpc == 0:
+                continue
+            
+            current_cvr = current_orders / current_clicks if current_clicks > 0 else 0
+            current_aov = current_sales / current_orders if current_orders > 0 else 0
+            current_roas = current_sales / current_spend if current_spend > 0 else 0
+            
+            if current_aov == 0 and baseline["orders"] > 0:
+                current_aov = baseline["sales"] / baseline["orders"]
+            
+            # Calculate baseline ROAS for comparison
+            baseline_roas = baseline["sales"] / baseline["spend"] if baseline["spend"] > 0 else 1.0
+            
+            # Apply elasticity with ROAS-aware adjustment
+            new_cpc = current_cpc * (1 + elasticity["cpc"] * bid_change_pct)
+            new_clicks = current_clicks * (1 + elasticity["clicks"] * bid_change_pct)
+            
+            # KEY FIX: When DECREASING bids on LOW-ROAS targets, CVR doesn't decrease
+            # because we're cutting wasteful traffic, not good traffic
+            if bid_change_pct < 0 and current_roas < baseline_roas:
+                # Below-average ROAS target: cutting this traffic is GOOD
+                # CVR stays same or improves slightly (removing untargeted clicks)
+                new_cvr = current_cvr * (1 + abs(elasticity["cvr"] * bid_change_pct * 0.2))
+            else:
+                # Normal case: CVR follows elasticity
+                new_cvr = current_cvr * (1 + elasticity["cvr"] * bid_change_pct)
+            
+            new_orders = new_clicks * new_cvr
+            new_sales = new_orders * current_aov
+            new_spend = new_clicks * new_cpc
+            
+            forecasted_changes.append({
+                "delta_clicks": new_clicks - current_clicks,
+                "delta_spend": new_spend - current_spend,
+                "delta_sales": new_sales - current_sales,
+                "delta_orders": new_orders - current_orders
+            })
+    
+    # Part 2: Process harvest campaigns
+    if not harvest_df.empty:
+        efficiency = config.get("HARVEST_EFFICIENCY_MULTIPLIER", 1.15)
+        
+        for _, row in harvest_df.iterrows():
+            base_clicks = float(row.get("Clicks", 0) or 0)
+            base_spend = float(row.get("Spend", 0) or 0)
+            base_orders = float(row.get("Orders", 0) or 0)
+            base_sales = float(row.get("Sales", 0) or 0)
+            base_cpc = float(row.get("CPC", 0) or 0)
+            
+            if base_clicks < 5:
+                continue
+            
+            # Use launch multiplier (2x) for harvest bids
+            launch_mult = config.get("HARVEST_LAUNCH_MULTIPLIER", 2.0)
+            base_cvr = base_orders / base_clicks if base_clicks > 0 else 0
+            base_aov = base_sales / base_orders if base_orders > 0 else 0
+            
+            fore_clicks = base_clicks
+            fore_cpc = base_cpc * 0.90  # Exact match is typically more efficient
+            fore_cvr = base_cvr * efficiency  # 1.15x CVR improvement (default)
+            
+            fore_orders = fore_clicks * fore_cvr
+            fore_sales = fore_orders * base_aov
+            fore_spend = fore_clicks * fore_cpc
+            
+            forecasted_changes.append({
+                "delta_clicks": fore_clicks - base_clicks,
+                "delta_spend": fore_spend - base_spend,  # Should be NEGATIVE (savings!)
+                "delta_sales": fore_sales - base_sales,  # Should be POSITIVE (better CVR!)
+                "delta_orders": fore_orders - base_orders
+            })
+    
+    # Aggregate changes
+    if not forecasted_changes:
+        return baseline.copy()
+    
+    total_delta = {
+        "clicks": sum(fc["delta_clicks"] for fc in forecasted_changes),
+        "spend": sum(fc["delta_spend"] for fc in forecasted_changes),
+        "sales": sum(fc["delta_sales"] for fc in forecasted_changes),
+        "orders": sum(fc["delta_orders"] for fc in forecasted_changes)
+    }
+    
+    new_clicks = max(0, baseline["clicks"] + total_delta["clicks"])
+    new_spend = max(0, baseline["spend"] + total_delta["spend"])
+    new_sales = max(0, baseline["sales"] + total_delta["sales"])
+    new_orders = max(0, baseline["orders"] + total_delta["orders"])
+    
+    return {
+        "clicks": new_clicks,
+        "spend": new_spend,
+        "sales": new_sales,
+        "orders": new_orders,
+        "impressions": baseline.get("impressions", 0),
+        "cpc": new_spend / new_clicks if new_clicks > 0 else 0,
+        "cvr": new_orders / new_clicks if new_clicks > 0 else 0,
+        "roas": new_sales / new_spend if new_spend > 0 else 0,
+        "acos": (new_spend / new_sales * 100) if new_sales > 0 else 0,
+        "ctr": baseline.get("ctr", 0)
+    }
+def analyze_risks_rowwise(bid_changes: pd.DataFrame) -> dict:
+    """Former per-row risk analysis from simulation.py (reference implementation)."""
+    if bid_changes.empty:
+        return {"summary": {"high_risk_count": 0, "medium_risk_count": 0, "low_risk_count": 0}, "high_risk": []}
+    
+    high_risk = []
+    medium_risk = 0
+    low_risk = 0
+    
+    for _, row in bid_changes.iterrows():
+        reason = str(row.get("Reason", "")).lower()
+        if "hold" in reason:
+            continue
+        
+        bid_change = row.get("Bid_Change_Pct", 0)
+        clicks = row.get("Clicks", 0)
+        
+        risk_factors = []
+        
+        # Large bid change
+        if abs(bid_change) > 0.25:
+            risk_factors.append(f"Large change ({bid_change*100:+.0f}%)")
+        
+        # Low data
+        if clicks < 10:
+            risk_factors.append(f"Low data ({clicks} clicks)")
+        
+        # Classify
+        if len(risk_factors) >= 2 or abs(bid_change) > 0.40:
+            high_risk.append({
+                "keyword": row.get("Targeting", row.get("Customer Search Term", "")),
+                "campaign": row.get("Campaign Name", ""),
+                "bid_change": f"{bid_change*100:+.0f}%",
+                "current_bid": row.get("CPC", row.get("Cost Per Click (CPC)", 0)),
+                "factors": ", ".join(risk_factors)
+            })
+        elif len(risk_factors) == 1:
+            medium_risk += 1
+        else:
+            low_risk += 1
+    
+    return {
+        "summary": {
+            "high_risk_count": len(high_risk),
+            "medium_risk_count": medium_risk,
+            "low_risk_count": low_risk
+        },
+        "high_risk": high_risk
+    }
+
+
+def build_inputs(rows: int):
+    rng = np.random.default_rng(11)
+    clicks = rng.integers(0, 60, rows)
+    orders = np.minimum(clicks, rng.integers(0, 6, rows))
+    bids = pd.DataFrame({
+        "Campaign Name": [f"Campaign {i}" for i in rng.integers(0, 300, rows)],
+        "Targeting": [f"keyword {i}" for i in range(rows)],
+        "Clicks": clicks,
+        "Spend": np.round(clicks * rng.uniform(0.3, 2.5, rows), 2),
+        "Orders": orders,
+        "Sales": np.round(orders * rng.uniform(10, 60, rows), 2),
+        "CPC": np.where(rng.random(rows) < 0.05, 0.0, np.round(rng.uniform(0.2, 2.5, rows), 2)),
+        "New Bid": np.round(rng.uniform(0.2, 3.0, rows), 2),
+        "Reason": rng.choice(["Promote: ROAS 4.10", "Bid Down: ROAS 0.80", "Hold: Insufficient data (2 clicks)"], rows),
+    })
+    harvest = pd.DataFrame({
+        "Clicks": rng.integers(0, 30, rows // 10),
+        "Spend": np.round(rng.uniform(1, 40, rows // 10), 2),
+        "Orders": rng.integers(0, 5, rows // 10),
+        "Sales": np.round(rng.uniform(0, 200, rows // 10), 2),
+        "CPC": np.round(rng.uniform(0.2, 2.0, rows // 10), 2),
+    })
+    df = pd.concat([bids[["Clicks", "Spend", "Orders", "Sales"]]] * 2, ignore_index=True)
+    df["Impressions"] = df["Clicks"] * 40
+    half = rows // 2
+    # Bucket frames each carry their own RangeIndex, so the concatenated index has duplicates
+    return df, bids.iloc[:half].reset_index(drop=True), bids.iloc[half:].reset_index(drop=True), harvest
+
+
+def close(a: dict, b: dict) -> bool:
+    return all(np.isclose(a[k], b[k], rtol=1e-9, atol=1e-9) for k in a)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    df, direct_bids, agg_bids, harvest = build_inputs(rows)
+    date_info = {"weeks": 4.0}
+    config = {"HARVEST_EFFICIENCY_MULTIPLIER": 1.15}
+    print(f"Synthetic bids: {rows:,} rows, harvest: {len(harvest):,} rows\n")
+
+    t0 = time.perf_counter()
+    sim = run_simulation(df, direct_bids, agg_bids, harvest, config, date_info)
+    t_vec = time.perf_counter() - t0
+
+    # Reference: the former loop (one forecaster call per scenario and per sensitivity point)
+    baseline = _calculate_baseline(df)
+    all_bids = pd.concat([direct_bids, agg_bids]).copy()
+    all_bids["Bid_Change_Pct"] = np.where(all_bids["CPC"] > 0, (all_bids["New Bid"] - all_bids["CPC"]) / all_bids["CPC"], 0)
+    t0 = time.perf_counter()
+    expected = {name: forecast_scenario_rowwise(all_bids, harvest, e, baseline, config) for name, e in ELASTICITY_SCENARIOS.items()}
+    sensitivity = []
+    for mult in SENSITIVITY_MULTIPLIERS:
+        scaled = all_bids.copy()
+        scaled["Bid_Change_Pct"] = scaled["Bid_Change_Pct"] * mult
+        sensitivity.append(forecast_scenario_rowwise(scaled, harvest, ELASTICITY_SCENARIOS["expected"], baseline, config))
+    expected_risks = analyze_risks_rowwise(all_bids)
+    t_row = time.perf_counter() - t0
+
+    weeks = date_info["weeks"]
+    for name, forecast in expected.items():
+        weekly = {k: v / weeks if k in ("clicks", "spend", "sales", "orders", "impressions") else v for k, v in forecast.items()}
+        assert close(weekly, sim["scenarios"][name]), f"Scenario mismatch: {name}"
+    for forecast, (_, row) in zip(sensitivity, sim["sensitivity"].iterrows()):
+        assert np.isclose(forecast["spend"] / weeks, row["Spend"], rtol=1e-9), "Sensitivity spend mismatch"
+        assert np.isclose(forecast["sales"] / weeks, row["Sales"], rtol=1e-9), "Sensitivity sales mismatch"
+        assert np.isclose(forecast["roas"], row["ROAS"], rtol=1e-9), "Sensitivity ROAS mismatch"
+    assert expected_risks == _analyze_risks(all_bids), "Risk analysis mismatch"
+
+    print(f"run_simulation   row-wise {t_row:7.2f}s | broadcasted {t_vec:6.3f}s | {t_row / t_vec:6.1f}x")
+    print("\n✅ Broadcasted forecasts match the former per-row forecaster")
+
+
+if __name__ == "__main__":
+    main()
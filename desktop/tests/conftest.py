@@ -0,0 +1,10 @@
+"""Shared pytest setup: run from desktop/ imports (core, features, api, utils)."""
+
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Bare-mode session_state access logs a warning per call
+logging.getLogger('streamlit').setLevel(logging.ERROR)
@@ -0,0 +1,158 @@
+"""Columnar bid engine (_compute_bids) against the scalar _classify_and_bid rules."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.optimizer.strategies.bids import (
+    VISIBILITY_BOOST_ELIGIBLE_TYPES,
+    VISIBILITY_BOOST_MAX_IMPRESSIONS,
+    VISIBILITY_BOOST_MIN_DAYS,
+    VISIBILITY_BOOST_PCT,
+    _classify_and_bid,
+    _classify_and_bid_vectorized,
+    _compute_bids,
+    _is_truthy,
+)
+
+CONFIG = {"TARGET_ROAS": 2.5, "BID_UP_THROTTLE": 0.5, "BID_DOWN_THROTTLE": 0.5, "MAX_BID_CHANGE": 0.25}
+MIN_CLICKS = 5
+
+
+def adgroup_stats_for(grouped: pd.DataFrame) -> pd.DataFrame:
+    stats = grouped.groupby(["Campaign Name", "Ad Group Name"]).agg(
+        {"Clicks": "sum", "Spend": "sum", "Sales": "sum"}).reset_index()
+    stats["AG_ROAS"] = np.where(stats["Spend"] > 0, stats["Sales"] / stats["Spend"], 0)
+    stats["AG_Clicks"] = stats["Clicks"]
+    return stats
+
+
+def rowwise_bid(r, adgroup_lookup, data_days):
+    """Per-row decision in the priority order _compute_bids documents."""
+    def positive(v):
+        return pd.notna(v) and v > 0
+
+    base_bid = float(r["Bid"] if positive(r.get("Bid")) else
+                     r["Ad Group Default Bid"] if positive(r.get("Ad Group Default Bid")) else
+                     r.get("Current Bid", 0) or r.get("CPC", 0) or 0)
+    if base_bid <= 0:
+        return 0.0, "Hold: No Bid/CPC Data", "Hold (No Data)"
+    eligible = (str(r.get("Match Type", "")).strip().lower() in VISIBILITY_BOOST_ELIGIBLE_TYPES
+                or str(r.get("Targeting", "")).strip().lower() in VISIBILITY_BOOST_ELIGIBLE_TYPES)
+    if eligible and data_days >= VISIBILITY_BOOST_MIN_DAYS and r["Impressions"] < VISIBILITY_BOOST_MAX_IMPRESSIONS:
+        return (round(base_bid * (1 + VISIBILITY_BOOST_PCT), 2),
+                f"Visibility Boost: Only {r['Impressions']} impressions in {data_days} days", "Visibility Boost (+30%)")
+    if r["Clicks"] >= MIN_CLICKS and r["ROAS"] > 0:
+        return _classify_and_bid(r["ROAS"], 0, base_bid, 0.2, "targeting", CONFIG)
+    ag = adgroup_lookup.get((r["Campaign Name"], r["Ad Group Name"]), {})
+    if ag.get("AG_Clicks", 0) >= MIN_CLICKS and ag.get("AG_ROAS", 0) > 0:
+        return _classify_and_bid(ag["AG_ROAS"], 0, base_bid, 0.1, "adgroup", CONFIG)
+    return base_bid, f"Hold: Insufficient data ({r['Clicks']} clicks)", "Hold (Insufficient Data)"
+
+
+def random_bucket(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    clicks = np.where(rng.random(rows) < 0.5, rng.integers(0, 3, rows), rng.integers(0, 40, rows))
+    spend = np.round(clicks * rng.uniform(0.2, 3.0, rows), 2)
+    sales = np.where(rng.random(rows) < 0.4, 0.0, np.round(spend * rng.uniform(0.1, 8.0, rows), 2))
+    grouped = pd.DataFrame({
+        "Campaign Name": [f"Campaign {i}" for i in rng.integers(0, 5, rows)],
+        "Ad Group Name": [f"AG {i}" for i in rng.integers(0, 40, rows)],
+        "Clicks": clicks,
+        "Spend": spend,
+        "Sales": sales,
+        "Impressions": rng.integers(0, 400, rows),
+        "Current Bid": np.where(rng.random(rows) < 0.1, np.nan, np.round(rng.uniform(0.0, 3.0, rows), 2)),
+        "CPC": np.where(rng.random(rows) < 0.2, 0.0, np.round(rng.uniform(0.1, 2.5, rows), 3)),
+        "Ad Group Default Bid": np.where(rng.random(rows) < 0.7, np.nan, np.round(rng.uniform(-0.1, 2.0, rows), 2)),
+        "Bid": np.where(rng.random(rows) < 0.5, np.nan, np.round(rng.uniform(-0.1, 4.0, rows), 2)),
+        "Match Type": rng.choice(np.array(["EXACT", "broad", "Phrase", "-", None], dtype=object), rows),
+        "Targeting": rng.choice(np.array(["running shoes", "close-match", "loose-match", None], dtype=object), rows),
+    })
+    grouped.loc[rng.random(rows) < 0.05, ["Current Bid", "CPC", "Bid", "Ad Group Default Bid"]] = 0.0
+    grouped["ROAS"] = np.where(grouped["Spend"] > 0, grouped["Sales"] / grouped["Spend"], 0)
+    return grouped
+
+
+def one_row(**values) -> pd.DataFrame:
+    row = {"Campaign Name": "C", "Ad Group Name": "AG", "Clicks": 0, "Spend": 0.0, "Sales": 0.0,
+           "Impressions": 500, "Current Bid": np.nan, "CPC": 0.0, "Ad Group Default Bid": np.nan,
+           "Bid": np.nan, "Match Type": "exact", "Targeting": "running shoes"}
+    row.update(values)
+    df = pd.DataFrame([row])
+    df["ROAS"] = np.where(df["Spend"] > 0, df["Sales"] / df["Spend"], 0)
+    return df
+
+
+def test_no_bid_source_holds_with_zero_bid():
+    grouped = one_row(Clicks=20, Spend=10.0, Sales=50.0, **{"Current Bid": 0.0})
+    bid, reason, basis = _compute_bids(grouped, adgroup_stats_for(grouped), CONFIG, MIN_CLICKS, 30)
+    assert (bid[0], reason[0], basis[0]) == (0.0, "Hold: No Bid/CPC Data", "Hold (No Data)")
+
+
+def test_base_bid_priority_bid_then_adgroup_default_then_current_bid_then_cpc():
+    cases = [
+        (dict(Bid=1.5, **{"Ad Group Default Bid": 1.2, "Current Bid": 0.9, "CPC": 0.5}), 1.5),
+        (dict(Bid=-0.1, **{"Ad Group Default Bid": 1.2, "Current Bid": 0.9, "CPC": 0.5}), 1.2),
+        (dict(**{"Ad Group Default Bid": 0.0, "Current Bid": 0.9, "CPC": 0.5}), 0.9),
+        (dict(**{"Current Bid": 0.0, "CPC": 0.5}), 0.5),
+    ]
+    for values, expected in cases:
+        grouped = one_row(Clicks=1, **values)
+        bid, _, basis = _compute_bids(grouped, adgroup_stats_for(grouped), CONFIG, MIN_CLICKS, 7)
+        assert basis[0] == "Hold (Insufficient Data)" and bid[0] == pytest.approx(expected)
+
+
+def test_visibility_boost_needs_eligible_type_days_and_low_impressions():
+    grouped = one_row(Bid=1.0, Impressions=40, Clicks=20, Spend=10.0, Sales=50.0)
+    stats = adgroup_stats_for(grouped)
+    bid, reason, basis = _compute_bids(grouped, stats, CONFIG, MIN_CLICKS, VISIBILITY_BOOST_MIN_DAYS)
+    assert basis[0] == "Visibility Boost (+30%)" and bid[0] == 1.3
+    assert reason[0] == f"Visibility Boost: Only 40 impressions in {VISIBILITY_BOOST_MIN_DAYS} days"
+
+    # Too few days of data, or an ineligible type: classified on ROAS instead
+    _, _, basis = _compute_bids(grouped, stats, CONFIG, MIN_CLICKS, VISIBILITY_BOOST_MIN_DAYS - 1)
+    assert basis[0] == "promote"
+    grouped = one_row(Bid=1.0, Impressions=40, Clicks=20, Spend=10.0, Sales=50.0,
+                      **{"Match Type": "-", "Targeting": "asin=\"B0ABC12345\""})
+    _, _, basis = _compute_bids(grouped, adgroup_stats_for(grouped), CONFIG, MIN_CLICKS, 30)
+    assert basis[0] == "promote"
+
+
+def test_sparse_target_falls_back_to_ad_group_roas():
+    grouped = pd.concat([
+        one_row(Bid=1.0, Clicks=2, Spend=2.0, Sales=0.0),
+        one_row(Bid=1.0, Clicks=10, Spend=10.0, Sales=10.0, Targeting="trail shoes"),
+    ], ignore_index=True)
+    grouped["ROAS"] = np.where(grouped["Spend"] > 0, grouped["Sales"] / grouped["Spend"], 0)
+    bid, reason, basis = _compute_bids(grouped, adgroup_stats_for(grouped), CONFIG, MIN_CLICKS, 7)
+    ag_roas = 10.0 / 12.0
+    expected = _classify_and_bid(ag_roas, 0, 1.0, 0.1, "adgroup", CONFIG)
+    assert (bid[0], reason[0], basis[0]) == (pytest.approx(expected[0]), expected[1], expected[2])
+
+
+@pytest.mark.parametrize("data_days", [7, 30])
+def test_matches_rowwise_decisions_on_random_bucket(data_days):
+    grouped = random_bucket(3_000)
+    stats = adgroup_stats_for(grouped)
+    lookup = stats.set_index(["Campaign Name", "Ad Group Name"])[["AG_ROAS", "AG_Clicks"]].to_dict('index')
+    expected = [rowwise_bid(r, lookup, data_days) for r in grouped.to_dict('records')]
+
+    bid, reason, basis = _compute_bids(grouped, stats, CONFIG, MIN_CLICKS, data_days)
+    assert np.array_equal(np.array([e[0] for e in expected], dtype=float), bid, equal_nan=True)
+    assert list(reason) == [e[1] for e in expected]
+    assert list(basis) == [e[2] for e in expected]
+
+
+def test_vectorized_classification_matches_scalar():
+    roas = np.array([0.0, 0.5, 1.249, 2.5, 2.51, 3.75, 10.0, 40.0])
+    base_bid = np.array([0.02, 0.3, 1.0, 1.0, 0.75, 1.2, 2.0, 0.05])
+    bid, reason, action = _classify_and_bid_vectorized(roas, base_bid, CONFIG)
+    for i in range(len(roas)):
+        exp_bid, exp_reason, exp_action = _classify_and_bid(roas[i], 0, base_bid[i], 0.2, "targeting", CONFIG)
+        assert bid[i] == pytest.approx(exp_bid) and reason[i] == exp_reason and action[i] == exp_action
+
+
+def test_is_truthy_follows_python_truthiness():
+    values = pd.Series([None, np.nan, "", "0", 0, 0.0, "T-42", 123], dtype=object)
+    assert list(_is_truthy(values)) == [bool(v) for v in values]
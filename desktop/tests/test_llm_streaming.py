@@ -0,0 +1,194 @@
+"""Streamed assistant replies: provider fallback, mid-stream errors, cancel and close."""
+
+import json
+import threading
+
+import pytest
+
+import features.assistant as module
+from features.assistant import AssistantModule, LLMError, NO_API_KEY_MESSAGE
+
+MESSAGES = [{"role": "system", "content": "KNOWLEDGE GRAPH: {}"},
+            {"role": "user", "content": "Where am I losing money?"}]
+TOKENS = ["Your biggest ", "leak is ", "**Auto** ", "→ save ", "~AED 5,400 ✅"]
+
+
+class StubProvider:
+    """Stands in for _stream_claude / _stream_openai; records calls and whether the stream was closed."""
+
+    def __init__(self, tokens=TOKENS, fail_before=False, fail_after=None):
+        self.tokens = tokens
+        self.fail_before = fail_before
+        self.fail_after = fail_after
+        self.calls = 0
+        self.sent = 0
+        self.closed = False
+
+    def __call__(self, messages, api_key, cancel=None):
+        self.calls += 1
+        return self._stream(cancel)
+
+    def _stream(self, cancel):
+        try:
+            if self.fail_before:
+                raise Exception("stub API error: 400")
+            for i, token in enumerate(self.tokens):
+                if cancel is not None and cancel.is_set():
+                    return
+                if i == self.fail_after:
+                    raise Exception("stub API error: overloaded")
+                self.sent += 1
+                yield token
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def assistant(monkeypatch):
+    instance = AssistantModule()
+    claude, openai = StubProvider(), StubProvider()
+    monkeypatch.setattr(instance, '_stream_claude', claude)
+    monkeypatch.setattr(instance, '_stream_openai', openai)
+    monkeypatch.setattr(instance, '_api_keys', lambda: ("claude-key", "openai-key"))
+    instance.claude, instance.openai = claude, openai
+    return instance
+
+
+def test_streams_claude_reply_without_touching_openai(assistant):
+    assert list(assistant._call_llm(MESSAGES, stream=True)) == TOKENS
+    assert assistant.claude.calls == 1 and assistant.openai.calls == 0
+    assert assistant.claude.closed
+
+
+def test_falls_back_to_openai_when_claude_fails_before_first_chunk(assistant):
+    assistant.claude.fail_before = True
+    assert "".join(assistant._call_llm(MESSAGES, stream=True)) == "".join(TOKENS)
+    assert assistant.claude.calls == 1 and assistant.openai.calls == 1
+    assert assistant.claude.closed and assistant.openai.closed
+
+
+def test_mid_stream_error_keeps_partial_reply_and_does_not_fall_back(assistant):
+    assistant.claude.fail_after = 2
+    reply = "".join(assistant._call_llm(MESSAGES, stream=True))
+    assert reply.startswith("".join(TOKENS[:2]) + "\n\n❌ Error communicating with AI")
+    assert assistant.openai.calls == 0
+
+
+def test_stream_llm_raises_when_last_provider_fails(assistant, monkeypatch):
+    monkeypatch.setattr(assistant, '_api_keys', lambda: ("claude-key", None))
+    assistant.claude.fail_before = True
+    with pytest.raises(LLMError, match="Error communicating with AI"):
+        list(assistant._stream_llm(MESSAGES))
+    # As a chat reply, the error is the text
+    assert "".join(assistant._call_llm(MESSAGES, stream=True)).startswith("❌ Error communicating with AI")
+
+
+def test_closing_the_reply_closes_the_provider_stream(assistant):
+    stream = assistant._call_llm(MESSAGES, stream=True)
+    assert [next(stream) for _ in range(2)] == TOKENS[:2]
+    stream.close()
+    assert assistant.claude.closed
+    assert assistant.claude.sent == 2
+
+
+def test_cancel_stops_reading(assistant):
+    cancel = threading.Event()
+    chunks = []
+    for chunk in assistant._call_llm(MESSAGES, stream=True, cancel=cancel):
+        chunks.append(chunk)
+        if len(chunks) == 3:
+            cancel.set()
+    assert chunks == TOKENS[:3]
+    assert assistant.claude.closed
+
+
+def test_no_api_key_message_is_streamed(assistant, monkeypatch):
+    monkeypatch.setattr(assistant, '_api_keys', lambda: (None, None))
+    assert "".join(assistant._call_llm(MESSAGES, stream=True)) == NO_API_KEY_MESSAGE
+
+
+# ---------- Provider SSE parsing ----------
+
+class FakeResponse:
+    """requests.Response stand-in serving server-sent event lines."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.closed = False
+        self.read = 0
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, chunk_size=None):
+        for line in self.lines:
+            self.read += 1
+            yield line.encode('utf-8')
+
+    def close(self):
+        self.closed = True
+
+
+def _events(*pairs):
+    lines = []
+    for name, payload in pairs:
+        if name:
+            lines.append(f"event: {name}")
+        lines.append(f"data: {payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)}")
+        lines.append("")
+    return lines
+
+
+def _serve(monkeypatch, response):
+    class Session:
+        def post(self, *args, **kwargs):
+            assert kwargs.get('stream') is True
+            return response
+    monkeypatch.setattr(module, '_get_llm_session', lambda: Session())
+    monkeypatch.setattr(module._llm_rate_limiter, 'wait', lambda: None)
+
+
+def test_claude_sse_yields_text_deltas_and_closes(monkeypatch):
+    response = FakeResponse([": keep-alive", ""] + _events(
+        ("message_start", {"type": "message_start"}),
+        *[("content_block_delta", {"delta": {"type": "text_delta", "text": t}}) for t in TOKENS],
+        ("message_stop", {"type": "message_stop"}),
+    ))
+    _serve(monkeypatch, response)
+    assert list(AssistantModule()._stream_claude(MESSAGES, "key")) == TOKENS
+    assert response.closed
+
+
+def test_claude_sse_error_event_raises(monkeypatch):
+    response = FakeResponse(_events(
+        ("content_block_delta", {"delta": {"type": "text_delta", "text": "partial"}}),
+        ("error", {"error": {"type": "overloaded_error"}}),
+    ))
+    _serve(monkeypatch, response)
+    stream = AssistantModule()._stream_claude(MESSAGES, "key")
+    assert next(stream) == "partial"
+    with pytest.raises(Exception, match="overloaded_error"):
+        next(stream)
+    assert response.closed
+
+
+def test_openai_sse_yields_content_until_done(monkeypatch):
+    response = FakeResponse(_events(
+        *[(None, {"choices": [{"delta": {"content": t}}]}) for t in TOKENS],
+        (None, "[DONE]"),
+        (None, {"choices": [{"delta": {"content": "after done"}}]}),
+    ))
+    _serve(monkeypatch, response)
+    assert list(AssistantModule()._stream_openai(MESSAGES, "key")) == TOKENS
+    assert response.closed
+
+
+def test_provider_stream_stops_reading_once_cancelled(monkeypatch):
+    response = FakeResponse(_events(*[(None, {"choices": [{"delta": {"content": t}}]}) for t in TOKENS]))
+    _serve(monkeypatch, response)
+    cancel = threading.Event()
+    stream = AssistantModule()._stream_openai(MESSAGES, "key", cancel)
+    assert next(stream) == TOKENS[0]
+    cancel.set()
+    assert list(stream) == []
+    assert response.closed and response.read < len(response.lines)
@@ -0,0 +1,112 @@
+"""RainforestClient.batch_lookup: concurrency, dedup, caching and progress against a stub fetch."""
+
+import threading
+import time
+
+import pytest
+
+from api.rainforest_client import RainforestClient, RateLimiter
+
+
+class StubFetch:
+    """Stands in for RainforestClient._fetch; tracks calls and peak concurrency."""
+
+    def __init__(self, delay=0.05, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, asin, marketplace):
+        with self.lock:
+            self.calls.append(asin)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        if asin in self.fail:
+            return {'asin': asin, 'status': 'error', 'error': 'HTTP 500'}
+        return {'asin': asin, 'title': f"Product {asin}", 'brand': 'Acme', 'status': 'success'}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    instance = RainforestClient("test-key", cache_db=str(tmp_path / "asin_cache.db"), max_workers=4)
+    instance.stub = StubFetch()
+    monkeypatch.setattr(instance, '_fetch', instance.stub)
+    yield instance
+    instance.cache.close()
+    instance.session.close()
+
+
+def test_results_follow_input_order_and_duplicates_are_fetched_once(client):
+    asins = ["b0a", "B0B", "B0A", "B0C", "b0b"]
+    results = client.batch_lookup(asins)
+    assert [r['asin'] for r in results] == ["B0A", "B0B", "B0A", "B0C", "B0B"]
+    assert sorted(client.stub.calls) == ["B0A", "B0B", "B0C"]
+
+    # Repeated ASINs get independent copies
+    results[0]['note'] = 'annotated'
+    assert 'note' not in results[2]
+
+
+def test_misses_are_fetched_concurrently_up_to_max_workers(client):
+    asins = [f"B0{i:02d}" for i in range(12)]
+    client.batch_lookup(asins)
+    assert len(client.stub.calls) == 12
+    assert 1 < client.stub.peak <= client.max_workers
+
+
+def test_successes_are_cached_and_errors_are_retried(client):
+    client.stub.fail = {"B0BAD"}
+    first = client.batch_lookup(["B0GOOD", "B0BAD"])
+    assert [r['status'] for r in first] == ['success', 'error']
+
+    client.stub.calls.clear()
+    second = client.batch_lookup(["B0GOOD", "B0BAD"])
+    assert client.stub.calls == ["B0BAD"]  # Cache hit for the success only
+    assert second[0]['title'] == "Product B0GOOD"
+    assert client.cache.get("B0GOOD", 'AE')['title'] == "Product B0GOOD"
+
+
+def test_progress_callback_runs_on_calling_thread_and_reaches_total(client):
+    client.batch_lookup(["B0CACHED"])
+    calls = []
+    caller = threading.get_ident()
+
+    def progress(done, total):
+        calls.append((done, total, threading.get_ident()))
+
+    client.batch_lookup(["B0CACHED", "B001", "B002", "B001"], progress_callback=progress)
+    assert [c[:2] for c in calls] == [(1, 3), (2, 3), (3, 3)]
+    assert {c[2] for c in calls} == {caller}
+
+
+def test_empty_batch_does_not_fetch(client):
+    assert client.batch_lookup([]) == []
+    assert client.stub.calls == []
+
+
+def test_rate_limiter_spaces_calls_shared_across_threads():
+    limiter = RateLimiter(requests_per_second=50)
+    limiter.wait()  # Spend the initial token
+    stamps = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(3):
+            limiter.wait()
+            with lock:
+                stamps.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 9 tokens at 50/s after the burst was spent: at least 8 intervals of 20 ms
+    assert max(stamps) - start >= 8 / 50 * 0.9
@@ -0,0 +1,193 @@
+"""Client report narratives: parallel panels, prompt-keyed cache, fallbacks and cancellation against a stub LLM."""
+
+import json
+import threading
+import time
+
+import pytest
+
+import features.assistant as module
+from features.assistant import (
+    FALLBACK_EXECUTIVE_SUMMARY,
+    FALLBACK_PANEL_NARRATIVE,
+    AssistantModule,
+    LLMError,
+    NarrativeCache,
+    NarrativeGenerationError,
+)
+
+PANEL_MARKERS = {  # text that identifies each panel's prompt
+    "performance": "Based on these performance metrics", "health": "Account health analysis",
+    "portfolio": "Campaign portfolio breakdown", "impact": "Decision impact measurement",
+    "actions": "Optimization actions executed", "match_type": "Match type performance analysis",
+    "executive_summary": "EXECUTIVE SUMMARY",
+}
+PANELS = list(PANEL_MARKERS)
+SUMMARY = {"achievements": ["ROAS up to 3.85"], "areas_to_watch": ["Generic broad below 2.5 ROAS"],
+           "next_steps": ["Monitor market forces"]}
+
+
+def make_knowledge():
+    return {
+        "dataset_overview": {"spend": 12500.0, "sales": 48100.0, "roas": 3.85, "orders": 912},
+        "account_health": {"status": "Healthy", "score": 78, "optimization_opportunities": {"negatives": 41}},
+        "campaign_portfolio": {"winners": ["SP | Brand | Exact"], "losers": ["SP | Generic | Broad"]},
+        "strategic_insights": [{"type": "match_type_efficiency", "best": "exact"}],
+        "optimization_impact": {"date_range": "Aug 1 - Aug 28", "net_summary": {"net": 2100.0},
+                                "negatives": {"count": 41}, "harvests": {"count": 12}, "bids": {"count": 230}},
+        "module_context": {"decision_impact": {"attributed_impact": 3400.0, "actions": 283}},
+    }
+
+
+class StubLLM:
+    """Stands in for _request_llm; tells panels apart by prompt and tracks calls and peak concurrency."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.fail = {}  # panel -> exception to raise
+        self.replies = {}  # panel -> reply text override
+        self.calls = []
+        self.threads = set()
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, messages, keys=None):
+        prompt = messages[-1]["content"]
+        panel = next(p for p, marker in PANEL_MARKERS.items() if marker in prompt)
+        with self.lock:
+            self.calls.append(panel)
+            self.threads.add(threading.get_ident())
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        if panel in self.fail:
+            raise self.fail[panel]
+        if panel in self.replies:
+            return self.replies[panel]
+        if panel == "executive_summary":
+            return "```json\n" + json.dumps(SUMMARY) + "\n```"
+        return f"  Narrative for {panel}.  "
+
+
+@pytest.fixture
+def assistant(monkeypatch):
+    monkeypatch.setattr(module, 'narrative_cache', NarrativeCache())
+    instance = AssistantModule()
+    instance.llm = StubLLM()
+    monkeypatch.setattr(instance, '_get_knowledge', lambda: (make_knowledge(), True))
+    monkeypatch.setattr(instance, '_api_keys', lambda: ("claude-key", None))
+    monkeypatch.setattr(instance, '_request_llm', instance.llm)
+    return instance
+
+
+def test_panels_are_generated_concurrently_in_input_order(assistant):
+    narratives = assistant.generate_report_narratives(PANELS)
+    assert list(narratives) == PANELS
+    assert narratives["health"] == "Narrative for health."
+    assert narratives["executive_summary"] == SUMMARY
+    assert sorted(assistant.llm.calls) == sorted(PANELS)
+    assert 1 < assistant.llm.peak <= module.LLM_MAX_WORKERS
+    assert threading.get_ident() not in assistant.llm.threads
+
+
+def test_duplicate_panels_are_generated_once(assistant):
+    narratives = assistant.generate_report_narratives(["health", "impact", "health"])
+    assert list(narratives) == ["health", "impact"]
+    assert sorted(assistant.llm.calls) == ["health", "impact"]
+
+
+def test_unchanged_prompts_are_served_from_cache_and_refresh_asks_again(assistant):
+    first = assistant.generate_report_narratives(PANELS)
+    assistant.llm.calls.clear()
+
+    second = assistant.generate_report_narratives(PANELS)
+    assert second == first and assistant.llm.calls == []
+
+    # Cached values are copies: editing a report doesn't change the cache
+    second["executive_summary"]["achievements"].append("edited")
+    assert assistant.generate_report_narratives(["executive_summary"])["executive_summary"] == SUMMARY
+
+    assistant.generate_report_narratives(PANELS, refresh=True)
+    assert sorted(assistant.llm.calls) == sorted(PANELS)
+
+
+def test_changed_panel_data_misses_the_cache(assistant, monkeypatch):
+    assistant.generate_report_narratives(PANELS)
+    assistant.llm.calls.clear()
+
+    knowledge = make_knowledge()
+    knowledge["account_health"]["score"] = 64
+    monkeypatch.setattr(assistant, '_get_knowledge', lambda: (knowledge, True))
+    assistant.generate_report_narratives(PANELS)
+    # Health and the summary (built from the whole graph) see the change
+    assert sorted(assistant.llm.calls) == ["executive_summary", "health"]
+
+
+def test_failed_panels_get_fallbacks_and_are_not_cached(assistant):
+    assistant.llm.fail = {"health": LLMError("❌ Error communicating with AI: 429 Too Many Requests"),
+                          "executive_summary": LLMError("❌ Error communicating with AI: timeout")}
+    with pytest.raises(NarrativeGenerationError) as excinfo:
+        assistant.generate_report_narratives(PANELS)
+    error = excinfo.value
+    assert list(error.narratives) == PANELS
+    assert error.narratives["health"] == FALLBACK_PANEL_NARRATIVE
+    assert error.narratives["executive_summary"] == FALLBACK_EXECUTIVE_SUMMARY
+    assert error.narratives["impact"] == "Narrative for impact."
+    assert sorted(error.errors) == ["executive_summary: ❌ Error communicating with AI: timeout",
+                                    "health: Rate limit exceeded"]
+
+    # A retry asks again only for the panels that failed
+    assistant.llm.fail = {}
+    assistant.llm.calls.clear()
+    narratives = assistant.generate_report_narratives(PANELS)
+    assert sorted(assistant.llm.calls) == ["executive_summary", "health"]
+    assert narratives["health"] == "Narrative for health."
+
+
+def test_unusable_summary_reply_falls_back_without_caching(assistant):
+    assistant.llm.replies = {"executive_summary": '{"achievements": []}'}
+    narratives = assistant.generate_report_narratives(["executive_summary"])
+    assert narratives["executive_summary"] == FALLBACK_EXECUTIVE_SUMMARY
+
+    assistant.llm.replies = {}
+    assert assistant.generate_report_narratives(["executive_summary"])["executive_summary"] == SUMMARY
+    assert assistant.llm.calls == ["executive_summary", "executive_summary"]
+
+
+def test_on_panel_runs_on_calling_thread_with_progress(assistant):
+    progress = []
+    caller = threading.get_ident()
+
+    def on_panel(panel, done, total):
+        progress.append((panel, done, total, threading.get_ident()))
+
+    assistant.generate_report_narratives(PANELS + ["health"], on_panel=on_panel)
+    assert sorted(p[0] for p in progress) == sorted(PANELS)
+    assert [p[1:3] for p in progress] == [(i, len(PANELS)) for i in range(1, len(PANELS) + 1)]
+    assert {p[3] for p in progress} == {caller}
+
+
+def test_on_panel_error_cancels_panels_not_yet_started(assistant, monkeypatch):
+    monkeypatch.setattr(module, 'LLM_MAX_WORKERS', 1)
+
+    class Navigated(Exception):
+        pass
+
+    def on_panel(panel, done, total):
+        raise Navigated()
+
+    with pytest.raises(Navigated):
+        assistant.generate_report_narratives(PANELS, on_panel=on_panel)
+    time.sleep(assistant.llm.delay * 4)  # Let a panel already running finish
+    assert len(assistant.llm.calls) <= 2
+
+
+def test_no_data_returns_placeholders_without_calling_llm(assistant, monkeypatch):
+    monkeypatch.setattr(assistant, '_get_knowledge', lambda: ({}, False))
+    narratives = assistant.generate_report_narratives(["performance", "executive_summary"])
+    assert narratives["performance"].startswith("Data analysis pending")
+    assert narratives["executive_summary"]["key_metric"] == "No Data"
+    assert assistant.llm.calls == []
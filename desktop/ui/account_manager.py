@@ -69,6 +69,7 @@ def render_account_selector():
                 'optimization_run',
                 'optimizer_css_injected',        # Reset CSS injection flag
                 'impact_analysis_cache',
+                '_assistant_knowledge',          # AI Assistant knowledge graph sections
                 'run_optimizer',
                 'run_optimizer_refactored'
             ]
@@ -189,6 +190,7 @@ def render_account_selector():
                 'optimization_run',
                 'optimizer_css_injected',        # Reset CSS injection flag
                 'impact_analysis_cache',
+                '_assistant_knowledge',          # AI Assistant knowledge graph sections
                 'run_optimizer',
                 'run_optimizer_refactored'
             ]
@@ -285,6 +287,7 @@ def _show_account_creation_form():
                         'optimization_run',
                         'optimizer_css_injected',        # Reset CSS injection flag
                         'impact_analysis_cache',
+                        '_assistant_knowledge',          # AI Assistant knowledge graph sections
                         'run_optimizer',
                         'run_optimizer_refactored'
                     ]
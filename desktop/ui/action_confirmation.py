@@ -9,6 +9,8 @@ import streamlit as st
 import time
 from typing import Optional
 
+from core.action_log import count_action_types
+
 
 @st.dialog("Unsaved Optimization Actions", width="large")
 def show_confirmation_dialog():
@@ -27,10 +29,7 @@ def show_confirmation_dialog():
     
     # Action breakdown
     actions = pending.get('actions', [])
-    action_types = {}
-    for action in actions:
-        atype = action.get('action_type', 'UNKNOWN')
-        action_types[atype] = action_types.get(atype, 0) + 1
+    action_types = count_action_types(actions)
     
     st.markdown(f"""
     You have **{action_count} pending actions** that haven't been saved to your action history.
@@ -92,7 +91,7 @@ def _save_pending_actions_and_navigate(target_module: str):
         batch_id = pending.get('batch_id')
         report_date = pending.get('report_date')
         
-        if actions and client_id:
+        if len(actions) > 0 and client_id:
             db.log_action_batch(actions, client_id, batch_id, report_date)
             
             # Set up undo capability
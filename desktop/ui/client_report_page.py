@@ -1177,9 +1177,16 @@ def run():
             "actions", "match_type", "executive_summary"
         ]
 
+        progress = st.progress(0.0, text="🤖 Generating AI insights...")
+
+        def _on_panel(panel, done, total):
+            progress.progress(done / total, text=f"🤖 Generating AI insights... {done}/{total} panels ready")
+
         with st.spinner("🤖 Generating AI insights..."):
             try:
-                narratives = assistant.generate_report_narratives(panels_to_generate)
+                refresh = st.session_state.pop('client_report_refresh_narratives', False)
+                narratives = assistant.generate_report_narratives(panels_to_generate, refresh=refresh,
+                                                                  on_panel=_on_panel)
                 # Only cache if generation succeeded
                 st.session_state[cache_key] = narratives
             except Exception as e:
@@ -1215,6 +1222,9 @@ def run():
                     "actions": "Detailed analysis available in full dashboard.",
                     "match_type": "Detailed analysis available in full dashboard."
                 }
+                # Keep the panels that did generate (they are cached, so a retry only re-asks the failed ones)
+                narratives.update(getattr(e, 'narratives', None) or {})
+        progress.empty()
     else:
         narratives = st.session_state[cache_key]
     
@@ -1290,6 +1300,9 @@ def run():
             if st.button("🔄 Regenerate Analysis", help="Force refresh AI insights"):
                 if cache_key in st.session_state:
                     del st.session_state[cache_key]
+                    # Last run succeeded: ask for fresh narratives. After a failure, reuse
+                    # the panels that did generate and only retry the failed ones.
+                    st.session_state['client_report_refresh_narratives'] = True
                 st.rerun()
     
     # Read-only banner
@@ -235,6 +235,22 @@ def render_data_hub():
     # ADVANCED / ADMIN SECTION
     # ===========================================
     with st.expander("**› Advanced / Admin**", expanded=False):
+        st.markdown("### Session Memory")
+        memory_report = hub.get_memory_report()
+        if memory_report.empty:
+            st.caption("No datasets loaded in this session.")
+        else:
+            st.dataframe(
+                memory_report,
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    'Original MB': st.column_config.NumberColumn(format="%.1f"),
+                    'Stored MB': st.column_config.NumberColumn(format="%.1f"),
+                    'Saved %': st.column_config.NumberColumn(format="%.0f%%"),
+                },
+            )
+        
         st.markdown("### Data Reassignment")
         st.warning("⚠️ **Use with caution!** This permanently moves data from one account to another.")
         
@@ -1,26 +1,39 @@
-
 import pandas as pd
+import numpy as np
 import re
 import difflib
-from collections import defaultdict
+from typing import Iterable, List, Optional, Tuple
+
 
 class ExactMatcher:
-    """Fuzzy matcher for detecting existing exact match keywords."""
-    
+    """
+    Fuzzy matcher for detecting existing exact match keywords.
+
+    A search term matches the most similar exact keyword that shares at least one
+    token with it, scored with difflib.SequenceMatcher.ratio(). Candidates are pruned
+    before scoring with two upper bounds on ratio() (evaluated as NumPy arrays):
+      - length:    2*min(len_a, len_b) / (len_a + len_b)  (token postings are sorted by
+                   keyword length, so only a length window is gathered per token)
+      - character: 2*sum(min(count_a[c], count_b[c])) / (len_a + len_b)  (difflib quick_ratio)
+    Survivors are scored best-bound first and scoring stops once the bound falls below
+    the best score, so results match an exhaustive scan at any threshold. Candidates whose
+    bound equals the best score are still scored, so among equally scored keywords the
+    lexicographically first one is returned.
+    """
+
+    # Cells of the (terms x keywords) candidate bitmap materialized per batch chunk
+    PAIR_CHUNK = 8_000_000
+
     def __init__(self, df: pd.DataFrame):
+        self.exact_keywords = set()
         match_col = "Match Type" if "Match Type" in df.columns else "Match"
-        if match_col not in df.columns:
-            self.exact_keywords = set()
-            return
-        match_types = df[match_col].astype(str).fillna("")
-        exact_rows = df[match_types.str.contains("exact", case=False, na=False)]
-        term_col = "Customer Search Term" if "Customer Search Term" in df.columns else "Term"
-        self.exact_keywords = set(exact_rows[term_col].astype(str).apply(self.normalize_text).unique())
-        self.token_index = defaultdict(set)
-        for kw in self.exact_keywords:
-            tokens = self.get_tokens(kw)
-            for t in tokens:
-                self.token_index[t].add(kw)
+        if match_col in df.columns:
+            match_types = df[match_col].astype(str).fillna("")
+            exact_rows = df[match_types.str.contains("exact", case=False, na=False)]
+            term_col = "Customer Search Term" if "Customer Search Term" in df.columns else "Term"
+            terms = exact_rows[term_col].astype(str).unique()
+            self.exact_keywords = {self.normalize_text(t) for t in terms}
+        self._build_index()
 
     def normalize_text(self, s: str) -> str:
         if not isinstance(s, str): return ""
@@ -29,26 +42,159 @@ class ExactMatcher:
     def get_tokens(self, s: str) -> set:
         return set(self.normalize_text(s).split())
 
-    def find_match(self, term: str, threshold: float = 0.90) -> tuple[str | None, float]:
-        norm_term = self.normalize_text(str(term))
-        if not norm_term: return None, 0.0
-        if norm_term in self.exact_keywords: return norm_term, 1.0
-        
-        term_tokens = self.get_tokens(norm_term)
-        candidates = set()
-        for t in term_tokens:
-            if t in self.token_index:
-                candidates.update(self.token_index[t])
-        
-        if not candidates: return None, 0.0
-        
+    def _build_index(self):
+        """Keyword arrays plus a token -> keywords posting list sorted by (token, keyword length)."""
+        self._keywords = np.array(sorted(self.exact_keywords), dtype=object)
+        self._kw_len = np.fromiter((len(k) for k in self._keywords), dtype=np.int64, count=len(self._keywords))
+
+        # Character alphabet of the keywords; term characters outside it can never match
+        self._alphabet = {c: i for i, c in enumerate(sorted(set("".join(self._keywords))))}
+        self._kw_counts = self._char_counts(self._keywords)
+
+        self._token_ids = {}
+        post_token, post_kw = [], []
+        for kw_id, kw in enumerate(self._keywords):
+            for token in set(kw.split()):
+                post_token.append(self._token_ids.setdefault(token, len(self._token_ids)))
+                post_kw.append(kw_id)
+        post_token = np.asarray(post_token, dtype=np.int64)
+        post_kw = np.asarray(post_kw, dtype=np.int64)
+        order = np.lexsort((post_kw, self._kw_len[post_kw], post_token))
+        self._post_kw = post_kw[order]
+        # Sorted (token, length) keys for windowed lookups via searchsorted
+        self._len_span = int(self._kw_len.max()) + 2 if len(self._kw_len) else 2
+        self._post_key = post_token[order] * self._len_span + self._kw_len[self._post_kw]
+
+    def _char_counts(self, texts) -> np.ndarray:
+        """Per-text character counts over the keyword alphabet (len(texts) x alphabet)."""
+        width = max(len(self._alphabet), 1)
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+        lookup = np.full(int(codes.max()) + 1 if len(codes) else 1, -1, dtype=np.int64)
+        for c, j in self._alphabet.items():
+            if ord(c) < len(lookup):
+                lookup[ord(c)] = j
+        cols = lookup[codes]
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        known = cols >= 0
+        flat = np.bincount(rows[known] * width + cols[known], minlength=len(texts) * width)
+        return flat.reshape(len(texts), width).astype(np.uint8 if flat.max(initial=0) < 256 else np.int32)
+
+    def _length_window(self, lengths: np.ndarray, threshold: float):
+        """Keyword length range [lo, hi] whose length bound can reach the threshold (conservative)."""
+        if threshold <= 0:
+            return np.zeros_like(lengths), np.full_like(lengths, self._len_span - 1)
+        t = min(threshold, 1.0)
+        lo = np.floor(lengths * t / (2.0 - t)).astype(np.int64) - 1
+        hi = np.ceil(lengths * (2.0 - t) / t).astype(np.int64) + 1
+        return np.clip(lo, 0, self._len_span - 1), np.clip(hi, 0, self._len_span - 1)
+
+    def _candidate_pairs(self, term_ids: np.ndarray, token_ids: np.ndarray, lengths: np.ndarray,
+                         threshold: float, first_term: int, n_terms: int):
+        """Unique (term, keyword) pairs sharing a token within the length window, sorted by (term, keyword)."""
+        lo, hi = self._length_window(lengths[term_ids], threshold)
+        start = np.searchsorted(self._post_key, token_ids * self._len_span + lo, side="left")
+        stop = np.searchsorted(self._post_key, token_ids * self._len_span + hi, side="right")
+        sizes = stop - start
+        total = int(sizes.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        offsets = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        pair_kw = self._post_kw[np.repeat(start, sizes) + offsets]
+        # Terms sharing several tokens with a keyword yield it more than once: dedupe on a bitmap
+        n_kw = len(self._keywords)
+        seen = np.zeros(n_terms * n_kw, dtype=bool)
+        seen[(np.repeat(term_ids, sizes) - first_term) * n_kw + pair_kw] = True
+        cells = np.flatnonzero(seen)
+        return cells // n_kw + first_term, cells % n_kw
+
+    def find_matches(self, terms: Iterable, threshold: float = 0.90) -> List[Tuple[Optional[str], float]]:
+        """Batch find_match: one (match, score) per term, in input order."""
+        norm = [self.normalize_text(str(t)) for t in terms]
+        if not norm:
+            return []
+
+        # Score each distinct normalized term once
+        codes, uniques = pd.factorize(pd.Series(norm, dtype=object))
+        unique_results = [(None, 0.0)] * len(uniques)
+        pending = []
+        for i, text in enumerate(uniques):
+            if not text:
+                continue
+            if text in self.exact_keywords:
+                unique_results[i] = (text, 1.0)
+            else:
+                pending.append(i)
+
+        if pending and len(self._keywords):
+            pending_terms = [uniques[i] for i in pending]
+            term_len = np.fromiter((len(t) for t in pending_terms), dtype=np.int64, count=len(pending_terms))
+            term_counts = self._char_counts(pending_terms)
+
+            # (term, token) rows for tokens present in the keyword index, in term order
+            tt_term, tt_token = [], []
+            for t_idx, text in enumerate(pending_terms):
+                for token in set(text.split()):
+                    token_id = self._token_ids.get(token)
+                    if token_id is not None:
+                        tt_term.append(t_idx)
+                        tt_token.append(token_id)
+            tt_term = np.asarray(tt_term, dtype=np.int64)
+            tt_token = np.asarray(tt_token, dtype=np.int64)
+
+            # Terms per chunk keep the dedupe bitmap (terms x keywords) bounded
+            chunk = max(1, self.PAIR_CHUNK // len(self._keywords))
+            for first in range(0, len(pending_terms), chunk):
+                last = min(first + chunk, len(pending_terms))
+                rows = slice(*np.searchsorted(tt_term, [first, last]))
+                pair_term, pair_kw = self._candidate_pairs(tt_term[rows], tt_token[rows], term_len,
+                                                           threshold, first, last - first)
+                if not len(pair_term):
+                    continue
+                total = term_len[pair_term] + self._kw_len[pair_kw]
+                shared = np.minimum(term_counts[pair_term], self._kw_counts[pair_kw]).sum(axis=1, dtype=np.int64)
+                bound = 2.0 * shared / total
+                keep = bound >= threshold
+                pair_term, pair_kw, bound = pair_term[keep], pair_kw[keep], bound[keep]
+                if not len(pair_term):
+                    continue
+
+                # Per term: best bound first, ties by keyword order
+                order = np.lexsort((pair_kw, -bound, pair_term))
+                pair_term, pair_kw, bound = pair_term[order], pair_kw[order], bound[order]
+                splits = np.flatnonzero(np.diff(pair_term)) + 1
+                for p_term, p_kw, p_bound in zip(np.split(pair_term, splits), np.split(pair_kw, splits),
+                                                 np.split(bound, splits)):
+                    unique_results[pending[p_term[0]]] = self._best_match(
+                        pending_terms[p_term[0]], p_kw, p_bound, threshold)
+
+        return [unique_results[code] for code in codes]
+
+    def _best_match(self, norm_term: str, kw_ids: np.ndarray, bounds: np.ndarray, threshold: float):
+        """
+        Exact ratio() over candidates ordered by descending upper bound, stopping once none can
+        win or tie. kw_ids index the sorted keywords, so the smallest id is the lexicographic tie-break.
+        """
         best_match = None
+        best_id = -1
         best_score = 0.0
-        for cand in candidates:
-            score = difflib.SequenceMatcher(None, norm_term, cand).ratio()
-            if score > best_score:
+        # Same argument order as SequenceMatcher(None, norm_term, cand): ratio() is not symmetric
+        matcher = difflib.SequenceMatcher(None)
+        matcher.set_seq1(norm_term)
+        for kw_id, bound in zip(kw_ids.tolist(), bounds.tolist()):
+            # Same 2*M/T arithmetic as ratio(), so a bound equal to best_score is an exact tie
+            if bound < best_score:
+                break
+            cand = self._keywords[kw_id]
+            matcher.set_seq2(cand)
+            score = matcher.ratio()
+            if score > best_score or (score == best_score and kw_id < best_id):
                 best_score = score
                 best_match = cand
-        
+                best_id = kw_id
+
         if best_score >= threshold: return best_match, best_score
         return None, 0.0
+
+    def find_match(self, term: str, threshold: float = 0.90) -> tuple[str | None, float]:
+        return self.find_matches([term], threshold)[0]